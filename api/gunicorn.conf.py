@@ -9,6 +9,7 @@ from prometheus_flask_exporter.multiprocess import GunicornPrometheusMetrics
 
 from pcapi.flask_app import app
 from pcapi.models import db
+from pcapi.tasks import cloud_task
 from pcapi.utils import kubernetes as kubernetes_utils
 
 
@@ -98,6 +99,12 @@ def post_fork(server, worker):
         worker.available_threads.set(worker.cfg.settings["threads"].value)
 
 
+def worker_exit(server, worker):
+    """Called when a Gunicorn worker has exited."""
+    # Create cloud tasks that are still buffered, if any.
+    cloud_task.shutdown_enqueuer()
+
+
 def pre_request(worker, req):
     gunicorn.config.PreRequest.default(worker, req)
     if ENABLE_FLASK_PROMETHEUS_EXPORTER:
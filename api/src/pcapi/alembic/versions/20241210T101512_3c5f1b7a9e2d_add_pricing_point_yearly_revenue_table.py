@@ -0,0 +1,30 @@
+"""Add PricingPointYearlyRevenue table
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# pre/post deployment: pre
+# revision identifiers, used by Alembic.
+revision = "3c5f1b7a9e2d"
+down_revision = "741084b8cec2"
+branch_labels: tuple[str] | None = None
+depends_on: list[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "pricing_point_yearly_revenue",
+        sa.Column("id", sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column("pricingPointId", sa.BigInteger(), nullable=False),
+        sa.Column("year", sa.Integer(), nullable=False),
+        sa.Column("revenue", sa.BigInteger(), nullable=False),
+        sa.ForeignKeyConstraint(["pricingPointId"], ["venue.id"]),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("pricingPointId", "year", name="unique_pricing_point_year"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("pricing_point_yearly_revenue")
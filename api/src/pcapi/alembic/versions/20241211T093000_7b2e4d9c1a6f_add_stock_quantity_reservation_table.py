@@ -0,0 +1,32 @@
+"""
+Add stock quantity reservation table
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# pre/post deployment: pre
+# revision identifiers, used by Alembic.
+revision = "7b2e4d9c1a6f"
+down_revision = "3c5f1b7a9e2d"
+branch_labels: tuple[str] | None = None
+depends_on: list[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "stock_quantity_reservation",
+        sa.Column("id", sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column("stockId", sa.BigInteger(), nullable=False),
+        sa.Column("quantity", sa.Integer(), nullable=False),
+        sa.Column("dateCreated", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(["stockId"], ["stock.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(op.f("ix_stock_quantity_reservation_stockId"), "stock_quantity_reservation", ["stockId"])
+    op.create_index(op.f("ix_stock_quantity_reservation_dateCreated"), "stock_quantity_reservation", ["dateCreated"])
+
+
+def downgrade() -> None:
+    op.drop_table("stock_quantity_reservation")
@@ -1,3 +1,4 @@
 from .backend import BaseBackend
 from .backend import get_backend
+from .backend import reset_backends
 from .testing_backend import TestingBackend
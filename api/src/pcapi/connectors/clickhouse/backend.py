@@ -1,4 +1,6 @@
 import logging
+import os
+import threading
 import typing
 
 from sqlalchemy import create_engine
@@ -13,14 +15,33 @@ from pcapi.utils.module_loading import import_string
 logger = logging.getLogger(__name__)
 
 
+# Backends are instantiated once per process, so that all queries share
+# the same engine and connection pool. The pid is part of the key: a
+# connection must not be shared with forked processes.
+_backends: dict[tuple[int, str], "BaseBackend"] = {}
+_backends_lock = threading.Lock()
+
+
 def get_backend() -> "BaseBackend":
-    backend_class = import_string(settings.CLICKHOUSE_BACKEND)
-    return backend_class()
+    key = (os.getpid(), settings.CLICKHOUSE_BACKEND)
+    backend = _backends.get(key)
+    if backend is None:
+        with _backends_lock:
+            backend = _backends.get(key)
+            if backend is None:
+                backend_class = import_string(settings.CLICKHOUSE_BACKEND)
+                backend = _backends[key] = backend_class()
+    return backend
+
+
+def reset_backends() -> None:
+    _backends.clear()
 
 
 class BaseBackend:
     def __init__(self) -> None:
         self._engine: engine.Engine | None = None
+        self._engine_lock = threading.Lock()
 
     def _get_engine(self) -> engine.Engine:
         raise NotImplementedError
@@ -28,7 +49,9 @@ class BaseBackend:
     @property
     def engine(self) -> engine.Engine:
         if not self._engine:
-            self._engine = self._get_engine()
+            with self._engine_lock:
+                if not self._engine:
+                    self._engine = self._get_engine()
         return self._engine
 
     def run_query(self, query: str, params: typing.Tuple) -> list:
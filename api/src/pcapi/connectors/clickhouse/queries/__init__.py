@@ -1,3 +1,4 @@
+from .base import execute_concurrently
 from .total_revenue import TotalAggregatedRevenueModel
 from .total_revenue import TotalAggregatedRevenueQuery
 from .yearly_revenue import YearlyAggregatedCollectiveRevenueQuery
@@ -1,13 +1,25 @@
 from collections.abc import Mapping
+from collections.abc import Sequence
+from concurrent import futures
+import hashlib
+import logging
+import time
 import typing
 
+from flask import current_app
 import pydantic.v1 as pydantic_v1
+import redis
 
+from pcapi import settings
 import pcapi.connectors.clickhouse as clickhouse_connector
 
 
+logger = logging.getLogger(__name__)
+
 ModelType = typing.TypeVar("ModelType", bound=pydantic_v1.BaseModel)
 
+CACHE_KEY_PREFIX = "api:clickhouse:query"
+
 
 class BaseQuery(typing.Generic[ModelType]):
     def __init__(self) -> None:
@@ -27,7 +39,75 @@ class BaseQuery(typing.Generic[ModelType]):
     def model(self) -> type[ModelType]:
         raise NotImplementedError()
 
-    def execute(self, params: typing.Tuple) -> ModelType:
+    def _get_cache_key(self, params: typing.Tuple) -> str:
+        # Venue ids may be given in any order, and there may be a lot of
+        # them: the key is built from a digest of the sorted ids.
+        venue_ids = ",".join(str(venue_id) for venue_id in sorted(set(params)))
+        digest = hashlib.sha256(venue_ids.encode()).hexdigest()
+        return f"{CACHE_KEY_PREFIX}:{type(self).__name__}:{digest}"
+
+    def _get_cached(self, cache_key: str) -> str | None:
+        try:
+            return current_app.redis_client.get(cache_key)
+        except redis.exceptions.RedisError:
+            logger.exception("Could not get cached result of Clickhouse query", extra={"cache_key": cache_key})
+            return None
+
+    def _set_cached(self, cache_key: str, result: ModelType, ttl: int) -> None:
+        try:
+            current_app.redis_client.set(cache_key, result.json(by_alias=True), ex=ttl)
+        except redis.exceptions.RedisError:
+            logger.exception("Could not cache result of Clickhouse query", extra={"cache_key": cache_key})
+
+    def _execute(self, params: typing.Tuple) -> ModelType:
         rows = self._get_rows(params)
         results = self._format_result(rows)
         return self.model(**typing.cast(Mapping, results))
+
+    def execute(self, params: typing.Tuple) -> ModelType:
+        """Run the query for the given venue ids.
+
+        Results are cached in Redis for ``CLICKHOUSE_QUERY_CACHE_TTL``
+        seconds, since the underlying tables are only refreshed daily.
+        The query is run without caching if Redis is unavailable.
+        """
+        start = time.perf_counter()
+        ttl = settings.CLICKHOUSE_QUERY_CACHE_TTL
+        cache_key = self._get_cache_key(params) if ttl > 0 else None
+        cached = cache_key and self._get_cached(cache_key)
+        if cached:
+            result = self.model.parse_raw(cached)
+        else:
+            result = self._execute(params)
+            if cache_key:
+                self._set_cached(cache_key, result, ttl)
+        logger.info(
+            "Executed Clickhouse query",
+            extra={
+                "query": type(self).__name__,
+                "venues_count": len(params),
+                "cached": bool(cached),
+                "duration": time.perf_counter() - start,
+            },
+        )
+        return result
+
+
+def execute_concurrently(queries: Sequence[tuple[BaseQuery, typing.Tuple]]) -> list[pydantic_v1.BaseModel]:
+    """Execute ``(query, params)`` pairs concurrently, and return their
+    results in the same order.
+
+    The first error raised by a query is raised once all queries are done.
+    """
+    if len(queries) <= 1:
+        return [query.execute(params) for query, params in queries]
+
+    app = current_app._get_current_object()  # type: ignore[attr-defined]
+
+    def execute(query: BaseQuery, params: typing.Tuple) -> pydantic_v1.BaseModel:
+        with app.app_context():
+            return query.execute(params)
+
+    with futures.ThreadPoolExecutor(max_workers=len(queries)) as executor:
+        results = [executor.submit(execute, query, params) for query, params in queries]
+    return [result.result() for result in results]
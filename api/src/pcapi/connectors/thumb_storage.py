@@ -1,3 +1,12 @@
+from concurrent import futures
+import contextlib
+import hashlib
+import logging
+import threading
+import time
+import typing
+import uuid
+
 from pcapi import settings
 from pcapi.core import object_storage
 from pcapi.models.has_thumb_mixin import HasThumbMixin
@@ -7,6 +16,9 @@ from pcapi.utils.image_conversion import process_original_image
 from pcapi.utils.image_conversion import standardize_image
 
 
+logger = logging.getLogger(__name__)
+
+
 def create_thumb(
     model_with_thumb: HasThumbMixin,
     image_as_bytes: bytes,
@@ -17,20 +29,140 @@ def create_thumb(
     keep_ratio: bool = False,
     object_id: str | None = None,
 ) -> None:
-    if keep_ratio:
-        image_as_bytes = process_original_image(image_as_bytes)
-    else:
-        image_as_bytes = standardize_image(image_as_bytes, ratio=ratio, crop_params=crop_params)
+    image_as_bytes = process_thumb(image_as_bytes, crop_params=crop_params, ratio=ratio, keep_ratio=keep_ratio)
     if object_id is None:
         model_with_thumb.thumbCount += 1
+    store_thumb(
+        model_with_thumb.get_thumb_storage_id(storage_id_suffix_str) if object_id is None else object_id,
+        image_as_bytes,
+    )
+
+
+def process_thumb(
+    image_as_bytes: bytes,
+    *,
+    crop_params: CropParams | None = None,
+    ratio: ImageRatio = ImageRatio.PORTRAIT,
+    keep_ratio: bool = False,
+) -> bytes:
+    if keep_ratio:
+        return process_original_image(image_as_bytes)
+    return standardize_image(image_as_bytes, ratio=ratio, crop_params=crop_params)
+
+
+def store_thumb(object_id: str, image_as_bytes: bytes) -> None:
     object_storage.store_public_object(
         folder=settings.THUMBS_FOLDER_NAME,
-        object_id=model_with_thumb.get_thumb_storage_id(storage_id_suffix_str) if object_id is None else object_id,
+        object_id=object_id,
         blob=image_as_bytes,
         content_type="image/jpeg",
     )
 
 
+def get_content_object_id(key: str, image_as_bytes: bytes) -> str:
+    """Return a storage id that only depends on ``key`` (e.g. the id of
+    a product and the type of image) and on the content of the image,
+    so that an unchanged image can be detected before being processed
+    and stored again.
+    """
+    digest = hashlib.blake2b(key.encode() + b"|" + image_as_bytes, digest_size=16).digest()
+    return str(uuid.UUID(bytes=digest))
+
+
+class ThumbPipeline:
+    """Run thumb jobs (download, processing, storage) in a bounded pool
+    of threads, so that a synchronization can go on writing in the
+    database while images are handled.
+
+    Jobs must not use the database session, which is not thread-safe.
+    They time their stages with `stage()`. At most ``max_pending`` jobs
+    are pending: `submit()` blocks until one of them is done.
+
+    Usage:
+
+        with ThumbPipeline("Titelive") as pipeline:
+            for item in items:
+                for result in pipeline.submit(download_and_store, item):
+                    save(result)
+            for result in pipeline.join():
+                save(result)
+    """
+
+    stages = ("download", "process", "store")
+
+    def __init__(self, name: str, workers: int | None = None, max_pending: int | None = None) -> None:
+        self.name = name
+        workers = workers or settings.THUMBS_PIPELINE_WORKERS
+        self.max_pending = max_pending or 2 * workers
+        self.counts = dict.fromkeys(self.stages, 0)
+        self.durations = dict.fromkeys(self.stages, 0.0)
+        self.unchanged = 0
+        self.backpressure_wait = 0.0
+        self._executor = futures.ThreadPoolExecutor(max_workers=workers, thread_name_prefix="thumbs")
+        self._pending: set[futures.Future] = set()
+        self._lock = threading.Lock()
+        self._start = time.perf_counter()
+
+    def __enter__(self) -> "ThumbPipeline":
+        return self
+
+    def __exit__(self, *args: typing.Any) -> None:
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        self.log_stats()
+
+    @contextlib.contextmanager
+    def stage(self, name: str) -> typing.Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.counts[name] += 1
+                self.durations[name] += time.perf_counter() - start
+
+    def mark_unchanged(self) -> None:
+        with self._lock:
+            self.unchanged += 1
+
+    def submit(self, func: typing.Callable, *args: typing.Any, **kwargs: typing.Any) -> list[typing.Any]:
+        """Submit a job, and return the results of jobs that are done."""
+        if len(self._pending) >= self.max_pending:
+            start = time.perf_counter()
+            done, self._pending = futures.wait(self._pending, return_when=futures.FIRST_COMPLETED)
+            self.backpressure_wait += time.perf_counter() - start
+        else:
+            done = {future for future in self._pending if future.done()}
+            self._pending -= done
+        self._pending.add(self._executor.submit(func, *args, **kwargs))
+        return [future.result() for future in done]
+
+    def join(self) -> list[typing.Any]:
+        """Wait for all pending jobs, and return their results."""
+        done = futures.wait(self._pending).done
+        self._pending = set()
+        return [future.result() for future in done]
+
+    def log_stats(self) -> None:
+        elapsed = time.perf_counter() - self._start
+        logger.info(
+            "Handled thumbs through pipeline",
+            extra={
+                "pipeline": self.name,
+                "elapsed": round(elapsed, 3),
+                "unchanged": self.unchanged,
+                "backpressure_wait": round(self.backpressure_wait, 3),
+                "stages": {
+                    stage: {
+                        "count": self.counts[stage],
+                        "busy_time": round(self.durations[stage], 3),
+                        "per_second": round(self.counts[stage] / elapsed, 2) if elapsed else None,
+                    }
+                    for stage in self.stages
+                },
+            },
+        )
+
+
 def remove_thumb(
     model_with_thumb: HasThumbMixin,
     storage_id_suffix: str,
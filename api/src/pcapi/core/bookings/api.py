@@ -17,6 +17,7 @@ from pcapi.core.bookings.models import BookingCancellationReasons
 from pcapi.core.bookings.models import BookingStatus
 from pcapi.core.bookings.models import BookingValidationAuthorType
 from pcapi.core.bookings.models import ExternalBooking
+from pcapi.core.bookings.models import StockQuantityReservation
 from pcapi.core.bookings.repository import generate_booking_token
 from pcapi.core.educational import utils as educational_utils
 from pcapi.core.educational.models import CollectiveBooking
@@ -260,35 +261,165 @@ def _book_offer(
 
         if is_cinema_external_ticket_applicable:
             offers_validation.check_offer_is_from_current_cinema_provider(stock.offer)
+
+        is_booked_outside_lock = (
+            (is_cinema_external_ticket_applicable or stock.offer.isEventLinkedToTicketingService)
+            and not is_activation_code_applicable
+            and FeatureToggle.WIP_BOOK_EXTERNAL_TICKETS_OUTSIDE_STOCK_LOCK.is_active()
+        )
+        if is_booked_outside_lock:
+            # Only reserve the quantity here, and release locks before
+            # calling the external ticketing service, which may be slow
+            # (see `_book_external_ticket_outside_lock()`).
+            stock.dnBookedQuantity += booking.quantity
+            reservation = StockQuantityReservation(stockId=stock.id, quantity=booking.quantity)
+            db.session.add_all((stock, reservation))
+        else:
+            if is_cinema_external_ticket_applicable:
+                _book_cinema_external_ticket(booking, stock, beneficiary)
+
+            if stock.offer.isEventLinkedToTicketingService:
+                remaining_quantity = _book_event_external_ticket(booking, stock, beneficiary)
+                if remaining_quantity is None:
+                    stock.quantity = None
+                else:
+                    stock.quantity = stock.dnBookedQuantity + remaining_quantity + booking.quantity
+
+            stock.dnBookedQuantity += booking.quantity
+            _save_booking(booking, stock)
+
+    if is_booked_outside_lock:
+        _book_external_ticket_outside_lock(booking, reservation, beneficiary, is_cinema_external_ticket_applicable)
+    return booking
+
+
+def _save_booking(booking: Booking, stock: Stock) -> None:
+    logger.info(
+        "Updating dnBookedQuantity after a successful booking",
+        extra={
+            "booking_id": booking.id,
+            "booking_quantity": booking.quantity,
+            "stock_dnBookedQuantity": stock.dnBookedQuantity,
+        },
+    )
+
+    db.session.add_all((booking, stock))
+    db.session.flush()  # to setup relations on `booking` for `add_event()` below.
+
+    if booking.status == BookingStatus.USED:
+        finance_api.add_event(
+            finance_models.FinanceEventMotive.BOOKING_USED,
+            booking=booking,
+        )
+
+
+def _book_external_ticket_outside_lock(
+    booking: Booking,
+    reservation: StockQuantityReservation,
+    beneficiary: User,
+    is_cinema_external_ticket_applicable: bool,
+) -> None:
+    """Book the external ticket of a booking whose quantity has
+    already been reserved on the stock, and save the booking.
+
+    The external ticketing service is called without any lock on the
+    stock or the user, so that concurrent bookings of the same stock
+    do not wait for it. The booking is then saved under a short lock.
+    If anything fails, the reserved quantity is released, or later by
+    `release_stale_stock_quantity_reservations()` if the process is
+    killed meanwhile. Tickets that have been booked but not saved are
+    cancelled later by `cancel_unstored_external_bookings()`.
+    """
+    stock_id = reservation.stockId
+    reservation_id = reservation.id
+    try:
+        stock = offers_models.Stock.query.filter_by(id=stock_id).one()
+        if is_cinema_external_ticket_applicable:
             _book_cinema_external_ticket(booking, stock, beneficiary)
 
+        remaining_quantity = None
         if stock.offer.isEventLinkedToTicketingService:
             remaining_quantity = _book_event_external_ticket(booking, stock, beneficiary)
-            if remaining_quantity is None:
-                stock.quantity = None
-            else:
-                stock.quantity = stock.dnBookedQuantity + remaining_quantity + booking.quantity
 
-        stock.dnBookedQuantity += booking.quantity
+        with transaction():
+            stock = offers_repository.get_and_lock_stock(stock_id=stock_id)
+            get_and_lock_user(beneficiary.id)
+            # The user may have booked something else while locks were
+            # released. The quantity of the stock has been checked and
+            # reserved already.
+            validation.check_offer_already_booked(beneficiary, stock.offer)
+            validation.check_expenses_limits(beneficiary, booking.quantity * booking.amount, stock.offer)
+
+            if not StockQuantityReservation.query.filter_by(id=reservation_id).delete(synchronize_session=False):
+                # The reservation has been released as stale meanwhile,
+                # but the ticket has been booked: reserve it again.
+                stock.dnBookedQuantity += booking.quantity
+                logger.warning(
+                    "Reserved quantity of a booking was released before the booking was saved",
+                    extra={"stock_id": stock_id, "quantity": booking.quantity},
+                )
 
-        logger.info(
-            "Updating dnBookedQuantity after a successful booking",
-            extra={
-                "booking_id": booking.id,
-                "booking_quantity": booking.quantity,
-                "stock_dnBookedQuantity": stock.dnBookedQuantity,
-            },
-        )
+            if stock.offer.isEventLinkedToTicketingService:
+                if remaining_quantity is None:
+                    stock.quantity = None
+                else:
+                    # `dnBookedQuantity` includes this booking, but also
+                    # quantities reserved by concurrent bookings that are
+                    # not saved yet, which the ticketing service still
+                    # counts in its remaining quantity.
+                    stock.quantity = stock.dnBookedQuantity - _get_reserved_quantity(stock_id) + remaining_quantity
+
+            _save_booking(booking, stock)
+    except Exception:
+        _release_reserved_quantity(reservation_id)
+        raise
 
-        db.session.add_all((booking, stock))
-        db.session.flush()  # to setup relations on `booking` for `add_event()` below.
 
-        if booking.status == BookingStatus.USED:
-            finance_api.add_event(
-                finance_models.FinanceEventMotive.BOOKING_USED,
-                booking=booking,
-            )
-    return booking
+def _get_reserved_quantity(stock_id: int) -> int:
+    return (
+        db.session.query(sa.func.coalesce(sa.func.sum(StockQuantityReservation.quantity), 0))
+        .filter(StockQuantityReservation.stockId == stock_id)
+        .scalar()
+    )
+
+
+def _release_reserved_quantity(reservation_id: int) -> None:
+    """Delete a reservation and subtract its quantity from the
+    `dnBookedQuantity` of its stock, unless it has already been released.
+    """
+    reservation = StockQuantityReservation.query.filter_by(id=reservation_id).one_or_none()
+    if not reservation:
+        return
+    stock_id, quantity = reservation.stockId, reservation.quantity
+    with transaction():
+        # Lock the stock before the reservation, as when the booking is saved.
+        stock = offers_repository.get_and_lock_stock(stock_id=stock_id)
+        if not StockQuantityReservation.query.filter_by(id=reservation_id).delete(synchronize_session=False):
+            return
+        stock.dnBookedQuantity -= quantity
+        db.session.add(stock)
+    logger.info(
+        "Released reserved quantity of a booking that failed",
+        extra={"stock_id": stock_id, "quantity": quantity},
+    )
+
+
+def release_stale_stock_quantity_reservations() -> None:
+    """Release quantities reserved for bookings that have not been saved
+    nor failed in time, e.g. because the worker was killed while it was
+    waiting for the external ticketing service.
+    """
+    stale_reservation_ids = [
+        reservation_id
+        for reservation_id, in StockQuantityReservation.query.filter(
+            StockQuantityReservation.dateCreated
+            < datetime.datetime.utcnow() - constants.STOCK_QUANTITY_RESERVATION_TIMEOUT
+        ).with_entities(StockQuantityReservation.id)
+    ]
+    for reservation_id in stale_reservation_ids:
+        _release_reserved_quantity(reservation_id)
+    if stale_reservation_ids:
+        logger.warning("Released stale reserved quantities of stocks", extra={"count": len(stale_reservation_ids)})
 
 
 def book_offer(
@@ -980,6 +1111,95 @@ def recompute_dnBookedQuantity(stock_ids: list[int]) -> None:
     db.session.execute(sa.text(query), {"stock_ids": tuple(stock_ids)})
 
 
+def _mark_as_used_by_chunks(
+    model: type[Booking] | type[CollectiveBooking],
+    conditions: typing.Sequence[sa.sql.ColumnElement],
+    values: dict,
+    returning: typing.Sequence[sa.sql.ColumnElement],
+) -> typing.Iterator[list[sa.engine.Row]]:
+    """Update bookings that match ``conditions`` by chunks of
+    ``AUTO_USE_AFTER_EVENT_CHUNK_SIZE`` bookings, ordered by id, and
+    yield the ``returning`` columns of updated bookings of each chunk.
+    """
+    last_id = 0
+    while True:
+        ids = [
+            booking_id
+            for booking_id, in db.session.execute(
+                sa.select(model.id)
+                .where(*conditions, model.id > last_id)
+                .order_by(model.id)
+                .limit(constants.AUTO_USE_AFTER_EVENT_CHUNK_SIZE)
+            )
+        ]
+        if not ids:
+            return
+        last_id = ids[-1]
+        # Conditions are checked again, in case a booking has been
+        # updated from another channel in the meantime.
+        yield db.session.execute(
+            sa.update(model).where(model.id.in_(ids), *conditions).values(**values).returning(*returning),
+            execution_options={"synchronize_session": False},
+        ).all()
+
+
+def _auto_mark_as_used_after_event_by_chunks(now: datetime.datetime, threshold: datetime.datetime) -> tuple[int, int]:
+    """Mark bookings as used and add their finance events by chunks,
+    with a commit after each chunk, so that no ORM object is loaded.
+
+    Return the number of updated individual and collective bookings.
+    """
+    n_individual_bookings_updated = 0
+    for rows in _mark_as_used_by_chunks(
+        Booking,
+        conditions=(
+            Booking.status == BookingStatus.CONFIRMED,
+            Booking.stockId == offers_models.Stock.id,
+            offers_models.Stock.beginningDatetime < threshold,
+        ),
+        values={
+            "dateUsed": now,
+            "status": BookingStatus.USED,
+            "validationAuthorType": BookingValidationAuthorType.AUTO,
+        },
+        returning=(Booking.id, Booking.venueId, offers_models.Stock.beginningDatetime),
+    ):
+        finance_api.add_used_events([tuple(row) for row in rows], date_used=now)
+        db.session.commit()
+        n_individual_bookings_updated += len(rows)
+
+    n_collective_bookings_updated = 0
+    for rows in _mark_as_used_by_chunks(
+        CollectiveBooking,
+        conditions=(
+            CollectiveBooking.status == CollectiveBookingStatus.CONFIRMED,
+            CollectiveBooking.collectiveStockId == CollectiveStock.id,
+            CollectiveStock.endDatetime < threshold,
+        ),
+        values={"dateUsed": now, "status": CollectiveBookingStatus.USED},
+        returning=(
+            CollectiveBooking.id,
+            CollectiveBooking.venueId,
+            CollectiveStock.endDatetime,
+            CollectiveBooking.collectiveStockId,
+        ),
+    ):
+        finance_api.add_used_events(
+            [(row.id, row.venueId, row.endDatetime) for row in rows], date_used=now, collective=True
+        )
+        db.session.commit()
+        n_collective_bookings_updated += len(rows)
+        for row in rows:
+            educational_utils.log_information_for_data_purpose(
+                event_name="BookingUsed",
+                extra_data={"bookingId": row.id, "stockId": row.collectiveStockId},
+                uai=None,
+                user_role=None,
+            )
+
+    return n_individual_bookings_updated, n_collective_bookings_updated
+
+
 def auto_mark_as_used_after_event() -> None:
     """Automatically mark as used bookings that correspond to events that
     have happened (with a delay).
@@ -990,6 +1210,20 @@ def auto_mark_as_used_after_event() -> None:
     now = datetime.datetime.utcnow()
     threshold = now - constants.AUTO_USE_AFTER_EVENT_TIME_DELAY
 
+    if FeatureToggle.WIP_CHUNKED_AUTO_MARK_AS_USED.is_active():
+        n_individual_bookings_updated, n_collective_bookings_updated = _auto_mark_as_used_after_event_by_chunks(
+            now, threshold
+        )
+        logger.info(
+            "Automatically marked bookings as used after event",
+            extra={
+                "dateUsed": now,
+                "individualBookingsUpdatedCount": n_individual_bookings_updated,
+                "collectiveBookingsUpdatedCount": n_collective_bookings_updated,
+            },
+        )
+        return
+
     # Revisit with SQLAlchemy 2.
     #
     # I tried to update and select bookings in a single query, like this:
@@ -20,8 +20,11 @@ BOOKS_BOOKINGS_AUTO_EXPIRY_DELAY = datetime.timedelta(days=10)
 BOOKINGS_EXPIRY_NOTIFICATION_DELAY = datetime.timedelta(days=7)
 BOOKS_BOOKINGS_EXPIRY_NOTIFICATION_DELAY = datetime.timedelta(days=5)
 AUTO_USE_AFTER_EVENT_TIME_DELAY = datetime.timedelta(hours=48)
+AUTO_USE_AFTER_EVENT_CHUNK_SIZE = 1000
 REDIS_EXTERNAL_BOOKINGS_NAME = "api:external_bookings:barcodes"
 EXTERNAL_BOOKINGS_MINIMUM_ITEM_AGE_IN_QUEUE = 60
+# Longer than any call to an external ticketing service.
+STOCK_QUANTITY_RESERVATION_TIMEOUT = datetime.timedelta(minutes=15)
 ONE_SIDE_BOOKINGS_CANCELLATION_PROVIDERS = {"CDSStocks", "CGRStocks", "EMSStocks"}
 
 
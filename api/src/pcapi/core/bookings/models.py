@@ -120,6 +120,21 @@ class ExternalBooking(PcObject, Base, Model):
     additional_information: dict | None = Column(postgresql.JSONB)
 
 
+class StockQuantityReservation(PcObject, Base, Model):
+    """A quantity that has been added to the `dnBookedQuantity` of a
+    stock for a booking that is not saved yet, while its external
+    ticket is being booked (see `api._book_external_ticket_outside_lock()`).
+
+    It is deleted when the booking is saved or when the quantity is
+    released. Stale reservations, e.g. of a worker that has been killed,
+    are released by `api.release_stale_stock_quantity_reservations()`.
+    """
+
+    stockId: int = Column(BigInteger, ForeignKey("stock.id", ondelete="CASCADE"), index=True, nullable=False)
+    quantity: int = Column(Integer, nullable=False)
+    dateCreated: datetime = Column(DateTime, nullable=False, default=datetime.utcnow, index=True)
+
+
 class Booking(PcObject, Base, Model):
     __tablename__ = "booking"
 
@@ -1,3 +1,4 @@
+import codecs
 import csv
 from datetime import date
 from datetime import datetime
@@ -6,6 +7,7 @@ from datetime import timedelta
 from io import BytesIO
 from io import StringIO
 from operator import and_
+import tempfile
 import typing
 
 from flask_sqlalchemy import BaseQuery
@@ -32,7 +34,7 @@ from pcapi.core.bookings.models import BookingExportType
 from pcapi.core.bookings.models import BookingStatus
 from pcapi.core.bookings.models import BookingStatusFilter
 from pcapi.core.bookings.models import ExternalBooking
-from pcapi.core.bookings.utils import convert_booking_dates_utc_to_venue_timezone
+from pcapi.core.bookings.utils import BookingDatesConverter
 from pcapi.core.categories import subcategories_v2 as subcategories
 from pcapi.core.finance.models import BookingFinanceIncident
 from pcapi.core.geography.models import Address
@@ -109,6 +111,19 @@ BOOKING_EXPORT_HEADER = [
     "Duo",
 ]
 
+# Indices of the columns of export rows (see `_get_export_row()`)
+# that are formatted differently in CSV and Excel exports.
+EXCEL_DATE_COLUMNS = {2, 8, 9, 14}
+EXCEL_AMOUNT_COLUMN = 12
+CSV_PRICE_CATEGORY_LABEL_COLUMN = 11
+CSV_POSTAL_CODE_COLUMN = 16
+# Streamed exports are sent by chunks of EXPORT_CHUNK_ROWS rows (CSV)
+# or EXPORT_CHUNK_SIZE bytes (Excel). Excel files are kept in memory up
+# to EXCEL_EXPORT_SPOOL_MAX_SIZE bytes, and written on disk beyond.
+EXPORT_CHUNK_ROWS = 1000
+EXPORT_CHUNK_SIZE = 64 * 1024
+EXCEL_EXPORT_SPOOL_MAX_SIZE = 5 * 1024 * 1024
+
 
 def booking_export_header() -> list[str]:
     if FeatureToggle.WIP_ENABLE_OFFER_ADDRESS.is_active():
@@ -361,16 +376,19 @@ def _create_export_query(offer_id: int, event_beginning_date: date) -> BaseQuery
     return query.distinct(Booking.id)
 
 
-def export_validated_bookings_by_offer_id(
-    offer_id: int, event_beginning_date: date, export_type: BookingExportType
-) -> str | bytes:
-    offer_validated_bookings_query = _create_export_query(offer_id, event_beginning_date)
-    offer_validated_bookings_query = offer_validated_bookings_query.filter(
+def _filter_validated_bookings(query: BaseQuery) -> BaseQuery:
+    return query.filter(
         or_(
             and_(Booking.isConfirmed, Booking.status != BookingStatus.CANCELLED),
             Booking.status == BookingStatus.USED,
         )
     )
+
+
+def export_validated_bookings_by_offer_id(
+    offer_id: int, event_beginning_date: date, export_type: BookingExportType
+) -> str | bytes:
+    offer_validated_bookings_query = _filter_validated_bookings(_create_export_query(offer_id, event_beginning_date))
     if export_type == BookingExportType.EXCEL:
         return _write_bookings_to_excel(offer_validated_bookings_query)
     return _write_bookings_to_csv(offer_validated_bookings_query)
@@ -385,6 +403,40 @@ def export_bookings_by_offer_id(
     return _write_bookings_to_csv(offer_bookings_query)
 
 
+def stream_bookings_by_offer_id(
+    offer_id: int, event_beginning_date: date, export_type: BookingExportType, *, validated_only: bool = False
+) -> typing.Iterator[bytes]:
+    """Same export as `export_bookings_by_offer_id()` (or
+    `export_validated_bookings_by_offer_id()`), as chunks of the file
+    that are generated while bookings are fetched.
+    """
+    query = _create_export_query(offer_id, event_beginning_date)
+    if validated_only:
+        query = _filter_validated_bookings(query)
+    rows = _iter_export_rows(query, split_duo_bookings=True)
+    return _stream_export(booking_export_header(), rows, export_type)
+
+
+def _get_export_query(
+    user: User,
+    *,
+    booking_period: tuple[date, date] | None,
+    status_filter: BookingStatusFilter | None,
+    event_date: date | None,
+    venue_id: int | None,
+    offer_id: int | None,
+) -> BaseQuery:
+    bookings_query = _get_filtered_booking_report(
+        pro_user=user,
+        period=booking_period,
+        status_filter=status_filter,
+        event_date=event_date,
+        venue_id=venue_id,
+        offer_id=offer_id,
+    )
+    return _duplicate_booking_when_quantity_is_two(bookings_query)
+
+
 def get_export(
     user: User,
     *,
@@ -395,20 +447,44 @@ def get_export(
     offer_id: int | None = None,
     export_type: BookingExportType | None = BookingExportType.CSV,
 ) -> str | bytes:
-    bookings_query = _get_filtered_booking_report(
-        pro_user=user,
-        period=booking_period,
+    bookings_query = _get_export_query(
+        user,
+        booking_period=booking_period,
         status_filter=status_filter,
         event_date=event_date,
         venue_id=venue_id,
         offer_id=offer_id,
     )
-    bookings_query = _duplicate_booking_when_quantity_is_two(bookings_query)
     if export_type == BookingExportType.EXCEL:
         return _serialize_excel_report(bookings_query)
     return _serialize_csv_report(bookings_query)
 
 
+def stream_export(
+    user: User,
+    *,
+    booking_period: tuple[date, date] | None = None,
+    status_filter: BookingStatusFilter | None = BookingStatusFilter.BOOKED,
+    event_date: date | None = None,
+    venue_id: int | None = None,
+    offer_id: int | None = None,
+    export_type: BookingExportType = BookingExportType.CSV,
+) -> typing.Iterator[bytes]:
+    """Same export as `get_export()`, as chunks of the file that are
+    generated while bookings are fetched.
+    """
+    bookings_query = _get_export_query(
+        user,
+        booking_period=booking_period,
+        status_filter=status_filter,
+        event_date=event_date,
+        venue_id=venue_id,
+        offer_id=offer_id,
+    )
+    rows = _iter_export_rows(bookings_query, split_duo_bookings=False)
+    return _stream_export(LEGACY_BOOKING_EXPORT_HEADER, rows, export_type)
+
+
 def field_to_venue_timezone(
     field: InstrumentedAttribute, column: sa.orm.Mapped[typing.Any] | sa.sql.functions.Function
 ) -> cast:
@@ -674,203 +750,132 @@ def _get_booking_status(status: BookingStatus, is_confirmed: bool) -> str:
     return BOOKING_STATUS_LABELS[status]
 
 
-def _write_bookings_to_csv(query: BaseQuery) -> str:
-    output = StringIO()
-    writer = csv.writer(output, dialect=csv.excel, delimiter=";", quoting=csv.QUOTE_NONNUMERIC)
-    writer.writerow(booking_export_header())
+def _iter_export_rows(query: BaseQuery, *, split_duo_bookings: bool) -> typing.Iterator[tuple]:
+    """Yield a row of the export for each booking, or two rows for duo
+    bookings if ``split_duo_bookings`` is set.
+    """
+    convert_date = BookingDatesConverter()
     for booking in query.yield_per(1000):
-        if booking.quantity == DUO_QUANTITY:
-            _write_csv_row(writer, booking, "DUO 1")
-            _write_csv_row(writer, booking, "DUO 2")
+        if not split_duo_bookings:
+            yield _get_export_row(booking, convert_date, "Oui" if booking.quantity == DUO_QUANTITY else "Non")
+        elif booking.quantity == DUO_QUANTITY:
+            yield _get_export_row(booking, convert_date, "DUO 1")
+            yield _get_export_row(booking, convert_date, "DUO 2")
         else:
-            _write_csv_row(writer, booking, "Non")
+            yield _get_export_row(booking, convert_date, "Non")
 
-    return output.getvalue()
 
-
-def _write_csv_row(csv_writer: typing.Any, booking: Booking, booking_duo_column: str) -> None:
-    csv_writer.writerow(
-        (
-            booking.venueName,
-            booking.offerName,
-            convert_booking_dates_utc_to_venue_timezone(booking.stockBeginningDatetime, booking),
-            booking.ean,
-            booking.beneficiaryFirstName,
-            booking.beneficiaryLastName,
-            booking.beneficiaryEmail,
-            booking.beneficiaryPhoneNumber,
-            convert_booking_dates_utc_to_venue_timezone(booking.bookedAt, booking),
-            convert_booking_dates_utc_to_venue_timezone(booking.usedAt, booking),
-            booking_recap_utils.get_booking_token(
-                booking.token,
-                booking.status,
-                booking.isExternal,
-                booking.stockBeginningDatetime,
-            ),
-            booking.priceCategoryLabel or "",
-            booking.amount,
-            _get_booking_status(booking.status, booking.isConfirmed),
-            convert_booking_dates_utc_to_venue_timezone(booking.reimbursedAt, booking),
-            serialize_offer_type_educational_or_individual(offer_is_educational=False),
-            booking.beneficiaryPostalCode or "",
-            booking_duo_column,
-        )
+def _get_export_row(booking: Booking, convert_date: BookingDatesConverter, duo_column: str) -> tuple:
+    return (
+        booking.venueName,
+        booking.offerName,
+        convert_date(booking.stockBeginningDatetime, booking),
+        booking.ean,
+        booking.beneficiaryFirstName,
+        booking.beneficiaryLastName,
+        booking.beneficiaryEmail,
+        booking.beneficiaryPhoneNumber,
+        convert_date(booking.bookedAt, booking),
+        convert_date(booking.usedAt, booking),
+        booking_recap_utils.get_booking_token(
+            booking.token,
+            booking.status,
+            booking.isExternal,
+            booking.stockBeginningDatetime,
+        ),
+        booking.priceCategoryLabel,
+        booking.amount,
+        _get_booking_status(booking.status, booking.isConfirmed),
+        convert_date(booking.reimbursedAt, booking),
+        # This method is still used in the old Payment model
+        serialize_offer_type_educational_or_individual(offer_is_educational=False),
+        booking.beneficiaryPostalCode,
+        duo_column,
     )
 
 
-def _write_bookings_to_excel(query: BaseQuery) -> bytes:
-    output = BytesIO()
-    workbook = xlsxwriter.Workbook(output)
+def _iter_csv_chunks(header: list[str], rows: typing.Iterable[tuple]) -> typing.Iterator[str]:
+    output = StringIO()
+    writer = csv.writer(output, dialect=csv.excel, delimiter=";", quoting=csv.QUOTE_NONNUMERIC)
+    writer.writerow(header)
+    for index, row in enumerate(rows, 1):
+        row = list(row)
+        row[CSV_PRICE_CATEGORY_LABEL_COLUMN] = row[CSV_PRICE_CATEGORY_LABEL_COLUMN] or ""
+        row[CSV_POSTAL_CODE_COLUMN] = row[CSV_POSTAL_CODE_COLUMN] or ""
+        writer.writerow(row)
+        if index % EXPORT_CHUNK_ROWS == 0:
+            yield output.getvalue()
+            output.seek(0)
+            output.truncate()
+    yield output.getvalue()
+
+
+def _write_excel(
+    output: typing.BinaryIO, header: list[str], rows: typing.Iterable[tuple], *, constant_memory: bool = False
+) -> None:
+    # In constant memory mode, each row is flushed to a temporary file
+    # once the next one is written.
+    workbook = xlsxwriter.Workbook(output, {"constant_memory": constant_memory})
 
     bold = workbook.add_format({"bold": 1})
     currency_format = workbook.add_format({"num_format": "###0.00[$€-fr-FR]"})
     col_width = 18
 
     worksheet = workbook.add_worksheet()
-    row = 0
-
-    for col_num, title in enumerate(booking_export_header()):
-        worksheet.write(row, col_num, title, bold)
+    for col_num, title in enumerate(header):
+        worksheet.write(0, col_num, title, bold)
         worksheet.set_column(col_num, col_num, col_width)
 
-    row = 1
-    for booking in query.yield_per(1000):
-        if booking.quantity == DUO_QUANTITY:
-            _write_excel_row(worksheet, row, booking, currency_format, "DUO 1")
-            row += 1
-            _write_excel_row(worksheet, row, booking, currency_format, "DUO 2")
-        else:
-            _write_excel_row(worksheet, row, booking, currency_format, "Non")
-        row += 1
+    for row_num, row in enumerate(rows, 1):
+        _write_excel_row(worksheet, row_num, row, currency_format)
     workbook.close()
-    return output.getvalue()
 
 
-def _write_excel_row(
-    worksheet: Worksheet, row: int, booking: Booking, currency_format: Format, duo_column: str
-) -> None:
-    worksheet.write(row, 0, booking.venueName)
-    worksheet.write(row, 1, booking.offerName)
-    worksheet.write(row, 2, str(convert_booking_dates_utc_to_venue_timezone(booking.stockBeginningDatetime, booking)))
-    worksheet.write(row, 3, booking.ean)
-    worksheet.write(row, 4, booking.beneficiaryFirstName)
-    worksheet.write(row, 5, booking.beneficiaryLastName)
-    worksheet.write(row, 6, booking.beneficiaryEmail)
-    worksheet.write(row, 7, booking.beneficiaryPhoneNumber)
-    worksheet.write(row, 8, str(convert_booking_dates_utc_to_venue_timezone(booking.bookedAt, booking)))
-    worksheet.write(row, 9, str(convert_booking_dates_utc_to_venue_timezone(booking.usedAt, booking)))
-    worksheet.write(
-        row,
-        10,
-        booking_recap_utils.get_booking_token(
-            booking.token,
-            booking.status,
-            booking.isExternal,
-            booking.stockBeginningDatetime,
-        ),
-    )
-    worksheet.write(row, 11, booking.priceCategoryLabel)
-    worksheet.write(row, 12, booking.amount, currency_format)
-    worksheet.write(row, 13, _get_booking_status(booking.status, booking.isConfirmed))
-    worksheet.write(row, 14, str(convert_booking_dates_utc_to_venue_timezone(booking.reimbursedAt, booking)))
-    worksheet.write(row, 15, serialize_offer_type_educational_or_individual(offer_is_educational=False))
-    worksheet.write(row, 16, booking.beneficiaryPostalCode)
-    worksheet.write(
-        row,
-        17,
-        duo_column,
-    )
+def _write_excel_row(worksheet: Worksheet, row_num: int, row: tuple, currency_format: Format) -> None:
+    for col_num, value in enumerate(row):
+        if col_num in EXCEL_DATE_COLUMNS:
+            worksheet.write(row_num, col_num, str(value))
+        elif col_num == EXCEL_AMOUNT_COLUMN:
+            worksheet.write(row_num, col_num, value, currency_format)
+        else:
+            worksheet.write(row_num, col_num, value)
 
 
-def _serialize_csv_report(query: BaseQuery) -> str:
-    output = StringIO()
-    writer = csv.writer(output, dialect=csv.excel, delimiter=";", quoting=csv.QUOTE_NONNUMERIC)
-    writer.writerow(LEGACY_BOOKING_EXPORT_HEADER)
-    for booking in query.yield_per(1000):
-        writer.writerow(
-            (
-                booking.venueName,
-                booking.offerName,
-                convert_booking_dates_utc_to_venue_timezone(booking.stockBeginningDatetime, booking),
-                booking.ean,
-                booking.beneficiaryFirstName,
-                booking.beneficiaryLastName,
-                booking.beneficiaryEmail,
-                booking.beneficiaryPhoneNumber,
-                convert_booking_dates_utc_to_venue_timezone(booking.bookedAt, booking),
-                convert_booking_dates_utc_to_venue_timezone(booking.usedAt, booking),
-                booking_recap_utils.get_booking_token(
-                    booking.token,
-                    booking.status,
-                    booking.isExternal,
-                    booking.stockBeginningDatetime,
-                ),
-                booking.priceCategoryLabel or "",
-                booking.amount,
-                _get_booking_status(booking.status, booking.isConfirmed),
-                convert_booking_dates_utc_to_venue_timezone(booking.reimbursedAt, booking),
-                # This method is still used in the old Payment model
-                serialize_offer_type_educational_or_individual(offer_is_educational=False),
-                booking.beneficiaryPostalCode or "",
-                "Oui" if booking.quantity == DUO_QUANTITY else "Non",
-            )
-        )
+def _stream_export(
+    header: list[str], rows: typing.Iterable[tuple], export_type: BookingExportType | None
+) -> typing.Iterator[bytes]:
+    if export_type == BookingExportType.EXCEL:
+        # The workbook is written to a temporary file (kept in memory
+        # while it is small), then sent by chunks.
+        with tempfile.SpooledTemporaryFile(max_size=EXCEL_EXPORT_SPOOL_MAX_SIZE) as output:
+            _write_excel(output, header, rows, constant_memory=True)  # type: ignore[arg-type]
+            output.seek(0)
+            while chunk := output.read(EXPORT_CHUNK_SIZE):
+                yield chunk
+        return
 
-    return output.getvalue()
+    yield codecs.BOM_UTF8
+    for chunk in _iter_csv_chunks(header, rows):
+        yield chunk.encode("utf-8")
 
 
-def _serialize_excel_report(query: BaseQuery) -> bytes:
+def _write_bookings_to_csv(query: BaseQuery) -> str:
+    return "".join(_iter_csv_chunks(booking_export_header(), _iter_export_rows(query, split_duo_bookings=True)))
+
+
+def _write_bookings_to_excel(query: BaseQuery) -> bytes:
     output = BytesIO()
-    workbook = xlsxwriter.Workbook(output)
+    _write_excel(output, booking_export_header(), _iter_export_rows(query, split_duo_bookings=True))
+    return output.getvalue()
 
-    bold = workbook.add_format({"bold": 1})
-    currency_format = workbook.add_format({"num_format": "###0.00[$€-fr-FR]"})
-    col_width = 18
 
-    worksheet = workbook.add_worksheet()
-    row = 0
+def _serialize_csv_report(query: BaseQuery) -> str:
+    return "".join(_iter_csv_chunks(LEGACY_BOOKING_EXPORT_HEADER, _iter_export_rows(query, split_duo_bookings=False)))
 
-    for col_num, title in enumerate(LEGACY_BOOKING_EXPORT_HEADER):
-        worksheet.write(row, col_num, title, bold)
-        worksheet.set_column(col_num, col_num, col_width)
-    row = 1
-    for booking in query.yield_per(1000):
-        worksheet.write(row, 0, booking.venueName)
-        worksheet.write(row, 1, booking.offerName)
-        worksheet.write(
-            row, 2, str(convert_booking_dates_utc_to_venue_timezone(booking.stockBeginningDatetime, booking))
-        )
-        worksheet.write(row, 3, booking.ean)
-        worksheet.write(row, 4, booking.beneficiaryFirstName)
-        worksheet.write(row, 5, booking.beneficiaryLastName)
-        worksheet.write(row, 6, booking.beneficiaryEmail)
-        worksheet.write(row, 7, booking.beneficiaryPhoneNumber)
-        worksheet.write(row, 8, str(convert_booking_dates_utc_to_venue_timezone(booking.bookedAt, booking)))
-        worksheet.write(row, 9, str(convert_booking_dates_utc_to_venue_timezone(booking.usedAt, booking)))
-        worksheet.write(
-            row,
-            10,
-            booking_recap_utils.get_booking_token(
-                booking.token,
-                booking.status,
-                booking.isExternal,
-                booking.stockBeginningDatetime,
-            ),
-        )
-        worksheet.write(row, 11, booking.priceCategoryLabel)
-        worksheet.write(row, 12, booking.amount, currency_format)
-        worksheet.write(row, 13, _get_booking_status(booking.status, booking.isConfirmed))
-        worksheet.write(row, 14, str(convert_booking_dates_utc_to_venue_timezone(booking.reimbursedAt, booking)))
-        worksheet.write(row, 15, serialize_offer_type_educational_or_individual(offer_is_educational=False))
-        worksheet.write(row, 16, booking.beneficiaryPostalCode)
-        worksheet.write(
-            row,
-            17,
-            "Oui" if booking.quantity == DUO_QUANTITY else "Non",
-        )
-        row += 1
 
-    workbook.close()
+def _serialize_excel_report(query: BaseQuery) -> bytes:
+    output = BytesIO()
+    _write_excel(output, LEGACY_BOOKING_EXPORT_HEADER, _iter_export_rows(query, split_duo_bookings=False))
     return output.getvalue()
 
 
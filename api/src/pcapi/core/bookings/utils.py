@@ -1,5 +1,6 @@
 from datetime import datetime
 from datetime import timedelta
+from datetime import tzinfo
 from hashlib import sha256
 import hmac
 import typing
@@ -64,17 +65,42 @@ def _apply_departement_timezone(naive_datetime: datetime | None, departement_cod
     return naive_datetime.astimezone(departement_tz) if naive_datetime is not None else None
 
 
-def convert_booking_dates_utc_to_venue_timezone(date_without_timezone: datetime, booking: "Booking") -> datetime | None:
-    if FeatureToggle.WIP_USE_OFFERER_ADDRESS_AS_DATA_SOURCE.is_active():
-        if booking.offerDepartmentCode:
-            department_code = booking.offerDepartmentCode
-            return _apply_departement_timezone(naive_datetime=date_without_timezone, departement_code=department_code)
+def _get_booking_departement_code(booking: "Booking", use_offer_departement_code: bool) -> str:
+    if use_offer_departement_code and booking.offerDepartmentCode:
+        return booking.offerDepartmentCode
     if booking.venueDepartmentCode:
-        return _apply_departement_timezone(
-            naive_datetime=date_without_timezone, departement_code=booking.venueDepartmentCode
+        return booking.venueDepartmentCode
+    return postal_code_utils.PostalCode(booking.offererPostalCode).get_departement_code()
+
+
+def convert_booking_dates_utc_to_venue_timezone(date_without_timezone: datetime, booking: "Booking") -> datetime | None:
+    departement_code = _get_booking_departement_code(
+        booking, FeatureToggle.WIP_USE_OFFERER_ADDRESS_AS_DATA_SOURCE.is_active()
+    )
+    return _apply_departement_timezone(naive_datetime=date_without_timezone, departement_code=departement_code)
+
+
+class BookingDatesConverter:
+    """Convert dates of bookings like
+    `convert_booking_dates_utc_to_venue_timezone()`, for exports of many
+    bookings: the timezone is resolved once per venue (and offer
+    departement), not for each date.
+    """
+
+    def __init__(self) -> None:
+        self.use_offer_departement_code = FeatureToggle.WIP_USE_OFFERER_ADDRESS_AS_DATA_SOURCE.is_active()
+        self._timezones: dict[tuple[str | None, str | None, str | None], tzinfo | None] = {}
+
+    def __call__(self, date_without_timezone: datetime | None, booking: "Booking") -> datetime | None:
+        key = (
+            booking.offerDepartmentCode if self.use_offer_departement_code else None,
+            booking.venueDepartmentCode,
+            booking.offererPostalCode,
         )
-    offerer_department_code = postal_code_utils.PostalCode(booking.offererPostalCode).get_departement_code()
-    return _apply_departement_timezone(naive_datetime=date_without_timezone, departement_code=offerer_department_code)
+        if key not in self._timezones:
+            departement_code = _get_booking_departement_code(booking, self.use_offer_departement_code)
+            self._timezones[key] = tz.gettz(date_utils.get_department_timezone(departement_code))
+        return date_without_timezone.astimezone(self._timezones[key]) if date_without_timezone is not None else None
 
 
 def convert_collective_booking_dates_utc_to_venue_timezone(
@@ -1,13 +1,18 @@
 from collections import Counter
 from collections import defaultdict
+from datetime import date
 from datetime import datetime
+from decimal import Decimal
 from functools import partial
+import time
 
 import sqlalchemy as sa
 from sqlalchemy.orm import contains_eager
 from sqlalchemy.orm import joinedload
 from sqlalchemy.orm import load_only
+from sqlalchemy.orm import selectinload
 
+from pcapi import settings
 from pcapi.core.bookings import models as bookings_models
 from pcapi.core.bookings import repository as bookings_repository
 from pcapi.core.categories import categories
@@ -45,6 +50,13 @@ def update_external_user(
 
     if user.has_any_pro_role:
         update_external_pro(user.email)
+    elif (
+        # Cultural survey answers and extra data are only known now, they are pushed right away
+        not cultural_survey_answers
+        and not batch_extra_data
+        and FeatureToggle.WIP_DEFERRED_EXTERNAL_USER_ATTRIBUTES.is_active()
+    ):
+        _defer_update_external_user(user.id, skip_batch=skip_batch, skip_sendinblue=skip_sendinblue)
     else:
         user_attributes = get_user_attributes(user)
 
@@ -69,6 +81,41 @@ def update_external_user(
             )
 
 
+def _defer_update_external_user(user_id: int, skip_batch: bool, skip_sendinblue: bool) -> None:
+    from pcapi.tasks.external_user_tasks import update_external_user_attributes_task
+    from pcapi.tasks.serialization.external_user_tasks import UpdateUserAttributesRequest
+
+    if skip_batch and skip_sendinblue:
+        return
+
+    # All updates of a user in the same debounce window share the same payload, so the same task
+    time_id = f"{int(time.time()) // settings.EXTERNAL_USER_ATTRIBUTES_DEBOUNCE_SECONDS}"
+    on_commit(
+        partial(
+            update_external_user_attributes_task.delay,
+            payload=UpdateUserAttributesRequest(
+                user_id=user_id, time_id=time_id, skip_batch=skip_batch, skip_sendinblue=skip_sendinblue
+            ),
+        ),
+    )
+
+
+def push_user_attributes(user_id: int, skip_batch: bool = False, skip_sendinblue: bool = False) -> None:
+    """Compute the current attributes of a user and push them to Batch
+    and Brevo. Called by the task enqueued by `update_external_user()`.
+    """
+    user = users_models.User.query.filter_by(id=user_id).one_or_none()
+    if not user or not user.isActive or user.has_any_pro_role:
+        # suspended users have been removed from Brevo, pro users are updated by update_external_pro
+        return
+
+    user_attributes = get_user_attributes(user)
+    if not skip_batch:
+        update_batch_user(user.id, user_attributes)
+    if not skip_sendinblue:
+        update_sendinblue_user(user.email, user_attributes, asynchronous=False)
+
+
 def update_external_pro(email: str | None) -> None:
     # Call this function instead of update_external_user in actions which are only available for pro
     # ex. updating a venue, in which bookingEmail is not a User parameter
@@ -397,9 +444,6 @@ def _check_if_pro_attribute_has_collective_offers(user: users_models.User) -> bo
 
 
 def get_user_attributes(user: users_models.User) -> models.UserAttributes:
-    from pcapi.core.fraud import api as fraud_api
-    from pcapi.core.users.api import get_domains_credit
-
     is_pro_user: bool = user.has_pro_role or user.has_non_attached_pro_role
 
     if is_pro_user:
@@ -414,6 +458,78 @@ def get_user_attributes(user: users_models.User) -> models.UserAttributes:
             .all()
         )
 
+    # Call only once to limit to one get_wallet_balance query
+    return _build_user_attributes(user, user_bookings, favorites, user.has_remaining_credit)
+
+
+def get_users_attributes(users: list[users_models.User]) -> dict[int, models.UserAttributes]:
+    """Compute the attributes of many users (e.g. in nightly resyncs),
+    with one query per kind of data for all users instead of one per
+    user as `get_user_attributes()` would.
+    """
+    if not users:
+        return {}
+
+    user_ids = [user.id for user in users]
+    # Load related collections of users which are already in the session.
+    users_models.User.query.filter(users_models.User.id.in_(user_ids)).options(
+        selectinload(users_models.User.deposits),
+        selectinload(users_models.User.beneficiaryFraudChecks),
+        selectinload(users_models.User.beneficiaryFraudReviews),
+        selectinload(users_models.User.action_history),
+    ).all()
+
+    non_pro_user_ids = [user.id for user in users if not (user.has_pro_role or user.has_non_attached_pro_role)]
+    bookings_by_user_id: dict[int, list[bookings_models.Booking]] = defaultdict(list)
+    favorites_by_user_id: dict[int, list[users_models.Favorite]] = defaultdict(list)
+    if non_pro_user_ids:
+        for booking in _get_bookings_query(non_pro_user_ids):
+            bookings_by_user_id[booking.userId].append(booking)
+        favorites = (
+            users_models.Favorite.query.filter(users_models.Favorite.userId.in_(non_pro_user_ids))
+            .options(joinedload(users_models.Favorite.offer).load_only(offers_models.Offer.subcategoryId))
+            .order_by(users_models.Favorite.id.desc())
+        )
+        for favorite in favorites:
+            favorites_by_user_id[favorite.userId].append(favorite)
+
+    # Same as User.has_remaining_credit, with a single get_wallet_balance query
+    today = datetime.combine(date.today(), datetime.min.time())
+    users_with_credit = [
+        user
+        for user in users
+        if user.deposit is not None and (user.deposit.expirationDate is None or user.deposit.expirationDate > today)
+    ]
+    wallet_balances: dict[int, Decimal] = {}
+    if users_with_credit:
+        wallet_balances = dict(
+            db.session.query(users_models.User.id, sa.func.get_wallet_balance(users_models.User.id, False))
+            .filter(users_models.User.id.in_([user.id for user in users_with_credit]))
+            .all()
+        )
+
+    return {
+        user.id: _build_user_attributes(
+            user,
+            bookings_by_user_id[user.id],
+            favorites_by_user_id[user.id],
+            wallet_balances.get(user.id, Decimal(0)) > 0,
+        )
+        for user in users
+    }
+
+
+def _build_user_attributes(
+    user: users_models.User,
+    user_bookings: list[bookings_models.Booking],
+    favorites: list[users_models.Favorite],
+    has_remaining_credit: bool,
+) -> models.UserAttributes:
+    from pcapi.core.fraud import api as fraud_api
+    from pcapi.core.users.api import get_domains_credit
+
+    is_pro_user: bool = user.has_pro_role or user.has_non_attached_pro_role
+
     last_favorite = favorites[0] if favorites else None
     most_favorite_offer_subcategories = get_most_favorite_subcategories(favorites)
 
@@ -421,9 +537,6 @@ def get_user_attributes(user: users_models.User) -> models.UserAttributes:
     bookings_attributes = get_bookings_categories_and_subcategories(user_bookings)
     booking_venues_count = len({booking.venueId for booking in user_bookings})
 
-    # Call only once to limit to one get_wallet_balance query
-    has_remaining_credit = user.has_remaining_credit
-
     # A user becomes a former beneficiary only after the last credit is expired or spent or can no longer be claimed
     is_former_beneficiary = (user.has_beneficiary_role and not has_remaining_credit) or (
         user.has_underage_beneficiary_role and user.eligibility is None
@@ -547,6 +660,10 @@ def get_bookings_categories_and_subcategories(
 
 
 def get_user_bookings(user: users_models.User) -> list[bookings_models.Booking]:
+    return _get_bookings_query([user.id]).all()
+
+
+def _get_bookings_query(user_ids: list[int]) -> sa.orm.Query:
     return (
         bookings_models.Booking.query.options(
             joinedload(bookings_models.Booking.venue).load_only(offerers_models.Venue.isVirtual)
@@ -564,11 +681,10 @@ def get_user_bookings(user: users_models.User) -> list[bookings_models.Booking]:
             joinedload(bookings_models.Booking.incidents).joinedload(finance_models.BookingFinanceIncident.incident),
         )
         .filter(
-            bookings_models.Booking.userId == user.id,
+            bookings_models.Booking.userId.in_(user_ids),
             bookings_models.Booking.status != bookings_models.BookingStatus.CANCELLED,
         )
         .order_by(bookings_models.Booking.dateCreated.desc())
-        .all()
     )
 
 
@@ -24,13 +24,16 @@ details).
 """
 
 from collections import defaultdict
+import concurrent.futures
 import csv
 import datetime
 import decimal
 import functools
+import io
 import itertools
 import logging
 import math
+import multiprocessing
 import pathlib
 import secrets
 import tempfile
@@ -204,6 +207,58 @@ def add_event(
     return event
 
 
+def add_used_events(
+    bookings: typing.Collection[tuple[int, int, datetime.datetime | None]],
+    date_used: datetime.datetime,
+    collective: bool = False,
+) -> None:
+    """Add a `BOOKING_USED` event for each booking that has just been
+    marked as used at ``date_used``, like `add_event()` does, but with
+    a single query to find pricing points and a single insert.
+
+    ``bookings`` holds ``(booking_id, venue_id, event_datetime)``
+    tuples, where ``event_datetime`` is the beginning of the stock (or
+    the end of the collective stock).
+    """
+    if not bookings:
+        return
+    venue_ids = {venue_id for _, venue_id, _ in bookings}
+    links = {
+        venue_id: (pricing_point_id, timespan)
+        for venue_id, pricing_point_id, timespan in db.session.query(
+            offerers_models.VenuePricingPointLink.venueId,
+            offerers_models.VenuePricingPointLink.pricingPointId,
+            offerers_models.VenuePricingPointLink.timespan,
+        ).filter(
+            offerers_models.VenuePricingPointLink.venueId.in_(venue_ids),
+            offerers_models.VenuePricingPointLink.timespan.contains(date_used),
+        )
+    }
+    booking_id_column = "collectiveBookingId" if collective else "bookingId"
+    events = []
+    for booking_id, venue_id, event_datetime in bookings:
+        pricing_point_id, timespan = links.get(venue_id, (None, None))
+        if pricing_point_id:
+            # IMPORTANT: this must be consistent with `get_pricing_ordering_date()`.
+            pricing_ordering_date = max(timespan.lower, event_datetime or date_used, date_used)
+            status = models.FinanceEventStatus.READY
+        else:
+            pricing_ordering_date = None
+            status = models.FinanceEventStatus.PENDING
+        events.append(
+            {
+                booking_id_column: booking_id,
+                "status": status,
+                "motive": models.FinanceEventMotive.BOOKING_USED,
+                "valueDate": date_used,
+                "venueId": venue_id,
+                "pricingPointId": pricing_point_id,
+                "pricingOrderingDate": pricing_ordering_date,
+            }
+        )
+    db.session.execute(sa.insert(models.FinanceEvent), events)
+
+
 def cancel_latest_event(
     booking: bookings_models.Booking | educational_models.CollectiveBooking,
 ) -> models.FinanceEvent | None:
@@ -246,9 +301,14 @@ def cancel_latest_event(
 def price_events(
     min_date: datetime.datetime = MIN_DATE_TO_PRICE,
     batch_size: int = PRICE_EVENTS_BATCH_SIZE,
+    by_pricing_point: bool = False,
 ) -> None:
     """Price finance events that are ready to be priced.
 
+    If ``by_pricing_point`` is set, events are grouped by pricing
+    point and priced in batches (see `_price_events_of_pricing_point()`)
+    instead of one by one.
+
     This function is normally called by a cron job.
     """
     # The upper bound on `pricingOrderingDate` avoids selecting a very
@@ -258,6 +318,14 @@ def price_events(
     threshold = datetime.datetime.utcnow() - datetime.timedelta(minutes=1)
     window = (min_date, threshold)
 
+    # Custom reimbursement rules are loaded once per run (and only if
+    # there is something to price).
+    reimbursement.reset_custom_rule_finder()
+
+    if by_pricing_point:
+        _price_events_by_pricing_point(window, batch_size)
+        return
+
     errored_pricing_point_ids = set()
 
     # This is a quick hack to avoid fetching all events at once,
@@ -297,7 +365,7 @@ def price_events(
                     "pricing_point": event.pricingPointId,
                 }
                 with log_elapsed(logger, "Priced event", extra):
-                    price_event(event)
+                    price_event(event, rule_finder=reimbursement.get_custom_rule_finder())
             except Exception as exc:  # pylint: disable=broad-except
                 errored_pricing_point_ids.add(event.pricingPointId)
                 logger.info(
@@ -350,9 +418,9 @@ def get_pricing_point_link(
     raise ValueError(f"Could not find pricing point for booking {booking.id}")
 
 
-def _get_events_to_price(window: tuple[datetime.datetime, datetime.datetime]) -> BaseQuery:
+def _filter_events_to_price(query: BaseQuery, window: tuple[datetime.datetime, datetime.datetime]) -> BaseQuery:
     return (
-        models.FinanceEvent.query.filter(
+        query.filter(
             models.FinanceEvent.pricingPointId.is_not(None),
             models.FinanceEvent.status == models.FinanceEventStatus.READY,
             models.FinanceEvent.pricingOrderingDate.between(*window),
@@ -361,6 +429,12 @@ def _get_events_to_price(window: tuple[datetime.datetime, datetime.datetime]) ->
         .filter(
             models.Pricing.id.is_(None) | (models.Pricing.status == models.PricingStatus.CANCELLED),
         )
+    )
+
+
+def _get_events_to_price(window: tuple[datetime.datetime, datetime.datetime]) -> BaseQuery:
+    return (
+        _filter_events_to_price(models.FinanceEvent.query, window)
         .order_by(models.FinanceEvent.pricingOrderingDate, models.FinanceEvent.id)
         .options(
             sa.orm.joinedload(models.FinanceEvent.booking),
@@ -369,6 +443,162 @@ def _get_events_to_price(window: tuple[datetime.datetime, datetime.datetime]) ->
     )
 
 
+def _get_pricing_point_ids_with_events_to_price(window: tuple[datetime.datetime, datetime.datetime]) -> list[int]:
+    query = _filter_events_to_price(
+        db.session.query(models.FinanceEvent.pricingPointId),
+        window,
+    )
+    return [pricing_point_id for (pricing_point_id,) in query.distinct().order_by(models.FinanceEvent.pricingPointId)]
+
+
+def _get_batch_of_events_to_price(
+    pricing_point_id: int,
+    window: tuple[datetime.datetime, datetime.datetime],
+    batch_size: int,
+) -> list[models.FinanceEvent]:
+    """Return the next ``batch_size`` events to price for the given
+    pricing point, along with all objects that are needed to price
+    them (loaded with a few "SELECT ... IN" queries).
+    """
+    return (
+        _filter_events_to_price(models.FinanceEvent.query, window)
+        .filter(models.FinanceEvent.pricingPointId == pricing_point_id)
+        .order_by(models.FinanceEvent.pricingOrderingDate, models.FinanceEvent.id)
+        .options(
+            sqla_orm.selectinload(models.FinanceEvent.booking)
+            .joinedload(bookings_models.Booking.stock, innerjoin=True)
+            .joinedload(offers_models.Stock.offer, innerjoin=True),
+            sqla_orm.selectinload(models.FinanceEvent.booking)
+            .joinedload(bookings_models.Booking.venue, innerjoin=True)
+            .selectinload(offerers_models.Venue.pricing_point_links),
+            sqla_orm.selectinload(models.FinanceEvent.collectiveBooking)
+            .joinedload(educational_models.CollectiveBooking.collectiveStock, innerjoin=True)
+            .joinedload(educational_models.CollectiveStock.collectiveOffer, innerjoin=True),
+            sqla_orm.selectinload(models.FinanceEvent.collectiveBooking)
+            .joinedload(educational_models.CollectiveBooking.venue, innerjoin=True)
+            .selectinload(offerers_models.Venue.pricing_point_links),
+            sqla_orm.selectinload(models.FinanceEvent.bookingFinanceIncident),
+        )
+        .limit(batch_size)
+        .all()
+    )
+
+
+def _price_events_by_pricing_point(
+    window: tuple[datetime.datetime, datetime.datetime],
+    batch_size: int,
+) -> None:
+    for pricing_point_id in _get_pricing_point_ids_with_events_to_price(window):
+        extra = {"pricing_point": pricing_point_id}
+        try:
+            with log_elapsed(logger, "Priced events of pricing point", extra):
+                _price_events_of_pricing_point(pricing_point_id, window, batch_size)
+        except Exception as exc:  # pylint: disable=broad-except
+            logger.exception(
+                "Could not price events of pricing point by batch, falling back to pricing events one by one",
+                extra={"pricing_point": pricing_point_id, "exc": str(exc)},
+            )
+            _price_events_of_pricing_point_one_by_one(pricing_point_id, window)
+
+
+def _price_events_of_pricing_point(
+    pricing_point_id: int,
+    window: tuple[datetime.datetime, datetime.datetime],
+    batch_size: int,
+) -> None:
+    """Price all events of a pricing point that are ready to be
+    priced, ``batch_size`` events at a time.
+
+    Unlike `price_event()`, each batch is priced within a single
+    transaction: the pricing point is locked once, events are loaded
+    with a few queries, the yearly revenue is computed once per revenue
+    period and then incremented in memory, and all pricings are
+    inserted with a single flush.
+    """
+    while True:
+        with transaction():
+            lock_pricing_point(pricing_point_id)
+            events = _get_batch_of_events_to_price(pricing_point_id, window, batch_size)
+            if not events:
+                break
+            # Delete pricings that should be priced after the first
+            # event of each revenue period (see module docstring). The
+            # related events are now ready to be priced and may have
+            # to be priced before some events of this batch: reload it.
+            first_event_by_period = {}
+            for event in events:
+                first_event_by_period.setdefault(_get_revenue_period(event.valueDate), event)
+            deleted = False
+            for event in first_event_by_period.values():
+                deleted |= _delete_dependent_pricings(event, "Deleted pricings priced too early")
+            if deleted:
+                events = _get_batch_of_events_to_price(pricing_point_id, window, batch_size)
+                first_event_by_period = {}
+                for event in events:
+                    first_event_by_period.setdefault(_get_revenue_period(event.valueDate), event)
+
+            initial_revenue_by_period = {
+                period: _get_current_revenue(event) for period, event in first_event_by_period.items()
+            }
+            revenue_by_period = initial_revenue_by_period.copy()
+            rule_finder = reimbursement.get_custom_rule_finder()
+            pricings = []
+            for event in events:
+                period = _get_revenue_period(event.valueDate)
+                pricing = _price_event(event, rule_finder=rule_finder, current_revenue=revenue_by_period[period])
+                pricings.append(pricing)
+                # Only pricings of individual bookings are included in
+                # the revenue of the next events.
+                revenue_by_period[period] += _get_revenue_of_pricing(pricing, event.booking)
+            db.session.add_all(pricings)
+            for period, event in first_event_by_period.items():
+                _update_pricing_point_revenue(
+                    pricing_point_id,
+                    event.valueDate,
+                    revenue_by_period[period] - initial_revenue_by_period[period],
+                )
+            models.FinanceEvent.query.filter(
+                models.FinanceEvent.id.in_([event.id for event in events]),
+            ).update(
+                {"status": models.FinanceEventStatus.PRICED},
+                synchronize_session=False,
+            )
+            db.session.flush()
+        logger.info(
+            "Priced batch of events of pricing point",
+            extra={"pricing_point": pricing_point_id, "events": len(events)},
+        )
+        for event in events:
+            db.session.expunge(event)
+        if len(events) < batch_size:
+            break
+
+
+def _price_events_of_pricing_point_one_by_one(
+    pricing_point_id: int,
+    window: tuple[datetime.datetime, datetime.datetime],
+) -> None:
+    events = _get_events_to_price(window).filter(models.FinanceEvent.pricingPointId == pricing_point_id).all()
+    for event in events:
+        try:
+            with log_elapsed(logger, "Priced event", {"event": event.id, "pricing_point": pricing_point_id}):
+                price_event(event, rule_finder=reimbursement.get_custom_rule_finder())
+        except Exception as exc:  # pylint: disable=broad-except
+            logger.info(
+                "Ignoring further events from pricing point",
+                extra={"pricing_point": pricing_point_id},
+            )
+            logger.exception(
+                "Could not price event",
+                extra={
+                    "event": event.id,
+                    "pricing_point": pricing_point_id,
+                    "exc": str(exc),
+                },
+            )
+            return
+
+
 def lock_pricing_point(pricing_point_id: int) -> None:
     """Lock a pricing point (a venue) while we are doing some work that
     cannot be done while there are other running operations on the
@@ -393,7 +623,10 @@ def lock_bank_account(bank_account_id: int) -> None:
     return db_utils.acquire_lock(f"bank-account-{bank_account_id}")
 
 
-def price_event(event: models.FinanceEvent) -> models.Pricing | None:
+def price_event(
+    event: models.FinanceEvent,
+    rule_finder: "reimbursement.CustomRuleFinder | None" = None,
+) -> models.Pricing | None:
     assert event.pricingPointId  # helps mypy
     with transaction():
         lock_pricing_point(event.pricingPointId)
@@ -462,18 +695,30 @@ def price_event(event: models.FinanceEvent) -> models.Pricing | None:
 
         _delete_dependent_pricings(event, "Deleted pricings priced too early")
 
-        pricing = _price_event(event)
+        pricing = _price_event(event, rule_finder=rule_finder)
         db.session.add(pricing)
+        _update_pricing_point_revenue(
+            event.pricingPointId,
+            event.valueDate,
+            _get_revenue_of_pricing(pricing, event.booking),
+        )
         event.status = models.FinanceEventStatus.PRICED
         db.session.commit()
     return pricing
 
 
+def _get_revenue_year(value_date: datetime.datetime) -> int:
+    return value_date.replace(tzinfo=pytz.utc).astimezone(utils.ACCOUNTING_TIMEZONE).year
+
+
 def _get_revenue_period(value_date: datetime.datetime) -> tuple[datetime.datetime, datetime.datetime]:
     """Return a datetime (year) period for the given value date, i.e. the
     first and last seconds of the year of the ``value_date``.
     """
-    year = value_date.replace(tzinfo=pytz.utc).astimezone(utils.ACCOUNTING_TIMEZONE).year
+    return _get_revenue_period_of_year(_get_revenue_year(value_date))
+
+
+def _get_revenue_period_of_year(year: int) -> tuple[datetime.datetime, datetime.datetime]:
     first_second = utils.ACCOUNTING_TIMEZONE.localize(
         datetime.datetime.combine(
             datetime.date(year, 1, 1),
@@ -491,19 +736,19 @@ def _get_revenue_period(value_date: datetime.datetime) -> tuple[datetime.datetim
 
 def _get_current_revenue(event: models.FinanceEvent) -> int:
     """Return the current year revenue for the pricing point of an
-    event, NOT including the given event.
+    event, NOT including the given event (because this function is
+    called before we create the pricing for this event).
     """
-    revenue_period = _get_revenue_period(event.valueDate)
+    assert event.pricingPointId  # helps mypy
+    return _get_pricing_point_revenue(event.pricingPointId, _get_revenue_year(event.valueDate))
+
+
+def _sum_revenue_of_pricings(*filters: typing.Any) -> int:
     # Collective bookings must not be included in revenue.
-    current_revenue = (
+    revenue = (
         bookings_models.Booking.query.join(models.Pricing)
         .filter(
-            models.Pricing.pricingPointId == event.pricingPointId,
-            # The following filter is not strictly necessary, because
-            # this function is called before we create the pricing for
-            # this event.
-            models.Pricing.bookingId != event.bookingId,
-            models.Pricing.valueDate.between(*revenue_period),
+            *filters,
             models.Pricing.status.notin_(
                 (
                     models.PricingStatus.CANCELLED,
@@ -514,11 +759,161 @@ def _get_current_revenue(event: models.FinanceEvent) -> int:
         .with_entities(sa.func.sum(bookings_models.Booking.amount * bookings_models.Booking.quantity))
         .scalar()
     )
-    return utils.to_cents(current_revenue or 0)
+    return utils.to_cents(revenue or 0)
+
+
+def _compute_pricing_point_revenue(pricing_point_id: int, year: int) -> int:
+    return _sum_revenue_of_pricings(
+        models.Pricing.pricingPointId == pricing_point_id,
+        models.Pricing.valueDate.between(*_get_revenue_period_of_year(year)),
+    )
+
+
+def _get_pricing_point_revenue(pricing_point_id: int, year: int) -> int:
+    """Return the revenue of a pricing point for the given accounting
+    year (see `models.PricingPointYearlyRevenue`).
+
+    The revenue is computed from pricings and stored on the first
+    call. It is then kept up to date by `_update_pricing_point_revenue()`.
+
+    IMPORTANT: The caller must hold the lock on the pricing point.
+    """
+    revenue = (
+        db.session.query(models.PricingPointYearlyRevenue.revenue)
+        .filter_by(pricingPointId=pricing_point_id, year=year)
+        .scalar()
+    )
+    if revenue is None:
+        revenue = _compute_pricing_point_revenue(pricing_point_id, year)
+        db.session.add(
+            models.PricingPointYearlyRevenue(
+                pricingPointId=pricing_point_id,
+                year=year,
+                revenue=revenue,
+            )
+        )
+        db.session.flush()
+    return revenue
+
+
+def _update_pricing_point_revenue(pricing_point_id: int, value_date: datetime.datetime, delta: int) -> None:
+    """Add ``delta`` (in euro cents) to the stored revenue of a pricing
+    point, if it has already been stored. Otherwise, it will be
+    computed from pricings (thus including this change) when needed.
+
+    IMPORTANT: The caller must hold the lock on the pricing point.
+    """
+    if not delta:
+        return
+    models.PricingPointYearlyRevenue.query.filter_by(
+        pricingPointId=pricing_point_id,
+        year=_get_revenue_year(value_date),
+    ).update(
+        {"revenue": models.PricingPointYearlyRevenue.revenue + delta},
+        synchronize_session=False,
+    )
+
+
+def reset_pricing_point_revenues(*pricing_filters: typing.Any) -> None:
+    """Delete the stored revenues of the pricing points and years of the
+    pricings that match the given filters, so that they are computed
+    again from pricings when needed.
+
+    This must be called before pricings are deleted, or after the
+    amount of priced bookings has changed, when it is not done through
+    `_update_pricing_point_revenue()`.
+    """
+    accounting_date = sa.func.timezone(
+        utils.ACCOUNTING_TIMEZONE.zone, sa.func.timezone("UTC", models.Pricing.valueDate)
+    )
+    revenue_periods = (
+        models.Pricing.query.filter(*pricing_filters)
+        .with_entities(models.Pricing.pricingPointId, sa.cast(sa.extract("year", accounting_date), sa.Integer))
+        .distinct()
+    )
+    revenue_key = sa.tuple_(models.PricingPointYearlyRevenue.pricingPointId, models.PricingPointYearlyRevenue.year)
+    models.PricingPointYearlyRevenue.query.filter(revenue_key.in_(revenue_periods)).delete(synchronize_session=False)
+
+
+def _get_revenue_of_pricing(pricing: models.Pricing, booking: bookings_models.Booking | None) -> int:
+    """Return the amount (in euro cents) that the pricing adds to the
+    revenue of its pricing point.
+    """
+    if not pricing.bookingId or pricing.status in (models.PricingStatus.CANCELLED, models.PricingStatus.REJECTED):
+        return 0
+    assert booking  # helps mypy
+    return utils.to_cents(booking.total_amount)
 
 
-def _price_event(event: models.FinanceEvent) -> models.Pricing:
-    new_revenue = _get_current_revenue(event)
+def check_pricing_point_revenues(year: int, fix: bool = False) -> list[dict]:
+    """Compare stored revenues of pricing points for the given year
+    with revenues computed from pricings, and return those that differ.
+
+    If ``fix`` is set, the stored revenues are replaced by the
+    computed ones.
+    """
+    computed_revenues = dict(
+        bookings_models.Booking.query.join(models.Pricing)
+        .filter(
+            models.Pricing.valueDate.between(*_get_revenue_period_of_year(year)),
+            models.Pricing.status.notin_(
+                (
+                    models.PricingStatus.CANCELLED,
+                    models.PricingStatus.REJECTED,
+                )
+            ),
+        )
+        .group_by(models.Pricing.pricingPointId)
+        .with_entities(
+            models.Pricing.pricingPointId,
+            sa.func.sum(bookings_models.Booking.amount * bookings_models.Booking.quantity),
+        )
+    )
+    stored_revenues = (
+        db.session.query(models.PricingPointYearlyRevenue.pricingPointId, models.PricingPointYearlyRevenue.revenue)
+        .filter_by(year=year)
+        .order_by(models.PricingPointYearlyRevenue.pricingPointId)
+        .all()
+    )
+
+    drifts = []
+    for pricing_point_id, stored_revenue in stored_revenues:
+        computed_revenue = utils.to_cents(computed_revenues.get(pricing_point_id) or 0)
+        if stored_revenue == computed_revenue:
+            continue
+        if fix:
+            # Pricings may have changed since we computed the revenue
+            # above: compute it again, this time with a lock.
+            with transaction():
+                lock_pricing_point(pricing_point_id)
+                computed_revenue = _compute_pricing_point_revenue(pricing_point_id, year)
+                models.PricingPointYearlyRevenue.query.filter_by(pricingPointId=pricing_point_id, year=year).update(
+                    {"revenue": computed_revenue},
+                    synchronize_session=False,
+                )
+        drift = {
+            "pricing_point": pricing_point_id,
+            "year": year,
+            "stored_revenue": stored_revenue,
+            "computed_revenue": computed_revenue,
+        }
+        logger.warning("Found drift in stored revenue of pricing point", extra=drift | {"fixed": fix})
+        drifts.append(drift)
+    return drifts
+
+
+def _price_event(
+    event: models.FinanceEvent,
+    rule_finder: "reimbursement.CustomRuleFinder | None" = None,
+    current_revenue: int | None = None,
+) -> models.Pricing:
+    """Return a new pricing for the given event.
+
+    ``rule_finder`` and ``current_revenue`` may be given by callers
+    that price many events of the same pricing point, to avoid
+    loading rules and computing the revenue for each event.
+    """
+    new_revenue = current_revenue if current_revenue is not None else _get_current_revenue(event)
     individual_booking = event.bookingFinanceIncident.booking if event.bookingFinanceIncident else event.booking
     collective_booking = (
         event.bookingFinanceIncident.collectiveBooking if event.bookingFinanceIncident else event.collectiveBooking
@@ -547,7 +942,7 @@ def _price_event(event: models.FinanceEvent) -> models.Pricing:
         models.FinanceEventMotive.BOOKING_USED,
         models.FinanceEventMotive.BOOKING_USED_AFTER_CANCELLATION,
     ):
-        rule_finder = reimbursement.CustomRuleFinder()
+        rule_finder = rule_finder or reimbursement.CustomRuleFinder()
         rule = reimbursement.get_reimbursement_rule(booking, rule_finder, new_revenue)
         amount = -rule.apply(booking)  # outgoing, thus negative
         offerer_revenue_amount = -utils.to_cents(booking.total_amount)
@@ -696,6 +1091,11 @@ def _cancel_event_pricing(
                 reason=reason,
             )
         )
+        _update_pricing_point_revenue(
+            pricing.pricingPointId,
+            pricing.valueDate,
+            -_get_revenue_of_pricing(pricing, pricing.booking),
+        )
         pricing.status = models.PricingStatus.CANCELLED
         db.session.add(pricing)
         db.session.flush()
@@ -714,9 +1114,9 @@ def _cancel_event_pricing(
 
 def _delete_dependent_pricings(
     event: models.FinanceEvent, log_message: str, pricing_points_overriding_pricing_ordering: typing.Iterable[int] = ()
-) -> None:
+) -> bool:
     """Delete pricings for events that should be priced after the
-    requested ``event``.
+    requested ``event``. Return whether pricings have been deleted.
 
     See note in the module docstring for further details.
 
@@ -743,7 +1143,7 @@ def _delete_dependent_pricings(
 
     pricings = pricings.all()
     if not pricings:
-        return
+        return False
     pricing_ids = {pricing.id for pricing in pricings}
     events_already_priced = {pricing.eventId for pricing in pricings}
     for pricing in pricings:
@@ -777,12 +1177,18 @@ def _delete_dependent_pricings(
             raise exceptions.NonCancellablePricingError()
 
     if not pricing_ids:
-        return
+        return False
 
     # Do not reuse the `pricings` query. It should not have changed
     # since the beginning of the function (since we should have an
     # exclusive lock on the pricing point to avoid that)... but let's
     # be defensive.
+    assert event.pricingPointId  # helps mypy
+    _update_pricing_point_revenue(
+        event.pricingPointId,
+        event.valueDate,
+        -_sum_revenue_of_pricings(models.Pricing.id.in_(pricing_ids)),
+    )
     lines = models.PricingLine.query.filter(models.PricingLine.pricingId.in_(pricing_ids))
     lines.delete(synchronize_session=False)
     logs = models.PricingLog.query.filter(models.PricingLog.pricingId.in_(pricing_ids))
@@ -805,6 +1211,7 @@ def _delete_dependent_pricings(
             "pricing_point": event.pricingPointId,
         },
     )
+    return True
 
 
 def update_finance_event_pricing_date(stock: offers_models.Stock) -> None:
@@ -845,8 +1252,10 @@ def update_finance_event_pricing_date(stock: offers_models.Stock) -> None:
         force_event_repricing(first_event, models.PricingLogReason.CHANGE_DATE)
 
 
-def generate_cashflows_and_payment_files(cutoff: datetime.datetime) -> models.CashflowBatch:
-    batch = generate_cashflows(cutoff)
+def generate_cashflows_and_payment_files(
+    cutoff: datetime.datetime, by_chunks: bool = False
+) -> models.CashflowBatch:
+    batch = generate_cashflows(cutoff, by_chunks=by_chunks)
     generate_payment_files(batch)
     return batch
 
@@ -863,7 +1272,7 @@ def _get_next_cashflow_batch_label() -> str:
     return CASHFLOW_BATCH_LABEL_PREFIX + str(next_number)
 
 
-def generate_cashflows(cutoff: datetime.datetime) -> models.CashflowBatch:
+def generate_cashflows(cutoff: datetime.datetime, by_chunks: bool = False) -> models.CashflowBatch:
     """Generate a new CashflowBatch and a new cashflow for each
     reimbursement point for which there is money to transfer.
     """
@@ -871,13 +1280,13 @@ def generate_cashflows(cutoff: datetime.datetime) -> models.CashflowBatch:
     batch = models.CashflowBatch(cutoff=cutoff, label=_get_next_cashflow_batch_label())
     db.session.add(batch)
     db.session.commit()
-    _generate_cashflows(batch)
+    _generate_cashflows(batch, by_chunks=by_chunks)
     # if the script fail we want to keep the lock to forbid backoffice to modify the data
     app.redis_client.delete(conf.REDIS_GENERATE_CASHFLOW_LOCK)
     return batch
 
 
-def _generate_cashflows(batch: models.CashflowBatch) -> None:
+def _generate_cashflows(batch: models.CashflowBatch, by_chunks: bool = False) -> None:
     """Given an existing CashflowBatch and corresponding cutoff, generate
     a new cashflow for each bank account for which there is money to transfer.
 
@@ -889,9 +1298,29 @@ def _generate_cashflows(batch: models.CashflowBatch) -> None:
     # id again after each COMMIT.
     batch_id = batch.id
     logger.info("Started to generate cashflows for batch %d", batch_id)
-    filters = (
+    if by_chunks:
+        _generate_cashflows_by_chunks(batch)
+        return
+
+    bank_account_infos = (
+        _get_cashflow_pricings_query(batch.cutoff)
+        .with_entities(
+            models.BankAccount.id,
+            sqla_func.array_agg(models.Pricing.venueId.distinct()),
+        )
+        .group_by(
+            models.BankAccount.id,
+        )
+    )
+
+    for bank_account_id, venue_ids in bank_account_infos:
+        _generate_cashflow_of_bank_account(batch, bank_account_id, venue_ids)
+
+
+def _get_cashflow_pricing_filters(cutoff: datetime.datetime) -> tuple:
+    return (
         models.Pricing.status == models.PricingStatus.VALIDATED,
-        models.Pricing.valueDate < batch.cutoff,
+        models.Pricing.valueDate < cutoff,
         # We should not have any validated pricing with a cashflow,
         # this is a safety belt.
         models.CashflowPricing.pricingId.is_(None),
@@ -905,43 +1334,24 @@ def _generate_cashflows(batch: models.CashflowBatch) -> None:
                 models.Pricing.bookingId.is_not(None),
                 sa.or_(
                     offers_models.Stock.beginningDatetime.is_(None),
-                    offers_models.Stock.beginningDatetime < batch.cutoff,
+                    offers_models.Stock.beginningDatetime < cutoff,
                 ),
             ),
             sa.and_(
                 models.Pricing.collectiveBookingId.is_not(None),
-                educational_models.CollectiveStock.endDatetime < batch.cutoff,
+                educational_models.CollectiveStock.endDatetime < cutoff,
             ),
             models.FinanceEvent.bookingFinanceIncidentId.is_not(None),
         ),
     )
 
-    def _mark_as_processed(pricing_ids: typing.Iterable[int]) -> None:
-        db.session.execute(
-            sa.text(
-                """
-                WITH updated AS (
-                  UPDATE pricing
-                  SET status = :processed
-                  WHERE
-                    id in :pricing_ids
-                  RETURNING id AS pricing_id
-                )
-                INSERT INTO pricing_log
-                ("pricingId", "statusBefore", "statusAfter", reason)
-                SELECT updated.pricing_id, :validated, :processed, :log_reason from updated
-            """
-            ),
-            {
-                "validated": models.PricingStatus.VALIDATED.value,
-                "processed": models.PricingStatus.PROCESSED.value,
-                "log_reason": models.PricingLogReason.GENERATE_CASHFLOW.value,
-                "pricing_ids": tuple(pricing_ids),
-            },
-        )
 
-    bank_account_infos = (
-        models.Pricing.query.filter(*filters)
+def _get_cashflow_pricings_query(cutoff: datetime.datetime) -> BaseQuery:
+    """Return a query of pricings that should be included in cashflows
+    of the given cutoff, joined with the bank account they are paid to.
+    """
+    return (
+        models.Pricing.query.filter(*_get_cashflow_pricing_filters(cutoff))
         .outerjoin(models.Pricing.booking)
         .outerjoin(bookings_models.Booking.stock)
         .outerjoin(models.Pricing.collectiveBooking)
@@ -951,213 +1361,527 @@ def _generate_cashflows(batch: models.CashflowBatch) -> None:
             offerers_models.VenueBankAccountLink,
             offerers_models.VenueBankAccountLink.venueId == models.Pricing.venueId,
         )
-        .filter(offerers_models.VenueBankAccountLink.timespan.contains(batch.cutoff))
+        .filter(offerers_models.VenueBankAccountLink.timespan.contains(cutoff))
         .join(models.BankAccount, models.BankAccount.id == offerers_models.VenueBankAccountLink.bankAccountId)
         .outerjoin(models.CashflowPricing)
-        .with_entities(
-            models.BankAccount.id,
-            sqla_func.array_agg(models.Pricing.venueId.distinct()),
-        )
-        .group_by(
-            models.BankAccount.id,
-        )
     )
 
-    for bank_account_id, venue_ids in bank_account_infos:
-        log_extra = {
-            "batch": batch_id,
-            "bank_account": bank_account_id,
-        }
-        start = time.perf_counter()
-        logger.info("Generating cashflow", extra=log_extra)
-        try:
-            with transaction():
-                pricings = (
-                    models.Pricing.query.outerjoin(models.Pricing.booking)
-                    .outerjoin(bookings_models.Booking.stock)
-                    .outerjoin(models.Pricing.collectiveBooking)
-                    .outerjoin(educational_models.CollectiveBooking.collectiveStock)
-                    .join(models.Pricing.event)
-                    .join(
-                        models.BankAccount,
-                        models.BankAccount.id == bank_account_id,
-                    )
-                    .outerjoin(models.CashflowPricing)
-                    .filter(
-                        models.Pricing.venueId.in_(venue_ids),
-                        *filters,
-                    )
-                )
 
-                # Don't generate cashflows if ever all of the priced bookings are free → avoid creating empty invoices
-                pricings_with_lines_amount = (
-                    pricings.join(models.Pricing.lines)
-                    .with_entities(
-                        models.Pricing.id,
-                        sqla_func.count(models.PricingLine.id).label("lines_count"),
-                        sqla_func.sum(sa.case((models.PricingLine.amount == 0, 1), else_=0)).label("free_lines_count"),
-                    )
-                    .group_by(models.Pricing.id)
-                    .all()
-                )
-                pricing_ids = {e.id for e in pricings_with_lines_amount}
-                free_pricing_ids = {e.id for e in pricings_with_lines_amount if e.lines_count == e.free_lines_count}
-                if pricing_ids and (len(pricing_ids) == len(free_pricing_ids)):
-                    logger.info(
-                        "Found only free pricings, skip cashflow creation but mark pricings as processed",
-                        extra={
-                            "pricing_ids": pricing_ids,
-                            "bank_account": bank_account_id,
-                        },
-                    )
-                    _mark_as_processed(pricing_ids)
-                    continue
+def _get_offerer_revenue_mismatch_filter() -> sa.sql.ColumnElement:
+    """Return a filter on pricing lines that catches bookings whose
+    amount has been changed after they have been priced.
+    """
+    return sa.and_(
+        models.PricingLine.category == models.PricingLineCategory.OFFERER_REVENUE,
+        models.PricingLine.amount
+        != -100
+        * sa.case(
+            (
+                bookings_models.Booking.id.is_not(None),
+                bookings_models.Booking.amount * bookings_models.Booking.quantity,
+            ),
+            else_=educational_models.CollectiveStock.price,
+        ),
+    )
 
-                # Check integrity by looking for bookings whose amount
-                # has been changed after they have been priced.
-                diff = (
-                    pricings.join(models.Pricing.lines)
-                    .filter(
-                        models.PricingLine.category == models.PricingLineCategory.OFFERER_REVENUE,
-                        models.PricingLine.amount
-                        != -100
-                        * sa.case(
-                            (
-                                bookings_models.Booking.id.is_not(None),
-                                bookings_models.Booking.amount * bookings_models.Booking.quantity,
-                            ),
-                            else_=educational_models.CollectiveStock.price,
-                        ),
-                    )
-                    .with_entities(models.Pricing.id)
-                )
-                diff = {_pricing_id for _pricing_id, in diff.all()}
-                if diff:
-                    logger.error(
-                        "Found integrity error on booking prices vs. pricing lines",
-                        extra={
-                            "pricing_lines": diff,
-                            "bank_account": bank_account_id,
-                        },
-                    )
-                    continue
-                total = pricings.with_entities(sa.func.sum(models.Pricing.amount)).scalar() or 0
 
-                # The total is positive if the pro owes us more than we do.
-                if total > 0:
+def _mark_pricings_as_processed(pricing_ids: typing.Iterable[int]) -> None:
+    db.session.execute(
+        sa.text(
+            """
+            WITH updated AS (
+              UPDATE pricing
+              SET status = :processed
+              WHERE
+                id in :pricing_ids
+              RETURNING id AS pricing_id
+            )
+            INSERT INTO pricing_log
+            ("pricingId", "statusBefore", "statusAfter", reason)
+            SELECT updated.pricing_id, :validated, :processed, :log_reason from updated
+        """
+        ),
+        {
+            "validated": models.PricingStatus.VALIDATED.value,
+            "processed": models.PricingStatus.PROCESSED.value,
+            "log_reason": models.PricingLogReason.GENERATE_CASHFLOW.value,
+            "pricing_ids": tuple(pricing_ids),
+        },
+    )
 
-                    all_current_incidents = (
-                        models.FinanceIncident.query.join(models.FinanceIncident.booking_finance_incidents)
-                        .join(models.BookingFinanceIncident.finance_events)
-                        .join(models.FinanceEvent.pricings)
-                        .outerjoin(models.Pricing.cashflows)
-                        .filter(
-                            models.FinanceIncident.venueId.in_(venue_ids),
-                            models.FinanceIncident.status == models.IncidentStatus.VALIDATED,
-                            models.Cashflow.id.is_(None),  # exclude incidents that already have a cashflow
-                            models.Pricing.status == models.PricingStatus.VALIDATED,
-                            models.Pricing.valueDate < batch.cutoff,
-                        )
-                        .all()
-                    )
 
-                    override_incident_debit_note = any(incident.forceDebitNote for incident in all_current_incidents)
-                    # Last cashflow where we effectively paid (successfully or not) the pro
-                    last_cashflow = (
-                        models.Cashflow.query.filter(
-                            models.Cashflow.bankAccountId == bank_account_id,
-                            models.Cashflow.status == models.CashflowStatus.ACCEPTED,
-                        )
-                        .order_by(models.Cashflow.creationDate.desc())
-                        .first()
-                    )
-                    if last_cashflow:
-                        last_cashflow_age = (datetime.datetime.utcnow() - last_cashflow.creationDate).days
-                    else:
-                        last_cashflow_age = 0
-
-                    if (
-                        last_cashflow_age < conf.DEBIT_NOTE_AGE_THRESHOLD_FOR_CASHFLOW
-                        and not override_incident_debit_note
-                    ):
-                        for incident in all_current_incidents:
-                            history_api.add_action(
-                                history_models.ActionType.FINANCE_INCIDENT_WAIT_FOR_PAYMENT,
-                                author=None,
-                                finance_incident=incident,
-                                comment="Le montant de l’incident est supérieur au montant total des réservations validées. Donc aucun justificatif n’est généré, on attend la prochaine échéance",
-                            )
+def _can_generate_debit_note(
+    batch: models.CashflowBatch,
+    bank_account_id: int,
+    venue_ids: typing.Iterable[int],
+    add_history_actions: bool = True,
+) -> bool:
+    """Return whether a cashflow may be generated for a bank account
+    whose total is positive (i.e. the pro owes us money), which will
+    lead to a debit note.
+    """
+    all_current_incidents = (
+        models.FinanceIncident.query.join(models.FinanceIncident.booking_finance_incidents)
+        .join(models.BookingFinanceIncident.finance_events)
+        .join(models.FinanceEvent.pricings)
+        .outerjoin(models.Pricing.cashflows)
+        .filter(
+            models.FinanceIncident.venueId.in_(venue_ids),
+            models.FinanceIncident.status == models.IncidentStatus.VALIDATED,
+            models.Cashflow.id.is_(None),  # exclude incidents that already have a cashflow
+            models.Pricing.status == models.PricingStatus.VALIDATED,
+            models.Pricing.valueDate < batch.cutoff,
+        )
+        .all()
+    )
 
-                        continue
+    override_incident_debit_note = any(incident.forceDebitNote for incident in all_current_incidents)
+    # Last cashflow where we effectively paid (successfully or not) the pro
+    last_cashflow = (
+        models.Cashflow.query.filter(
+            models.Cashflow.bankAccountId == bank_account_id,
+            models.Cashflow.status == models.CashflowStatus.ACCEPTED,
+        )
+        .order_by(models.Cashflow.creationDate.desc())
+        .first()
+    )
+    if last_cashflow:
+        last_cashflow_age = (datetime.datetime.utcnow() - last_cashflow.creationDate).days
+    else:
+        last_cashflow_age = 0
+
+    if last_cashflow_age < conf.DEBIT_NOTE_AGE_THRESHOLD_FOR_CASHFLOW and not override_incident_debit_note:
+        if add_history_actions:
+            for incident in all_current_incidents:
+                history_api.add_action(
+                    history_models.ActionType.FINANCE_INCIDENT_WAIT_FOR_PAYMENT,
+                    author=None,
+                    finance_incident=incident,
+                    comment="Le montant de l’incident est supérieur au montant total des réservations validées. Donc aucun justificatif n’est généré, on attend la prochaine échéance",
+                )
+        return False
 
-                    for incident in all_current_incidents:
-                        history_api.add_action(
-                            history_models.ActionType.FINANCE_INCIDENT_GENERATE_DEBIT_NOTE,
-                            author=None,
-                            finance_incident=incident,
-                            comment="Une note de débit sera générée dans quelques jours",
-                        )
+    if add_history_actions:
+        for incident in all_current_incidents:
+            history_api.add_action(
+                history_models.ActionType.FINANCE_INCIDENT_GENERATE_DEBIT_NOTE,
+                author=None,
+                finance_incident=incident,
+                comment="Une note de débit sera générée dans quelques jours",
+            )
+    return True
 
-                cashflow = models.Cashflow(
-                    batchId=batch_id,
-                    bankAccountId=bank_account_id,
-                    status=models.CashflowStatus.PENDING,
-                    amount=total,
+
+def _generate_cashflow_of_bank_account(
+    batch: models.CashflowBatch,
+    bank_account_id: int,
+    venue_ids: typing.Iterable[int],
+) -> None:
+    batch_id = batch.id
+    filters = _get_cashflow_pricing_filters(batch.cutoff)
+    log_extra = {
+        "batch": batch_id,
+        "bank_account": bank_account_id,
+    }
+    start = time.perf_counter()
+    logger.info("Generating cashflow", extra=log_extra)
+    try:
+        with transaction():
+            pricings = (
+                models.Pricing.query.outerjoin(models.Pricing.booking)
+                .outerjoin(bookings_models.Booking.stock)
+                .outerjoin(models.Pricing.collectiveBooking)
+                .outerjoin(educational_models.CollectiveBooking.collectiveStock)
+                .join(models.Pricing.event)
+                .join(
+                    models.BankAccount,
+                    models.BankAccount.id == bank_account_id,
                 )
-                db.session.add(cashflow)
-                db.session.flush()
-                links = [
-                    models.CashflowPricing(
-                        cashflowId=cashflow.id,
-                        pricingId=pricing.id,
-                    )
-                    for pricing in pricings
-                ]
-                db.session.bulk_save_objects(links)
-                # It's possible (but unlikely) that new pricings have
-                # been added (1) between the calculation of `total`
-                # and the creation of the `CashflowPricing`s; or (2)
-                # between the creation of `CashflowPricing` and now.
-                # If (1): the cashflow amount will be wrong, which is
-                # why we check it below.
-                # If (2): calling `mark_as_processed()` on `pricings`
-                # would be wrong because it would include pricings
-                # that are not linked to any `CashflowPricing`. These
-                # pricings would then stay "processed" and never move
-                # to "invoiced".
-                cashflowed_pricings = models.CashflowPricing.query.filter_by(cashflowId=cashflow.id)
-                _mark_as_processed(
-                    {pricing_id for pricing_id, in cashflowed_pricings.with_entities(models.CashflowPricing.pricingId)}
+                .outerjoin(models.CashflowPricing)
+                .filter(
+                    models.Pricing.venueId.in_(venue_ids),
+                    *filters,
                 )
-                total_from_pricings = (
-                    cashflowed_pricings.join(models.Pricing).with_entities(sa.func.sum(models.Pricing.amount)).scalar()
-                    or 0
+            )
+
+            # Don't generate cashflows if ever all of the priced bookings are free → avoid creating empty invoices
+            pricings_with_lines_amount = (
+                pricings.join(models.Pricing.lines)
+                .with_entities(
+                    models.Pricing.id,
+                    sqla_func.count(models.PricingLine.id).label("lines_count"),
+                    sqla_func.sum(sa.case((models.PricingLine.amount == 0, 1), else_=0)).label("free_lines_count"),
                 )
-                if cashflow.amount != total_from_pricings:
-                    # We rollback (because we would not want such an
-                    # inconsistency in the database) so there is
-                    # nothing to fix... but the error is quite
-                    # unlikely to happen (see comment above), so it
-                    # warrants an analysis (hence the ERROR log level
-                    # and not INFO).
-                    logger.error(
-                        "Cashflow amount is different from the sum of its pricings, changes have been rolled back",
-                        extra={
-                            "cashflow_id": cashflow.id,
-                            "cashflow_amount": cashflow.amount,
-                            "total_from_pricings": total_from_pricings,
-                        }
-                        | log_extra,
-                    )
+                .group_by(models.Pricing.id)
+                .all()
+            )
+            pricing_ids = {e.id for e in pricings_with_lines_amount}
+            free_pricing_ids = {e.id for e in pricings_with_lines_amount if e.lines_count == e.free_lines_count}
+            if pricing_ids and (len(pricing_ids) == len(free_pricing_ids)):
+                logger.info(
+                    "Found only free pricings, skip cashflow creation but mark pricings as processed",
+                    extra={
+                        "pricing_ids": pricing_ids,
+                        "bank_account": bank_account_id,
+                    },
+                )
+                _mark_pricings_as_processed(pricing_ids)
+                return
+
+            # Check integrity by looking for bookings whose amount
+            # has been changed after they have been priced.
+            diff = (
+                pricings.join(models.Pricing.lines)
+                .filter(_get_offerer_revenue_mismatch_filter())
+                .with_entities(models.Pricing.id)
+            )
+            diff = {_pricing_id for _pricing_id, in diff.all()}
+            if diff:
+                logger.error(
+                    "Found integrity error on booking prices vs. pricing lines",
+                    extra={
+                        "pricing_lines": diff,
+                        "bank_account": bank_account_id,
+                    },
+                )
+                return
+            total = pricings.with_entities(sa.func.sum(models.Pricing.amount)).scalar() or 0
+
+            # The total is positive if the pro owes us more than we do.
+            if total > 0 and not _can_generate_debit_note(batch, bank_account_id, venue_ids):
+                return
+
+            cashflow = models.Cashflow(
+                batchId=batch_id,
+                bankAccountId=bank_account_id,
+                status=models.CashflowStatus.PENDING,
+                amount=total,
+            )
+            db.session.add(cashflow)
+            db.session.flush()
+            links = [
+                models.CashflowPricing(
+                    cashflowId=cashflow.id,
+                    pricingId=pricing.id,
+                )
+                for pricing in pricings
+            ]
+            db.session.bulk_save_objects(links)
+            # It's possible (but unlikely) that new pricings have
+            # been added (1) between the calculation of `total`
+            # and the creation of the `CashflowPricing`s; or (2)
+            # between the creation of `CashflowPricing` and now.
+            # If (1): the cashflow amount will be wrong, which is
+            # why we check it below.
+            # If (2): calling `mark_as_processed()` on `pricings`
+            # would be wrong because it would include pricings
+            # that are not linked to any `CashflowPricing`. These
+            # pricings would then stay "processed" and never move
+            # to "invoiced".
+            cashflowed_pricings = models.CashflowPricing.query.filter_by(cashflowId=cashflow.id)
+            _mark_pricings_as_processed(
+                {pricing_id for pricing_id, in cashflowed_pricings.with_entities(models.CashflowPricing.pricingId)}
+            )
+            total_from_pricings = (
+                cashflowed_pricings.join(models.Pricing).with_entities(sa.func.sum(models.Pricing.amount)).scalar()
+                or 0
+            )
+            if cashflow.amount != total_from_pricings:
+                # We rollback (because we would not want such an
+                # inconsistency in the database) so there is
+                # nothing to fix... but the error is quite
+                # unlikely to happen (see comment above), so it
+                # warrants an analysis (hence the ERROR log level
+                # and not INFO).
+                logger.error(
+                    "Cashflow amount is different from the sum of its pricings, changes have been rolled back",
+                    extra={
+                        "cashflow_id": cashflow.id,
+                        "cashflow_amount": cashflow.amount,
+                        "total_from_pricings": total_from_pricings,
+                    }
+                    | log_extra,
+                )
+                db.session.rollback()
+                return
+            db.session.commit()
+            elapsed = time.perf_counter() - start
+            logger.info("Generated cashflow", extra=log_extra | {"elapsed": elapsed})
+    except Exception:  # pylint: disable=broad-except
+        if settings.IS_RUNNING_TESTS:
+            raise
+        logger.exception("Could not generate cashflow for bank account %d", bank_account_id, extra=log_extra)
+
+
+def simulate_cashflows(cutoff: datetime.datetime) -> dict[int, int]:
+    """Return the amount of the cashflow that would be generated for
+    each bank account with the given cutoff, without writing anything.
+    """
+    batch = models.CashflowBatch(cutoff=cutoff)
+    return _generate_cashflows_by_chunks(batch, dry_run=True)
+
+
+def _generate_cashflows_by_chunks(
+    batch: models.CashflowBatch,
+    dry_run: bool = False,
+    chunk_size: int = 500,
+) -> dict[int, int]:
+    """Generate cashflows of bank accounts by chunks, with a handful
+    of set-based statements per chunk, and return the amount of
+    generated cashflows by bank account.
+
+    A chunk whose processing fails is rolled back and its bank
+    accounts are processed one by one.
+
+    If `dry_run` is true, nothing is written: returned amounts are
+    those of cashflows that would have been generated.
+    """
+    bank_account_ids = [
+        bank_account_id
+        for bank_account_id, in _get_cashflow_pricings_query(batch.cutoff)
+        .with_entities(models.BankAccount.id)
+        .distinct()
+        .order_by(models.BankAccount.id)
+    ]
+    totals = {}
+    for chunk in get_chunks(bank_account_ids, chunk_size):
+        log_extra = {"batch": batch.id, "bank_accounts": len(chunk)}
+        start = time.perf_counter()
+        try:
+            with transaction():
+                chunk_totals = _generate_cashflows_of_bank_accounts(batch, chunk, dry_run)
+                if dry_run:
                     db.session.rollback()
-                    continue
-                db.session.commit()
-                elapsed = time.perf_counter() - start
-                logger.info("Generated cashflow", extra=log_extra | {"elapsed": elapsed})
         except Exception:  # pylint: disable=broad-except
-            if settings.IS_RUNNING_TESTS:
+            if settings.IS_RUNNING_TESTS or dry_run:
                 raise
-            logger.exception("Could not generate cashflow for bank account %d", bank_account_id, extra=log_extra)
+            logger.exception("Could not generate cashflows of a chunk of bank accounts", extra=log_extra)
+            chunk_totals = None
+        if chunk_totals is None:
+            chunk_totals = _generate_cashflows_one_by_one(batch, chunk)
+        totals.update(chunk_totals)
+        logger.info(
+            "Generated cashflows of a chunk of bank accounts",
+            extra=log_extra | {"cashflows": len(chunk_totals), "elapsed": time.perf_counter() - start},
+        )
+    return totals
+
+
+def _generate_cashflows_one_by_one(batch: models.CashflowBatch, bank_account_ids: list[int]) -> dict[int, int]:
+    bank_account_infos = (
+        _get_cashflow_pricings_query(batch.cutoff)
+        .filter(models.BankAccount.id.in_(bank_account_ids))
+        .with_entities(
+            models.BankAccount.id,
+            sqla_func.array_agg(models.Pricing.venueId.distinct()),
+        )
+        .group_by(models.BankAccount.id)
+        .all()
+    )
+    for bank_account_id, venue_ids in bank_account_infos:
+        _generate_cashflow_of_bank_account(batch, bank_account_id, venue_ids)
+    return dict(
+        models.Cashflow.query.filter(
+            models.Cashflow.batchId == batch.id,
+            models.Cashflow.bankAccountId.in_(bank_account_ids),
+        ).with_entities(models.Cashflow.bankAccountId, models.Cashflow.amount)
+    )
+
+
+def _generate_cashflows_of_bank_accounts(
+    batch: models.CashflowBatch,
+    bank_account_ids: list[int],
+    dry_run: bool,
+) -> dict[int, int] | None:
+    """Generate cashflows of the requested bank accounts and return
+    their amount by bank account, or None if the changes have been
+    rolled back.
+
+    This function must be called within a transaction.
+    """
+    pricings = _get_cashflow_pricings_query(batch.cutoff).filter(models.BankAccount.id.in_(bank_account_ids))
+
+    # Compute, in a single query, everything we need to know about
+    # each bank account: see `_generate_cashflow_of_bank_account()`
+    # for the meaning of each check.
+    pricing_infos = (
+        pricings.outerjoin(models.Pricing.lines)
+        .group_by(models.BankAccount.id, models.Pricing.id)
+        .with_entities(
+            models.BankAccount.id.label("bank_account_id"),
+            models.Pricing.id.label("pricing_id"),
+            models.Pricing.venueId.label("venue_id"),
+            models.Pricing.amount.label("amount"),
+            sqla_func.count(models.PricingLine.id).label("lines_count"),
+            sqla_func.sum(sa.case((models.PricingLine.amount == 0, 1), else_=0)).label("free_lines_count"),
+            sqla_func.bool_or(_get_offerer_revenue_mismatch_filter()).label("has_mismatch"),
+        )
+        .subquery()
+    )
+    bank_account_infos = (
+        db.session.query(
+            pricing_infos.c.bank_account_id,
+            sqla_func.array_agg(pricing_infos.c.venue_id.distinct()).label("venue_ids"),
+            sqla_func.sum(pricing_infos.c.amount).label("total"),
+            sqla_func.count(pricing_infos.c.pricing_id)
+            .filter(pricing_infos.c.lines_count > 0)
+            .label("pricings_with_lines_count"),
+            sqla_func.count(pricing_infos.c.pricing_id)
+            .filter(
+                pricing_infos.c.lines_count > 0,
+                pricing_infos.c.lines_count == pricing_infos.c.free_lines_count,
+            )
+            .label("free_pricings_count"),
+            sqla_func.bool_or(pricing_infos.c.has_mismatch).label("has_mismatch"),
+        )
+        .group_by(pricing_infos.c.bank_account_id)
+        .all()
+    )
+
+    free_bank_account_ids = []
+    totals = {}
+    for info in bank_account_infos:
+        if info.pricings_with_lines_count and info.pricings_with_lines_count == info.free_pricings_count:
+            free_bank_account_ids.append(info.bank_account_id)
+            continue
+        if info.has_mismatch:
+            logger.error(
+                "Found integrity error on booking prices vs. pricing lines",
+                extra={
+                    "pricing_lines": {
+                        pricing_id
+                        for pricing_id, in pricings.join(models.Pricing.lines)
+                        .filter(
+                            models.BankAccount.id == info.bank_account_id,
+                            _get_offerer_revenue_mismatch_filter(),
+                        )
+                        .with_entities(models.Pricing.id)
+                    },
+                    "bank_account": info.bank_account_id,
+                },
+            )
+            continue
+        total = info.total or 0
+        # The total is positive if the pro owes us more than we do.
+        if total > 0 and not _can_generate_debit_note(
+            batch, info.bank_account_id, info.venue_ids, add_history_actions=not dry_run
+        ):
+            continue
+        totals[info.bank_account_id] = total
+
+    if dry_run:
+        return totals
+
+    if free_bank_account_ids:
+        free_pricing_ids = {
+            pricing_id
+            for pricing_id, in pricings.join(models.Pricing.lines)
+            .filter(models.BankAccount.id.in_(free_bank_account_ids))
+            .with_entities(models.Pricing.id)
+            .distinct()
+        }
+        logger.info(
+            "Found only free pricings, skip cashflow creation but mark pricings as processed",
+            extra={
+                "pricing_ids": free_pricing_ids,
+                "bank_accounts": free_bank_account_ids,
+            },
+        )
+        _mark_pricings_as_processed(free_pricing_ids)
+
+    if not totals:
+        return totals
+
+    cashflowed_pricings = pricings.filter(models.BankAccount.id.in_(list(totals)))
+    cashflow_table = models.Cashflow.__table__
+    cashflows = db.session.execute(
+        sa.insert(cashflow_table)
+        .from_select(
+            ["batchId", "bankAccountId", "status", "amount"],
+            cashflowed_pricings.group_by(models.BankAccount.id)
+            .with_entities(
+                sa.literal(batch.id),
+                models.BankAccount.id,
+                sa.literal(models.CashflowStatus.PENDING.value),
+                sqla_func.sum(models.Pricing.amount),
+            )
+            .statement,
+        )
+        .returning(cashflow_table.c.id, cashflow_table.c.bankAccountId, cashflow_table.c.amount)
+    ).all()
+    cashflow_ids = [cashflow.id for cashflow in cashflows]
+    db.session.execute(
+        sa.insert(models.CashflowPricing.__table__).from_select(
+            ["cashflowId", "pricingId"],
+            cashflowed_pricings.join(
+                models.Cashflow,
+                sa.and_(
+                    models.Cashflow.bankAccountId == models.BankAccount.id,
+                    models.Cashflow.id.in_(cashflow_ids),
+                ),
+            )
+            .with_entities(models.Cashflow.id, models.Pricing.id)
+            .statement,
+        )
+    )
+    # Only mark pricings that are linked to the new cashflows: see
+    # comment in `_generate_cashflow_of_bank_account()`.
+    db.session.execute(
+        sa.text(
+            """
+            WITH updated AS (
+              UPDATE pricing
+              SET status = :processed
+              FROM cashflow_pricing
+              WHERE
+                cashflow_pricing."pricingId" = pricing.id
+                AND cashflow_pricing."cashflowId" IN :cashflow_ids
+              RETURNING pricing.id AS pricing_id
+            )
+            INSERT INTO pricing_log
+            ("pricingId", "statusBefore", "statusAfter", reason)
+            SELECT updated.pricing_id, :validated, :processed, :log_reason from updated
+        """
+        ),
+        {
+            "validated": models.PricingStatus.VALIDATED.value,
+            "processed": models.PricingStatus.PROCESSED.value,
+            "log_reason": models.PricingLogReason.GENERATE_CASHFLOW.value,
+            "cashflow_ids": tuple(cashflow_ids),
+        },
+    )
+    # New pricings may have been added between the computation of
+    # cashflow amounts and the creation of `CashflowPricing`s.
+    wrong_cashflows = (
+        models.Cashflow.query.join(models.Cashflow.pricings)
+        .filter(models.Cashflow.id.in_(cashflow_ids))
+        .group_by(models.Cashflow.id)
+        .having(models.Cashflow.amount != sqla_func.sum(models.Pricing.amount))
+        .with_entities(
+            models.Cashflow.id,
+            models.Cashflow.amount,
+            sqla_func.sum(models.Pricing.amount).label("total_from_pricings"),
+        )
+        .all()
+    )
+    if wrong_cashflows:
+        logger.error(
+            "Cashflow amount is different from the sum of its pricings, changes of the chunk have been rolled back",
+            extra={
+                "batch": batch.id,
+                "cashflows": [
+                    {
+                        "cashflow_id": cashflow.id,
+                        "cashflow_amount": cashflow.amount,
+                        "total_from_pricings": cashflow.total_from_pricings,
+                    }
+                    for cashflow in wrong_cashflows
+                ],
+            },
+        )
+        db.session.rollback()
+        return None
+    return {cashflow.bankAccountId: cashflow.amount for cashflow in cashflows}
 
 
 def generate_payment_files(batch: models.CashflowBatch) -> None:
@@ -1275,11 +1999,9 @@ def _write_csv(
     # Store file in a dedicated directory within "/tmp". It's easier
     # to clean files in tests that way.
     path = pathlib.Path(tempfile.mkdtemp()) / filename
-    with open(path, "w+", encoding="utf-8") as fp:
-        writer = csv.writer(fp, quoting=csv.QUOTE_NONNUMERIC)
-        writer.writerow(header)
-        if rows is not None:
-            writer.writerows(row_formatter(row) for row in rows)
+    # Rows are written as they are fetched. If the file is compressed,
+    # they are written directly in the archive, without any
+    # intermediate uncompressed file.
     if compress:
         compressed_path = pathlib.Path(str(path) + ".zip")
         with zipfile.ZipFile(
@@ -1288,11 +2010,46 @@ def _write_csv(
             compression=zipfile.ZIP_DEFLATED,
             compresslevel=9,
         ) as zfile:
-            zfile.write(path, arcname=path.name)
+            with zfile.open(filename, "w", force_zip64=True) as fp:
+                row_count = _write_csv_rows(fp, header, rows, row_formatter)
+            csv_size = zfile.getinfo(filename).file_size
         path = compressed_path
+    else:
+        with open(path, "wb") as fp:
+            row_count = _write_csv_rows(fp, header, rows, row_formatter)
+        csv_size = path.stat().st_size
+    logger.info(
+        "Wrote finance CSV file",
+        extra={
+            "path": str(path),
+            "rows": row_count,
+            "csv_bytes": csv_size,
+            "file_bytes": path.stat().st_size,
+        },
+    )
     return path
 
 
+def _write_csv_rows(
+    binary_fp: typing.IO[bytes],
+    header: typing.Iterable,
+    rows: typing.Iterable,
+    row_formatter: typing.Callable[[typing.Iterable], typing.Iterable],
+) -> int:
+    """Write header and rows to the given binary file and return the
+    number of rows (excluding the header).
+    """
+    row_count = 0
+    with io.TextIOWrapper(binary_fp, encoding="utf-8", newline="") as fp:
+        writer = csv.writer(fp, quoting=csv.QUOTE_NONNUMERIC)
+        writer.writerow(header)
+        if rows is not None:
+            for row in rows:
+                writer.writerow(row_formatter(row))
+                row_count += 1
+    return row_count
+
+
 def _generate_bank_accounts_file(cutoff: datetime.datetime) -> pathlib.Path:
     header = (
         "Lieux liés au compte bancaire",
@@ -1341,7 +2098,7 @@ def _generate_bank_accounts_file(cutoff: datetime.datetime) -> pathlib.Path:
         _clean_for_accounting(row.iban),
         _clean_for_accounting(row.bic),
     )
-    return _write_csv("bank_accounts", header, rows=query, row_formatter=row_formatter)
+    return _write_csv("bank_accounts", header, rows=query.yield_per(1_000), row_formatter=row_formatter)
 
 
 def _clean_for_accounting(value: str) -> str:
@@ -1472,7 +2229,7 @@ def _generate_payments_file(batch: models.CashflowBatch, only_caledonian: bool =
             sa.column("caledonian_label"),
             sqla_func.sum(sa.column("pricing_amount")).label("pricing_amount"),
         )
-        .all()
+        .yield_per(1_000)
     )
 
     collective_query = get_collective_data(
@@ -1506,7 +2263,7 @@ def _generate_payments_file(batch: models.CashflowBatch, only_caledonian: bool =
                 sa.column("ministry"),
                 sqla_func.sum(sa.column("pricing_amount")).label("pricing_amount"),
             )
-            .all()
+            .yield_per(1_000)
         )
 
     return _write_csv(
@@ -1744,13 +2501,29 @@ def generate_invoices_and_debit_notes(batch: models.CashflowBatch) -> None:
     """Generate and store all invoices and debit notes."""
     invoice_rows = [(False, row) for row in _get_cashflows_by_bank_accounts(batch)]
     debit_note_rows = [(True, row) for row in _get_cashflows_by_bank_accounts(batch, only_debit_notes=True)]
+    use_worker_pools = feature.FeatureToggle.WIP_GENERATE_INVOICES_WITH_WORKER_POOLS.is_active()
+    invoices_without_pdf = _get_invoices_without_pdf(batch) if use_worker_pools else {}
 
-    if not invoice_rows and not debit_note_rows:
+    if not invoice_rows and not debit_note_rows and not invoices_without_pdf:
         raise exceptions.NoInvoiceToGenerate()
 
     _mark_free_pricings_as_invoiced()
 
-    for is_debit_note, row in invoice_rows + debit_note_rows:
+    if use_worker_pools:
+        _generate_invoices_with_worker_pools(batch, invoice_rows + debit_note_rows, invoices_without_pdf)
+    else:
+        _generate_invoices_one_by_one(invoice_rows + debit_note_rows)
+
+    # TODO: remove csv generation once migration to the new finance tool is finalized
+    with log_elapsed(logger, "Generated CSV invoices file"):
+        path = generate_invoice_file(batch)
+    drive_folder_name = _get_drive_folder_name(batch)
+    with log_elapsed(logger, "Uploaded CSV invoices file to Google Drive"):
+        _upload_files_to_google_drive(drive_folder_name, [path])
+
+
+def _generate_invoices_one_by_one(rows: list[tuple[bool, typing.Any]]) -> None:
+    for is_debit_note, row in rows:
         try:
             with transaction():
                 extra = {"bank_account_id": row.bank_account_id}
@@ -1772,12 +2545,177 @@ def generate_invoices_and_debit_notes(batch: models.CashflowBatch) -> None:
                 },
             )
 
-    # TODO: remove csv generation once migration to the new finance tool is finalized
-    with log_elapsed(logger, "Generated CSV invoices file"):
-        path = generate_invoice_file(batch)
-    drive_folder_name = _get_drive_folder_name(batch)
-    with log_elapsed(logger, "Uploaded CSV invoices file to Google Drive"):
-        _upload_files_to_google_drive(drive_folder_name, [path])
+
+def _get_invoices_without_pdf(batch: models.CashflowBatch) -> dict[int, bool]:
+    """Return invoices of the batch that have been generated by a
+    previous (and interrupted) run of `_generate_invoices_with_worker_pools()`
+    but whose PDF has not been stored yet, as a mapping of invoice id
+    to whether it is a debit note.
+    """
+    key = conf.REDIS_INVOICES_WITHOUT_PDF.format(batch_id=batch.id)
+    return {
+        int(invoice_id): bool(int(is_debit_note))
+        for invoice_id, is_debit_note in app.redis_client.hgetall(key).items()
+    }
+
+
+def _generate_invoices_with_worker_pools(
+    batch: models.CashflowBatch,
+    rows: list[tuple[bool, typing.Any]],
+    invoices_without_pdf: dict[int, bool],
+) -> None:
+    """Generate and store invoices and debit notes, with PDF rendering
+    and upload delegated to worker pools.
+
+    Invoices and their HTML need the database: they are generated in
+    this process, one bank account at a time. PDF rendering is
+    CPU-bound and is done by a pool of processes that share the cache
+    of static files (fonts, images) of their URL fetcher. PDF files
+    are uploaded to the object storage by a pool of threads.
+
+    Each invoice is recorded in Redis as soon as it has been committed
+    and removed once its PDF has been stored and the email sent. If a
+    run is interrupted, the next run of the same batch first resumes
+    these invoices, and then goes on with bank accounts that have not
+    been invoiced yet (see `_filter_invoiceable_cashflows()`).
+    """
+    redis_key = conf.REDIS_INVOICES_WITHOUT_PDF.format(batch_id=batch.id)
+    max_pending_invoices = 2 * (settings.FINANCE_INVOICE_PDF_WORKERS + settings.FINANCE_INVOICE_UPLOAD_WORKERS)
+    pdf_futures: dict[concurrent.futures.Future, tuple[int, str]] = {}
+    upload_futures: dict[concurrent.futures.Future, int] = {}
+    stages = ("html", "pdf", "upload", "email")
+    counts = dict.fromkeys(stages, 0) | {"errors": 0}
+    durations = dict.fromkeys(stages, 0.0)
+    start = time.perf_counter()
+
+    def log_throughput(message: str) -> None:
+        elapsed = time.perf_counter() - start
+        logger.info(
+            message,
+            extra={
+                "batch_id": batch.id,
+                "elapsed": round(elapsed, 3),
+                "errors": counts["errors"],
+                "stages": {
+                    stage: {
+                        "count": counts[stage],
+                        # Total time spent by workers of this stage.
+                        "busy_time": round(durations[stage], 3),
+                        "per_second": round(counts[stage] / elapsed, 2) if elapsed else None,
+                    }
+                    for stage in stages
+                },
+            },
+        )
+
+    def record(stage: str, duration: float) -> None:
+        counts[stage] += 1
+        durations[stage] += duration
+
+    def handle_error(message: str, invoice_id: int) -> None:
+        if settings.IS_RUNNING_TESTS:
+            raise
+        counts["errors"] += 1
+        logger.exception(message, extra={"batch_id": batch.id, "invoice_id": invoice_id})
+
+    def submit(invoice: models.Invoice, is_debit_note: bool) -> None:
+        html_start = time.perf_counter()
+        if is_debit_note:
+            invoice_html = _generate_debit_note_html(invoice, batch)
+        else:
+            invoice_html = _generate_invoice_html(invoice, batch)
+        record("html", time.perf_counter() - html_start)
+        future = pdf_pool.submit(pdf_utils.generate_timed_pdf_from_html, invoice_html)
+        pdf_futures[future] = (invoice.id, invoice.storage_object_id)
+
+    def process_done_futures(max_pending: int) -> None:
+        # Wait (if there are too many pending invoices) and process all
+        # done futures: send rendered PDF files to the upload pool,
+        # send emails for stored PDF files.
+        while pdf_futures or upload_futures:
+            must_wait = len(pdf_futures) + len(upload_futures) > max_pending
+            done, _ = concurrent.futures.wait(
+                [*pdf_futures, *upload_futures],
+                timeout=None if must_wait else 0,
+                return_when=concurrent.futures.FIRST_COMPLETED,
+            )
+            if not done:
+                return
+            for future in done:
+                if future in pdf_futures:
+                    invoice_id, storage_object_id = pdf_futures.pop(future)
+                    try:
+                        invoice_pdf, duration = future.result()
+                    except Exception:  # pylint: disable=broad-except
+                        handle_error("Could not generate PDF of invoice", invoice_id)
+                        continue
+                    record("pdf", duration)
+                    upload_future = upload_pool.submit(_store_timed_invoice_pdf, storage_object_id, invoice_pdf)
+                    upload_futures[upload_future] = invoice_id
+                    continue
+                invoice_id = upload_futures.pop(future)
+                try:
+                    record("upload", future.result())
+                    email_start = time.perf_counter()
+                    with transaction():
+                        invoice = models.Invoice.query.get(invoice_id)
+                        transactional_mails.send_invoice_available_to_pro_email(invoice, batch)
+                    record("email", time.perf_counter() - email_start)
+                    app.redis_client.hdel(redis_key, invoice_id)
+                except Exception:  # pylint: disable=broad-except
+                    handle_error("Could not store PDF of invoice", invoice_id)
+                    continue
+                if counts["email"] % 1000 == 0:
+                    log_throughput("Generating invoices with worker pools")
+
+    # Worker processes need neither the database connections nor the
+    # Flask application of this process: use "spawn" instead of "fork"
+    # so that they do not inherit them.
+    with tempfile.TemporaryDirectory() as url_fetcher_cache_dir:
+        with concurrent.futures.ProcessPoolExecutor(
+            max_workers=settings.FINANCE_INVOICE_PDF_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=pdf_utils.use_shared_url_fetcher_cache,
+            initargs=(url_fetcher_cache_dir,),
+        ) as pdf_pool, concurrent.futures.ThreadPoolExecutor(
+            max_workers=settings.FINANCE_INVOICE_UPLOAD_WORKERS,
+        ) as upload_pool:
+            for invoice_id, is_debit_note in invoices_without_pdf.items():
+                try:
+                    with transaction():
+                        submit(models.Invoice.query.get(invoice_id), is_debit_note)
+                except Exception:  # pylint: disable=broad-except
+                    handle_error("Could not resume generation of invoice", invoice_id)
+                process_done_futures(max_pending_invoices)
+
+            for is_debit_note, row in rows:
+                try:
+                    with transaction():
+                        invoice = _generate_invoice(
+                            bank_account_id=row.bank_account_id,
+                            cashflow_ids=row.cashflow_ids,
+                            is_debit_note=is_debit_note,
+                        )
+                        if invoice:
+                            app.redis_client.hset(redis_key, str(invoice.id), int(is_debit_note))
+                            app.redis_client.expire(redis_key, conf.REDIS_INVOICES_WITHOUT_PDF_TIMEOUT)
+                            submit(invoice, is_debit_note)
+                except Exception:  # pylint: disable=broad-except
+                    if settings.IS_RUNNING_TESTS:
+                        raise
+                    counts["errors"] += 1
+                    logger.exception(
+                        "Could not generate debit note" if is_debit_note else "Could not generate invoice",
+                        extra={
+                            "bank_account_id": row.bank_account_id,
+                            "cashflow_ids": row.cashflow_ids,
+                        },
+                    )
+                process_done_futures(max_pending_invoices)
+
+            process_done_futures(0)
+
+    log_throughput("Generated invoices with worker pools")
 
 
 def generate_invoices_and_debit_notes_legacy(batch: models.CashflowBatch) -> None:
@@ -1830,7 +2768,7 @@ def generate_invoice_file(batch: models.CashflowBatch) -> pathlib.Path:
         "Somme des tickets de facturation",
     ]
 
-    def get_data(query: BaseQuery, bank_accounts: typing.Iterable[int]) -> BaseQuery:
+    def get_data(query: BaseQuery, invoice_ids: typing.Iterable[int]) -> BaseQuery:
         return (
             query.join(models.Pricing.lines)
             .join(bookings_models.Booking.deposit)
@@ -1838,7 +2776,7 @@ def generate_invoice_file(batch: models.CashflowBatch) -> pathlib.Path:
             .join(models.BankAccount.offerer)
             .filter(
                 models.Cashflow.batchId == batch.id,
-                models.Invoice.bankAccountId.in_(bank_accounts),
+                models.Invoice.id.in_(invoice_ids),
             )
             .group_by(
                 models.Invoice.id,
@@ -1861,7 +2799,7 @@ def generate_invoice_file(batch: models.CashflowBatch) -> pathlib.Path:
             )
         )
 
-    def get_collective_data(query: BaseQuery, bank_accounts: typing.Iterable[int]) -> BaseQuery:
+    def get_collective_data(query: BaseQuery, invoice_ids: typing.Iterable[int]) -> BaseQuery:
         return (
             query.join(models.Pricing.lines)
             .join(educational_models.CollectiveBooking.educationalInstitution)
@@ -1878,7 +2816,7 @@ def generate_invoice_file(batch: models.CashflowBatch) -> pathlib.Path:
             .outerjoin(educational_models.EducationalInstitution.programs)
             .filter(
                 models.Cashflow.batchId == batch.id,
-                models.Invoice.bankAccountId.in_(bank_accounts),
+                models.Invoice.id.in_(invoice_ids),
             )
             .group_by(
                 models.Invoice.id,
@@ -1904,108 +2842,123 @@ def generate_invoice_file(batch: models.CashflowBatch) -> pathlib.Path:
             )
         )
 
-    bank_accounts_query = (
-        models.Invoice.query.with_entities(models.Invoice.bankAccountId)
-        .join(models.Invoice.cashflows)
-        .filter(models.Cashflow.batchId == batch.id)
-    )
-    bank_accounts = [i.bankAccountId for i in bank_accounts_query]
-    indiv_data = []
-    collective_data = []
-    chunk_size = 100
-    for i in range(0, len(bank_accounts), chunk_size):
-        bank_accounts_chunk = bank_accounts[i : i + chunk_size]
-
-        indiv_query = get_data(
-            models.Invoice.query.join(models.Invoice.cashflows)
-            .join(models.Cashflow.pricings)
-            .join(models.Pricing.booking),
-            bank_accounts_chunk,
-        )
-        indiv_incident_query = get_data(
-            models.Invoice.query.join(models.Invoice.cashflows)
-            .join(models.Cashflow.pricings)
-            .join(models.Pricing.event)
-            .join(models.FinanceEvent.bookingFinanceIncident)
-            .join(models.BookingFinanceIncident.booking),
-            bank_accounts_chunk,
-        )
-
-        indiv_data.extend(
-            indiv_query.union(indiv_incident_query)
-            .group_by(
-                sa.column("invoice_date"),
-                sa.column("invoice_reference"),
-                sa.column("bank_account_id"),
-                sa.column("pricing_line_category"),
-                sa.column("deposit_type"),
-                sa.column("ministry"),
-            )
-            .with_entities(
-                sa.column("invoice_date"),
-                sa.column("invoice_reference"),
-                sa.column("bank_account_id"),
-                sa.column("pricing_line_category"),
-                sa.column("deposit_type"),
-                sa.column("ministry"),
-                sqla_func.sum(sa.column("pricing_line_amount")).label("pricing_line_amount"),
+    # Rows are streamed to the CSV file, sorted by invoice reference.
+    # Invoices are processed by chunks (ordered by reference) so that
+    # each query stays small, and rows of each chunk are sorted by the
+    # database instead of being all loaded and sorted in memory. The
+    # "C" collation sorts strings like Python does.
+    invoice_ids = [
+        invoice_id
+        for invoice_id, in models.Invoice.query.filter(
+            models.Invoice.id.in_(
+                sa.select(models.InvoiceCashflow.invoiceId)
+                .join(models.Cashflow, models.Cashflow.id == models.InvoiceCashflow.cashflowId)
+                .where(models.Cashflow.batchId == batch.id)
             )
-            .all()
-        )
-
-        collective_query = get_collective_data(
-            models.Invoice.query.join(models.Invoice.cashflows)
-            .join(models.Cashflow.pricings)
-            .join(models.Pricing.collectiveBooking),
-            bank_accounts_chunk,
         )
+        .order_by(sa.collate(models.Invoice.reference, "C"))
+        .with_entities(models.Invoice.id)
+    ]
+    chunk_size = 100
+    pricing_line_category_order = sa.case(
+        {
+            category: index
+            for index, category in enumerate(sorted([e.value for e in models.PricingLineCategory], reverse=True))
+        },
+        value=sa.column("pricing_line_category"),
+    )
 
-        collective_incident_query = get_collective_data(
-            models.Invoice.query.join(models.Invoice.cashflows)
-            .join(models.Cashflow.pricings)
-            .join(models.Pricing.event)
-            .join(models.FinanceEvent.bookingFinanceIncident)
-            .join(models.BookingFinanceIncident.collectiveBooking),
-            bank_accounts_chunk,
-        )
+    def iter_indiv_rows() -> typing.Iterator:
+        for invoice_ids_chunk in get_chunks(invoice_ids, chunk_size):
+            indiv_query = get_data(
+                models.Invoice.query.join(models.Invoice.cashflows)
+                .join(models.Cashflow.pricings)
+                .join(models.Pricing.booking),
+                invoice_ids_chunk,
+            )
+            indiv_incident_query = get_data(
+                models.Invoice.query.join(models.Invoice.cashflows)
+                .join(models.Cashflow.pricings)
+                .join(models.Pricing.event)
+                .join(models.FinanceEvent.bookingFinanceIncident)
+                .join(models.BookingFinanceIncident.booking),
+                invoice_ids_chunk,
+            )
 
-        collective_data.extend(
-            collective_query.union(collective_incident_query)
-            .group_by(
-                sa.column("invoice_date"),
-                sa.column("invoice_reference"),
-                sa.column("bank_account_id"),
-                sa.column("pricing_line_category"),
-                sa.column("ministry"),
+            yield from (
+                indiv_query.union(indiv_incident_query)
+                .group_by(
+                    sa.column("invoice_date"),
+                    sa.column("invoice_reference"),
+                    sa.column("bank_account_id"),
+                    sa.column("pricing_line_category"),
+                    sa.column("deposit_type"),
+                    sa.column("ministry"),
+                )
+                .with_entities(
+                    sa.column("invoice_date"),
+                    sa.column("invoice_reference"),
+                    sa.column("bank_account_id"),
+                    sa.column("pricing_line_category"),
+                    sa.column("deposit_type"),
+                    sa.column("ministry"),
+                    sqla_func.sum(sa.column("pricing_line_amount")).label("pricing_line_amount"),
+                )
+                .order_by(
+                    sa.collate(sa.column("invoice_reference"), "C"),
+                    sa.collate(sa.cast(sa.column("deposit_type"), sa.Text), "C"),
+                    pricing_line_category_order,
+                )
+                .yield_per(1_000)
             )
-            .with_entities(
-                sa.column("invoice_date"),
-                sa.column("invoice_reference"),
-                sa.column("bank_account_id"),
-                sa.column("pricing_line_category"),
-                sa.column("ministry"),
-                sqla_func.sum(sa.column("pricing_line_amount")).label("pricing_line_amount"),
+
+    def iter_collective_rows() -> typing.Iterator:
+        for invoice_ids_chunk in get_chunks(invoice_ids, chunk_size):
+            collective_query = get_collective_data(
+                models.Invoice.query.join(models.Invoice.cashflows)
+                .join(models.Cashflow.pricings)
+                .join(models.Pricing.collectiveBooking),
+                invoice_ids_chunk,
             )
-            .all()
-        )
 
-    pricing_line_dict = {}
+            collective_incident_query = get_collective_data(
+                models.Invoice.query.join(models.Invoice.cashflows)
+                .join(models.Cashflow.pricings)
+                .join(models.Pricing.event)
+                .join(models.FinanceEvent.bookingFinanceIncident)
+                .join(models.BookingFinanceIncident.collectiveBooking),
+                invoice_ids_chunk,
+            )
 
-    for index, category in enumerate(sorted([e.value for e in models.PricingLineCategory], reverse=True)):
-        pricing_line_dict[category] = index
+            yield from (
+                collective_query.union(collective_incident_query)
+                .group_by(
+                    sa.column("invoice_date"),
+                    sa.column("invoice_reference"),
+                    sa.column("bank_account_id"),
+                    sa.column("pricing_line_category"),
+                    sa.column("ministry"),
+                )
+                .with_entities(
+                    sa.column("invoice_date"),
+                    sa.column("invoice_reference"),
+                    sa.column("bank_account_id"),
+                    sa.column("pricing_line_category"),
+                    sa.column("ministry"),
+                    sqla_func.sum(sa.column("pricing_line_amount")).label("pricing_line_amount"),
+                )
+                .order_by(
+                    sa.collate(sa.column("invoice_reference"), "C"),
+                    sa.collate(sa.column("ministry"), "C"),
+                    pricing_line_category_order,
+                )
+                .yield_per(1_000)
+            )
 
-    indiv_data = sorted(
-        indiv_data,
-        key=lambda o: (o.invoice_reference, o.deposit_type, pricing_line_dict[o.pricing_line_category]),
-    )
-    collective_data = sorted(
-        collective_data,
-        key=lambda o: (o.invoice_reference, o.ministry, pricing_line_dict[o.pricing_line_category]),
-    )
     return _write_csv(
         f"invoices_{batch.label}",
         header,
-        rows=itertools.chain(indiv_data, collective_data),
+        rows=itertools.chain(iter_indiv_rows(), iter_collective_rows()),
         row_formatter=_invoice_row_formatter,
         compress=True,
     )
@@ -2641,6 +3594,14 @@ def _store_invoice_pdf(invoice_storage_id: str, invoice_html: str) -> None:
         )
 
 
+def _store_timed_invoice_pdf(invoice_storage_id: str, invoice_pdf: bytes) -> float:
+    start = time.perf_counter()
+    store_public_object(
+        folder="invoices", object_id=invoice_storage_id, blob=invoice_pdf, content_type="application/pdf"
+    )
+    return time.perf_counter() - start
+
+
 def merge_cashflow_batches(
     batches_to_remove: list[models.CashflowBatch],
     target_batch: models.CashflowBatch,
@@ -2813,6 +3774,7 @@ def _create_reimbursement_rule(
     validation.validate_reimbursement_rule(rule)
     db.session.add(rule)
     db.session.commit()
+    reimbursement.reset_custom_rule_finder()
     return rule
 
 
@@ -2844,6 +3806,7 @@ def edit_reimbursement_rule(
         raise
     db.session.add(rule)
     db.session.flush()
+    reimbursement.reset_custom_rule_finder()
     return rule
 
 
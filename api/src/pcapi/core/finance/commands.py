@@ -31,22 +31,61 @@ logger = logging.getLogger(__name__)
 @cron_decorators.cron_require_feature(FeatureToggle.PRICE_FINANCE_EVENTS)
 def price_finance_events() -> None:
     """Price finance events that have recently been created."""
-    finance_api.price_events()
+    finance_api.price_events(
+        by_pricing_point=FeatureToggle.WIP_PRICE_FINANCE_EVENTS_BY_PRICING_POINT.is_active(),
+    )
+
+
+@blueprint.cli.command("check_pricing_point_revenues")
+@click.option("--year", type=int, help="Accounting year to check. Default: current year.")
+@click.option("--fix", is_flag=True, default=False, help="Replace drifting revenues by the computed ones")
+@cron_decorators.log_cron_with_transaction
+def check_pricing_point_revenues(year: int | None, fix: bool) -> None:
+    """Check that stored yearly revenues of pricing points match their pricings."""
+    year = year or datetime.datetime.now(finance_utils.ACCOUNTING_TIMEZONE).year
+    drifts = finance_api.check_pricing_point_revenues(year, fix=fix)
+    logger.info(
+        "Checked stored revenues of pricing points",
+        extra={"year": year, "drifts": len(drifts), "fixed": fix},
+    )
 
 
 @blueprint.cli.command("generate_cashflows_and_payment_files")
 @click.option("--override-feature-flag", help="Override feature flag", is_flag=True, default=False)
 @click.option("--cutoff", help="Datetime cutoff to put in UTC timezone", type=datetime.datetime, required=False)
+@click.option(
+    "--dry-run",
+    help="Only compute and log amounts of cashflows, do not generate anything",
+    is_flag=True,
+    default=False,
+)
 @cron_decorators.log_cron_with_transaction
-def generate_cashflows_and_payment_files(override_feature_flag: bool, cutoff: datetime.datetime) -> None:
+def generate_cashflows_and_payment_files(
+    override_feature_flag: bool, cutoff: datetime.datetime, dry_run: bool
+) -> None:
     flag = FeatureToggle.GENERATE_CASHFLOWS_BY_CRON
-    if not override_feature_flag and not flag.is_active():
+    if not override_feature_flag and not dry_run and not flag.is_active():
         logger.info("%s is not active, cronjob will not run.", flag.name)
         return
     if not cutoff:
         last_day = datetime.date.today() - datetime.timedelta(days=1)
         cutoff = finance_utils.get_cutoff_as_datetime(last_day)
-    batch = finance_api.generate_cashflows_and_payment_files(cutoff)
+    if dry_run:
+        totals = finance_api.simulate_cashflows(cutoff)
+        logger.info(
+            "Simulated cashflows",
+            extra={
+                "cutoff": cutoff.isoformat(),
+                "cashflows": len(totals),
+                "total": sum(totals.values()),
+                "debit_notes": len([total for total in totals.values() if total > 0]),
+            },
+        )
+        return
+    batch = finance_api.generate_cashflows_and_payment_files(
+        cutoff,
+        by_chunks=FeatureToggle.WIP_GENERATE_CASHFLOWS_BY_CHUNKS.is_active(),
+    )
     if FeatureToggle.WIP_ENABLE_NEW_FINANCE_WORKFLOW:
         finance_api.generate_invoices_and_debit_notes(batch)
 
@@ -13,6 +13,11 @@ REDIS_PUSH_BANK_ACCOUNT_LOCK_TIMEOUT = 86400  # = 60 * 60 * 24 = 24h
 REDIS_GENERATE_CASHFLOW_LOCK = "pc:finance:generate_cashflow_lock"
 REDIS_GENERATE_CASHFLOW_LOCK_TIMEOUT = 60 * 60 * 24  # 24h
 
+# invoices of a cashflow batch whose PDF has not been stored yet (see
+# `generate_invoices_and_debit_notes()`)
+REDIS_INVOICES_WITHOUT_PDF = "pc:finance:invoices_without_pdf:{batch_id}"
+REDIS_INVOICES_WITHOUT_PDF_TIMEOUT = 60 * 60 * 24 * 7  # 7 days
+
 # Age in days before generating a cashflow and a debit note when total pricings is positive
 DEBIT_NOTE_AGE_THRESHOLD_FOR_CASHFLOW = 90
 
@@ -451,6 +451,27 @@ class Pricing(PcObject, Base, Model):
         return sqla.cast(sqla.func.round(cls.amount * utils.EUR_TO_XPF_RATE), sqla.Integer)
 
 
+class PricingPointYearlyRevenue(PcObject, Base, Model):
+    """The revenue of a pricing point for an accounting year, i.e. the
+    total amount of individual bookings whose pricing has not been
+    cancelled (nor rejected).
+
+    It is stored so that we do not have to compute it each time we
+    price an event. It is updated when pricings are created, cancelled
+    or deleted. See `api.check_pricing_point_revenues()`.
+    """
+
+    pricingPointId = sqla.Column(sqla.BigInteger, sqla.ForeignKey("venue.id"), nullable=False)
+    pricingPoint: sqla_orm.Mapped["offerers_models.Venue"] = sqla_orm.relationship(
+        "Venue", foreign_keys=[pricingPointId]
+    )
+    year: int = sqla.Column(sqla.Integer, nullable=False)
+    # In euro cents.
+    revenue: int = sqla.Column(sqla.BigInteger, nullable=False)
+
+    __table_args__ = (sqla.UniqueConstraint(pricingPointId, year, name="unique_pricing_point_year"),)
+
+
 class PricingLine(PcObject, Base, Model):
 
     pricingId = sqla.Column(sqla.BigInteger, sqla.ForeignKey("pricing.id"), index=True, nullable=True)
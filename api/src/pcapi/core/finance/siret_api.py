@@ -12,6 +12,7 @@ from pcapi.models import feature
 from pcapi.repository import atomic
 import pcapi.utils.db as db_utils
 
+from . import api as finance_api
 from . import models
 
 
@@ -168,6 +169,12 @@ def has_pending_pricings(pricing_point: offerers_models.Venue) -> bool:
 
 
 def _delete_ongoing_pricings(venue: offerers_models.Venue) -> None:
+    # The stored revenues of the pricing point include the deleted
+    # pricings: they are computed again when needed.
+    finance_api.reset_pricing_point_revenues(
+        models.Pricing.pricingPointId == venue.id,
+        models.Pricing.status == models.PricingStatus.VALIDATED,
+    )
     queries = (
         # Delete all ongoing pricings (and related pricing lines),
         # except pending ones. The corresponding bookings will be
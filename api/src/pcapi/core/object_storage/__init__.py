@@ -1,6 +1,21 @@
+import dataclasses
+import logging
+import os
+import threading
+import time
+import typing
+
 from pcapi import settings
 from pcapi.utils.module_loading import import_string
 
+from .backends.base import BaseBackend
+from .backends.base import PublicObject
+from .backends.base import measure_upload
+from .backends.base import upload_stats
+
+
+logger = logging.getLogger(__name__)
+
 
 GCP = "GCP"
 GCP_ALTERNATE = "GCP_ALTERNATE"
@@ -46,29 +61,72 @@ def _check_backend_setting() -> None:
 _check_backend_setting()
 
 
+# Backends are instantiated once per process, bucket and backend, so
+# that they can reuse their client and its HTTP connections. The pid is
+# part of the key: a connection must not be shared with forked processes.
+_backends: dict[tuple[int, str, str], BaseBackend] = {}
+_backends_lock = threading.Lock()
+
+
+def _get_backend(backend_path: str, bucket: str) -> BaseBackend:
+    key = (os.getpid(), backend_path, bucket)
+    backend = _backends.get(key)
+    if backend is None:
+        with _backends_lock:
+            backend = _backends.get(key)
+            if backend is None:
+                backend = _backends[key] = import_string(backend_path)(bucket_name=bucket)
+    return backend
+
+
+def reset_backends() -> None:
+    _backends.clear()
+
+
+def get_upload_stats() -> dict:
+    stats = dataclasses.asdict(upload_stats)
+    attempts = stats["uploads"] + stats["errors"]
+    stats["average_latency"] = stats["busy_time"] / attempts if attempts else 0.0
+    return stats
+
+
 def store_public_object(folder: str, object_id: str, blob: bytes, content_type: str, *, bucket: str = "") -> None:
     for backend_path in _get_backends():
-        backend = import_string(backend_path)
-        backend(bucket_name=bucket).store_public_object(folder, object_id, blob, content_type)
+        with measure_upload(len(blob)):
+            _get_backend(backend_path, bucket).store_public_object(folder, object_id, blob, content_type)
+
+
+def store_public_objects(objects: typing.Sequence[PublicObject], *, bucket: str = "") -> None:
+    """Store a batch of objects in each backend, uploading them
+    concurrently.
+    """
+    start = time.perf_counter()
+    for backend_path in _get_backends():
+        _get_backend(backend_path, bucket).store_public_objects(objects)
+    logger.info(
+        "Stored public objects",
+        extra={
+            "count": len(objects),
+            "bytes": sum(len(obj.blob) for obj in objects),
+            "duration": time.perf_counter() - start,
+        },
+    )
 
 
 def get_public_object(folder: str, object_id: str, *, bucket: str = "") -> list[bytes]:
     files = []
     for backend_path in _get_backends():
-        backend = import_string(backend_path)
-        files.append(backend(bucket_name=bucket).get_public_object(folder, object_id))
+        files.append(_get_backend(backend_path, bucket).get_public_object(folder, object_id))
     return files
 
 
 def delete_public_object(folder: str, object_id: str, *, bucket: str = "") -> None:
     for backend_path in _get_backends():
-        backend = import_string(backend_path)
-        backend(bucket_name=bucket).delete_public_object(folder, object_id)
+        _get_backend(backend_path, bucket).delete_public_object(folder, object_id)
 
 
 def list_files(folder: str, *, bucket: str = "", max_results: int = 1000) -> list[str]:
     files = []
     for backend_path in _get_backends():
-        backend = import_string(backend_path)
-        files.extend(backend(bucket_name=bucket).list_files(folder, max_results=max_results))
+        files.extend(_get_backend(backend_path, bucket).list_files(folder, max_results=max_results))
     return files
@@ -1,3 +1,50 @@
+from concurrent import futures
+import contextlib
+import dataclasses
+import threading
+import time
+import typing
+
+from pcapi import settings
+
+
+@dataclasses.dataclass(frozen=True)
+class PublicObject:
+    folder: str
+    object_id: str
+    blob: bytes
+    content_type: str
+
+
+@dataclasses.dataclass
+class UploadStats:
+    uploads: int = 0
+    errors: int = 0
+    bytes: int = 0
+    busy_time: float = 0.0
+
+
+# Counters of the uploads of the current process, for all backends.
+upload_stats = UploadStats()
+_upload_stats_lock = threading.Lock()
+
+
+@contextlib.contextmanager
+def measure_upload(size: int) -> typing.Iterator[None]:
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        with _upload_stats_lock:
+            upload_stats.errors += 1
+            upload_stats.busy_time += time.perf_counter() - start
+        raise
+    with _upload_stats_lock:
+        upload_stats.uploads += 1
+        upload_stats.bytes += size
+        upload_stats.busy_time += time.perf_counter() - start
+
+
 class BaseBackend:
     def __init__(
         self,
@@ -9,6 +56,24 @@ class BaseBackend:
     def store_public_object(self, folder: str, object_id: str, blob: bytes, content_type: str) -> None:
         raise NotImplementedError()
 
+    def store_public_objects(self, objects: typing.Sequence[PublicObject]) -> None:
+        """Store objects concurrently, with at most
+        `OBJECT_STORAGE_UPLOAD_WORKERS` uploads at the same time. Raise
+        the first error, once all uploads are done.
+        """
+        if not objects:
+            return
+
+        def store(obj: PublicObject) -> None:
+            with measure_upload(len(obj.blob)):
+                self.store_public_object(obj.folder, obj.object_id, obj.blob, obj.content_type)
+
+        workers = min(settings.OBJECT_STORAGE_UPLOAD_WORKERS, len(objects))
+        with futures.ThreadPoolExecutor(max_workers=workers, thread_name_prefix="object-storage") as executor:
+            results = [executor.submit(store, obj) for obj in objects]
+        for result in results:
+            result.result()
+
     def get_public_object(self, folder: str, object_id: str) -> bytes:
         raise NotImplementedError()
 
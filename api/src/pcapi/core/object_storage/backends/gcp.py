@@ -1,10 +1,13 @@
 import logging
+import threading
 
+from google.auth.transport.requests import AuthorizedSession
 from google.cloud.exceptions import NotFound
 from google.cloud.storage.bucket import Bucket
 from google.cloud.storage.client import Client
 import google.cloud.storage.retry
 from google.oauth2.service_account import Credentials
+import requests.adapters
 
 from pcapi import settings
 
@@ -37,10 +40,21 @@ class GCPBackend(BaseBackend):
     ) -> None:
         self.project_id = project_id or self.bucket_credentials.get("project_id")
         self.bucket_name = bucket_name or self.default_bucket_name
+        self._client: Client | None = None
+        self._client_lock = threading.Lock()
 
     def get_gcp_storage_client(self) -> Client:
-        credentials = Credentials.from_service_account_info(self.bucket_credentials)
-        return Client(credentials=credentials, project=self.project_id)
+        # The client is created once: its credentials (and the access
+        # token they fetch) and its pool of HTTP connections are reused
+        # by all operations of this backend, including concurrent ones.
+        with self._client_lock:
+            if self._client is None:
+                credentials = Credentials.from_service_account_info(self.bucket_credentials)
+                session = AuthorizedSession(credentials)
+                adapter = requests.adapters.HTTPAdapter(pool_maxsize=settings.OBJECT_STORAGE_UPLOAD_WORKERS)
+                session.mount("https://", adapter)
+                self._client = Client(credentials=credentials, project=self.project_id, _http=session)
+            return self._client
 
     def get_gcp_storage_client_bucket(self) -> Bucket:
 
@@ -50,6 +50,7 @@ from pcapi.core.offerers import models as offerers_models
 import pcapi.core.offers.api as offers_api
 import pcapi.core.offers.models as offers_models
 import pcapi.core.providers.models as providers_models
+import pcapi.core.users.identity_cache as users_identity_cache
 import pcapi.core.users.models as users_models
 import pcapi.core.users.repository as users_repository
 from pcapi.models import db
@@ -1119,6 +1120,7 @@ def remove_pro_role_and_add_non_attached_pro_role(users: list[users_models.User]
             for user_offerer in user_with_offerers.UserOfferers
         ):
             user_with_offerers.add_non_attached_pro_role()
+            on_commit(functools.partial(users_identity_cache.invalidate_cached_users, user_with_offerers.email))
 
 
 def validate_offerer_attachment(
@@ -1128,6 +1130,7 @@ def validate_offerer_attachment(
         raise exceptions.UserOffererAlreadyValidatedException()
 
     user_offerer.user.add_pro_role()
+    on_commit(functools.partial(users_identity_cache.invalidate_cached_users, user_offerer.user.email))
     user_offerer.validationStatus = ValidationStatus.VALIDATED
     db.session.add(user_offerer)
 
@@ -1248,6 +1251,9 @@ def validate_offerer(offerer: models.Offerer, author_user: users_models.User) ->
     for applicant in applicants:
         applicant.add_pro_role()
     db.session.add_all(applicants)
+    on_commit(
+        functools.partial(users_identity_cache.invalidate_cached_users, *[applicant.email for applicant in applicants])
+    )
 
     history_api.add_action(
         history_models.ActionType.OFFERER_VALIDATED,
@@ -4,11 +4,14 @@ import decimal
 import enum
 from functools import partial
 import logging
+import time
 import typing
 
+from flask import current_app
 from flask_sqlalchemy import BaseQuery
 from psycopg2.errorcodes import CHECK_VIOLATION
 from psycopg2.errorcodes import UNIQUE_VIOLATION
+import redis
 import sentry_sdk
 import sqlalchemy as sa
 from sqlalchemy import func
@@ -74,15 +77,16 @@ from pcapi.repository import transaction
 from pcapi.utils import image_conversion
 import pcapi.utils.cinema_providers as cinema_providers_utils
 from pcapi.utils.custom_keys import get_field
-from pcapi.utils.custom_logic import OPERATIONS
 from pcapi.utils.date import local_datetime_to_default_timezone
 from pcapi.workers import push_notification_job
+from pcapi.workers import update_cinema_stocks_job
 
 from . import exceptions
 from . import models
 from . import repository as offers_repository
 from . import schemas as offers_schemas
 from . import validation
+from . import validation_rules
 
 
 logger = logging.getLogger(__name__)
@@ -91,12 +95,9 @@ AnyOffer = educational_api_offer.AnyCollectiveOffer | models.Offer
 
 OFFERS_RECAP_LIMIT = 501
 
-
-OFFER_LIKE_MODELS = {
-    "Offer",
-    "CollectiveOffer",
-    "CollectiveOfferTemplate",
-}
+REDIS_CINEMA_OFFER_VIEWS_NAME = "pcapi:cinema_stocks:views"
+REDIS_CINEMA_STOCKS_REFRESH_LOCK_PREFIX = "pcapi:cinema_stocks:refresh"
+REDIS_CINEMA_STOCKS_RATE_LIMIT_PREFIX = "pcapi:cinema_stocks:rate_limit"
 
 
 class T_UNCHANGED(enum.Enum):
@@ -1247,75 +1248,62 @@ def reject_inappropriate_products(
     return True
 
 
-def resolve_offer_validation_sub_rule(sub_rule: models.OfferValidationSubRule, offer: AnyOffer) -> bool:
-    if sub_rule.model:
-        if sub_rule.model.value in OFFER_LIKE_MODELS and type(offer).__name__ == sub_rule.model.value:
-            object_to_compare = offer
-        elif sub_rule.model.value == "CollectiveStock" and isinstance(offer, educational_models.CollectiveOffer):
-            object_to_compare = offer.collectiveStock
-        elif sub_rule.model.value == "Venue":
-            object_to_compare = offer.venue
-        elif sub_rule.model.value == "Offerer":
-            object_to_compare = offer.venue.managingOfferer
-        else:
-            raise exceptions.UnapplicableModel()
-
-        target_attribute = getattr(object_to_compare, sub_rule.attribute.value)
-    else:
-        target_attribute = type(offer).__name__
-
-    return OPERATIONS[sub_rule.operator.value](target_attribute, sub_rule.comparated["comparated"])  # type: ignore[operator]
+def set_offer_status_based_on_fraud_criteria(offer: AnyOffer) -> models.OfferValidationStatus:
+    return set_offers_status_based_on_fraud_criteria([offer])[0]
 
 
-def rule_flags_offer(rule: models.OfferValidationRule, offer: AnyOffer) -> bool:
-    sub_rule_flags_offer = []
-    for sub_rule in rule.subRules:
-        try:
-            sub_rule_flags_offer.append(resolve_offer_validation_sub_rule(sub_rule, offer))
-        except exceptions.UnapplicableModel:
-            sub_rule_flags_offer.append(False)
-            break
-    is_offer_flagged = all(sub_rule_flags_offer)
-    return is_offer_flagged
+def set_offers_status_based_on_fraud_criteria(
+    offers: typing.Sequence[AnyOffer],
+) -> list[models.OfferValidationStatus]:
+    """Compute the validation status of each offer, in the same order,
+    and link flagged offers to the validation rules that flag them.
 
+    Active rules are loaded (from the process cache) once for the whole
+    batch, and flagging rules are fetched with a single query.
+    """
+    rules = validation_rules.get_active_rules()
+    confidence_levels: dict[int, offerers_models.OffererConfidenceLevel | None] = {}
+    statuses = []
+    # None for offers of whitelisted venues, which are not checked against rules
+    flagging_rules_by_offer: list[list[validation_rules.CompiledRule] | None] = []
 
-def set_offer_status_based_on_fraud_criteria(offer: AnyOffer) -> models.OfferValidationStatus:
-    status = models.OfferValidationStatus.APPROVED
+    for offer in offers:
+        status = models.OfferValidationStatus.APPROVED
+        if offer.venue.id not in confidence_levels:
+            confidence_levels[offer.venue.id] = offerers_api.get_offer_confidence_level(offer.venue)
+        confidence_level = confidence_levels[offer.venue.id]
 
-    confidence_level = offerers_api.get_offer_confidence_level(offer.venue)
+        if confidence_level == offerers_models.OffererConfidenceLevel.WHITELIST:
+            logger.info(
+                "Computed offer validation", extra={"offer": offer.id, "status": status.value, "whitelist": True}
+            )
+            statuses.append(status)
+            flagging_rules_by_offer.append(None)
+            continue
 
-    if confidence_level == offerers_models.OffererConfidenceLevel.WHITELIST:
-        logger.info("Computed offer validation", extra={"offer": offer.id, "status": status.value, "whitelist": True})
-        return status
+        if confidence_level == offerers_models.OffererConfidenceLevel.MANUAL_REVIEW:
+            status = models.OfferValidationStatus.PENDING
+            # continue so that offers are checked against rules: gives more information for manual validation
 
-    if confidence_level == offerers_models.OffererConfidenceLevel.MANUAL_REVIEW:
-        status = models.OfferValidationStatus.PENDING
-        # continue so that offers are checked against rules: gives more information for manual validation
+        flagging_rules = validation_rules.get_flagging_rules(rules, offer)
+        if flagging_rules:
+            status = models.OfferValidationStatus.PENDING
+        statuses.append(status)
+        flagging_rules_by_offer.append(flagging_rules)
 
-    offer_validation_rules = (
-        models.OfferValidationRule.query.options(
-            sa.orm.joinedload(models.OfferValidationSubRule, models.OfferValidationRule.subRules)
-        )
-        .filter(models.OfferValidationRule.isActive.is_(True))
-        .all()
+    rules_by_id = validation_rules.get_rules_by_id(
+        {rule.id for flagging_rules in flagging_rules_by_offer for rule in flagging_rules or ()}
     )
-
-    flagging_rules = []
-    for rule in offer_validation_rules:
-        if rule_flags_offer(rule, offer):
-            flagging_rules.append(rule)
-
-    if flagging_rules:
-        status = models.OfferValidationStatus.PENDING
-        offer.flaggingValidationRules = flagging_rules
-        if isinstance(offer, models.Offer):
-            compliance.update_offer_compliance_score(offer, is_primary=True)
-    else:
+    for offer, status, flagging_rules in zip(offers, statuses, flagging_rules_by_offer):
+        if flagging_rules is None:
+            continue
+        if flagging_rules:
+            offer.flaggingValidationRules = [rules_by_id[rule.id] for rule in flagging_rules if rule.id in rules_by_id]
         if isinstance(offer, models.Offer):
-            compliance.update_offer_compliance_score(offer, is_primary=False)
+            compliance.update_offer_compliance_score(offer, is_primary=bool(flagging_rules))
+        logger.info("Computed offer validation", extra={"offer": offer.id, "status": status.value})
 
-    logger.info("Computed offer validation", extra={"offer": offer.id, "status": status.value})
-    return status
+    return statuses
 
 
 def unindex_expired_offers(process_all_expired: bool = False) -> None:
@@ -1429,7 +1417,87 @@ def _should_try_to_update_offer_stock_quantity(offer: models.Offer) -> bool:
     return False
 
 
-def update_stock_quantity_to_match_cinema_venue_provider_remaining_places(offer: models.Offer) -> None:
+def _get_cinema_stocks_refresh_lock_name(offer: models.Offer) -> str:
+    # `idAtProvider` identifies the movie within the venue
+    return f"{REDIS_CINEMA_STOCKS_REFRESH_LOCK_PREFIX}:{offer.venueId}:{offer.idAtProvider}"
+
+
+def _acquire_cinema_stocks_refresh_lock(offer: models.Offer) -> bool:
+    """Return whether no refresh of the remaining places of the offer has
+    been requested during the last ``CINEMA_STOCKS_REFRESH_INTERVAL``
+    seconds, so that concurrent views trigger a single provider call.
+    """
+    return bool(
+        current_app.redis_client.set(
+            _get_cinema_stocks_refresh_lock_name(offer), "1", nx=True, ex=settings.CINEMA_STOCKS_REFRESH_INTERVAL
+        )
+    )
+
+
+def _is_cinema_provider_rate_limited(provider_class: str) -> bool:
+    window = int(time.time() // 60)
+    key = f"{REDIS_CINEMA_STOCKS_RATE_LIMIT_PREFIX}:{provider_class}:{window}"
+    count = current_app.redis_client.incr(key)
+    if count == 1:
+        current_app.redis_client.expire(key, 60)
+    return count > settings.CINEMA_STOCKS_REFRESH_RATE_LIMIT
+
+
+def request_cinema_stocks_refresh(offer: models.Offer) -> None:
+    """Schedule an update of the stocks of a cinema offer, to match the
+    remaining places of its provider. The current stocks are served
+    meanwhile.
+
+    Views are counted, so that the most viewed offers are refreshed in the
+    background by `refresh_hot_cinema_offers_stocks()`.
+    """
+    if not _should_try_to_update_offer_stock_quantity(offer):
+        return
+    # The offer is served with its current stocks even if Redis is down.
+    try:
+        current_app.redis_client.zincrby(REDIS_CINEMA_OFFER_VIEWS_NAME, 1, offer.id)
+        refresh_lock_acquired = _acquire_cinema_stocks_refresh_lock(offer)
+    except redis.exceptions.RedisError:
+        logger.exception("Could not request refresh of cinema stocks", extra={"offer_id": offer.id})
+        return
+    if refresh_lock_acquired:
+        update_cinema_stocks_job.update_cinema_stocks_job.delay(offer.id)
+
+
+def refresh_hot_cinema_offers_stocks() -> None:
+    """Request a refresh of the stocks of the most viewed cinema offers
+    since the previous run, unless they have just been refreshed.
+    """
+    with current_app.redis_client.pipeline(transaction=True) as pipeline:
+        pipeline.zrevrange(REDIS_CINEMA_OFFER_VIEWS_NAME, 0, settings.CINEMA_STOCKS_HOT_OFFERS_COUNT - 1)
+        pipeline.delete(REDIS_CINEMA_OFFER_VIEWS_NAME)
+        offer_ids, _ = pipeline.execute()
+    if not offer_ids:
+        return
+
+    offers = (
+        models.Offer.query.filter(models.Offer.id.in_([int(offer_id) for offer_id in offer_ids]))
+        .filter(models.Offer.isActive.is_(True))
+        .options(sa.orm.load_only(models.Offer.id, models.Offer.venueId, models.Offer.idAtProvider))
+        .all()
+    )
+    requested = 0
+    for offer in offers:
+        if _acquire_cinema_stocks_refresh_lock(offer):
+            update_cinema_stocks_job.update_cinema_stocks_job.delay(offer.id)
+            requested += 1
+    logger.info("Requested refresh of hot cinema offers stocks", extra={"hot": len(offer_ids), "requested": requested})
+
+
+def update_stock_quantity_to_match_cinema_venue_provider_remaining_places(
+    offer: models.Offer, *, rate_limited: bool = False
+) -> None:
+    """Update the stocks of a cinema offer to match the remaining places
+    returned by its provider.
+
+    If ``rate_limited`` is true, the provider is not called more than
+    ``CINEMA_STOCKS_REFRESH_RATE_LIMIT`` times per minute.
+    """
     if not _should_try_to_update_offer_stock_quantity(offer):
         return
     try:
@@ -1446,6 +1514,13 @@ def update_stock_quantity_to_match_cinema_venue_provider_remaining_places(offer:
         )
         return
 
+    if rate_limited and _is_cinema_provider_rate_limited(venue_provider.provider.localClass):
+        logger.info(
+            "Skipped remaining places update of cinema offer: provider is rate limited",
+            extra={"offer": offer.id, "provider": venue_provider.provider.localClass},
+        )
+        return
+
     sentry_sdk.set_tag("cinema-venue-provider", venue_provider.provider.localClass)
     logger.info(
         "Getting up-to-date show stock from booking provider on offer view",
@@ -2050,6 +2125,14 @@ def update_used_stock_price(
             bookings_models.Booking.stockId == stock.id,
         ).update({bookings_models.Booking.amount: bookings_models.Booking.amount * price_percent})
 
+    # Pricings of these bookings were added to the stored revenues with
+    # their former amount.
+    finance_api.reset_pricing_point_revenues(
+        finance_models.Pricing.bookingId.in_(
+            db.session.query(bookings_models.Booking.id).filter(bookings_models.Booking.stockId == stock.id)
+        ),
+    )
+
     first_finance_event = (
         finance_models.FinanceEvent.query.join(bookings_models.Booking, finance_models.FinanceEvent.booking)
         .filter(
@@ -1,4 +1,5 @@
 import pcapi.core.offers.api as offers_api
+from pcapi.models.feature import FeatureToggle
 from pcapi.scheduled_tasks.decorators import log_cron_with_transaction
 from pcapi.utils.blueprint import Blueprint
 
@@ -10,3 +11,11 @@ blueprint = Blueprint(__name__, __name__)
 @log_cron_with_transaction
 def activate_future_offers() -> None:
     offers_api.activate_future_offers()
+
+
+@blueprint.cli.command("refresh_hot_cinema_offers_stocks")
+@log_cron_with_transaction
+def refresh_hot_cinema_offers_stocks() -> None:
+    if not FeatureToggle.WIP_ASYNC_CINEMA_STOCKS_REFRESH.is_active():
+        return
+    offers_api.refresh_hot_cinema_offers_stocks()
@@ -626,6 +626,14 @@ class Offer(PcObject, Base, Model, DeactivableMixin, ValidationMixin, Accessibil
     bookingsCount: sa_orm.Mapped["int"] = sa_orm.query_expression()
     hasPendingBookings: sa_orm.Mapped["bool"] = sa_orm.query_expression()
     likesCount: sa_orm.Mapped["int"] = sa_orm.query_expression()
+    # Summary of the stocks that are not soft-deleted, loaded instead of the stocks
+    # themselves in the offers list (see `repository.get_capped_offers_for_filters()`)
+    stocksCount: sa_orm.Mapped["int | None"] = sa_orm.query_expression()
+    stocksFirstBeginningDatetime: sa_orm.Mapped["datetime.datetime | None"] = sa_orm.query_expression()
+    stocksLastBeginningDatetime: sa_orm.Mapped["datetime.datetime | None"] = sa_orm.query_expression()
+    stocksRemainingQuantity: sa_orm.Mapped["int | None"] = sa_orm.query_expression()
+    stocksAreSoldOut: sa_orm.Mapped["bool | None"] = sa_orm.query_expression()
+    stocksHaveBookingLimitDatetimesPassed: sa_orm.Mapped["bool | None"] = sa_orm.query_expression()
 
     @property
     def description(self) -> str | None:
@@ -667,6 +675,8 @@ class Offer(PcObject, Base, Model, DeactivableMixin, ValidationMixin, Accessibil
 
     @hybrid_property
     def isSoldOut(self) -> bool:
+        if self.stocksAreSoldOut is not None:
+            return self.stocksAreSoldOut
         for stock in self.stocks:
             if (
                 not stock.isSoftDeleted
@@ -789,6 +799,8 @@ class Offer(PcObject, Base, Model, DeactivableMixin, ValidationMixin, Accessibil
 
     @hybrid_property
     def hasBookingLimitDatetimesPassed(self) -> bool:
+        if self.stocksHaveBookingLimitDatetimesPassed is not None:
+            return self.stocksHaveBookingLimitDatetimesPassed
         if self.activeStocks:
             return all(stock.hasBookingLimitDatetimePassed for stock in self.activeStocks)
         return False
@@ -37,6 +37,8 @@ logger = logging.getLogger(__name__)
 
 
 IMPORTED_CREATION_MODE = "imported"
+# Number of rows of each multi-row INSERT of `upsert_offers_by_id_at_provider()` and `insert_stocks()`
+BULK_INSERT_CHUNK_SIZE = 1_000
 MANUAL_CREATION_MODE = "manual"
 
 LIMIT_STOCKS_PER_PAGE = 20
@@ -81,7 +83,14 @@ def get_capped_offers_for_filters(
     period_beginning_date: datetime.date | None = None,
     period_ending_date: datetime.date | None = None,
     offerer_address_id: int | None = None,
+    after_id: int | None = None,
 ) -> list[models.Offer]:
+    """Return at most `offers_limit` offers, the most recent first.
+
+    `after_id` is a keyset cursor: only offers older than this one (i.e.
+    the next page when it is the id of the last offer of a page) are
+    returned.
+    """
     query = get_offers_by_filters(
         user_id=user_id,
         user_is_admin=user_is_admin,
@@ -96,7 +105,68 @@ def get_capped_offers_for_filters(
         period_ending_date=period_ending_date,
     )
 
-    offers = (
+    if after_id is not None:
+        query = query.filter(models.Offer.id < after_id)
+
+    if FeatureToggle.WIP_OFFERS_LIST_STOCKS_SUMMARY.is_active():
+        # Select the page of offer ids first, so that stocks are only
+        # aggregated, and relations loaded, for the offers of the page.
+        # Keyset pagination: the primary key index is scanned backwards from the cursor.
+        page = query.with_entities(models.Offer.id).order_by(models.Offer.id.desc()).limit(offers_limit).subquery()
+        # Stocks are not loaded: only their summary, computed by offer in SQL.
+        stocks_summary = _get_stocks_summary_subquery()
+        return (
+            _with_offers_list_options(models.Offer.query.join(page, models.Offer.id == page.c.id))
+            .outerjoin(stocks_summary, sa.true())
+            .options(
+                sa_orm.with_expression(models.Offer.stocksCount, stocks_summary.c.count),
+                sa_orm.with_expression(
+                    models.Offer.stocksFirstBeginningDatetime, stocks_summary.c.first_beginning_datetime
+                ),
+                sa_orm.with_expression(
+                    models.Offer.stocksLastBeginningDatetime, stocks_summary.c.last_beginning_datetime
+                ),
+                sa_orm.with_expression(models.Offer.stocksRemainingQuantity, stocks_summary.c.remaining_quantity),
+                sa_orm.with_expression(models.Offer.stocksAreSoldOut, stocks_summary.c.are_sold_out),
+                sa_orm.with_expression(
+                    models.Offer.stocksHaveBookingLimitDatetimesPassed,
+                    stocks_summary.c.have_booking_limit_datetimes_passed,
+                ),
+            )
+            .order_by(models.Offer.id.desc())
+            .all()
+        )
+
+    query = _with_offers_list_options(query)
+    query = query.options(
+        sa_orm.joinedload(models.Offer.stocks).load_only(
+            models.Stock.id,
+            models.Stock.beginningDatetime,
+            models.Stock.bookingLimitDatetime,
+            models.Stock.quantity,
+            models.Stock.dnBookedQuantity,
+            models.Stock.isSoftDeleted,
+        )
+    )
+    if after_id is not None:
+        # Pages of a cursor must be sorted in SQL.
+        return query.order_by(models.Offer.id.desc()).limit(offers_limit).all()
+
+    offers = query.limit(offers_limit).all()
+
+    # Do not use `ORDER BY` in SQL, which sometimes applies on a very large result set
+    # _before_ the `LIMIT` clause (and kills performance).
+    if len(offers) < offers_limit:
+        offers = sorted(offers, key=operator.attrgetter("id"), reverse=True)
+
+    return offers
+
+
+def _with_offers_list_options(query: BaseQuery) -> BaseQuery:
+    """Load the attributes and relations of offers that are needed by the
+    list of offers of the pro interface.
+    """
+    return (
         query.options(
             sa.orm.load_only(
                 models.Offer.id,
@@ -129,16 +199,6 @@ def get_capped_offers_for_filters(
                 offerers_models.OffererAddress._isLinkedToVenue, offerers_models.OffererAddress.isLinkedToVenue.expression  # type: ignore [attr-defined]
             ),
         )
-        .options(
-            sa_orm.joinedload(models.Offer.stocks).load_only(
-                models.Stock.id,
-                models.Stock.beginningDatetime,
-                models.Stock.bookingLimitDatetime,
-                models.Stock.quantity,
-                models.Stock.dnBookedQuantity,
-                models.Stock.isSoftDeleted,
-            )
-        )
         .options(
             sa_orm.joinedload(models.Offer.mediations).load_only(
                 models.Mediation.id,
@@ -163,16 +223,32 @@ def get_capped_offers_for_filters(
                 offerers_models.OffererAddress._isLinkedToVenue, offerers_models.OffererAddress.isLinkedToVenue.expression  # type: ignore [attr-defined]
             ),
         )
-        .limit(offers_limit)
-        .all()
     )
 
-    # Do not use `ORDER BY` in SQL, which sometimes applies on a very large result set
-    # _before_ the `LIMIT` clause (and kills performance).
-    if len(offers) < offers_limit:
-        offers = sorted(offers, key=operator.attrgetter("id"), reverse=True)
 
-    return offers
+def _get_stocks_summary_subquery() -> sa.sql.selectable.Lateral:
+    """Aggregate the stocks of each offer that are not soft-deleted, with
+    the same rules as `Offer.isSoldOut` and
+    `Offer.hasBookingLimitDatetimesPassed`.
+    """
+    return (
+        sa.select(
+            sa.func.count(models.Stock.id).label("count"),
+            sa.func.min(models.Stock.beginningDatetime).label("first_beginning_datetime"),
+            sa.func.max(models.Stock.beginningDatetime).label("last_beginning_datetime"),
+            # NULL when a stock has an unlimited quantity
+            sa.case(
+                (sa.func.bool_or(models.Stock.quantity.is_(None)), None),
+                else_=sa.func.coalesce(sa.func.sum(models.Stock.remainingQuantity), 0),
+            ).label("remaining_quantity"),
+            sa.func.coalesce(sa.func.bool_and(models.Stock.isSoldOut), True).label("are_sold_out"),
+            sa.func.coalesce(sa.func.bool_and(models.Stock.hasBookingLimitDatetimePassed), False).label(
+                "have_booking_limit_datetimes_passed"
+            ),
+        )
+        .where(models.Stock.offerId == models.Offer.id, models.Stock.isSoftDeleted.is_(False))
+        .lateral("stocks_summary")
+    )
 
 
 def get_offers_by_publication_date(publication_date: datetime.datetime | None = None) -> BaseQuery:
@@ -828,6 +904,70 @@ def get_offers_map_by_venue_reference(id_at_provider_list: list[str], venue_id:
     return offers_map
 
 
+def _get_insert_rows(objects: typing.Sequence[models.Offer | models.Stock]) -> list[dict]:
+    """Return the values of the columns that are set on transient
+    objects, as rows that have the same keys, so that they can be
+    inserted with a single multi-row INSERT.
+    """
+    mapper = sa.inspect(type(objects[0]))
+    rows = [
+        {attr.columns[0].key: obj.__dict__[attr.key] for attr in mapper.column_attrs if attr.key in obj.__dict__}
+        for obj in objects
+    ]
+    keys: set[str] = set().union(*rows)
+    for row in rows:
+        for key in keys - row.keys():
+            default = mapper.local_table.c[key].default
+            if default is None:
+                row[key] = sa.literal_column("DEFAULT")
+            elif default.is_callable:
+                row[key] = default.arg(None)
+            else:
+                row[key] = default.arg
+    return rows
+
+
+def upsert_offers_by_id_at_provider(offers: list[models.Offer]) -> dict[str, int]:
+    """Insert offers of a single venue, and return their ids by
+    `idAtProvider`.
+
+    An offer that already exists with the same `idAtProvider` (e.g.
+    inserted by a concurrent synchronization) is not inserted again:
+    only its last provider is updated, and its id is returned.
+    """
+    offer_ids = {}
+    for start in range(0, len(offers), BULK_INSERT_CHUNK_SIZE):
+        statement = postgresql.insert(models.Offer).values(
+            _get_insert_rows(offers[start : start + BULK_INSERT_CHUNK_SIZE])
+        )
+        statement = statement.on_conflict_do_update(
+            constraint="unique_idAtProvider_venueId",
+            set_={"lastProviderId": statement.excluded.lastProviderId},
+        ).returning(models.Offer.id, models.Offer.idAtProvider)
+        offer_ids.update({id_at_provider: offer_id for offer_id, id_at_provider in db.session.execute(statement)})
+    return offer_ids
+
+
+def insert_stocks(stocks: list[models.Stock]) -> list[tuple[int, int]]:
+    """Insert stocks, and return the id and the offer id of each of
+    them.
+
+    A stock that already exists with the same `offerId` and
+    `idAtProviders` is ignored. ORM events are not triggered, so this
+    must not be used for stocks of events.
+    """
+    inserted = []
+    for start in range(0, len(stocks), BULK_INSERT_CHUNK_SIZE):
+        statement = (
+            postgresql.insert(models.Stock)
+            .values(_get_insert_rows(stocks[start : start + BULK_INSERT_CHUNK_SIZE]))
+            .on_conflict_do_nothing(index_elements=["offerId", "idAtProviders"])
+            .returning(models.Stock.id, models.Stock.offerId)
+        )
+        inserted.extend((stock_id, offer_id) for stock_id, offer_id in db.session.execute(statement))
+    return inserted
+
+
 def get_stocks_by_id_at_providers(id_at_providers: list[str]) -> dict:
     stocks = models.Stock.query.filter(models.Stock.idAtProviders.in_(id_at_providers)).with_entities(
         models.Stock.id,
@@ -118,6 +118,22 @@ def check_stock_quantity(quantity: int | None, bookingQuantity: int = 0) -> None
         raise errors
 
 
+def check_stock_price_bounds(price: decimal.Decimal, error_key: str = "price") -> None:
+    if price < 0:
+        errors = api_errors.ApiErrors()
+        errors.add_error(error_key, "Le prix doit être positif")
+        raise errors
+    if price > 300:
+        if error_key == "price":
+            error_key += "300"
+        errors = api_errors.ApiErrors()
+        errors.add_error(
+            error_key,
+            "Le prix d’une offre ne peut excéder 300 euros.",
+        )
+        raise errors
+
+
 def check_stocks_price(
     stocks: list[serialization.StockCreationBodyModel] | list[serialization.StockEditionBodyModel],
     offer: models.Offer,
@@ -140,19 +156,7 @@ def check_stocks_price(
 def check_stock_price(
     price: decimal.Decimal, offer: models.Offer, old_price: decimal.Decimal | None = None, error_key: str = "price"
 ) -> None:
-    if price < 0:
-        errors = api_errors.ApiErrors()
-        errors.add_error(error_key, "Le prix doit être positif")
-        raise errors
-    if price > 300:
-        if error_key == "price":
-            error_key += "300"
-        errors = api_errors.ApiErrors()
-        errors.add_error(
-            error_key,
-            "Le prix d’une offre ne peut excéder 300 euros.",
-        )
-        raise errors
+    check_stock_price_bounds(price, error_key=error_key)
 
     offer_price_limitation_rule = models.OfferPriceLimitationRule.query.filter(
         models.OfferPriceLimitationRule.subcategoryId == offer.subcategoryId
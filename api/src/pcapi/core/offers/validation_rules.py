@@ -0,0 +1,210 @@
+"""Offer validation rules, compiled into predicates and cached in each
+process.
+
+Rules are edited in the backoffice, which calls `bump_rules_version()`
+so that all processes load them again.
+"""
+
+import dataclasses
+import logging
+import operator
+import time
+import typing
+
+import flask
+import redis
+import sqlalchemy as sa
+
+from pcapi import settings
+from pcapi.core.educational import models as educational_models
+from pcapi.models import db
+from pcapi.utils import custom_logic
+
+from . import exceptions
+from . import models
+
+
+if typing.TYPE_CHECKING:
+    from .api import AnyOffer
+
+
+logger = logging.getLogger(__name__)
+
+REDIS_RULES_VERSION_KEY = "pcapi:offer_validation_rules:version"
+
+OFFER_LIKE_MODELS = {
+    "Offer",
+    "CollectiveOffer",
+    "CollectiveOfferTemplate",
+}
+
+Predicate = typing.Callable[["AnyOffer"], bool]
+
+
+@dataclasses.dataclass(frozen=True)
+class CompiledRule:
+    id: int
+    name: str
+    sub_rules: tuple[Predicate, ...]
+
+
+def _compile_target_getter(sub_rule: models.OfferValidationSubRule) -> typing.Callable[["AnyOffer"], typing.Any]:
+    if not sub_rule.model:
+        return lambda offer: type(offer).__name__
+
+    model = sub_rule.model.value
+    get_attribute = operator.attrgetter(sub_rule.attribute.value)
+
+    if model in OFFER_LIKE_MODELS:
+
+        def get_object(offer: "AnyOffer") -> typing.Any:
+            if type(offer).__name__ != model:
+                raise exceptions.UnapplicableModel()
+            return offer
+
+    elif model == "CollectiveStock":
+
+        def get_object(offer: "AnyOffer") -> typing.Any:
+            if not isinstance(offer, educational_models.CollectiveOffer):
+                raise exceptions.UnapplicableModel()
+            return offer.collectiveStock
+
+    elif model == "Venue":
+
+        def get_object(offer: "AnyOffer") -> typing.Any:
+            return offer.venue
+
+    elif model == "Offerer":
+
+        def get_object(offer: "AnyOffer") -> typing.Any:
+            return offer.venue.managingOfferer
+
+    else:
+
+        def get_object(offer: "AnyOffer") -> typing.Any:
+            raise exceptions.UnapplicableModel()
+
+    return lambda offer: get_attribute(get_object(offer))
+
+
+def compile_sub_rule(sub_rule: models.OfferValidationSubRule) -> Predicate:
+    get_target = _compile_target_getter(sub_rule)
+    operation = custom_logic.compile_operation(sub_rule.operator.value, sub_rule.comparated["comparated"])
+    return lambda offer: operation(get_target(offer))
+
+
+def compile_rule(rule: models.OfferValidationRule) -> CompiledRule:
+    return CompiledRule(
+        id=rule.id,
+        name=rule.name,
+        sub_rules=tuple(compile_sub_rule(sub_rule) for sub_rule in rule.subRules),
+    )
+
+
+def rule_flags_offer(rule: CompiledRule, offer: "AnyOffer") -> bool:
+    """Return whether all sub-rules of the rule match the offer. A rule
+    never flags an offer of a model that one of its sub-rules does not
+    apply to.
+    """
+    try:
+        return all(sub_rule(offer) for sub_rule in rule.sub_rules)
+    except exceptions.UnapplicableModel:
+        return False
+
+
+def get_flagging_rules(rules: typing.Iterable[CompiledRule], offer: "AnyOffer") -> list[CompiledRule]:
+    return [rule for rule in rules if rule_flags_offer(rule, offer)]
+
+
+@dataclasses.dataclass
+class _RulesCache:
+    rules: tuple[CompiledRule, ...] | None = None
+    version: str | None = None
+    loaded_at: float = 0.0
+    checked_at: float = 0.0
+
+
+_rules_cache = _RulesCache()
+
+
+def _load_rules() -> tuple[CompiledRule, ...]:
+    rules = (
+        models.OfferValidationRule.query.options(
+            sa.orm.joinedload(models.OfferValidationSubRule, models.OfferValidationRule.subRules)
+        )
+        .filter(models.OfferValidationRule.isActive.is_(True))
+        .order_by(models.OfferValidationRule.id)
+        .all()
+    )
+    return tuple(compile_rule(rule) for rule in rules)
+
+
+def get_active_rules() -> tuple[CompiledRule, ...]:
+    """Return active rules, from a cache that is shared by the whole
+    process.
+
+    The cache is used as is during ``OFFER_VALIDATION_RULES_CACHE_TTL``
+    seconds. Then, it is used again for the same duration if the version
+    of rules in Redis has not changed (see `bump_rules_version()`),
+    unless it is older than ``OFFER_VALIDATION_RULES_CACHE_MAX_AGE``
+    seconds. Otherwise, rules are loaded from the database and compiled.
+    """
+    cache = _rules_cache
+    now = time.monotonic()
+    if cache.rules is not None and now < cache.checked_at + settings.OFFER_VALIDATION_RULES_CACHE_TTL:
+        return cache.rules
+
+    version = _get_rules_version() if settings.OFFER_VALIDATION_RULES_CACHE_TTL > 0 else None
+    if (
+        cache.rules is not None
+        and version is not None
+        and version == cache.version
+        and now < cache.loaded_at + settings.OFFER_VALIDATION_RULES_CACHE_MAX_AGE
+    ):
+        cache.checked_at = now
+        return cache.rules
+
+    rules = _load_rules()
+    if settings.OFFER_VALIDATION_RULES_CACHE_TTL > 0:
+        logger.info("Loaded offer validation rules from database", extra={"version": version, "count": len(rules)})
+    cache.rules = rules
+    cache.version = version
+    cache.loaded_at = cache.checked_at = now
+    return rules
+
+
+def _get_rules_version() -> str | None:
+    try:
+        return flask.current_app.redis_client.get(REDIS_RULES_VERSION_KEY) or "0"
+    except redis.exceptions.RedisError:
+        logger.exception("Could not get version of offer validation rules")
+        return None
+
+
+def invalidate_rules_cache() -> None:
+    """Force the next call to `get_active_rules()` to load rules from
+    the database, in this process only.
+    """
+    _rules_cache.rules = None
+
+
+def bump_rules_version() -> None:
+    """Notify all processes that rules have changed: they load them
+    again from the database within ``OFFER_VALIDATION_RULES_CACHE_TTL``
+    seconds.
+    """
+    invalidate_rules_cache()
+    try:
+        flask.current_app.redis_client.incr(REDIS_RULES_VERSION_KEY)
+    except redis.exceptions.RedisError:
+        logger.exception("Could not bump version of offer validation rules")
+
+
+def get_rules_by_id(rule_ids: typing.Collection[int]) -> dict[int, models.OfferValidationRule]:
+    """Return the database objects of the given rules, to be linked to
+    flagged offers.
+    """
+    if not rule_ids:
+        return {}
+    rules = db.session.query(models.OfferValidationRule).filter(models.OfferValidationRule.id.in_(rule_ids))
+    return {rule.id: rule for rule in rules}
@@ -453,12 +453,11 @@ def synchronize_stocks(
         venue,
         provider_id=provider_id,
     )
-    new_offers_references = [new_offer.idAtProvider for new_offer in new_offers if new_offer.idAtProvider]
-
-    db.session.bulk_save_objects(new_offers)
-
-    new_offers_by_provider_reference = offers_repository.get_offers_map_by_id_at_provider(new_offers_references, venue)
-    offers_by_provider_reference = {**offers_by_provider_reference, **new_offers_by_provider_reference}
+    if new_offers:
+        # A single statement inserts the offers and returns their ids,
+        # instead of inserting them and querying them back.
+        new_offers_by_provider_reference = offers_repository.upsert_offers_by_id_at_provider(new_offers)
+        offers_by_provider_reference = {**offers_by_provider_reference, **new_offers_by_provider_reference}
 
     stocks_provider_references = [stock.stocks_provider_reference for stock in stock_details]
     stocks_by_provider_reference = offers_repository.get_stocks_by_id_at_providers(stocks_provider_references)
@@ -470,7 +469,8 @@ def synchronize_stocks(
         provider_id,
     )
 
-    db.session.bulk_save_objects(new_stocks)
+    if new_stocks:
+        offers_repository.insert_stocks(new_stocks)
     db.session.bulk_update_mappings(offers_models.Stock, update_stock_mapping)
 
     db.session.commit()
@@ -1,4 +1,7 @@
 import abc
+import collections
+import contextlib
+import dataclasses
 import datetime
 import functools
 import logging
@@ -20,6 +23,7 @@ import pcapi.core.providers.constants as providers_constants
 import pcapi.core.providers.models as providers_models
 import pcapi.core.providers.repository as providers_repository
 from pcapi.models import db
+from pcapi.models.feature import FeatureToggle
 from pcapi.utils import requests
 
 
@@ -58,27 +62,43 @@ class TiteliveSearch(abc.ABC, typing.Generic[TiteliveWorkType]):
             start_sync_event = self.log_sync_status(providers_models.LocalProviderEventType.SyncStart)
             db.session.add(start_sync_event)
 
-        products_to_update_pages = self.get_updated_titelive_pages(from_date, from_page)
-        for titelive_page in products_to_update_pages:
-            updated_products = self.upsert_titelive_page(titelive_page)
-            failed_to_update_products = []
-            # Saving the products one by one to avoid a rollback of the whole transaction if and when an error occurs
-            for product in updated_products:
-                try:
-                    with repository.transaction():
-                        db.session.add(product)
-                except Exception as e:  # pylint: disable=broad-except
-                    ean = product.extraData.get("ean") if product.extraData else None
-                    logger.error(
-                        "Error while saving product in db",
-                        extra={"exception": e, "productId": product.id, "ean": ean},
-                    )
-                    failed_to_update_products.append(product)
-            updated_products = [product for product in updated_products if product not in failed_to_update_products]
+        thumb_pipeline = None
+        if FeatureToggle.WIP_PROVIDER_THUMBS_PIPELINE.is_active():
+            thumb_pipeline = thumb_storage.ThumbPipeline(self.__class__.__name__)
 
-            with repository.transaction():
-                updated_thumb_products = self.update_product_thumbnails(updated_products, titelive_page)
-                db.session.add_all(updated_thumb_products)
+        products_to_update_pages = self.get_updated_titelive_pages(from_date, from_page)
+        with thumb_pipeline or contextlib.nullcontext():
+            for titelive_page in products_to_update_pages:
+                updated_products = self.upsert_titelive_page(titelive_page)
+                failed_to_update_products = []
+                # Saving the products one by one to avoid a rollback of the whole transaction
+                # if and when an error occurs
+                for product in updated_products:
+                    try:
+                        with repository.transaction():
+                            db.session.add(product)
+                    except Exception as e:  # pylint: disable=broad-except
+                        ean = product.extraData.get("ean") if product.extraData else None
+                        logger.error(
+                            "Error while saving product in db",
+                            extra={"exception": e, "productId": product.id, "ean": ean},
+                        )
+                        failed_to_update_products.append(product)
+                updated_products = [
+                    product for product in updated_products if product not in failed_to_update_products
+                ]
+
+                with repository.transaction():
+                    if thumb_pipeline:
+                        # Thumbnails of this page are handled while the next pages are synchronized.
+                        self.submit_product_thumbnails(thumb_pipeline, updated_products, titelive_page)
+                    else:
+                        updated_thumb_products = self.update_product_thumbnails(updated_products, titelive_page)
+                        db.session.add_all(updated_thumb_products)
+
+            if thumb_pipeline:
+                with repository.transaction():
+                    self.save_product_thumbnails(thumb_pipeline.join())
 
         with repository.transaction():
             stop_sync_event = self.log_sync_status(providers_models.LocalProviderEventType.SyncEnd)
@@ -183,19 +203,7 @@ class TiteliveSearch(abc.ABC, typing.Generic[TiteliveWorkType]):
         products: list[offers_models.Product],
         titelive_page: list[TiteliveWorkType],
     ) -> list[offers_models.Product]:
-        thumbnail_url_by_ean: dict[str, dict[offers_models.TiteliveImageType, str]] = {}
-
-        for work in titelive_page:
-            for article in work.article:
-                thumbnail_url_by_ean[article.gencod] = {}
-                if article.has_image:
-                    thumbnail_url_by_ean[article.gencod][
-                        offers_models.TiteliveImageType.RECTO
-                    ] = article.imagesUrl.recto
-                if article.has_verso_image:
-                    thumbnail_url_by_ean[article.gencod][
-                        offers_models.TiteliveImageType.VERSO
-                    ] = article.imagesUrl.verso
+        thumbnail_url_by_ean = _get_thumbnail_url_by_ean(titelive_page)
 
         for product in products:
             assert product.extraData, "product %s initialized without extra data" % product.id
@@ -247,6 +255,92 @@ class TiteliveSearch(abc.ABC, typing.Generic[TiteliveWorkType]):
 
         return products
 
+    def submit_product_thumbnails(
+        self,
+        thumb_pipeline: thumb_storage.ThumbPipeline,
+        products: list[offers_models.Product],
+        titelive_page: list[TiteliveWorkType],
+    ) -> None:
+        """Submit the download of new thumbnails of products to the
+        pipeline, and save thumbnails of products that are done.
+
+        Unlike `update_product_thumbnails()`, an image that has not
+        changed is not processed nor stored again, and its mediation is
+        kept.
+        """
+        thumbnail_url_by_ean = _get_thumbnail_url_by_ean(titelive_page)
+        object_ids_by_product_id: dict[int, dict[offers_models.TiteliveImageType, str]] = collections.defaultdict(
+            dict
+        )
+        for mediation in self._get_product_mediations([product.id for product in products]):
+            object_ids_by_product_id[mediation.productId][mediation.imageType] = mediation.uuid
+
+        for product in products:
+            assert product.extraData, "product %s initialized without extra data" % product.id
+
+            ean = product.extraData.get("ean")
+            assert ean, "product %s initialized without ean" % product.id
+
+            new_thumbnail_urls = thumbnail_url_by_ean.get(ean)
+            if not new_thumbnail_urls:
+                logger.warning("No thumbnail for product ean %s", ean)
+                continue
+            done = thumb_pipeline.submit(
+                _download_and_store_product_thumbnails,
+                thumb_pipeline,
+                product.id,
+                new_thumbnail_urls,
+                object_ids_by_product_id[product.id],
+            )
+            self.save_product_thumbnails(done)
+
+    def save_product_thumbnails(self, results: list["_ProductThumbnails"]) -> None:
+        """
+        warning this function does not automatically commit the transaction
+        """
+        object_ids_by_product_id = {}
+        for result in results:
+            if result.error is not None:
+                # Keep the current mediations of the product.
+                _log_thumbnails_error(result)
+                continue
+            object_ids_by_product_id[result.product_id] = result.object_ids
+
+        # The same product may appear in several results, e.g. when it is on several pages.
+        saved_object_ids: set[str] = set()
+        for mediation in self._get_product_mediations(list(object_ids_by_product_id)):
+            if object_ids_by_product_id[mediation.productId].get(mediation.imageType) == mediation.uuid:
+                saved_object_ids.add(mediation.uuid)
+            else:
+                db.session.delete(mediation)
+
+        for result in results:
+            if result.error is not None:
+                continue
+            for image_type in result.stored_image_types:
+                object_id = result.object_ids[image_type]
+                if object_id in saved_object_ids or object_id != object_ids_by_product_id[result.product_id].get(
+                    image_type
+                ):
+                    continue
+                saved_object_ids.add(object_id)
+                mediation = offers_models.ProductMediation(
+                    productId=result.product_id,
+                    lastProvider=self.provider,
+                    imageType=image_type,
+                    url=f"{settings.OBJECT_STORAGE_URL}/{settings.THUMBS_FOLDER_NAME}/{object_id}",
+                    uuid=object_id,
+                )
+                db.session.add(mediation)
+
+    def _get_product_mediations(self, product_ids: list[int]) -> list[offers_models.ProductMediation]:
+        if not product_ids:
+            return []
+        return offers_models.ProductMediation.query.filter(
+            offers_models.ProductMediation.productId.in_(product_ids),
+            offers_models.ProductMediation.lastProvider == self.provider,
+        ).all()
+
     def remove_product_mediation(self, product: offers_models.Product) -> None:
         """
         warning this function does not automatically commit the transaction
@@ -265,6 +359,73 @@ class TiteliveSearch(abc.ABC, typing.Generic[TiteliveWorkType]):
         return s
 
 
+def _get_thumbnail_url_by_ean(
+    titelive_page: list[TiteliveWorkType],
+) -> dict[str, dict[offers_models.TiteliveImageType, str]]:
+    thumbnail_url_by_ean: dict[str, dict[offers_models.TiteliveImageType, str]] = {}
+
+    for work in titelive_page:
+        for article in work.article:
+            thumbnail_url_by_ean[article.gencod] = {}
+            if article.has_image:
+                thumbnail_url_by_ean[article.gencod][offers_models.TiteliveImageType.RECTO] = article.imagesUrl.recto
+            if article.has_verso_image:
+                thumbnail_url_by_ean[article.gencod][offers_models.TiteliveImageType.VERSO] = article.imagesUrl.verso
+
+    return thumbnail_url_by_ean
+
+
+@dataclasses.dataclass
+class _ProductThumbnails:
+    product_id: int
+    urls: dict[offers_models.TiteliveImageType, str]
+    object_ids: dict[offers_models.TiteliveImageType, str] = dataclasses.field(default_factory=dict)
+    stored_image_types: list[offers_models.TiteliveImageType] = dataclasses.field(default_factory=list)
+    error: Exception | None = None
+
+
+def _download_and_store_product_thumbnails(
+    thumb_pipeline: thumb_storage.ThumbPipeline,
+    product_id: int,
+    urls: dict[offers_models.TiteliveImageType, str],
+    previous_object_ids: dict[offers_models.TiteliveImageType, str],
+) -> _ProductThumbnails:
+    # Runs in a thread of the pipeline: the database must not be used here.
+    result = _ProductThumbnails(product_id=product_id, urls=urls)
+    try:
+        for image_type in offers_models.TiteliveImageType:
+            url = urls.get(image_type)
+            if url is None:
+                continue
+            with thumb_pipeline.stage("download"):
+                image_bytes = titelive.download_titelive_image(url)
+            object_id = thumb_storage.get_content_object_id(f"{product_id}:{image_type.value}", image_bytes)
+            result.object_ids[image_type] = object_id
+            if object_id == previous_object_ids.get(image_type):
+                thumb_pipeline.mark_unchanged()
+                continue
+            with thumb_pipeline.stage("process"):
+                image_bytes = thumb_storage.process_thumb(image_bytes, keep_ratio=True)
+            with thumb_pipeline.stage("store"):
+                thumb_storage.store_thumb(object_id, image_bytes)
+            result.stored_image_types.append(image_type)
+    except (requests.ExternalAPIException, PIL.UnidentifiedImageError) as e:
+        result.error = e
+    return result
+
+
+def _log_thumbnails_error(result: _ProductThumbnails) -> None:
+    logger.error(
+        "Error while downloading Titelive image",
+        extra={
+            "exception": result.error,
+            "url_recto": result.urls.get(offers_models.TiteliveImageType.RECTO),
+            "url_verso": result.urls.get(offers_models.TiteliveImageType.VERSO),
+            "request_type": "image",
+        },
+    )
+
+
 def filter_recent_products(
     titelive_product_page: list[TiteliveWorkType],
     from_date: datetime.date,
@@ -1,9 +1,14 @@
 from collections import abc
+import contextlib
 import datetime
 import enum
 import logging
+import queue
+import threading
+import time
 import typing
 
+from flask import current_app
 from flask_sqlalchemy import BaseQuery
 import sqlalchemy as sa
 
@@ -213,7 +218,11 @@ def async_index_offers_of_venue_ids(
         )
 
 
-def index_offers_in_queue(from_error_queue: bool = False, max_batches_to_process: int | None = 100) -> None:
+def index_offers_in_queue(
+    from_error_queue: bool = False,
+    max_batches_to_process: int | None = 100,
+    pipelined: bool = False,
+) -> None:
     """Pop offers from indexation queue and reindex them.
 
     If ``from_error_queue`` is True, pop offers from the error queue
@@ -229,9 +238,17 @@ def index_offers_in_queue(from_error_queue: bool = False, max_batches_to_process
     If ``max_batches_to_process`` is None (i.e. if called manually to
     process the whole queue), we pop from the queue and stop only when
     the queue is empty.
+
+    If ``pipelined`` is True, the next batches are loaded and
+    serialized while previous batches are being sent to the external
+    indexation service (see `_index_offers_in_queue_pipelined`).
     """
 
     backend = _get_backend()
+    if pipelined:
+        _index_offers_in_queue_pipelined(backend, from_error_queue, max_batches_to_process)
+        return
+
     n_batches = 1
     while True:
         with backend.pop_offer_ids_from_queue(
@@ -266,6 +283,203 @@ def index_offers_in_queue(from_error_queue: bool = False, max_batches_to_process
         n_batches += 1
 
 
+class _OfferIndexationBatch(typing.NamedTuple):
+    offer_ids: set[int]
+    popping_context: contextlib.AbstractContextManager
+    objects: list[dict]
+    to_delete_ids: list[int]
+
+
+def _index_offers_in_queue_pipelined(
+    backend: base.SearchBackend,
+    from_error_queue: bool,
+    max_batches_to_process: int | None,
+) -> None:
+    """Pop offers from indexation queue and reindex them through a
+    pipeline of stages:
+
+    1. the loader pops a batch of ids and loads the offers (and their
+       booking counts) from the database;
+    2. the serializer turns these offers into objects to be indexed;
+    3. a pool of senders sends these objects (and unindexation
+       requests) to the external indexation service, concurrently.
+
+    The first two stages use the database session, which cannot be
+    shared between threads: they run in the calling thread while
+    previous batches are being sent. Senders are fed through a
+    bounded queue: when it is full, the loader waits for a sender to
+    be available before popping another batch.
+
+    A batch stays in its processing queue until it has been sent, as
+    in `index_offers_in_queue`: if the process crashes, items of
+    batches that have not been sent are put back in the originating
+    queue by `clean_processing_queues()`.
+    """
+    app = current_app._get_current_object()  # type: ignore[attr-defined]
+    to_send: queue.Queue[_OfferIndexationBatch | None] = queue.Queue(maxsize=settings.ALGOLIA_INDEXATION_QUEUE_SIZE)
+    sent: queue.Queue[tuple[_OfferIndexationBatch, Exception | None]] = queue.Queue()
+    stages = ("load", "serialize", "send")
+    counts = dict.fromkeys(stages, 0)
+    durations = dict.fromkeys(stages, 0.0)
+    send_stats_lock = threading.Lock()
+    backpressure_wait = 0.0
+    # Feature flags must be read here: senders cannot use the database session.
+    skip_unchanged = FeatureToggle.WIP_SKIP_UNCHANGED_OFFER_INDEXATION.is_active()
+    start = time.perf_counter()
+
+    def send() -> None:
+        with app.app_context():
+            while (batch := to_send.get()) is not None:
+                send_start = time.perf_counter()
+                try:
+                    _send_offer_indexation_batch(backend, batch, from_error_queue, skip_unchanged)
+                except Exception as exc:  # pylint: disable=broad-except
+                    sent.put((batch, exc))
+                else:
+                    sent.put((batch, None))
+                with send_stats_lock:
+                    counts["send"] += len(batch.objects) + len(batch.to_delete_ids)
+                    durations["send"] += time.perf_counter() - send_start
+
+    def load_and_serialize(
+        offer_ids: set[int], popping_context: contextlib.AbstractContextManager
+    ) -> _OfferIndexationBatch:
+        stage_start = time.perf_counter()
+        to_add, to_delete_ids = _get_offers_to_index_and_unindex(backend, offer_ids)
+        last_x_days_bookings_count_by_offer = get_last_x_days_booking_count_by_offer(to_add)
+        # some offers changes might make some venue ineligible for search
+        _reindex_venues_from_offers(offer_ids)
+        counts["load"] += len(offer_ids)
+        durations["load"] += time.perf_counter() - stage_start
+
+        stage_start = time.perf_counter()
+        try:
+            objects = [
+                backend.serialize_offer(offer, last_x_days_bookings_count_by_offer.get(offer.id) or 0)
+                for offer in to_add
+            ]
+        except Exception as exc:  # pylint: disable=broad-except
+            if not settings.CATCH_INDEXATION_EXCEPTIONS:
+                raise
+            to_add_ids = [offer.id for offer in to_add]
+            _log_indexation_error("offers", ids=to_add_ids, exc=exc, from_error_queue=from_error_queue)
+            backend.enqueue_offer_ids_in_error(to_add_ids)
+            objects = []
+        counts["serialize"] += len(objects)
+        durations["serialize"] += time.perf_counter() - stage_start
+        return _OfferIndexationBatch(offer_ids, popping_context, objects, to_delete_ids)
+
+    def finish(batch: _OfferIndexationBatch, exc: Exception | None) -> None:
+        if exc and not settings.CATCH_INDEXATION_EXCEPTIONS:
+            # Leave the processing queue as is, as `index_offers_in_queue` does.
+            batch.popping_context.__exit__(type(exc), exc, exc.__traceback__)
+            raise exc
+        if exc:
+            logger.error(
+                "Exception while reindexing offers, must fix manually",
+                extra={"exc": str(exc), "offers": batch.offer_ids},
+                exc_info=exc,
+            )
+        else:
+            logger.info(
+                "Reindexed offers from queue",
+                extra={"count": len(batch.offer_ids), "from_error_queue": from_error_queue},
+            )
+        batch.popping_context.__exit__(None, None, None)
+
+    def finish_sent_batches() -> None:
+        while True:
+            try:
+                batch, exc = sent.get_nowait()
+            except queue.Empty:
+                return
+            finish(batch, exc)
+
+    senders = [threading.Thread(target=send, daemon=True) for _ in range(settings.ALGOLIA_INDEXATION_SENDERS)]
+    for sender in senders:
+        sender.start()
+    n_batches = 0
+    try:
+        while not max_batches_to_process or n_batches < max_batches_to_process:
+            popping_context = backend.pop_offer_ids_from_queue(
+                count=settings.REDIS_OFFER_IDS_CHUNK_SIZE,
+                from_error_queue=from_error_queue,
+            )
+            offer_ids = popping_context.__enter__()
+            if not offer_ids:
+                popping_context.__exit__(None, None, None)
+                break
+            n_batches += 1
+
+            logger.info(
+                "Fetched offer ids from indexation queue",
+                extra={"count": len(offer_ids), "offer_ids": offer_ids},
+            )
+            try:
+                batch = load_and_serialize(offer_ids, popping_context)
+            except Exception as exc:  # pylint: disable=broad-except
+                finish(_OfferIndexationBatch(offer_ids, popping_context, [], []), exc)
+                continue
+
+            wait_start = time.perf_counter()
+            to_send.put(batch)
+            backpressure_wait += time.perf_counter() - wait_start
+            finish_sent_batches()
+    finally:
+        for _sender in senders:
+            to_send.put(None)
+        for sender in senders:
+            sender.join()
+    finish_sent_batches()
+
+    elapsed = time.perf_counter() - start
+    logger.info(
+        "Reindexed offers from queue through pipeline",
+        extra={
+            "batches": n_batches,
+            "from_error_queue": from_error_queue,
+            "elapsed": round(elapsed, 3),
+            # Time spent by the loader waiting for an available sender.
+            "backpressure_wait": round(backpressure_wait, 3),
+            "stages": {
+                stage: {
+                    "count": counts[stage],
+                    # Total time spent by this stage (by all senders for "send").
+                    "busy_time": round(durations[stage], 3),
+                    "per_second": round(counts[stage] / elapsed, 2) if elapsed else None,
+                }
+                for stage in stages
+            },
+        },
+    )
+
+
+def _send_offer_indexation_batch(
+    backend: base.SearchBackend,
+    batch: _OfferIndexationBatch,
+    from_error_queue: bool,
+    skip_unchanged: bool,
+) -> None:
+    # Handle new or updated available offers
+    try:
+        backend.index_offer_objects(batch.objects, skip_unchanged=skip_unchanged)
+    except Exception as exc:  # pylint: disable=broad-except
+        if not settings.CATCH_INDEXATION_EXCEPTIONS:
+            raise
+        ids = [obj["objectID"] for obj in batch.objects]
+        _log_indexation_error("offers", ids=ids, exc=exc, from_error_queue=from_error_queue)
+        backend.enqueue_offer_ids_in_error(ids)
+
+    # Handle unavailable offers (deleted, expired, sold out, etc.)
+    try:
+        backend.unindex_offer_ids(batch.to_delete_ids)
+    except Exception as exc:  # pylint: disable=broad-except
+        if not settings.CATCH_INDEXATION_EXCEPTIONS:
+            raise
+        _log_indexation_error("offers", ids=batch.to_delete_ids, exc=exc, from_error_queue=from_error_queue)
+        backend.enqueue_offer_ids_in_error(batch.to_delete_ids)
+
+
 def index_all_collective_offers_and_templates() -> None:
     """Force reindexation of all collective offers and templates."""
     backend = _get_backend()
@@ -517,17 +731,9 @@ def get_last_x_days_booking_count_by_offer(offers: abc.Iterable[offers_models.Of
     return default_dict
 
 
-def reindex_offer_ids(offer_ids: abc.Collection[int], from_error_queue: bool = False) -> None:
-    """Given a list of `Offer.id`, reindex or unindex each offer
-    (i.e. request the external indexation service an update or a
-    removal).
-
-    This function calls the external indexation service and may thus
-    be slow. It should not be called by usual code. You should rather
-    call `async_index_offer_ids()` instead to return quickly.
-    """
-    backend = _get_backend()
-
+def _get_offers_to_index_and_unindex(
+    backend: base.SearchBackend, offer_ids: abc.Collection[int]
+) -> tuple[list[offers_models.Offer], list[int]]:
     to_add = []
     to_delete_ids = []
 
@@ -547,10 +753,29 @@ def reindex_offer_ids(offer_ids: abc.Collection[int], from_error_queue: bool = F
                 extra={"source": "reindex_offer_ids", "offer": offer.id},
             )
 
+    return to_add, to_delete_ids
+
+
+def reindex_offer_ids(offer_ids: abc.Collection[int], from_error_queue: bool = False) -> None:
+    """Given a list of `Offer.id`, reindex or unindex each offer
+    (i.e. request the external indexation service an update or a
+    removal).
+
+    This function calls the external indexation service and may thus
+    be slow. It should not be called by usual code. You should rather
+    call `async_index_offer_ids()` instead to return quickly.
+    """
+    backend = _get_backend()
+    to_add, to_delete_ids = _get_offers_to_index_and_unindex(backend, offer_ids)
+
     # Handle new or updated available offers
     last_x_days_bookings_count_by_offer = get_last_x_days_booking_count_by_offer(to_add)
     try:
-        backend.index_offers(to_add, last_x_days_bookings_count_by_offer)
+        backend.index_offers(
+            to_add,
+            last_x_days_bookings_count_by_offer,
+            skip_unchanged=FeatureToggle.WIP_SKIP_UNCHANGED_OFFER_INDEXATION.is_active(),
+        )
     except Exception as exc:  # pylint: disable=broad-except
         if not settings.CATCH_INDEXATION_EXCEPTIONS:
             raise
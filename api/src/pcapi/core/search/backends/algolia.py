@@ -1,10 +1,15 @@
 from collections import abc
 import contextlib
+import dataclasses
 import datetime
 import decimal
 import enum
+import hashlib
+import itertools
+import json
 import logging
 import re
+import time
 import typing
 import urllib.parse
 
@@ -64,6 +69,23 @@ QUEUES = (
     REDIS_COLLECTIVE_OFFER_TEMPLATE_IDS_IN_ERROR_TO_INDEX,
 )
 REDIS_HASHMAP_INDEXED_OFFERS_NAME = "indexed_offers"
+# Pop up to ARGV[1] random ids from the KEYS[1] set and add them to
+# the KEYS[2] set. Ids are added by chunks, because Lua's `unpack()`
+# cannot handle too many values.
+MOVE_IDS_TO_PROCESSING_QUEUE_SCRIPT = """
+local ids = redis.call("SPOP", KEYS[1], ARGV[1])
+for i = 1, #ids, 1000 do
+    redis.call("SADD", KEYS[2], unpack(ids, i, math.min(i + 999, #ids)))
+end
+return ids
+"""
+# Hashes of the attributes of the last object sent for each offer (see
+# `get_offer_object_hashes`).
+REDIS_HASHMAP_INDEXED_OFFERS_HASHES_NAME = "indexed_offers_hashes"
+# Top-level attributes of serialized offers, which are the unit of
+# partial updates in Algolia.
+OFFER_OBJECT_HASHED_ATTRIBUTES = ("distinct", "offer", "offerer", "venue", "_geoloc")
+OFFER_OBJECT_ATTRIBUTE_HASH_SIZE = 6  # bytes, i.e. 12 hexadecimal characters
 
 
 DEFAULT_LONGITUDE = 2.409289
@@ -146,6 +168,20 @@ def create_algolia_client() -> algoliasearch.search_client.SearchClient:
     return algoliasearch.search_client.SearchClient(transporter, config)
 
 
+class OffersIndexSize(typing.NamedTuple):
+    indexed: int
+    enqueued: int
+
+
+@dataclasses.dataclass
+class _OffersIndexSizeCache:
+    size: OffersIndexSize = OffersIndexSize(indexed=0, enqueued=0)
+    expires_at: float = 0.0
+
+
+_offers_index_size_cache = _OffersIndexSizeCache()
+
+
 class AlgoliaBackend(base.SearchBackend):
     def __init__(self) -> None:
         super().__init__()
@@ -156,13 +192,31 @@ class AlgoliaBackend(base.SearchBackend):
         )
         self.algolia_venues_client = client.init_index(settings.ALGOLIA_VENUES_INDEX_NAME)
         self.redis_client = current_app.redis_client
+        # The script is sent to Redis on its first call only, then run by its digest.
+        self._move_ids_to_processing_queue = self.redis_client.register_script(MOVE_IDS_TO_PROCESSING_QUEUE_SCRIPT)
+
+    def _get_offers_index_size(self) -> OffersIndexSize:
+        """Return the number of indexed and enqueued offers.
+
+        These numbers are cached for ``ALGOLIA_OFFERS_INDEX_SIZE_CACHE_TTL``
+        seconds, in each process, since they are only used to check the
+        (approximate) size limit of the index on each enqueue.
+        """
+        now = time.monotonic()
+        if now >= _offers_index_size_cache.expires_at:
+            with self.redis_client.pipeline(transaction=False) as pipeline:
+                pipeline.hlen(REDIS_HASHMAP_INDEXED_OFFERS_NAME)
+                pipeline.scard(REDIS_OFFER_IDS_NAME)
+                indexed, enqueued = pipeline.execute()
+            _offers_index_size_cache.size = OffersIndexSize(indexed=indexed, enqueued=enqueued)
+            _offers_index_size_cache.expires_at = now + settings.ALGOLIA_OFFERS_INDEX_SIZE_CACHE_TTL
+        return _offers_index_size_cache.size
 
     def _can_enqueue_offer_ids(self, offer_ids: abc.Collection[int]) -> bool:
         if settings.ALGOLIA_OFFERS_INDEX_MAX_SIZE < 0:
             return True
 
-        currently_indexed_offers = self.redis_client.hlen(REDIS_HASHMAP_INDEXED_OFFERS_NAME)
-        offers_in_indexing_queue = self.redis_client.scard(REDIS_OFFER_IDS_NAME)
+        currently_indexed_offers, offers_in_indexing_queue = self._get_offers_index_size()
         limit = settings.ALGOLIA_OFFERS_INDEX_MAX_SIZE
         can_enqueue = currently_indexed_offers + offers_in_indexing_queue < limit
         if not can_enqueue:
@@ -183,6 +237,10 @@ class AlgoliaBackend(base.SearchBackend):
             return
 
         self._enqueue_ids(offer_ids, REDIS_OFFER_IDS_NAME)
+        # Keep the cached size up to date until it expires (ids that
+        # are already in the queue are counted twice, that's fine).
+        size = _offers_index_size_cache.size
+        _offers_index_size_cache.size = size._replace(enqueued=size.enqueued + len(offer_ids))
 
     def enqueue_offer_ids_in_error(self, offer_ids: abc.Collection[int]) -> None:
         self._enqueue_ids(offer_ids, REDIS_OFFER_IDS_IN_ERROR_NAME)
@@ -295,33 +353,32 @@ class AlgoliaBackend(base.SearchBackend):
         # there. A separate cron job looks for these (specially-named)
         # queues and adds back their items to the originating queue
         # (see `clean_processing_queues`).
+        #
+        # Items are moved by a Lua script, which Redis runs
+        # atomically, in a single round trip.
         timestamp = datetime.datetime.utcnow().timestamp()
         processing_queue = f"{queue}:processing:{timestamp}"
         try:
-            ids = self.redis_client.srandmember(queue, count)
-            with self.redis_client.pipeline(transaction=True) as pipeline:
-                for id_ in ids:
-                    pipeline.smove(queue, processing_queue, id_)
-                pipeline.execute()
-                batch = {int(id_) for id_ in ids}  # str -> int
-                logger.info(
-                    "Moved batch of object ids to index to processing queue",
-                    extra={
-                        "originating_queue": queue,
-                        "processing_queue": processing_queue,
-                        "requested_count": count,
-                        "effective_count": len(batch),
-                    },
-                )
-                yield batch
-                self.redis_client.delete(processing_queue)
-                logger.info(
-                    "Deleted processing queue",
-                    extra={
-                        "originating_queue": queue,
-                        "processing_queue": processing_queue,
-                    },
-                )
+            ids = self._move_ids_to_processing_queue(keys=[queue, processing_queue], args=[count])
+            batch = {int(id_) for id_ in ids}  # str -> int
+            logger.info(
+                "Moved batch of object ids to index to processing queue",
+                extra={
+                    "originating_queue": queue,
+                    "processing_queue": processing_queue,
+                    "requested_count": count,
+                    "effective_count": len(batch),
+                },
+            )
+            yield batch
+            self.redis_client.delete(processing_queue)
+            logger.info(
+                "Deleted processing queue",
+                extra={
+                    "originating_queue": queue,
+                    "processing_queue": processing_queue,
+                },
+            )
         except redis.exceptions.RedisError:
             logger.exception(
                 "Could not pop object ids to index from queue",
@@ -359,11 +416,47 @@ class AlgoliaBackend(base.SearchBackend):
             # cache so that we do perform a request to Algolia.
             return True
 
-    def index_offers(self, offers: abc.Collection[offers_models.Offer], last_30_days_bookings: dict[int, int]) -> None:
+    def index_offers(
+        self,
+        offers: abc.Collection[offers_models.Offer],
+        last_30_days_bookings: dict[int, int],
+        skip_unchanged: bool = False,
+    ) -> None:
         if not offers:
             return
         objects = [self.serialize_offer(offer, last_30_days_bookings.get(offer.id) or 0) for offer in offers]
-        self.algolia_offers_client.save_objects(objects)
+        self.index_offer_objects(objects, skip_unchanged=skip_unchanged)
+
+    def index_offer_objects(self, objects: abc.Collection[dict], skip_unchanged: bool = False) -> None:
+        """Send already serialized offers (see `serialize_offer`).
+
+        If ``skip_unchanged`` is True, objects are compared with the
+        last objects that have been sent: identical objects are not
+        sent again, and only changed attributes of other objects are
+        sent (as partial updates).
+        """
+        if not objects:
+            return
+        hashes = {obj["objectID"]: get_offer_object_hashes(obj) for obj in objects}
+        if skip_unchanged:
+            to_save, to_update = self._get_changed_offer_objects(objects, hashes)
+            logger.info(
+                "Compared offers with last indexed versions",
+                extra={
+                    "saved": len(to_save),
+                    "partially_updated": len(to_update),
+                    "skipped": len(objects) - len(to_save) - len(to_update),
+                },
+            )
+        else:
+            to_save, to_update = list(objects), []
+        if to_save:
+            self.algolia_offers_client.save_objects(to_save)
+        if to_update:
+            # Objects that are not in the index anymore must not be
+            # created from partial objects: they are saved in full
+            # next time, since their hash is forgotten on unindexing.
+            self.algolia_offers_client.partial_update_objects(to_update, {"createIfNotExists": False})
 
         try:
             # We used to store a summary of each offer, which is why
@@ -372,16 +465,53 @@ class AlgoliaBackend(base.SearchBackend):
             # possible to make Redis use less memory. In the future,
             # we may even remove the hashmap if it's not proven useful
             # (see log in reindex_offer_ids)
-            offer_ids = [offer.id for offer in offers]
+            offer_ids = [obj["objectID"] for obj in itertools.chain(to_save, to_update)]
             pipeline = self.redis_client.pipeline(transaction=True)
             for offer_id in offer_ids:
                 pipeline.hset(REDIS_HASHMAP_INDEXED_OFFERS_NAME, str(offer_id), "")
+                pipeline.hset(REDIS_HASHMAP_INDEXED_OFFERS_HASHES_NAME, str(offer_id), hashes[offer_id])
             pipeline.execute()
         except Exception:  # pylint: disable=broad-except
             logger.exception("Could not add to list of indexed offers", extra={"offers": offer_ids})
         finally:
             pipeline.reset()
 
+    def _get_changed_offer_objects(
+        self, objects: abc.Collection[dict], hashes: dict[int, str]
+    ) -> tuple[list[dict], list[dict]]:
+        """Return objects that must be fully saved (because they have
+        never been sent, or we don't know what has been sent) and
+        partial objects with only changed attributes.
+
+        Partial objects always include the `offer` attribute, so that
+        its `indexedAt` date is updated along with other attributes.
+        """
+        try:
+            previous_hashes = self.redis_client.hmget(
+                REDIS_HASHMAP_INDEXED_OFFERS_HASHES_NAME,
+                [str(obj["objectID"]) for obj in objects],
+            )
+        except redis.exceptions.RedisError:
+            if settings.IS_RUNNING_TESTS:
+                raise
+            logger.exception("Could not get hashes of indexed offers")
+            return list(objects), []
+
+        to_save = []
+        to_update = []
+        for obj, previous in zip(objects, previous_hashes):
+            current = hashes[obj["objectID"]]
+            if not previous or len(previous) != len(current):
+                to_save.append(obj)
+                continue
+            changed_attributes = get_changed_offer_attributes(previous, current)
+            if changed_attributes:
+                to_update.append(
+                    {"objectID": obj["objectID"], "offer": obj["offer"]}
+                    | {attr: obj[attr] for attr in changed_attributes}
+                )
+        return to_save, to_update
+
     def index_collective_offer_templates(
         self,
         collective_offer_templates: abc.Collection[educational_models.CollectiveOfferTemplate],
@@ -405,10 +535,10 @@ class AlgoliaBackend(base.SearchBackend):
             return
         self.algolia_offers_client.delete_objects(offer_ids)
         try:
-            self.redis_client.hdel(
-                REDIS_HASHMAP_INDEXED_OFFERS_NAME,
-                *(str(offer_id) for offer_id in offer_ids),
-            )
+            with self.redis_client.pipeline(transaction=True) as pipeline:
+                for name in (REDIS_HASHMAP_INDEXED_OFFERS_NAME, REDIS_HASHMAP_INDEXED_OFFERS_HASHES_NAME):
+                    pipeline.hdel(name, *(str(offer_id) for offer_id in offer_ids))
+                pipeline.execute()
         except redis.exceptions.RedisError:
             if settings.IS_RUNNING_TESTS:
                 raise
@@ -417,7 +547,7 @@ class AlgoliaBackend(base.SearchBackend):
     def unindex_all_offers(self) -> None:
         self.algolia_offers_client.clear_objects()
         try:
-            self.redis_client.delete(REDIS_HASHMAP_INDEXED_OFFERS_NAME)
+            self.redis_client.delete(REDIS_HASHMAP_INDEXED_OFFERS_NAME, REDIS_HASHMAP_INDEXED_OFFERS_HASHES_NAME)
         except redis.exceptions.RedisError:
             if settings.IS_RUNNING_TESTS:
                 raise
@@ -803,6 +933,31 @@ class AlgoliaBackend(base.SearchBackend):
         return ids
 
 
+def get_offer_object_hashes(obj: dict) -> str:
+    """Return the concatenated hashes of the top-level attributes of a
+    serialized offer.
+
+    `indexedAt` changes every time an offer is serialized: it is ignored.
+    """
+    hashes = []
+    for attribute in OFFER_OBJECT_HASHED_ATTRIBUTES:
+        value = obj.get(attribute)
+        if attribute == "offer":
+            value = {key: val for key, val in value.items() if key != "indexedAt"}
+        dumped = json.dumps(value, sort_keys=True, default=str).encode()
+        hashes.append(hashlib.blake2b(dumped, digest_size=OFFER_OBJECT_ATTRIBUTE_HASH_SIZE).hexdigest())
+    return "".join(hashes)
+
+
+def get_changed_offer_attributes(previous_hashes: str, hashes: str) -> list[str]:
+    size = 2 * OFFER_OBJECT_ATTRIBUTE_HASH_SIZE
+    return [
+        attribute
+        for i, attribute in enumerate(OFFER_OBJECT_HASHED_ATTRIBUTES)
+        if previous_hashes[i * size : (i + 1) * size] != hashes[i * size : (i + 1) * size]
+    ]
+
+
 def position(venue: offerers_models.Venue, offer: offers_models.Offer | None = None) -> dict[str, float]:
     latitude = None
     longitude = None
@@ -49,10 +49,16 @@ class SearchBackend:
         raise NotImplementedError()
 
     def index_offers(
-        self, offers: "abc.Collection[offers_models.Offer]", last_30_days_bookings: dict[int, int]
+        self,
+        offers: "abc.Collection[offers_models.Offer]",
+        last_30_days_bookings: dict[int, int],
+        skip_unchanged: bool = False,
     ) -> None:
         raise NotImplementedError()
 
+    def index_offer_objects(self, objects: abc.Collection[dict], skip_unchanged: bool = False) -> None:
+        raise NotImplementedError()
+
     def index_collective_offer_templates(
         self, collective_offer_templates: "abc.Collection[educational_models.CollectiveOfferTemplate]"
     ) -> None:
@@ -11,6 +11,7 @@ from pcapi.core.offerers import api as offerers_api
 import pcapi.core.offers.api as offers_api
 import pcapi.core.offers.repository as offers_repository
 from pcapi.core.search import staging_indexation
+from pcapi.models.feature import FeatureToggle
 from pcapi.scheduled_tasks.decorators import log_cron_with_transaction
 from pcapi.utils.blueprint import Blueprint
 from pcapi.utils.chunks import get_chunks
@@ -24,7 +25,7 @@ logger = logging.getLogger(__name__)
 @log_cron_with_transaction
 def index_offers_in_algolia_by_offer() -> None:
     """Pop offers from indexation queue and reindex them."""
-    search.index_offers_in_queue()
+    search.index_offers_in_queue(pipelined=FeatureToggle.WIP_PIPELINED_OFFER_INDEXATION.is_active())
 
 
 @blueprint.cli.command("index_offers_in_algolia_by_venue")
@@ -64,7 +65,10 @@ def delete_expired_collective_offers_template_in_algolia() -> None:
 @log_cron_with_transaction
 def index_offers_in_error_in_algolia_by_offer() -> None:
     """Pop offers from the error queue and reindex them."""
-    search.index_offers_in_queue(from_error_queue=True)
+    search.index_offers_in_queue(
+        from_error_queue=True,
+        pipelined=FeatureToggle.WIP_PIPELINED_OFFER_INDEXATION.is_active(),
+    )
 
 
 @blueprint.cli.command("index_collective_offers_templates_in_error")
@@ -1,4 +1,5 @@
 import datetime
+import functools
 import logging
 import typing
 
@@ -23,6 +24,7 @@ from pcapi.core.subscription.educonnect import api as educonnect_subscription_ap
 from pcapi.core.subscription.ubble import api as ubble_subscription_api
 from pcapi.core.users import api as users_api
 from pcapi.core.users import constants as users_constants
+from pcapi.core.users import identity_cache as users_identity_cache
 from pcapi.core.users import models as users_models
 from pcapi.core.users import utils as users_utils
 from pcapi.core.users import young_status as young_status_module
@@ -84,6 +86,7 @@ def activate_beneficiary_for_eligibility(
 
     db.session.add_all((user, deposit))
     db.session.commit()
+    pcapi_repository.on_commit(functools.partial(users_identity_cache.invalidate_cached_users, user.email))
     logger.info("Activated beneficiary and created deposit", extra={"user": user.id, "source": deposit.source})
 
     transactional_mails.send_accepted_as_beneficiary_email(user=user)
@@ -15,6 +15,7 @@ import sqlalchemy.orm
 from pcapi import settings
 from pcapi.models import db
 from pcapi.models.feature import Feature
+from pcapi.models.feature import invalidate_features_cache
 
 
 # 1. SELECT the user session.
@@ -273,6 +274,7 @@ class override_features(TestContextDecorator):
                 self.apply_to_revert[name] = not status
                 Feature.query.filter_by(name=name).update({"isActive": status})
                 db.session.commit()
+        invalidate_features_cache()
         # Clear the feature cache on request if any
         if flask.has_request_context():
             if hasattr(flask.request, "_cached_features"):
@@ -282,6 +284,7 @@ class override_features(TestContextDecorator):
         for name, status in self.apply_to_revert.items():
             Feature.query.filter_by(name=name).update({"isActive": status})
             db.session.commit()
+        invalidate_features_cache()
         # Clear the feature cache on request if any
         if flask.has_request_context():
             if hasattr(flask.request, "_cached_features"):
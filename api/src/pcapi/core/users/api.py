@@ -2,6 +2,7 @@ from dataclasses import asdict
 import datetime
 from decimal import Decimal
 import enum
+from functools import partial
 from io import BytesIO
 import itertools
 import logging
@@ -64,6 +65,7 @@ from pcapi.models import db
 from pcapi.models.api_errors import ApiErrors
 from pcapi.models.validation_status_mixin import ValidationStatus
 from pcapi.notifications import push as push_api
+from pcapi.repository import on_commit
 from pcapi.repository import repository
 from pcapi.repository import transaction
 from pcapi.routes.serialization import users as users_serialization
@@ -77,6 +79,7 @@ from pcapi.utils.requests import ExternalAPIException
 
 from . import constants
 from . import exceptions
+from . import identity_cache
 from . import models
 
 
@@ -269,6 +272,7 @@ def _update_user_information(
         user.departementCode = postal_code_utils.PostalCode(postal_code).get_departement_code() if postal_code else None
 
     user.remove_admin_role()
+    on_commit(partial(identity_cache.invalidate_cached_users, user.email))
 
     db.session.add(user)
     db.session.flush()
@@ -458,6 +462,8 @@ def suspend_account(
         if user.backoffice_profile:
             user.backoffice_profile.roles = []
 
+    on_commit(partial(identity_cache.invalidate_cached_users, user.email))
+
     if reason == constants.SuspensionReason.SUSPICIOUS_LOGIN_REPORTED_BY_USER:
         update_user_password(user, random_password())
 
@@ -555,6 +561,7 @@ def unsuspend_account(
     history_api.add_action(history_models.ActionType.USER_UNSUSPENDED, author=actor, user=user, comment=comment)
 
     db.session.commit()
+    on_commit(partial(identity_cache.invalidate_cached_users, user.email))
 
     logger.info(
         "Account has been unsuspended",
@@ -580,6 +587,7 @@ def change_email(
     new_email: str,
 ) -> None:
     email_history = models.UserEmailHistory.build_validation(user=current_user, new_email=new_email, by_admin=False)
+    old_email = current_user.email
 
     try:
         current_user.email = new_email
@@ -596,6 +604,7 @@ def change_email(
     models.UserSession.query.filter_by(userId=current_user.id).delete(synchronize_session=False)
     models.SingleSignOn.query.filter_by(userId=current_user.id).delete(synchronize_session=False)
     db.session.commit()
+    on_commit(partial(identity_cache.invalidate_cached_users, old_email, new_email))
 
     logger.info("User has changed their email", extra={"user": current_user.id})
 
@@ -714,6 +723,7 @@ def update_user_info(
         repository.save(user)
     else:
         repository.add_to_session(user)
+    on_commit(partial(identity_cache.invalidate_cached_users, old_email, user.email))
 
     # TODO(prouzet) even for young users, we should probably remove contact with former email from sendinblue lists
     if old_email and user.has_pro_role:
@@ -1587,6 +1597,7 @@ def anonymize_user(user: models.User, *, author: models.User | None = None, forc
     ).delete()
 
     if external_email_anonymized:
+        on_commit(partial(identity_cache.invalidate_cached_users, user.email))
         user.replace_roles_by_anonymized_role()
         user.email = f"anonymous_{user.id}@anonymized.passculture"
         db.session.add(
@@ -12,6 +12,7 @@ from pcapi.core.mails import transactional as transactional_mails
 from pcapi.core.users import api
 from pcapi.core.users import constants
 from pcapi.core.users import exceptions
+from pcapi.core.users import identity_cache
 from pcapi.core.users import models
 from pcapi.core.users import repository as users_repository
 from pcapi.core.users.email.send import send_pro_user_emails_for_email_change
@@ -325,6 +326,7 @@ def request_email_update_from_admin(user: models.User, email: str) -> None:
 
     email_history = models.UserEmailHistory.build_update_request(user=user, new_email=email, by_admin=True)
 
+    on_commit(partial(identity_cache.invalidate_cached_users, user.email, email))
     user.email = email
     user.isEmailValidated = False
 
@@ -344,6 +346,7 @@ def full_email_update_by_admin(user: models.User, email: str, commit: bool = Fal
     admin_update_event = models.UserEmailHistory.build_admin_update(user=user, new_email=email)
     db.session.add(admin_update_event)
 
+    on_commit(partial(identity_cache.invalidate_cached_users, user.email, email))
     user.email = email
     user.isEmailValidated = True
     db.session.add(user)
@@ -358,6 +361,7 @@ def clear_email_by_admin(user: models.User) -> None:
     admin_update_event = models.UserEmailHistory.build_admin_update(user=user, new_email=email)
     db.session.add(admin_update_event)
 
+    on_commit(partial(identity_cache.invalidate_cached_users, user.email, email))
     user.email = email
     db.session.add(user)
 
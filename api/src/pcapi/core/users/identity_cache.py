@@ -0,0 +1,112 @@
+"""Short-lived cache of the users authenticated by the JWT of native
+routes, keyed by the identity of the token (their email address).
+
+It saves the lookup of the user by email on each request (see
+`routes.native.security.setup_context()`). Functions that change the
+email address, the active flag or the roles of a user call
+`invalidate_cached_users()` once the change is committed, through
+`repository.on_commit()`.
+"""
+
+import dataclasses
+import json
+import logging
+
+import flask
+import redis
+import sqlalchemy as sa
+
+from pcapi import settings
+from pcapi.models import db
+from pcapi.utils import email as email_utils
+
+from . import models
+
+
+logger = logging.getLogger(__name__)
+
+REDIS_KEY_PREFIX = "api:native:authenticated_user"
+
+
+@dataclasses.dataclass(frozen=True)
+class CachedUser:
+    id: int
+    email: str
+    is_active: bool
+    roles: tuple[models.UserRole, ...]
+
+
+def _get_key(email: str) -> str:
+    # Users are looked up with a case-insensitive comparison.
+    return f"{REDIS_KEY_PREFIX}:{email_utils.sanitize_email(email)}"
+
+
+def get_cached_user(email: str) -> CachedUser | None:
+    if settings.NATIVE_AUTHENTICATED_USER_CACHE_TTL <= 0:
+        return None
+    try:
+        cached = flask.current_app.redis_client.get(_get_key(email))
+    except redis.exceptions.RedisError:
+        logger.exception("Could not get authenticated user from cache")
+        return None
+    if not cached:
+        return None
+    data = json.loads(cached)
+    return CachedUser(
+        id=data["id"],
+        email=data["email"],
+        is_active=data["isActive"],
+        roles=tuple(models.UserRole(role) for role in data["roles"]),
+    )
+
+
+def cache_user(email: str, user: models.User) -> None:
+    if settings.NATIVE_AUTHENTICATED_USER_CACHE_TTL <= 0:
+        return
+    data = {
+        "id": user.id,
+        "email": user.email,
+        "isActive": user.isActive,
+        "roles": [role.value for role in user.roles],
+    }
+    try:
+        flask.current_app.redis_client.set(
+            _get_key(email), json.dumps(data), ex=settings.NATIVE_AUTHENTICATED_USER_CACHE_TTL
+        )
+    except redis.exceptions.RedisError:
+        logger.exception("Could not cache authenticated user", extra={"user": user.id})
+
+
+def invalidate_cached_users(*emails: str | None) -> None:
+    if settings.NATIVE_AUTHENTICATED_USER_CACHE_TTL <= 0:
+        return
+    keys = [_get_key(email) for email in emails if email]
+    if not keys:
+        return
+    try:
+        flask.current_app.redis_client.delete(*keys)
+    except redis.exceptions.RedisError:
+        logger.exception("Could not invalidate cached authenticated users")
+
+
+def get_lazy_user(cached_user: CachedUser) -> models.User:
+    """Return a user attached to the session, of which only cached
+    attributes are loaded. Other attributes are loaded from the
+    database, with a single query, the first time one of them is
+    accessed.
+    """
+    identity_key = sa.inspect(models.User).identity_key_from_primary_key((cached_user.id,))
+    user = db.session.identity_map.get(identity_key)
+    if user is not None:
+        return user
+    user = models.User(
+        id=cached_user.id,
+        email=cached_user.email,
+        isActive=cached_user.is_active,
+        roles=list(cached_user.roles),
+    )
+    # Unset attributes are marked as expired, as if they had been
+    # loaded and then expired by a commit.
+    sa.orm.make_transient_to_detached(user)
+    db.session.add(user)
+    return user
@@ -1,5 +1,7 @@
+import bisect
 import datetime
 from decimal import Decimal
+import typing
 
 from pcapi.core.bookings.models import Booking
 from pcapi.core.categories import subcategories_v2 as subcategories
@@ -8,6 +10,7 @@ from pcapi.core.finance import utils as finance_utils
 import pcapi.core.finance.api as finance_api
 import pcapi.core.finance.models as finance_models
 from pcapi.core.offers.models import Offer
+from pcapi.models import db
 
 
 # A new set rules are in effect as of 1 September 2021 (i.e. 31 August 22:00 UTC)
@@ -214,31 +217,106 @@ assert [r.description for r in REGULAR_RULES] == [
 ]
 
 
+class _IndexedRule(typing.NamedTuple):
+    start: datetime.datetime
+    end: datetime.datetime | None
+    subcategories: frozenset[str]
+    rule_id: int
+
+
 class CustomRuleFinder:
-    def __init__(self) -> None:
-        self.rules = finance_models.CustomReimbursementRule.query.all()
-        self.rules_by_offer = self._partition_by_field("offerId")
-        self.rules_by_venue = self._partition_by_field("venueId")
-        self.rules_by_offerer = self._partition_by_field("offererId")
+    """Find the custom reimbursement rule that applies to a booking.
 
-    def _partition_by_field(self, field: str) -> dict:
-        cache: dict[int, list[finance_models.CustomReimbursementRule]] = {}
-        for rule in self.rules:
-            cache.setdefault(getattr(rule, field), []).append(rule)
-        return cache
+    All rules are loaded once and indexed by offer, venue and offerer.
+    Each list of rules is sorted by start date, so that rules that
+    start after the booking has been used are skipped with a binary
+    search.
+    """
 
-    def get_rule(self, booking: Booking) -> finance_models.CustomReimbursementRule | None:
-        for rule in self.rules_by_offer.get(booking.stock.offerId, ()):
-            if rule.matches(booking, cumulative_revenue=0):  # cumulative revenue is ignored
-                return rule
-        for rule in self.rules_by_venue.get(finance_api.get_pricing_point_link(booking).pricingPointId, ()):
-            if rule.matches(booking, cumulative_revenue=0):  # cumulative revenue is ignored
-                return rule
-        for rule in self.rules_by_offerer.get(booking.offererId, ()):
-            if rule.matches(booking, cumulative_revenue=0):  # cumulative revenue is ignored
-                return rule
+    def __init__(self) -> None:
+        self.rules_by_offer: dict[int, list[_IndexedRule]] = {}
+        self.rules_by_venue: dict[int, list[_IndexedRule]] = {}
+        self.rules_by_offerer: dict[int, list[_IndexedRule]] = {}
+        rows = db.session.query(
+            finance_models.CustomReimbursementRule.id,
+            finance_models.CustomReimbursementRule.offerId,
+            finance_models.CustomReimbursementRule.venueId,
+            finance_models.CustomReimbursementRule.offererId,
+            finance_models.CustomReimbursementRule.subcategories,
+            finance_models.CustomReimbursementRule.timespan,
+        )
+        for rule_id, offer_id, venue_id, offerer_id, rule_subcategories, timespan in rows:
+            rule = _IndexedRule(
+                start=timespan.lower,
+                end=timespan.upper,
+                subcategories=frozenset(rule_subcategories or ()),
+                rule_id=rule_id,
+            )
+            if offer_id:
+                self.rules_by_offer.setdefault(offer_id, []).append(rule)
+            elif venue_id:
+                self.rules_by_venue.setdefault(venue_id, []).append(rule)
+            else:
+                self.rules_by_offerer.setdefault(offerer_id, []).append(rule)
+        for index in (self.rules_by_offer, self.rules_by_venue, self.rules_by_offerer):
+            for rules in index.values():
+                rules.sort(key=lambda rule: rule.start)
+
+    def _find_rule_id(
+        self,
+        rules: list[_IndexedRule],
+        date_used: datetime.datetime,
+        subcategory_id: str | None,
+    ) -> int | None:
+        # Only look at rules that started before the booking was used.
+        started = bisect.bisect_right(rules, date_used, key=lambda rule: rule.start)
+        for rule in reversed(rules[:started]):
+            if rule.end is not None and date_used >= rule.end:
+                continue
+            if subcategory_id and rule.subcategories and subcategory_id not in rule.subcategories:
+                continue
+            return rule.rule_id
         return None
 
+    def get_rule(self, booking: Booking) -> finance_models.CustomReimbursementRule | None:
+        if booking.dateUsed is None:
+            raise ValueError("Can't compare None to datetime")
+        # Offer rules apply regardless of the subcategory of the offer.
+        rule_id = self._find_rule_id(self.rules_by_offer.get(booking.stock.offerId, []), booking.dateUsed, None)
+        if rule_id is None:
+            subcategory_id = booking.stock.offer.subcategoryId
+            pricing_point_id = finance_api.get_pricing_point_link(booking).pricingPointId
+            rule_id = self._find_rule_id(self.rules_by_venue.get(pricing_point_id, []), booking.dateUsed, subcategory_id)
+            if rule_id is None:
+                rule_id = self._find_rule_id(
+                    self.rules_by_offerer.get(booking.offererId, []), booking.dateUsed, subcategory_id
+                )
+        if rule_id is None:
+            return None
+        return finance_models.CustomReimbursementRule.query.get(rule_id)
+
+
+_custom_rule_finder: CustomRuleFinder | None = None
+
+
+def get_custom_rule_finder() -> CustomRuleFinder:
+    """Return the rule finder shared by the current process, and build
+    it if needed.
+
+    It is rebuilt at the beginning of each pricing run, and when custom
+    reimbursement rules are created or modified (see
+    `reset_custom_rule_finder()`).
+    """
+    global _custom_rule_finder  # pylint: disable=global-statement
+    if _custom_rule_finder is None:
+        _custom_rule_finder = CustomRuleFinder()
+    return _custom_rule_finder
+
+
+def reset_custom_rule_finder() -> None:
+    global _custom_rule_finder  # pylint: disable=global-statement
+    _custom_rule_finder = None
+
 
 def get_reimbursement_rule(
     booking: Booking | CollectiveBooking,
@@ -30,6 +30,7 @@ from pcapi.core.logging import install_logging
 from pcapi.models import db
 from pcapi.models import install_models
 from pcapi.scripts.install import install_commands
+from pcapi.tasks import cloud_task
 from pcapi.utils.json_encoder import EnumJSONEncoder
 from pcapi.utils.sentry import init_sentry_sdk
 
@@ -215,6 +216,14 @@ def remove_db_session(exc: BaseException | None = None) -> None:
         pass
 
 
+@app.teardown_request
+def flush_cloud_tasks(exc: BaseException | None = None) -> None:
+    # Tasks of the request are created concurrently in the background
+    # (if `CLOUD_TASK_ENQUEUE_WORKERS` is set). Wait for them, so that
+    # they are not lost if the worker is then killed.
+    cloud_task.flush_tasks()
+
+
 with app.app_context():
     # Invalidates connections that are being shared accross process boundaries
     # see https://docs.sqlalchemy.org/en/13/core/pooling.html#using-connection-pools-with-multiprocessing-or-os-fork
@@ -92,24 +92,6 @@ class CDSStocks(LocalProvider):
 
         return providable_information_list
 
-    def get_existing_object(
-        self,
-        model_type: type[offers_models.Product | offers_models.Offer | offers_models.Stock],
-        id_at_providers: str,
-    ) -> offers_models.Product | offers_models.Offer | offers_models.Stock | None:
-        # exception to the ProvidableMixin because Offer no longer extends this class
-        # idAtProviders has been replaced by idAtProvider property
-        if model_type == offers_models.Offer:
-            query = model_type.query.filter_by(idAtProvider=id_at_providers)
-        elif model_type == offers_models.Stock:
-            query = model_type.query.filter(
-                offers_models.Stock.idAtProviders == id_at_providers,  # i.e. "51%123%CDS#2"
-            ).with_for_update()
-        else:
-            query = model_type.query.filter_by(idAtProviders=id_at_providers)
-
-        return query.one_or_none()
-
     def fill_object_attributes(self, pc_object: Model) -> None:
         if isinstance(pc_object, offers_models.Offer):
             self.fill_offer_attributes(pc_object)
@@ -1,10 +1,16 @@
 from abc import abstractmethod
+import collections
 from collections.abc import Iterator
+import contextlib
+import dataclasses
 from datetime import datetime
 import logging
 import typing
 
+from pcapi.connectors.thumb_storage import ThumbPipeline
 from pcapi.connectors.thumb_storage import create_thumb
+from pcapi.connectors.thumb_storage import process_thumb
+from pcapi.connectors.thumb_storage import store_thumb
 from pcapi.core import search
 import pcapi.core.finance.api as finance_api
 import pcapi.core.offers.models as offers_models
@@ -16,6 +22,7 @@ from pcapi.local_providers.providable_info import ProvidableInfo
 from pcapi.models import Model
 from pcapi.models import db
 from pcapi.models.api_errors import ApiErrors
+from pcapi.models.feature import FeatureToggle
 from pcapi.models.has_thumb_mixin import HasThumbMixin
 from pcapi.repository import repository
 from pcapi.repository.providable_queries import get_last_update_for_provider
@@ -40,6 +47,7 @@ class LocalProvider(Iterator):
         self.checkedThumbs = 0
         self.erroredThumbs = 0
         self.provider = get_provider_by_local_class(self.__class__.__name__)
+        self.thumb_pipeline: ThumbPipeline | None = None
 
     @property
     @abstractmethod
@@ -102,6 +110,26 @@ class LocalProvider(Iterator):
         if not new_thumb:
             return
 
+        if self.thumb_pipeline:
+            # The thumb is downloaded by `get_object_thumb()`, which uses
+            # the current state of the provider. Only its processing and
+            # storage can be done in the background. The count is
+            # incremented beforehand, as the storage id depends on it, and
+            # rolled back if the job fails.
+            if pc_object.thumbCount is None:
+                pc_object.thumbCount = 0
+            pc_object.thumbCount += 1
+            results = self.thumb_pipeline.submit(
+                _process_and_store_thumb,
+                self.thumb_pipeline,
+                _ThumbResult(pc_object=pc_object),
+                new_thumb,
+                pc_object.get_thumb_storage_id(),
+                self.get_keep_poster_ratio(),
+            )
+            self._handle_thumb_results(results)
+            return
+
         _upload_thumb(
             pc_object=pc_object,
             image_as_bytes=new_thumb,
@@ -110,6 +138,18 @@ class LocalProvider(Iterator):
 
         self.createdThumbs += 1
 
+    def _handle_thumb_results(self, results: list["_ThumbResult"]) -> None:
+        for result in results:
+            if result.error is None:
+                self.createdThumbs += 1
+                continue
+            # The object may have been saved since the job was submitted:
+            # the event logged below commits the rolled back count.
+            result.pc_object.thumbCount -= 1
+            self.log_provider_event(providers_models.LocalProviderEventType.SyncError, result.error.__class__.__name__)
+            self.erroredThumbs += 1
+            logger.info("ERROR during handle thumb: %s", result.error, exc_info=result.error)
+
     def _create_object(self, providable_info: ProvidableInfo) -> Model:
         pc_object = providable_info.type()
         pc_object.idAtProviders = providable_info.id_at_providers
@@ -192,17 +232,48 @@ class LocalProvider(Iterator):
 
         return query.one_or_none()
 
+    def get_existing_objects(
+        self, providable_infos: list[ProvidableInfo]
+    ) -> dict[str, offers_models.Product | offers_models.Offer | offers_models.Stock]:
+        """Return existing objects of the given providable infos, indexed
+        by their chunk key.
+
+        Only one query is run for each model type. Stocks are locked in
+        the order of their id, to avoid deadlocks with a concurrent
+        synchronization of the same stocks.
+        """
+        ids_by_model_type: dict[type, set[str]] = collections.defaultdict(set)
+        for providable_info in providable_infos:
+            ids_by_model_type[providable_info.type].add(providable_info.id_at_providers)
+
+        existing_objects: dict[str, offers_models.Product | offers_models.Offer | offers_models.Stock] = {}
+        for model_type, ids in ids_by_model_type.items():
+            # exception to the ProvidableMixin because Offer no longer extends this class
+            # idAtProviders has been replaced by idAtProvider property
+            column_name = "idAtProvider" if model_type == offers_models.Offer else "idAtProviders"
+            query = model_type.query.filter(getattr(model_type, column_name).in_(ids))
+            if model_type == offers_models.Stock:
+                query = query.order_by(offers_models.Stock.id).with_for_update()
+            for pc_object in query:
+                existing_objects[f"{getattr(pc_object, column_name)}|{model_type.__name__}"] = pc_object
+        return existing_objects
+
     def get_existing_pc_obj(
-        self, providable_info: ProvidableInfo, chunk_to_insert: dict, chunk_to_update: dict
+        self,
+        providable_info: ProvidableInfo,
+        chunk_to_insert: dict,
+        chunk_to_update: dict,
+        existing_objects: dict | None = None,
     ) -> offers_models.Product | offers_models.Offer | offers_models.Stock | None:
         object_in_current_chunk = get_object_from_current_chunks(providable_info, chunk_to_insert, chunk_to_update)
-        if object_in_current_chunk is None:
-            return self.get_existing_object(providable_info.type, providable_info.id_at_providers)
+        if object_in_current_chunk is not None:
+            return object_in_current_chunk
 
-        return object_in_current_chunk
+        if existing_objects is not None:
+            return existing_objects.get(f"{providable_info.id_at_providers}|{providable_info.type.__name__}")
+        return self.get_existing_object(providable_info.type, providable_info.id_at_providers)
 
     def updateObjects(self, limit: int | None = None) -> None:
-        # pylint: disable=too-many-nested-blocks
         if self.venue_provider and not self.venue_provider.isActive:
             logger.info("Venue provider %s is inactive", self.venue_provider)
             return
@@ -214,6 +285,28 @@ class LocalProvider(Iterator):
 
         self.log_provider_event(providers_models.LocalProviderEventType.SyncStart)
 
+        if self.shall_synchronize_thumbs() and FeatureToggle.WIP_PROVIDER_THUMBS_PIPELINE.is_active():
+            self.thumb_pipeline = ThumbPipeline(self.__class__.__name__)
+
+        # The pool of threads of the pipeline is shut down even if the
+        # synchronization fails.
+        try:
+            with self.thumb_pipeline or contextlib.nullcontext():
+                self._synchronize_objects(limit)
+                if self.thumb_pipeline:
+                    self._handle_thumb_results(self.thumb_pipeline.join())
+        finally:
+            self.thumb_pipeline = None
+
+        self._print_objects_summary()
+        self.log_provider_event(providers_models.LocalProviderEventType.SyncEnd)
+
+        if self.venue_provider is not None:
+            self.venue_provider.lastSyncDate = datetime.utcnow()
+            repository.save(self.venue_provider)
+
+    def _synchronize_objects(self, limit: int | None) -> None:
+        # pylint: disable=too-many-nested-blocks
         chunk_to_insert: dict[str, Model] = {}
         chunk_to_update: dict[str, Model] = {}
 
@@ -227,9 +320,15 @@ class LocalProvider(Iterator):
                 self.checkedObjects += 1
                 continue
 
-            for providable_info in providable_infos:
+            # Providers fill objects from their current state, so that
+            # existing objects cannot be prefetched beyond the providable
+            # infos of the current iteration.
+            existing_objects = self.get_existing_objects(providable_infos)
+            for index, providable_info in enumerate(providable_infos):
                 chunk_key = providable_info.id_at_providers + "|" + str(providable_info.type.__name__)
-                pc_object = self.get_existing_pc_obj(providable_info, chunk_to_insert, chunk_to_update)
+                pc_object = self.get_existing_pc_obj(
+                    providable_info, chunk_to_insert, chunk_to_update, existing_objects
+                )
                 last_update_for_current_provider = get_last_update_for_provider(self.provider.id, pc_object)
 
                 if pc_object is None:
@@ -287,6 +386,8 @@ class LocalProvider(Iterator):
                     )
                     chunk_to_insert = {}
                     chunk_to_update = {}
+                    # Saving chunks has released the locks on prefetched stocks.
+                    existing_objects = self.get_existing_objects(providable_infos[index + 1 :])
 
         if len(chunk_to_insert) + len(chunk_to_update) > 0:
             save_chunks(chunk_to_insert, chunk_to_update)
@@ -295,13 +396,6 @@ class LocalProvider(Iterator):
                 self.venue_provider,
             )
 
-        self._print_objects_summary()
-        self.log_provider_event(providers_models.LocalProviderEventType.SyncEnd)
-
-        if self.venue_provider is not None:
-            self.venue_provider.lastSyncDate = datetime.utcnow()
-            repository.save(self.venue_provider)
-
     def postTreatment(self) -> None:
         pass
 
@@ -322,6 +416,26 @@ def _upload_thumb(
     )
 
 
+@dataclasses.dataclass
+class _ThumbResult:
+    pc_object: HasThumbMixin
+    error: Exception | None = None
+
+
+def _process_and_store_thumb(
+    pipeline: ThumbPipeline, result: _ThumbResult, image_as_bytes: bytes, object_id: str, keep_poster_ratio: bool
+) -> _ThumbResult:
+    # Runs in a thread of the pipeline: `result.pc_object` must not be used here.
+    try:
+        with pipeline.stage("process"):
+            image_as_bytes = process_thumb(image_as_bytes, keep_ratio=keep_poster_ratio)
+        with pipeline.stage("store"):
+            store_thumb(object_id, image_as_bytes)
+    except Exception as exc:  # pylint: disable=broad-except
+        result.error = exc
+    return result
+
+
 def _reindex_offers(
     created_or_updated_objects: list[offers_models.Stock | offers_models.Offer],
     venue_provider: providers_models.VenueProvider | None,
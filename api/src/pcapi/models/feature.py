@@ -1,8 +1,11 @@
+import dataclasses
 import enum
 import logging
+import time
 
 from alembic import op
 import flask
+import redis
 from sqlalchemy import Column
 from sqlalchemy import String
 from sqlalchemy import Text
@@ -18,6 +21,8 @@ from pcapi.models.pc_object import PcObject
 
 logger = logging.getLogger(__name__)
 
+REDIS_FEATURES_VERSION_KEY = "pcapi:features:version"
+
 
 class DisabledFeatureError(Exception):
     pass
@@ -143,17 +148,35 @@ class FeatureToggle(enum.Enum):
     WIP_ENABLE_CLICKHOUSE_IN_BO = "Utiliser Clickhouse pour les statistiques des acteurs culturels dans le BO"
     WIP_HEADLINE_OFFER = "Activer l'offre à la une"
     WIP_IS_OPEN_TO_PUBLIC = "Activer l'utilisation du critère 'ouvert au public' pour les synchro"
+    WIP_BOOK_EXTERNAL_TICKETS_OUTSIDE_STOCK_LOCK = (
+        "Réserver les billets externes (cinémas, billetteries) sans verrouiller le stock pendant l'appel"
+    )
+    WIP_GENERATE_CASHFLOWS_BY_CHUNKS = "Générer les flux financiers par lots de comptes bancaires, en SQL"
+    WIP_GENERATE_INVOICES_WITH_WORKER_POOLS = (
+        "Générer les PDF des justificatifs de remboursement en parallèle, avec reprise en cas d'interruption"
+    )
+    WIP_PIPELINED_OFFER_INDEXATION = "Indexer les offres dans Algolia avec un pipeline d'envois concurrents"
+    WIP_SKIP_UNCHANGED_OFFER_INDEXATION = "Ne renvoyer à Algolia que les attributs modifiés des offres"
+    WIP_PRICE_FINANCE_EVENTS_BY_PRICING_POINT = (
+        "Valoriser les évènements de finance par lots, groupés par point de valorisation"
+    )
+    WIP_PROVIDER_THUMBS_PIPELINE = (
+        "Télécharger et traiter en parallèle les images des synchronisations de fournisseurs"
+    )
+    WIP_BULK_UPSERT_EAN_OFFERS = "Créer et mettre à jour par lots les offres par EAN de l'API publique"
+    WIP_STREAM_BOOKING_EXPORTS = "Générer en flux les exports de réservations du portail pro"
+    WIP_ASYNC_CINEMA_STOCKS_REFRESH = "Mettre à jour en tâche de fond les places restantes des séances de cinéma"
+    WIP_CHUNKED_AUTO_MARK_AS_USED = "Valider automatiquement par lots les réservations après l'évènement"
+    WIP_DEFERRED_EXTERNAL_USER_ATTRIBUTES = "Calculer en tâche de fond les attributs des jeunes pour Brevo et Batch"
+    WIP_OFFERS_LIST_STOCKS_SUMMARY = "Résumer les stocks en base et paginer par curseur la liste des offres pro"
 
     def is_active(self) -> bool:
         if flask.has_request_context():
+            # Use the same state of all features during the whole request.
             if not hasattr(flask.request, "_cached_features"):
-                setattr(
-                    flask.request,
-                    "_cached_features",
-                    {f.name: f.isActive for f in db.session.query(Feature.name, Feature.isActive)},
-                )
+                setattr(flask.request, "_cached_features", _get_features())
             return flask.request._cached_features[self.name]  # type: ignore[attr-defined]
-        return Feature.query.filter_by(name=self.name).one().isActive
+        return _get_features()[self.name]
 
     def __bool__(self) -> bool:
         return self.is_active()
@@ -200,7 +223,12 @@ FEATURES_DISABLED_BY_DEFAULT: tuple[FeatureToggle, ...] = (
     FeatureToggle.LOG_EMS_CINEMAS_AVAILABLE_FOR_SYNC,
     FeatureToggle.SYNCHRONIZE_TITELIVE_API_MUSIC_PRODUCTS,
     FeatureToggle.WIP_ENABLE_ALGOLIA_SEARCH_IN_BO,
+    FeatureToggle.WIP_ASYNC_CINEMA_STOCKS_REFRESH,
     FeatureToggle.WIP_BENEFICIARY_EXTRACT_TOOL,
+    FeatureToggle.WIP_BOOK_EXTERNAL_TICKETS_OUTSIDE_STOCK_LOCK,
+    FeatureToggle.WIP_BULK_UPSERT_EAN_OFFERS,
+    FeatureToggle.WIP_CHUNKED_AUTO_MARK_AS_USED,
+    FeatureToggle.WIP_DEFERRED_EXTERNAL_USER_ATTRIBUTES,
     FeatureToggle.WIP_DISABLE_CANCEL_BOOKING_NOTIFICATION,
     FeatureToggle.WIP_DISABLE_NOTIFY_USERS_BOOKINGS_NOT_RETRIEVED,
     FeatureToggle.WIP_DISABLE_SEND_NOTIFICATIONS_FAVORITES_NOT_BOOKED,
@@ -216,9 +244,17 @@ FEATURES_DISABLED_BY_DEFAULT: tuple[FeatureToggle, ...] = (
     FeatureToggle.WIP_ENABLE_OFFER_ADDRESS,
     FeatureToggle.WIP_ENABLE_PRO_ONBOARDING,
     FeatureToggle.WIP_ENABLE_REMINDER_MARKETING_MAIL_METADATA_DISPLAY,
+    FeatureToggle.WIP_GENERATE_CASHFLOWS_BY_CHUNKS,
+    FeatureToggle.WIP_GENERATE_INVOICES_WITH_WORKER_POOLS,
     FeatureToggle.WIP_HEADLINE_OFFER,
     FeatureToggle.WIP_IS_OPEN_TO_PUBLIC,
     FeatureToggle.WIP_OFFERER_STATS_V2,
+    FeatureToggle.WIP_OFFERS_LIST_STOCKS_SUMMARY,
+    FeatureToggle.WIP_PIPELINED_OFFER_INDEXATION,
+    FeatureToggle.WIP_PRICE_FINANCE_EVENTS_BY_PRICING_POINT,
+    FeatureToggle.WIP_PROVIDER_THUMBS_PIPELINE,
+    FeatureToggle.WIP_SKIP_UNCHANGED_OFFER_INDEXATION,
+    FeatureToggle.WIP_STREAM_BOOKING_EXPORTS,
     FeatureToggle.WIP_SUGGESTED_SUBCATEGORIES,
     FeatureToggle.WIP_UBBLE_V2,
     FeatureToggle.WIP_USE_OFFERER_ADDRESS_AS_DATA_SOURCE,
@@ -229,6 +265,86 @@ if settings.IS_PROD or settings.IS_STAGING:
     FEATURES_DISABLED_BY_DEFAULT += (FeatureToggle.WIP_ENABLE_NATIONAL_PROGRAM_NEW_RULES_PUBLIC_API,)
 
 
+@dataclasses.dataclass
+class _FeaturesCache:
+    features: dict[str, bool] | None = None
+    version: str | None = None
+    loaded_at: float = 0.0
+    checked_at: float = 0.0
+    # Since the process started, for logs.
+    db_hits: int = 0
+    db_hits_saved: int = 0
+
+
+_features_cache = _FeaturesCache()
+
+
+def _get_features() -> dict[str, bool]:
+    """Return the state of all features, from a cache that is shared
+    by the whole process.
+
+    The cache is used as is during ``FEATURES_CACHE_TTL`` seconds.
+    Then, it is used again for the same duration if the version of
+    features in Redis has not changed (see `bump_features_version()`),
+    unless it is older than ``FEATURES_CACHE_MAX_AGE`` seconds.
+    Otherwise, features are loaded from the database.
+    """
+    cache = _features_cache
+    now = time.monotonic()
+    if cache.features is not None and now < cache.checked_at + settings.FEATURES_CACHE_TTL:
+        cache.db_hits_saved += 1
+        return cache.features
+
+    version = _get_features_version() if settings.FEATURES_CACHE_TTL > 0 else None
+    if (
+        cache.features is not None
+        and version is not None
+        and version == cache.version
+        and now < cache.loaded_at + settings.FEATURES_CACHE_MAX_AGE
+    ):
+        cache.checked_at = now
+        cache.db_hits_saved += 1
+        return cache.features
+
+    features = {name: is_active for name, is_active in db.session.query(Feature.name, Feature.isActive)}
+    if settings.FEATURES_CACHE_TTL > 0:
+        logger.info(
+            "Loaded feature flags from database",
+            extra={"version": version, "db_hits": cache.db_hits + 1, "db_hits_saved": cache.db_hits_saved},
+        )
+    cache.features = features
+    cache.version = version
+    cache.loaded_at = cache.checked_at = now
+    cache.db_hits += 1
+    return features
+
+
+def _get_features_version() -> str | None:
+    try:
+        return flask.current_app.redis_client.get(REDIS_FEATURES_VERSION_KEY) or "0"
+    except redis.exceptions.RedisError:
+        logger.exception("Could not get version of feature flags")
+        return None
+
+
+def invalidate_features_cache() -> None:
+    """Force the next call to `FeatureToggle.is_active()` to load
+    features from the database, in this process only.
+    """
+    _features_cache.features = None
+
+
+def bump_features_version() -> None:
+    """Notify all processes that features have changed: they load them
+    again from the database within ``FEATURES_CACHE_TTL`` seconds.
+    """
+    invalidate_features_cache()
+    try:
+        flask.current_app.redis_client.incr(REDIS_FEATURES_VERSION_KEY)
+    except redis.exceptions.RedisError:
+        logger.exception("Could not bump version of feature flags")
+
+
 def add_feature_to_database(feature: Feature) -> None:
     """This function is to be used in the "downgrade" function of a
     migration when removing a new feature flag (so that it's added
@@ -276,6 +392,7 @@ def install_feature_flags() -> None:
         )
 
     db.session.commit()
+    bump_features_version()
 
 
 def clean_feature_flags() -> None:
@@ -291,6 +408,7 @@ def clean_feature_flags() -> None:
     for flag in to_remove_flags:
         db.session.execute(text("DELETE FROM feature WHERE name = :name").bindparams(name=flag))
     db.session.commit()
+    bump_features_version()
 
 
 def check_feature_flags_completeness() -> None:
@@ -1,4 +1,5 @@
 import datetime
+import functools
 import logging
 import secrets
 
@@ -15,12 +16,14 @@ from pcapi import settings
 from pcapi.core.auth import api as auth_api
 from pcapi.core.permissions import models as perm_models
 from pcapi.core.users import api as users_api
+from pcapi.core.users import identity_cache
 from pcapi.core.users import models as users_models
 from pcapi.core.users import repository as users_repository
 from pcapi.core.users.backoffice import api as backoffice_api
 from pcapi.flask_app import backoffice_oauth
 from pcapi.models import db
 from pcapi.repository import atomic
+from pcapi.repository import on_commit
 
 from . import blueprint
 from . import utils
@@ -103,6 +106,7 @@ def authorize() -> utils.BackofficeResponse:
 
     user.lastConnectionDate = datetime.datetime.utcnow()
     user.add_admin_role()
+    on_commit(functools.partial(identity_cache.invalidate_cached_users, user.email))
     backoffice_api.upsert_roles(user, roles)
     db.session.flush()
 
@@ -14,11 +14,13 @@ from pcapi.core.history import api as history_api
 from pcapi.core.history import models as history_models
 from pcapi.core.offerers import models as offerers_models
 from pcapi.core.offers import models as offers_models
+from pcapi.core.offers import validation_rules as offers_validation_rules
 from pcapi.core.permissions import models as perm_models
 from pcapi.core.users import models as users_models
 from pcapi.models import db
 from pcapi.repository import atomic
 from pcapi.repository import mark_transaction_as_invalid
+from pcapi.repository import on_commit
 from pcapi.routes.backoffice import autocomplete
 from pcapi.routes.backoffice.forms import empty as empty_forms
 from pcapi.utils.clean_accents import clean_accents
@@ -363,6 +365,7 @@ def create_rule() -> utils.BackofficeResponse:
             sub_rules_info=sub_rules_info,
         )
         db.session.flush()
+        on_commit(offers_validation_rules.bump_rules_version)
         flash("La nouvelle règle a été créée", "success")
 
     except sa.exc.IntegrityError as err:
@@ -418,6 +421,7 @@ def delete_rule(rule_id: int) -> utils.BackofficeResponse:
                 sub_rules_info=sub_rules_info,
             )
             db.session.flush()
+            on_commit(offers_validation_rules.bump_rules_version)
         except sa.exc.IntegrityError as exc:
             mark_transaction_as_invalid()
             flash(Markup("Une erreur s'est produite : {message}").format(message=str(exc)), "warning")
@@ -583,6 +587,7 @@ def edit_rule(rule_id: int) -> utils.BackofficeResponse:
                 sub_rules_info=sub_rules_info,
             )
         db.session.flush()
+        on_commit(offers_validation_rules.bump_rules_version)
 
     except sa.exc.IntegrityError as exc:
         mark_transaction_as_invalid()
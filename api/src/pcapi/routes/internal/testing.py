@@ -5,6 +5,7 @@ from pcapi.core.educational.utils import create_adage_jwt_fake_valid_token
 from pcapi.models import db
 from pcapi.models.api_errors import ApiErrors
 from pcapi.models.feature import Feature
+from pcapi.models.feature import bump_features_version
 from pcapi.routes.adage_iframe import blueprint
 from pcapi.routes.apis import public_api
 from pcapi.routes.serialization import BaseModel
@@ -24,6 +25,7 @@ def set_features(body: serializers.FeaturesToggleRequest) -> None:
     for feature in body.features:
         Feature.query.filter_by(name=feature.name).update({"isActive": feature.isActive})
         db.session.commit()
+    bump_features_version()
 
 
 class AdageFakeToken(BaseModel):
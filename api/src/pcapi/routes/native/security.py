@@ -3,11 +3,16 @@ import logging
 import typing
 
 from flask import _request_ctx_stack
+from flask import g
+from flask import has_app_context
 from flask import request
 from flask_jwt_extended.utils import get_jwt_identity
 from flask_jwt_extended.view_decorators import jwt_required
 import sentry_sdk
+import sqlalchemy as sa
 
+from pcapi import settings
+from pcapi.core.users import identity_cache
 from pcapi.core.users.models import User
 from pcapi.core.users.repository import find_user_by_email
 from pcapi.models.api_errors import ForbiddenError
@@ -46,9 +51,36 @@ def authenticated_maybe_inactive_user_required(route_function: RouteFunc) -> Rou
     return retrieve_authenticated_user
 
 
+@sa.event.listens_for(User, "refresh")
+def _record_lazy_user_load(user: User, *args: typing.Any) -> None:
+    # The cache of the authenticated user has saved no query if the
+    # route has needed attributes that are not cached.
+    if has_app_context() and g.get("lazy_authenticated_user") is user:
+        g.log_request_details_extra["authenticatedUserCache"]["dbQueriesSaved"] = 0
+
+
+def _find_authenticated_user(email: str) -> User | None:
+    cached_user = identity_cache.get_cached_user(email)
+    if cached_user is not None:
+        user = identity_cache.get_lazy_user(cached_user)
+        g.lazy_authenticated_user = user
+    else:
+        user = find_user_by_email(email)
+        if user is not None:
+            identity_cache.cache_user(email, user)
+
+    if settings.NATIVE_AUTHENTICATED_USER_CACHE_TTL > 0:
+        # Logged with the request, to measure the hit rate of the cache.
+        g.setdefault("log_request_details_extra", {})["authenticatedUserCache"] = {
+            "hit": cached_user is not None,
+            "dbQueriesSaved": int(cached_user is not None),
+        }
+    return user
+
+
 def setup_context(must_be_active: bool = True) -> User:
     email = get_jwt_identity()
-    user = find_user_by_email(email)
+    user = _find_authenticated_user(email)
 
     if must_be_active:
         invalid_user = user is None or not user.isActive
@@ -13,6 +13,7 @@ from pcapi.core.offers.models import Stock
 from pcapi.core.users.models import User
 from pcapi.models.api_errors import ApiErrors
 from pcapi.models.api_errors import ResourceNotFoundError
+from pcapi.models.feature import FeatureToggle
 from pcapi.models.offer_mixin import OfferValidationStatus
 from pcapi.repository import atomic
 from pcapi.routes.native.security import authenticated_and_active_user_required
@@ -24,6 +25,13 @@ from .serialization import offers as serializers
 from .serialization import subcategories_v2 as subcategories_v2_serializers
 
 
+def _update_cinema_stocks(offer: Offer) -> None:
+    if FeatureToggle.WIP_ASYNC_CINEMA_STOCKS_REFRESH.is_active():
+        api.request_cinema_stocks_refresh(offer)
+    else:
+        api.update_stock_quantity_to_match_cinema_venue_provider_remaining_places(offer)
+
+
 # WebApp v2 proxy expects endpoint to be at "/offer/<int:offer_id>". This path MUST NOT be changed. Its response can be changed, though.
 @blueprint.native_route("/offer/<int:offer_id>", methods=["GET"])
 @spectree_serialize(
@@ -35,7 +43,7 @@ def get_offer(offer_id: str) -> serializers.OfferResponse:
     offer = query.first_or_404()
 
     if offer.isActive:
-        api.update_stock_quantity_to_match_cinema_venue_provider_remaining_places(offer)
+        _update_cinema_stocks(offer)
 
     return serializers.OfferResponse.from_orm(offer)
 
@@ -48,7 +56,7 @@ def get_offer_v2(offer_id: int) -> serializers.OfferResponseV2:
     offer = query.first_or_404()
 
     if offer.isActive:
-        api.update_stock_quantity_to_match_cinema_venue_provider_remaining_places(offer)
+        _update_cinema_stocks(offer)
 
     return serializers.OfferResponseV2.from_orm(offer)
 
@@ -17,6 +17,7 @@ from pcapi.core.offerers import models as offerers_models
 from pcapi.core.offers import api as offers_api
 from pcapi.core.offers import exceptions as offers_exceptions
 from pcapi.core.offers import models as offers_models
+from pcapi.core.offers import repository as offers_repository
 from pcapi.core.offers import schemas as offers_schemas
 from pcapi.core.offers import validation as offers_validation
 from pcapi.core.providers import models as providers_models
@@ -25,6 +26,7 @@ from pcapi.domain import music_types
 from pcapi.domain import show_types
 from pcapi.models import api_errors
 from pcapi.models import db
+from pcapi.models.feature import FeatureToggle
 from pcapi.models.offer_mixin import OfferValidationType
 from pcapi.routes.public import blueprints
 from pcapi.routes.public import spectree_schemas
@@ -380,6 +382,16 @@ def _create_or_update_ean_offers(
     address_id: int | None = None,
     address_label: str | None = None,
 ) -> None:
+    if FeatureToggle.WIP_BULK_UPSERT_EAN_OFFERS.is_active():
+        _bulk_create_or_update_ean_offers(
+            serialized_products_stocks=serialized_products_stocks,
+            venue_id=venue_id,
+            provider_id=provider_id,
+            address_id=address_id,
+            address_label=address_label,
+        )
+        return
+
     provider = providers_models.Provider.query.filter_by(id=provider_id).one()
     venue = offerers_models.Venue.query.filter_by(id=venue_id).one()
 
@@ -508,6 +520,163 @@ def _create_or_update_ean_offers(
     )
 
 
+def _bulk_create_or_update_ean_offers(
+    *,
+    serialized_products_stocks: dict,
+    venue_id: int,
+    provider_id: int,
+    address_id: int | None = None,
+    address_label: str | None = None,
+) -> dict[str, int]:
+    """Create or update offers and their stock like
+    `_create_or_update_ean_offers`, with a constant number of SQL
+    statements: stocks are validated in memory, offers and stocks are
+    inserted or updated by batches, and all offers are indexed at once.
+
+    Return the number of created offers, created stocks, updated offers
+    and rejected EANs.
+    """
+    provider = providers_models.Provider.query.filter_by(id=provider_id).one()
+    venue = offerers_models.Venue.query.filter_by(id=venue_id).one()
+
+    offer_by_ean = {
+        offer.extraData["ean"]: offer  # type: ignore[index]
+        for offer in _get_existing_offers(set(serialized_products_stocks), venue)
+    }
+    ean_list_to_create = set(serialized_products_stocks) - offer_by_ean.keys()
+    errors: dict[str, str] = {}
+    new_offers = []
+    new_stock_by_ean: dict[str, offers_models.Stock] = {}
+    offer_mappings = []
+    stock_mappings = []
+
+    with repository.transaction():
+        offerer_address = venue.offererAddress  # default offerer_address
+        if address_id:
+            offerer_address = offerers_api.get_or_create_offerer_address(
+                offerer_id=venue.managingOffererId,
+                address_id=address_id,
+                label=address_label,
+            )
+
+        if ean_list_to_create:
+            product_by_ean = {
+                product.extraData["ean"]: product  # type: ignore[index]
+                for product in _get_existing_products(ean_list_to_create)
+            }
+            for ean in sorted(ean_list_to_create - product_by_ean.keys()):
+                errors[ean] = "ProductNotFound"
+            for ean, product in product_by_ean.items():
+                offer = _create_offer_from_product(venue, product, provider, offererAddress=offerer_address)
+                new_offers.append(offer)
+                try:
+                    stock = _build_ean_stock(serialized_products_stocks[ean])
+                except (api_errors.ApiErrors, offers_exceptions.OfferCreationBaseException) as exc:
+                    errors[ean] = exc.__class__.__name__
+                    continue
+                # offers can be created without stock in API, so we fill the lastValidationPrice at the stock creation
+                offer.lastValidationPrice = stock.price
+                new_stock_by_ean[ean] = stock
+
+        for ean, offer in offer_by_ean.items():
+            stock_data = serialized_products_stocks[ean]
+            existing_stock = next((stock for stock in offer.activeStocks), None)
+            stock_mapping = None
+            try:
+                if existing_stock:
+                    # Same checks as `offers_api.edit_stock()`
+                    offers_validation.check_stock_is_updatable(existing_stock, provider)
+                    stock_mapping = _get_ean_stock_mapping(existing_stock, stock_data)
+                else:
+                    # Same checks as `offers_api.create_stock()`
+                    offers_validation.check_validation_status(offer)
+                    offers_validation.check_provider_can_create_stock(offer, provider)
+                    new_stock = _build_ean_stock(stock_data)
+            except (
+                api_errors.ApiErrors,
+                offers_exceptions.OfferCreationBaseException,
+                offers_exceptions.OfferEditionBaseException,
+            ) as exc:
+                errors[ean] = exc.__class__.__name__
+                continue
+            offer_mappings.append({"id": offer.id, "lastProviderId": provider.id, "isActive": True})
+            if existing_stock:
+                if stock_mapping:
+                    stock_mappings.append(stock_mapping)
+            else:
+                new_stock_by_ean[ean] = new_stock
+
+        offer_id_by_ean = {ean: offer.id for ean, offer in offer_by_ean.items()}
+        if new_offers:
+            # `idAtProvider` of offers created from a product is their EAN
+            offer_id_by_ean.update(offers_repository.upsert_offers_by_id_at_provider(new_offers))
+        for ean, stock in new_stock_by_ean.items():
+            stock.offerId = offer_id_by_ean[ean]
+        if new_stock_by_ean:
+            offers_repository.insert_stocks(list(new_stock_by_ean.values()))
+        db.session.bulk_update_mappings(offers_models.Offer, offer_mappings)
+        db.session.bulk_update_mappings(offers_models.Stock, stock_mappings)
+
+    updated_offer_ids = {mapping["id"] for mapping in offer_mappings}
+    offers_to_index = list(updated_offer_ids | {offer_id_by_ean[ean] for ean in new_stock_by_ean})
+    search.async_index_offer_ids(
+        offers_to_index,
+        reason=search.IndexationReason.OFFER_UPDATE,
+        log_extra={"venue_id": venue_id, "source": "offers_public_api"},
+    )
+
+    summary = {
+        "created_offers": len(new_offers),
+        "created_stocks": len(new_stock_by_ean),
+        "updated_offers": len(offer_mappings),
+        "rejected_eans": len(errors),
+    }
+    logger.info(
+        "Created or updated offers by ean",
+        extra={"venue_id": venue_id, "provider_id": provider_id, "errors": errors, **summary},
+    )
+    return summary
+
+
+def _build_ean_stock(stock_data: dict) -> offers_models.Stock:
+    # Same validation as `offers_api.create_stock()`. Price limitation
+    # rules do not apply to offers with an EAN, so no query is needed.
+    price = finance_utils.cents_to_full_unit(stock_data["price"])
+    quantity = serialization.deserialize_quantity(stock_data["quantity"])
+    offers_validation.check_booking_limit_datetime(None, None, stock_data["booking_limit_datetime"])
+    offers_validation.check_stock_price_bounds(price)
+    offers_validation.check_stock_quantity(quantity)
+    return offers_models.Stock(
+        price=price,
+        quantity=quantity,
+        bookingLimitDatetime=stock_data["booking_limit_datetime"],
+    )
+
+
+def _get_ean_stock_mapping(stock: offers_models.Stock, stock_data: dict) -> dict | None:
+    # Same validation as `offers_api.edit_stock()`, which only checks
+    # modified fields.
+    modifications: dict = {}
+    price = finance_utils.cents_to_full_unit(stock_data["price"])
+    if price != stock.price:
+        offers_validation.check_stock_price_bounds(price)
+        modifications["price"] = price
+    quantity = serialization.deserialize_quantity(stock_data["quantity"])
+    if isinstance(quantity, int):
+        quantity += stock.dnBookedQuantity
+    if quantity != stock.quantity:
+        offers_validation.check_stock_quantity(quantity, stock.dnBookedQuantity)
+        modifications["quantity"] = quantity
+    if stock_data["booking_limit_datetime"] != stock.bookingLimitDatetime:
+        offers_validation.check_booking_limit_datetime(
+            stock, stock.beginningDatetime, stock_data["booking_limit_datetime"]
+        )
+        modifications["bookingLimitDatetime"] = stock_data["booking_limit_datetime"]
+    if not modifications:
+        return None
+    return {"id": stock.id, **modifications}
+
+
 ALLOWED_PRODUCT_SUBCATEGORIES = [
     subcategories.SUPPORT_PHYSIQUE_MUSIQUE_CD.id,
     subcategories.SUPPORT_PHYSIQUE_MUSIQUE_VINYLE.id,
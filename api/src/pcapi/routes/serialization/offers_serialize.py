@@ -215,12 +215,26 @@ def offer_address_getter_dict_helper(offer: offers_models.Offer) -> AddressRespo
     )
 
 
+class ListOffersStocksSummaryResponseModel(BaseModel):
+    count: int
+    firstBeginningDatetime: datetime.datetime | None
+    lastBeginningDatetime: datetime.datetime | None
+    remainingQuantity: int | str
+    isSoldOut: bool
+    hasBookingLimitDatetimesPassed: bool
+
+
 class ListOffersOfferResponseModelsGetterDict(GetterDict):
 
     def get(self, key: str, default: Any | None = None) -> Any:
         if key == "stocks":
+            if self._obj.stocksCount is not None:
+                # Only the summary of stocks has been loaded
+                return []
             # TODO: front pro doesn't need the soft deleted stocks but maybe this could be handled in the request directly
             return [_serialize_stock(stock) for stock in self._obj.stocks if not stock.isSoftDeleted]
+        if key == "stocksSummary":
+            return _serialize_stocks_summary(self._obj) if self._obj.stocksCount is not None else None
         if key == "productIsbn":
             return self._obj.extraData.get("ean") if self._obj.extraData else None
         if key == "venue":
@@ -242,6 +256,7 @@ class ListOffersOfferResponseModel(BaseModel):
     isEducational: bool
     name: str
     stocks: list[ListOffersStockResponseModel]
+    stocksSummary: ListOffersStocksSummaryResponseModel | None
     thumbUrl: str | None
     productIsbn: str | None
     subcategoryId: SubcategoryIdEnum
@@ -277,6 +292,17 @@ def _serialize_stock(stock: offers_models.Stock) -> ListOffersStockResponseModel
     )
 
 
+def _serialize_stocks_summary(offer: offers_models.Offer) -> ListOffersStocksSummaryResponseModel:
+    return ListOffersStocksSummaryResponseModel(
+        count=offer.stocksCount,
+        firstBeginningDatetime=offer.stocksFirstBeginningDatetime,
+        lastBeginningDatetime=offer.stocksLastBeginningDatetime,
+        remainingQuantity="unlimited" if offer.stocksRemainingQuantity is None else offer.stocksRemainingQuantity,
+        isSoldOut=offer.stocksAreSoldOut,
+        hasBookingLimitDatetimesPassed=offer.stocksHaveBookingLimitDatetimesPassed,
+    )
+
+
 def _serialize_venue(venue: offerers_models.Venue) -> base_serializers.ListOffersVenueResponseModel:
     return base_serializers.ListOffersVenueResponseModel(
         id=venue.id,
@@ -306,6 +332,7 @@ class ListOffersQueryModel(BaseModel):
     period_ending_date: datetime.date | None
     collective_offer_type: collective_offers_serialize.CollectiveOfferType | None
     offerer_address_id: int | None
+    after_id: int | None
 
     class Config:
         alias_generator = to_camel
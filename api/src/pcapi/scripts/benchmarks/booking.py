@@ -0,0 +1,105 @@
+"""Benchmark concurrent bookings of a single stock linked to an
+external ticketing service.
+
+The ticketing service is simulated: it answers after ``--latency``
+seconds. Run on a local database, since users and an offer are
+created, e.g.:
+
+    flask benchmark_hot_stock_booking --bookings 200 --workers 20 --latency 0.5
+"""
+
+from concurrent import futures
+import time
+import typing
+from unittest import mock
+import uuid
+
+import click
+from flask import current_app
+
+from pcapi import settings
+from pcapi.core.bookings import api as bookings_api
+from pcapi.core.external_bookings.models import Ticket
+import pcapi.core.offers.factories as offers_factories
+import pcapi.core.offers.models as offers_models
+import pcapi.core.providers.factories as providers_factories
+import pcapi.core.users.factories as users_factories
+import pcapi.core.users.models as users_models
+from pcapi.models import db
+from pcapi.models.feature import Feature
+from pcapi.models.feature import FeatureToggle
+from pcapi.models.feature import bump_features_version
+from pcapi.utils.blueprint import Blueprint
+
+
+blueprint = Blueprint(__name__, __name__)
+
+
+def _create_hot_stock(bookings: int) -> tuple[int, list[int]]:
+    provider = providers_factories.ProviderFactory(
+        bookingExternalUrl="https://ticketing.example.com/book",
+        cancelExternalUrl="https://ticketing.example.com/cancel",
+    )
+    stock = offers_factories.EventStockFactory(
+        offer__lastProvider=provider,
+        offer__withdrawalType=offers_models.WithdrawalTypeEnum.IN_APP,
+        idAtProviders="",
+        quantity=bookings,
+    )
+    user_ids = [users_factories.BeneficiaryGrant18Factory().id for _ in range(bookings)]
+    db.session.commit()
+    return stock.id, user_ids
+
+
+def _run(stock_id: int, user_ids: list[int], workers: int) -> tuple[int, float]:
+    app = current_app._get_current_object()  # type: ignore[attr-defined]
+
+    def book(user_id: int) -> bool:
+        with app.app_context():
+            user = users_models.User.query.get(user_id)
+            try:
+                bookings_api.book_offer(user, stock_id, quantity=1)
+            except Exception:  # pylint: disable=broad-except
+                return False
+            return True
+
+    start = time.perf_counter()
+    with futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        successes = sum(executor.map(book, user_ids))
+    return successes, time.perf_counter() - start
+
+
+@blueprint.cli.command("benchmark_hot_stock_booking")
+@click.option("--bookings", type=int, default=200, help="Number of bookings for each mode")
+@click.option("--workers", type=int, default=20, help="Number of concurrent bookings")
+@click.option("--latency", type=float, default=0.5, help="Latency of the ticketing service, in seconds")
+def benchmark_hot_stock_booking(bookings: int, workers: int, latency: float) -> None:
+    """Compare bookings/s when the external ticket is booked while the
+    stock is locked, and outside of the lock.
+    """
+    if not settings.CAN_RUN_SANDBOX:
+        print("Benchmarks are disabled on this environment")
+        return
+
+    def book_event_ticket(*args: typing.Any, **kwargs: typing.Any) -> tuple[list[Ticket], None]:
+        time.sleep(latency)
+        return [Ticket(barcode=uuid.uuid4().hex, seat_number=None)], None
+
+    feature = Feature.query.filter_by(name=FeatureToggle.WIP_BOOK_EXTERNAL_TICKETS_OUTSIDE_STOCK_LOCK.name).one()
+    initial_is_active = feature.isActive
+    try:
+        with mock.patch("pcapi.core.external_bookings.api.book_event_ticket", book_event_ticket):
+            for name, outside_stock_lock in (("under stock lock", False), ("outside stock lock", True)):
+                feature.isActive = outside_stock_lock
+                db.session.commit()
+                bump_features_version()
+                stock_id, user_ids = _create_hot_stock(bookings)
+                successes, elapsed = _run(stock_id, user_ids, workers)
+                print(
+                    f"{name:<18}: {successes}/{bookings} bookings in {elapsed:.2f}s, "
+                    f"{successes / elapsed:.1f} bookings/s"
+                )
+    finally:
+        feature.isActive = initial_is_active
+        db.session.commit()
+        bump_features_version()
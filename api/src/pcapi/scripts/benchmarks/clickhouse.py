@@ -0,0 +1,70 @@
+"""Benchmark the revenue queries run against ClickHouse.
+
+Run against a ClickHouse instance that holds revenue data for the
+given venues, e.g.:
+
+    flask benchmark_clickhouse_revenue --venue-id 1 --venue-id 2 --runs 10
+"""
+
+import time
+import typing
+
+import click
+from flask import current_app
+
+from pcapi import settings
+from pcapi.connectors.clickhouse import queries as clickhouse_queries
+from pcapi.connectors.clickhouse.queries.base import BaseQuery
+from pcapi.utils.blueprint import Blueprint
+
+
+blueprint = Blueprint(__name__, __name__)
+
+
+def _get_revenue_queries(venue_ids: tuple[int, ...]) -> list[tuple[BaseQuery, tuple]]:
+    return [
+        (clickhouse_queries.YearlyAggregatedRevenueQuery(), venue_ids),
+        (clickhouse_queries.YearlyAggregatedIndividualRevenueQuery(), venue_ids),
+        (clickhouse_queries.YearlyAggregatedCollectiveRevenueQuery(), venue_ids),
+    ]
+
+
+def _run_sequentially(venue_ids: tuple[int, ...]) -> None:
+    for query, params in _get_revenue_queries(venue_ids):
+        query.execute(params)
+
+
+def _run_concurrently(venue_ids: tuple[int, ...]) -> None:
+    clickhouse_queries.execute_concurrently(_get_revenue_queries(venue_ids))
+
+
+def _benchmark(run: typing.Callable, venue_ids: tuple[int, ...], runs: int, ttl: int) -> float:
+    initial_ttl = settings.CLICKHOUSE_QUERY_CACHE_TTL
+    settings.CLICKHOUSE_QUERY_CACHE_TTL = ttl
+    try:
+        run(venue_ids)  # warm up the connection pool (and the cache)
+        start = time.perf_counter()
+        for _ in range(runs):
+            run(venue_ids)
+        return time.perf_counter() - start
+    finally:
+        settings.CLICKHOUSE_QUERY_CACHE_TTL = initial_ttl
+        for query, params in _get_revenue_queries(venue_ids):
+            current_app.redis_client.delete(query._get_cache_key(params))
+
+
+@blueprint.cli.command("benchmark_clickhouse_revenue")
+@click.option("--venue-id", "venue_ids", type=int, multiple=True, required=True)
+@click.option("--runs", type=int, default=10, help="Number of runs of the 3 revenue queries for each mode")
+def benchmark_clickhouse_revenue(venue_ids: tuple[int, ...], runs: int) -> None:
+    """Compare the duration of the 3 revenue queries when run one after
+    the other, concurrently, and from the cache.
+    """
+    modes = (
+        ("sequential", _run_sequentially, 0),
+        ("concurrent", _run_concurrently, 0),
+        ("cached", _run_sequentially, 60),
+    )
+    for name, run, ttl in modes:
+        elapsed = _benchmark(run, venue_ids, runs, ttl)
+        print(f"{name:<10}: {runs} runs in {elapsed:.2f}s, {elapsed / runs * 1000:.1f} ms/run")
@@ -0,0 +1,58 @@
+"""Benchmark the creation of cloud tasks, one after the other by the
+caller or buffered and created by background threads.
+
+Google Cloud Tasks is simulated by the local client: it answers after
+``--latency`` seconds, e.g.:
+
+    flask benchmark_cloud_tasks_enqueue --tasks 500 --workers 8 --latency 0.05
+"""
+
+import time
+from unittest import mock
+
+import click
+
+from pcapi import settings
+from pcapi.tasks import cloud_task
+from pcapi.tasks.local_client import LocalCloudTasksClient
+from pcapi.utils.blueprint import Blueprint
+
+
+blueprint = Blueprint(__name__, __name__)
+
+
+def _run(tasks: int, workers: int, latency: float) -> tuple[int, float, float]:
+    client = LocalCloudTasksClient(latency=latency, dispatch=False)
+    with (
+        mock.patch.object(cloud_task, "get_client", return_value=client),
+        mock.patch.multiple(settings, CLOUD_TASK_CALL_INTERNAL_API_ENDPOINT=False, CLOUD_TASK_ENQUEUE_WORKERS=workers),
+    ):
+        start = time.perf_counter()
+        for index in range(tasks):
+            cloud_task.enqueue_internal_task("benchmark-queue", "/benchmark", {"index": index})
+        caller_elapsed = time.perf_counter() - start
+        cloud_task.flush_tasks(timeout=tasks * latency + 60)
+        total_elapsed = time.perf_counter() - start
+        cloud_task.shutdown_enqueuer()
+    created = sum(len(queue_tasks) for queue_tasks in client.tasks.values())
+    return created, caller_elapsed, total_elapsed
+
+
+@blueprint.cli.command("benchmark_cloud_tasks_enqueue")
+@click.option("--tasks", type=int, default=500, help="Number of tasks created in each mode")
+@click.option("--workers", type=int, default=8, help="Number of background threads that create tasks")
+@click.option("--latency", type=float, default=0.05, help="Latency of Google Cloud Tasks, in seconds")
+def benchmark_cloud_tasks_enqueue(tasks: int, workers: int, latency: float) -> None:
+    """Compare the time spent by the caller and tasks/s when tasks are
+    created synchronously and in the background.
+    """
+    if not settings.CAN_RUN_SANDBOX:
+        print("Benchmarks are disabled on this environment")
+        return
+
+    for name, mode_workers in (("synchronous", 0), ("buffered", workers)):
+        created, caller_elapsed, total_elapsed = _run(tasks, mode_workers, latency)
+        print(
+            f"{name:<11}: {created}/{tasks} tasks in {total_elapsed:.2f}s, {created / total_elapsed:.1f} tasks/s, "
+            f"{caller_elapsed:.2f}s spent by the caller"
+        )
@@ -0,0 +1,56 @@
+"""Benchmark the time it takes to import the application, as every API
+pod, worker and command pays it on startup, e.g.:
+
+    flask benchmark_import_time --runs 5 --top 20
+"""
+
+import statistics
+import subprocess
+import sys
+
+import click
+
+from pcapi.utils.blueprint import Blueprint
+
+
+blueprint = Blueprint(__name__, __name__)
+
+
+def _import(module: str) -> dict[str, int]:
+    """Import ``module`` in a new interpreter and return the cumulative
+    import time of each imported module, in microseconds.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+    cumulative_times = {}
+    # Lines are formatted as: "import time: <self> | <cumulative> | <module>"
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _self_time, cumulative_time, imported_module = line.removeprefix("import time:").split("|")
+        if cumulative_time.strip().isdigit():
+            cumulative_times[imported_module.strip()] = int(cumulative_time)
+    return cumulative_times
+
+
+@blueprint.cli.command("benchmark_import_time")
+@click.option("--module", default="pcapi.app", help="Module to import")
+@click.option("--runs", type=int, default=5, help="Number of imports, each one in a new interpreter")
+@click.option("--top", type=int, default=20, help="Number of slowest modules to display")
+def benchmark_import_time(module: str, runs: int, top: int) -> None:
+    """Display the median import time of a module and of the slowest
+    modules it imports.
+    """
+    imports = [_import(module) for _ in range(runs)]
+    median_times = {
+        imported_module: statistics.median(times.get(imported_module, 0) for times in imports)
+        for imported_module in imports[0]
+    }
+    print(f"{module:<60}: {median_times[module] / 1_000_000:.2f}s (median of {runs} runs)")
+    slowest = sorted(median_times.items(), key=lambda item: item[1], reverse=True)
+    for imported_module, median_time in slowest[1 : top + 1]:
+        print(f"  {imported_module:<58}: {median_time / 1_000:.1f}ms")
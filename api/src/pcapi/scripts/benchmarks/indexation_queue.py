@@ -0,0 +1,103 @@
+"""Benchmark the Redis primitives of the indexation queues.
+
+Run against a local Redis (never against a shared instance), e.g.:
+
+    flask benchmark_indexation_queue --batch-size 1000 --batch-size 10000
+"""
+
+import functools
+import time
+import typing
+import uuid
+
+import click
+from flask import current_app
+import redis
+
+from pcapi import settings
+from pcapi.core.search.backends import algolia
+from pcapi.utils.blueprint import Blueprint
+
+
+blueprint = Blueprint(__name__, __name__)
+
+
+def _pop_with_smove_pipeline(redis_client: redis.Redis, queue: str, processing_queue: str, count: int) -> list:
+    # Former implementation of `AlgoliaBackend._pop_ids_from_queue()`.
+    ids = redis_client.srandmember(queue, count)
+    with redis_client.pipeline(transaction=True) as pipeline:
+        for id_ in ids:
+            pipeline.smove(queue, processing_queue, id_)
+        pipeline.execute()
+    return ids
+
+
+def _pop_with_lua_script(
+    move_ids: redis.commands.core.Script, redis_client: redis.Redis, queue: str, processing_queue: str, count: int
+) -> list:
+    return move_ids(keys=[queue, processing_queue], args=[count], client=redis_client)
+
+
+def _benchmark_pop(redis_client: redis.Redis, pop: typing.Callable, batch_size: int, batches: int) -> float:
+    prefix = f"benchmark:indexation-queue:{uuid.uuid4().hex}"
+    queue = f"{prefix}:queue"
+    try:
+        for start in range(0, batch_size * batches, 10_000):
+            redis_client.sadd(queue, *range(start, min(start + 10_000, batch_size * batches)))
+        elapsed = 0.0
+        for i in range(batches):
+            processing_queue = f"{prefix}:processing:{i}"
+            start_time = time.perf_counter()
+            ids = pop(redis_client, queue, processing_queue, batch_size)
+            elapsed += time.perf_counter() - start_time
+            assert len(ids) == batch_size
+            redis_client.delete(processing_queue)
+        return elapsed
+    finally:
+        redis_client.delete(queue)
+
+
+def _benchmark_enqueue_guard(backend: algolia.AlgoliaBackend, calls: int, ttl: int) -> float:
+    initial_ttl = settings.ALGOLIA_OFFERS_INDEX_SIZE_CACHE_TTL
+    settings.ALGOLIA_OFFERS_INDEX_SIZE_CACHE_TTL = ttl
+    algolia._offers_index_size_cache.expires_at = 0.0
+    try:
+        start_time = time.perf_counter()
+        for _ in range(calls):
+            backend._get_offers_index_size()
+        return time.perf_counter() - start_time
+    finally:
+        settings.ALGOLIA_OFFERS_INDEX_SIZE_CACHE_TTL = initial_ttl
+
+
+@blueprint.cli.command("benchmark_indexation_queue")
+@click.option("--batch-size", "batch_sizes", type=int, multiple=True, default=(1_000, 10_000))
+@click.option("--batches", type=int, default=20, help="Number of batches popped for each batch size")
+@click.option("--calls", type=int, default=10_000, help="Number of calls to the enqueue guard")
+def benchmark_indexation_queue(batch_sizes: tuple[int, ...], batches: int, calls: int) -> None:
+    """Compare the former and current ways of popping ids from indexation
+    queues, and the enqueue guard with and without the cached size.
+    """
+    if not settings.CAN_RUN_SANDBOX:
+        print("Benchmarks are disabled on this environment")
+        return
+
+    redis_client = current_app.redis_client
+    # The script is registered once, so that only its calls are timed.
+    move_ids = redis_client.register_script(algolia.MOVE_IDS_TO_PROCESSING_QUEUE_SCRIPT)
+    pops = (
+        ("smove pipeline", _pop_with_smove_pipeline),
+        ("lua script", functools.partial(_pop_with_lua_script, move_ids)),
+    )
+    for batch_size in batch_sizes:
+        for name, pop in pops:
+            elapsed = _benchmark_pop(redis_client, pop, batch_size, batches)
+            print(
+                f"pop {batch_size:>6} ids with {name:<14}: "
+                f"{batches / elapsed:10.1f} pops/s, {batch_size * batches / elapsed:12.1f} ids/s"
+            )
+
+    backend = algolia.AlgoliaBackend()
+    for name, ttl in (("uncached size", 0), ("cached size", 60)):
+        elapsed = _benchmark_enqueue_guard(backend, calls, ttl)
+        print(f"enqueue guard with {name:<13}: {calls / elapsed:10.1f} calls/s")
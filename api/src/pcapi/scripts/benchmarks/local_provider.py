@@ -0,0 +1,147 @@
+"""Benchmark the synchronization of a local provider, with existing
+objects prefetched for each iteration or looked up one by one.
+
+The provider is simulated: it generates ``--movies`` offers with
+``--showtimes`` stocks each. Run on a local database, since a venue,
+offers and stocks are created, e.g.:
+
+    flask benchmark_local_provider_sync --movies 100 --showtimes 50
+"""
+
+import datetime
+import decimal
+import time
+import typing
+import uuid
+
+import click
+import sqlalchemy.event
+
+from pcapi import settings
+from pcapi.core.categories import subcategories_v2 as subcategories
+import pcapi.core.offerers.factories as offerers_factories
+import pcapi.core.offers.models as offers_models
+import pcapi.core.providers.factories as providers_factories
+import pcapi.core.providers.models as providers_models
+from pcapi.local_providers.local_provider import LocalProvider
+from pcapi.local_providers.providable_info import ProvidableInfo
+from pcapi.models import Model
+from pcapi.models import db
+from pcapi.utils.blueprint import Blueprint
+
+
+blueprint = Blueprint(__name__, __name__)
+
+
+class BenchmarkStocks(LocalProvider):
+    name = "Benchmark"
+    can_create = True
+
+    def __init__(
+        self,
+        venue_provider: providers_models.VenueProvider,
+        prefix: str,
+        movies: int,
+        showtimes: int,
+        prefetch: bool,
+    ) -> None:
+        super().__init__(venue_provider)
+        self.prefix = prefix
+        self.showtimes = showtimes
+        self.prefetch = prefetch
+        self.movie_ids = iter(range(movies))
+        self.last_offer: offers_models.Offer | None = None
+        self.beginning_datetime = datetime.datetime.utcnow() + datetime.timedelta(days=30)
+
+    def __next__(self) -> list[ProvidableInfo]:
+        movie_id = f"{self.prefix}-{next(self.movie_ids)}"
+        now = datetime.datetime.utcnow()
+        providable_infos = [self.create_providable_info(offers_models.Offer, movie_id, now, movie_id)]
+        for showtime in range(self.showtimes):
+            stock_id = f"{movie_id}#{showtime}"
+            providable_infos.append(self.create_providable_info(offers_models.Stock, stock_id, now, stock_id))
+        return providable_infos
+
+    def fill_object_attributes(self, pc_object: Model) -> None:
+        assert self.venue_provider  # helps mypy
+        if isinstance(pc_object, offers_models.Offer):
+            pc_object.name = f"Film {pc_object.idAtProvider}"
+            pc_object.venue = self.venue_provider.venue
+            pc_object.subcategoryId = subcategories.SEANCE_CINE.id
+            self.last_offer = pc_object
+        if isinstance(pc_object, offers_models.Stock):
+            pc_object.offer = self.last_offer
+            pc_object.price = decimal.Decimal("7.5")
+            pc_object.quantity = 100
+            pc_object.beginningDatetime = self.beginning_datetime
+            pc_object.bookingLimitDatetime = self.beginning_datetime
+
+    def get_existing_objects(self, providable_infos: list[ProvidableInfo]) -> dict:
+        if not self.prefetch:
+            return {}
+        return super().get_existing_objects(providable_infos)
+
+    def get_existing_pc_obj(
+        self,
+        providable_info: ProvidableInfo,
+        chunk_to_insert: dict,
+        chunk_to_update: dict,
+        existing_objects: dict | None = None,
+    ) -> offers_models.Product | offers_models.Offer | offers_models.Stock | None:
+        if not self.prefetch:
+            existing_objects = None
+        return super().get_existing_pc_obj(providable_info, chunk_to_insert, chunk_to_update, existing_objects)
+
+
+def _create_venue_provider() -> providers_models.VenueProvider:
+    provider = providers_models.Provider.query.filter_by(
+        localClass=BenchmarkStocks.__name__
+    ).one_or_none() or providers_factories.ProviderFactory(localClass=BenchmarkStocks.__name__)
+    venue_provider = providers_factories.VenueProviderFactory(
+        provider=provider, venue=offerers_factories.VenueFactory()
+    )
+    db.session.commit()
+    return venue_provider
+
+
+def _synchronize(
+    venue_provider: providers_models.VenueProvider, prefix: str, movies: int, showtimes: int, prefetch: bool
+) -> tuple[int, float]:
+    statements = 0
+
+    def count_statement(*args: typing.Any) -> None:
+        nonlocal statements
+        statements += 1
+
+    local_provider = BenchmarkStocks(venue_provider, prefix, movies, showtimes, prefetch)
+    sqlalchemy.event.listen(db.engine, "before_cursor_execute", count_statement)
+    try:
+        start = time.perf_counter()
+        local_provider.updateObjects()
+        return statements, time.perf_counter() - start
+    finally:
+        sqlalchemy.event.remove(db.engine, "before_cursor_execute", count_statement)
+
+
+@blueprint.cli.command("benchmark_local_provider_sync")
+@click.option("--movies", type=int, default=100, help="Number of offers generated by the provider")
+@click.option("--showtimes", type=int, default=50, help="Number of stocks generated for each offer")
+def benchmark_local_provider_sync(movies: int, showtimes: int) -> None:
+    """Compare the duration and the number of SQL statements of a
+    synchronization that updates existing objects.
+    """
+    if not settings.CAN_RUN_SANDBOX:
+        print("Benchmarks are disabled on this environment")
+        return
+
+    venue_provider = _create_venue_provider()
+    prefix = uuid.uuid4().hex
+    objects = movies * (showtimes + 1)
+    statements, elapsed = _synchronize(venue_provider, prefix, movies, showtimes, prefetch=True)
+    print(f"{'creation':<18}: {objects} objects in {elapsed:.2f}s, {statements} SQL statements")
+    for name, prefetch in (("one by one lookup", False), ("prefetched lookup", True)):
+        statements, elapsed = _synchronize(venue_provider, prefix, movies, showtimes, prefetch)
+        print(
+            f"{name:<18}: {objects} objects in {elapsed:.2f}s, {objects / elapsed:.1f} objects/s, "
+            f"{statements} SQL statements"
+        )
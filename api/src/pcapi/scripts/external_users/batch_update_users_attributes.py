@@ -10,8 +10,8 @@ from typing import Generator
 from pcapi.core.external import batch
 from pcapi.core.external import sendinblue
 from pcapi.core.external.attributes.api import get_pro_attributes
-from pcapi.core.external.attributes.api import get_user_attributes
-from pcapi.core.external.attributes.api import get_user_or_pro_attributes
+from pcapi.core.external.attributes.api import get_users_attributes
+from pcapi.core.external.attributes.models import UserAttributes
 from pcapi.core.external.sendinblue import SendinblueUserUpdateData
 from pcapi.core.external.sendinblue import import_contacts_in_sendinblue
 from pcapi.core.users.models import User
@@ -41,22 +41,32 @@ def get_users_chunks(chunk_size: int) -> Generator[list[User], None, None]:
             break
 
 
-def format_batch_users(users: list[User]) -> list[UserUpdateData]:
+def format_batch_users(
+    users: list[User], users_attributes: dict[int, UserAttributes] | None = None
+) -> list[UserUpdateData]:
+    if users_attributes is None:
+        users_attributes = get_users_attributes(users)
     res = []
     for user in users:
-        attributes = batch.format_user_attributes(get_user_attributes(user))
+        attributes = batch.format_user_attributes(users_attributes[user.id])
         res.append(UserUpdateData(user_id=str(user.id), attributes=attributes))
     print(f"{len(res)} users formatted for batch...")
     return res
 
 
-def format_sendinblue_users(users: list[User]) -> list[SendinblueUserUpdateData]:
+def format_sendinblue_users(
+    users: list[User], users_attributes: dict[int, UserAttributes] | None = None
+) -> list[SendinblueUserUpdateData]:
+    if users_attributes is None:
+        users_attributes = get_users_attributes([user for user in users if not user.has_any_pro_role])
     res = []
     for user in users:
         if user.has_any_pro_role and FeatureToggle.WIP_ENABLE_BREVO_PRO_SUBACCOUNT.is_active():
             attributes = sendinblue.format_pro_attributes(get_pro_attributes(user.email))
+        elif user.has_any_pro_role:
+            attributes = sendinblue.format_user_attributes(get_pro_attributes(user.email))
         else:
-            attributes = sendinblue.format_user_attributes(get_user_or_pro_attributes(user))
+            attributes = sendinblue.format_user_attributes(users_attributes[user.id])
         res.append(SendinblueUserUpdateData(email=user.email, attributes=attributes))
     print(f"{len(res)} users formatted for sendinblue...")
     return res
@@ -74,11 +84,13 @@ def run(chunk_size: int, synchronize_batch: bool = True, synchronize_sendinblue:
 
     print("%s started" % message)
     for chunk in get_users_chunks(chunk_size):
+        # Computed once for the whole chunk, for both Batch and Sendinblue
+        users_attributes = get_users_attributes(chunk)
         if synchronize_batch:
-            batch_users_data = format_batch_users(chunk)
+            batch_users_data = format_batch_users(chunk, users_attributes)
             update_users_attributes(batch_users_data)
         if synchronize_sendinblue:
-            sendinblue_users_data = format_sendinblue_users(chunk)
+            sendinblue_users_data = format_sendinblue_users(chunk, users_attributes)
             import_contacts_in_sendinblue(sendinblue_users_data)
 
     print("%s finished" % message)
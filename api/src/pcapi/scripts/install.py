@@ -25,6 +25,12 @@ def install_commands(app: flask.Flask) -> None:
         "pcapi.scheduled_tasks.offerer_stats_commands",
         "pcapi.scheduled_tasks.titelive_commands",
         "pcapi.scripts.backoffice_users.add_permissions_to_staging_specific_roles",
+        "pcapi.scripts.benchmarks.booking",
+        "pcapi.scripts.benchmarks.clickhouse",
+        "pcapi.scripts.benchmarks.cloud_tasks",
+        "pcapi.scripts.benchmarks.import_time",
+        "pcapi.scripts.benchmarks.indexation_queue",
+        "pcapi.scripts.benchmarks.local_provider",
         "pcapi.scripts.beneficiary.import_test_users",
         "pcapi.scripts.booking.commands",
         "pcapi.scripts.check_pre_migrations",
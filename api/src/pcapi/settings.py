@@ -92,6 +92,8 @@ LOG_PLAIN_TEXT = bool(int(os.environ.get("LOG_PLAIN_TEXT", 0)))
 NATIVE_APP_MINIMAL_CLIENT_VERSION = semver.VersionInfo.parse(
     os.environ.get("NATIVE_APP_MINIMAL_CLIENT_VERSION", "1.132.1")
 )
+# Time (in seconds) during which the user authenticated by a JWT is not looked up again in the database
+NATIVE_AUTHENTICATED_USER_CACHE_TTL = int(os.environ.get("NATIVE_AUTHENTICATED_USER_CACHE_TTL", 30))
 
 
 # REDIS
@@ -104,6 +106,20 @@ REDIS_VENUE_IDS_FOR_OFFERS_CHUNK_SIZE = int(os.environ.get("REDIS_VENUE_IDS_FOR_
 REDIS_VENUE_IDS_CHUNK_SIZE = int(os.environ.get("REDIS_VENUE_IDS_CHUNK_SIZE", 1000))
 
 
+# FEATURE FLAGS
+# Time (in seconds) during which the state of features is used without checking its version in Redis
+FEATURES_CACHE_TTL = int(os.environ.get("FEATURES_CACHE_TTL", 10))
+# Time (in seconds) after which the state of features is loaded from the database anyway
+FEATURES_CACHE_MAX_AGE = int(os.environ.get("FEATURES_CACHE_MAX_AGE", 300))
+
+
+# OFFER VALIDATION RULES
+# Time (in seconds) during which compiled rules are used without checking their version in Redis
+OFFER_VALIDATION_RULES_CACHE_TTL = int(os.environ.get("OFFER_VALIDATION_RULES_CACHE_TTL", 10))
+# Time (in seconds) after which rules are loaded from the database anyway
+OFFER_VALIDATION_RULES_CACHE_MAX_AGE = int(os.environ.get("OFFER_VALIDATION_RULES_CACHE_MAX_AGE", 300))
+
+
 # SENTRY
 ENABLE_SENTRY = bool(int(os.environ.get("ENABLE_SENTRY", 0)))
 SENTRY_DSN = secrets_utils.get("SENTRY_DSN", "")
@@ -169,8 +185,11 @@ ALGOLIA_DELETING_COLLECTIVE_OFFERS_CHUNK_SIZE = int(
     os.environ.get("ALGOLIA_DELETING_COLLECTIVE_OFFERS_CHUNK_SIZE", 10000)
 )
 ALGOLIA_OFFERS_INDEX_MAX_SIZE = int(os.environ.get("ALGOLIA_OFFERS_INDEX_MAX_SIZE", -1))
+ALGOLIA_OFFERS_INDEX_SIZE_CACHE_TTL = int(os.environ.get("ALGOLIA_OFFERS_INDEX_SIZE_CACHE_TTL", 60))  # seconds
 
 ALGOLIA_OFFERS_BY_VENUE_CHUNK_SIZE = int(os.environ.get("ALGOLIA_OFFERS_BY_VENUE_CHUNK_SIZE", 10000))
+ALGOLIA_INDEXATION_SENDERS = int(os.environ.get("ALGOLIA_INDEXATION_SENDERS", 4))
+ALGOLIA_INDEXATION_QUEUE_SIZE = int(os.environ.get("ALGOLIA_INDEXATION_QUEUE_SIZE", 4))
 ALGOLIA_LAST_30_DAYS_BOOKINGS_RANGE_THRESHOLDS = utils.env_get_list(
     "ALGOLIA_LAST_30_DAYS_BOOKINGS_RANGE_THRESHOLDS", type_=int
 )
@@ -353,9 +372,11 @@ DS_USER_ACCOUNT_UPDATE_PROCEDURE_ID = os.environ.get("DEMARCHES_SIMPLIFIEES_USER
 OBJECT_STORAGE_URL = os.environ.get("OBJECT_STORAGE_URL", "")
 OBJECT_STORAGE_PROVIDER = os.environ.get("OBJECT_STORAGE_PROVIDER")
 LOCAL_STORAGE_DIR = Path(os.path.dirname(os.path.realpath(__file__))) / "static" / "object_store_data"
+OBJECT_STORAGE_UPLOAD_WORKERS = int(os.environ.get("OBJECT_STORAGE_UPLOAD_WORKERS", 8))
 
 # THUMBS
 THUMBS_FOLDER_NAME = os.environ.get("THUMBS_FOLDER_NAME", "thumbs")
+THUMBS_PIPELINE_WORKERS = int(os.environ.get("THUMBS_PIPELINE_WORKERS", 4))
 
 # GOOGLE
 GCP_BUCKET_CREDENTIALS = json.loads(base64.b64decode(secrets_utils.get("GCP_BUCKET_CREDENTIALS", "")) or "{}")
@@ -395,6 +416,9 @@ GCP_BATCH_CUSTOM_EVENT_QUEUE_NAME = os.environ.get("GCP_BATCH_CUSTOM_EVENT_QUEUE
 GCP_EXTERNAL_API_BOOKING_NOTIFICATION_QUEUE_NAME = os.environ.get(
     "GCP_EXTERNAL_API_BOOKING_NOTIFICATION_QUEUE_NAME", ""
 )
+GCP_EXTERNAL_USER_ATTRIBUTES_QUEUE_NAME = os.environ.get("GCP_EXTERNAL_USER_ATTRIBUTES_QUEUE_NAME", "")
+# Updates of the attributes of a user pushed to Brevo and Batch are coalesced within this window
+EXTERNAL_USER_ATTRIBUTES_DEBOUNCE_SECONDS = int(os.environ.get("EXTERNAL_USER_ATTRIBUTES_DEBOUNCE_SECONDS", 60))
 
 CLOUD_TASK_CALL_INTERNAL_API_ENDPOINT = bool(int(os.environ.get("CLOUD_TASK_CALL_INTERNAL_API_ENDPOINT", 0)))
 CLOUD_TASK_BEARER_TOKEN = secrets_utils.get("CLOUD_TASK_BEARER_TOKEN", "")
@@ -405,6 +429,18 @@ CLOUD_TASK_RETRY_INITIAL_DELAY = float(os.environ.get("CLOUD_TASK_RETRY_INITIAL_
 CLOUD_TASK_RETRY_MAXIMUM_DELAY = float(os.environ.get("CLOUD_TASK_RETRY_MAXIMUM_DELAY", 60.0))
 CLOUD_TASK_RETRY_MULTIPLIER = float(os.environ.get("CLOUD_TASK_RETRY_MULTIPLIER", 2.0))
 CLOUD_TASK_RETRY_DEADLINE = float(os.environ.get("CLOUD_TASK_RETRY_DEADLINE", 60.0 * 2.0))
+# Client used to create cloud tasks: use "pcapi.tasks.local_client.LocalCloudTasksClient" to run without GCP
+CLOUD_TASK_CLIENT = os.environ.get("CLOUD_TASK_CLIENT", "google.cloud.tasks_v2.CloudTasksClient")
+# Number of background threads that create cloud tasks (0: tasks are created synchronously by the caller)
+CLOUD_TASK_ENQUEUE_WORKERS = int(os.environ.get("CLOUD_TASK_ENQUEUE_WORKERS", 0))
+# Maximum number of tasks waiting to be created in the background, beyond which tasks are created synchronously
+CLOUD_TASK_ENQUEUE_BUFFER_SIZE = int(os.environ.get("CLOUD_TASK_ENQUEUE_BUFFER_SIZE", 1000))
+# Maximum time (in seconds) spent waiting for tasks being created in the background, at the end of a request
+CLOUD_TASK_ENQUEUE_FLUSH_TIMEOUT = float(os.environ.get("CLOUD_TASK_ENQUEUE_FLUSH_TIMEOUT", 5.0))
+# Local client only: simulated latency (in seconds) of the creation of a task
+CLOUD_TASK_LOCAL_CLIENT_LATENCY = float(os.environ.get("CLOUD_TASK_LOCAL_CLIENT_LATENCY", 0.0))
+# Local client only: whether created tasks are sent to the API, like Google Cloud Tasks does
+CLOUD_TASK_LOCAL_CLIENT_DISPATCH = bool(int(os.environ.get("CLOUD_TASK_LOCAL_CLIENT_DISPATCH", 0)))
 
 GOOGLE_DRIVE_BACKEND = os.environ.get("GOOGLE_DRIVE_BACKEND")
 GOOGLE_DRIVE_SERVICE_ACCOUNT_INFO = os.environ.get("GOOGLE_DRIVE_SERVICE_ACCOUNT_INFO")  # only for dev/debug
@@ -517,6 +553,8 @@ FINANCE_OVERRIDE_PRICING_ORDERING_ON_PRICING_POINTS = utils.env_get_list(
     "FINANCE_OVERRIDE_PRICING_ORDERING_ON_PRICING_POINTS", type_=int
 )
 FINANCE_BACKEND = os.environ.get("FINANCE_BACKEND", "pcapi.core.finance.backend.dummy.DummyFinanceBackend")
+FINANCE_INVOICE_PDF_WORKERS = int(os.environ.get("FINANCE_INVOICE_PDF_WORKERS", 4))
+FINANCE_INVOICE_UPLOAD_WORKERS = int(os.environ.get("FINANCE_INVOICE_UPLOAD_WORKERS", 8))
 CGR_GOOGLE_DRIVE_CSV_REIMBURSEMENT_ID = os.environ.get("CGR_GOOGLE_DRIVE_CSV_REIMBURSEMENT_ID", "")
 KINEPOLIS_GOOGLE_DRIVE_CSV_REIMBURSEMENT_ID = os.environ.get("KINEPOLIS_GOOGLE_DRIVE_CSV_REIMBURSEMENT_ID", "")
 CGR_EMAIL = os.environ.get("CGR_EMAIL", "")
@@ -634,6 +672,7 @@ CLICKHOUSE_BACKEND = os.environ.get(
 CLICKHOUSE_IP = secrets_utils.get("CLICKHOUSE_IP", "127.0.0.1")
 CLICKHOUSE_USER = secrets_utils.get("CLICKHOUSE_USER", "default")
 CLICKHOUSE_PASSWORD = secrets_utils.get("CLICKHOUSE_PASSWORD")
+CLICKHOUSE_QUERY_CACHE_TTL = int(os.environ.get("CLICKHOUSE_QUERY_CACHE_TTL", 10 * 60))  # seconds
 
 
 # CEGID
@@ -644,3 +683,9 @@ CEGID_COMPANY = secrets_utils.get("CEGID_COMPANY")
 
 # External APIs
 EXTERNAL_BOOKINGS_TIMEOUT_IN_SECONDS = int(os.environ.get("EXTERNAL_BOOKINGS_TIMEOUT_IN_SECONDS", 10))
+# Time (in seconds) during which the remaining places of a cinema offer are not requested again
+CINEMA_STOCKS_REFRESH_INTERVAL = int(os.environ.get("CINEMA_STOCKS_REFRESH_INTERVAL", 60))
+# Maximum number of remaining places requests per minute, for each cinema provider
+CINEMA_STOCKS_REFRESH_RATE_LIMIT = int(os.environ.get("CINEMA_STOCKS_REFRESH_RATE_LIMIT", 300))
+# Number of most viewed cinema offers refreshed in the background by each run of the cron
+CINEMA_STOCKS_HOT_OFFERS_COUNT = int(os.environ.get("CINEMA_STOCKS_HOT_OFFERS_COUNT", 100))
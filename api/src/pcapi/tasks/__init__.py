@@ -8,5 +8,6 @@ def install_handlers(app: Flask) -> None:
     from . import batch_tasks
     from . import beamer_tasks
     from . import external_api_booking_notification_tasks
+    from . import external_user_tasks
     from . import sendinblue_tasks
     from . import ubble_tasks
@@ -1,7 +1,12 @@
+import atexit
+from concurrent import futures
 import datetime
+import functools
 import hashlib
 import json
 import logging
+import os
+import threading
 import typing
 
 from dateutil.relativedelta import relativedelta
@@ -13,6 +18,7 @@ from google.protobuf import timestamp_pb2
 
 from pcapi import settings
 from pcapi.utils import requests
+from pcapi.utils.module_loading import import_string
 
 
 logger = logging.getLogger(__name__)
@@ -26,7 +32,7 @@ REQUEST_TIMEOUT = datetime.timedelta(seconds=10)
 
 def get_client() -> tasks_v2.CloudTasksClient:
     if not hasattr(get_client, "client"):
-        get_client.__setattr__("client", tasks_v2.CloudTasksClient())
+        get_client.__setattr__("client", import_string(settings.CLOUD_TASK_CLIENT)())
 
     return get_client.__getattribute__("client")
 
@@ -117,11 +123,143 @@ def enqueue_internal_task(
 
     schedule_time = datetime.datetime.utcnow() + relativedelta(seconds=delayed_seconds) if delayed_seconds else None
 
+    enqueuer = _get_enqueuer()
+    if enqueuer:
+        enqueuer.submit(
+            queue, http_request, task_id=task_id, schedule_time=schedule_time, task_request_timeout=task_request_timeout
+        )
+        return None
+
     return enqueue_task(
         queue, http_request, task_id=task_id, schedule_time=schedule_time, task_request_timeout=task_request_timeout
     )
 
 
+class BufferedEnqueuer:
+    """Create tasks from background threads, so that several tasks are
+    created concurrently and callers do not wait for Google Cloud Tasks.
+
+    At most ``max_size`` tasks are buffered: beyond that, tasks are
+    created synchronously. A task that has a name (see `deduplicate`
+    in `enqueue_internal_task()`) is ignored if the same task is
+    already buffered.
+    """
+
+    def __init__(self, workers: int, max_size: int) -> None:
+        self._executor = futures.ThreadPoolExecutor(max_workers=workers, thread_name_prefix="cloud-task-enqueuer")
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._lock = threading.Lock()
+        self._pending: set[futures.Future] = set()
+        self._pending_task_ids: set[str] = set()
+
+    def submit(
+        self,
+        queue: str,
+        http_request: tasks_v2.HttpRequest,
+        task_id: str | None = None,
+        schedule_time: datetime.datetime | None = None,
+        task_request_timeout: int | None = None,
+    ) -> None:
+        if task_id:
+            with self._lock:
+                if task_id in self._pending_task_ids:
+                    logger.info("Task on queue %s url %s already buffered", queue, http_request.url)
+                    return
+                self._pending_task_ids.add(task_id)
+
+        enqueue = functools.partial(
+            enqueue_task,
+            queue,
+            http_request,
+            task_id=task_id,
+            schedule_time=schedule_time,
+            task_request_timeout=task_request_timeout,
+        )
+        if not self._slots.acquire(blocking=False):
+            logger.warning("Too many buffered cloud tasks, creating task synchronously", extra={"queue": queue})
+            try:
+                enqueue()
+            finally:
+                self._release(task_id)
+            return
+
+        with self._lock:
+            future = self._executor.submit(enqueue)
+            self._pending.add(future)
+        future.add_done_callback(functools.partial(self._on_done, task_id))
+
+    def _release(self, task_id: str | None) -> None:
+        if task_id:
+            with self._lock:
+                self._pending_task_ids.discard(task_id)
+
+    def _on_done(self, task_id: str | None, future: futures.Future) -> None:
+        with self._lock:
+            self._pending.discard(future)
+        self._release(task_id)
+        self._slots.release()
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """Wait until buffered tasks are created. Return whether all of
+        them have been created before ``timeout`` seconds.
+        """
+        with self._lock:
+            pending = list(self._pending)
+        if not pending:
+            return True
+        _, not_done = futures.wait(pending, timeout=timeout)
+        if not_done:
+            logger.warning("Could not flush buffered cloud tasks", extra={"count": len(not_done), "timeout": timeout})
+            return False
+        return True
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=True)
+
+
+_enqueuer: BufferedEnqueuer | None = None
+_enqueuer_key: tuple | None = None
+_enqueuer_lock = threading.Lock()
+
+
+def _get_enqueuer() -> BufferedEnqueuer | None:
+    global _enqueuer, _enqueuer_key  # pylint: disable=global-statement
+
+    if settings.CLOUD_TASK_ENQUEUE_WORKERS <= 0:
+        return None
+    # Threads do not survive a fork: each process has its own enqueuer.
+    key = (os.getpid(), settings.CLOUD_TASK_ENQUEUE_WORKERS, settings.CLOUD_TASK_ENQUEUE_BUFFER_SIZE)
+    with _enqueuer_lock:
+        if _enqueuer_key != key:
+            if _enqueuer is not None and _enqueuer_key and _enqueuer_key[0] == key[0]:
+                _enqueuer.shutdown()
+            _enqueuer = BufferedEnqueuer(settings.CLOUD_TASK_ENQUEUE_WORKERS, settings.CLOUD_TASK_ENQUEUE_BUFFER_SIZE)
+            _enqueuer_key = key
+        return _enqueuer
+
+
+def flush_tasks(timeout: float | None = None) -> bool:
+    """Wait until tasks buffered by this process are created, for at
+    most ``timeout`` seconds (``CLOUD_TASK_ENQUEUE_FLUSH_TIMEOUT`` by
+    default).
+    """
+    if _enqueuer is None or not _enqueuer_key or _enqueuer_key[0] != os.getpid():
+        return True
+    if timeout is None:
+        timeout = settings.CLOUD_TASK_ENQUEUE_FLUSH_TIMEOUT
+    return _enqueuer.flush(timeout)
+
+
+def shutdown_enqueuer() -> None:
+    """Create all buffered tasks, before the process exits."""
+    global _enqueuer, _enqueuer_key  # pylint: disable=global-statement
+
+    with _enqueuer_lock:
+        if _enqueuer is not None and _enqueuer_key and _enqueuer_key[0] == os.getpid():
+            _enqueuer.shutdown()
+        _enqueuer = _enqueuer_key = None
+
+
 def _call_internal_api_endpoint(queue: str, url: str, payload: typing.Any) -> None:
     requests.post(
         url,
@@ -146,3 +284,8 @@ def list_tasks(queue: str) -> list[tasks_v2.Task]:
     page_result = client.list_tasks(request=request)
 
     return page_result.tasks
+
+
+# Tasks that are still buffered when the process exits (e.g. a worker
+# that is stopped) are created before it exits.
+atexit.register(shutdown_enqueuer)
@@ -0,0 +1,24 @@
+from pcapi import settings
+from pcapi.tasks.decorator import task
+from pcapi.tasks.serialization.external_user_tasks import UpdateUserAttributesRequest
+
+
+EXTERNAL_USER_ATTRIBUTES_QUEUE_NAME = settings.GCP_EXTERNAL_USER_ATTRIBUTES_QUEUE_NAME
+
+
+# De-duplicate and delay by the debounce window, so that several changes of a user in a short time (e.g. ten bookings
+# in a minute) lead to a single computation of the attributes and a single update request to Batch and Brevo.
+#
+# time_id parameter in UpdateUserAttributesRequest is the same for all changes within a window, so their payloads have
+# the same hash, so the same task id (see src.pcapi.tasks.cloud_task.enqueue_internal_task). As the task is delayed
+# by the length of the window, it runs after the end of the window and sees all changes made within it.
+@task(
+    EXTERNAL_USER_ATTRIBUTES_QUEUE_NAME,
+    "/external/update_user_attributes",
+    True,
+    settings.EXTERNAL_USER_ATTRIBUTES_DEBOUNCE_SECONDS,
+)
+def update_external_user_attributes_task(payload: UpdateUserAttributesRequest) -> None:
+    from pcapi.core.external.attributes.api import push_user_attributes
+
+    push_user_attributes(payload.user_id, skip_batch=payload.skip_batch, skip_sendinblue=payload.skip_sendinblue)
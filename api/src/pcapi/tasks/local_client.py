@@ -0,0 +1,77 @@
+"""A stand-in for the Google Cloud Tasks client, to run and benchmark
+cloud tasks without GCP.
+
+Enable it with ``CLOUD_TASK_CLIENT=pcapi.tasks.local_client.LocalCloudTasksClient``.
+"""
+
+import collections
+import logging
+import threading
+import time
+import typing
+import uuid
+
+from google.api_core.exceptions import AlreadyExists
+from google.cloud import tasks_v2
+
+from pcapi import settings
+from pcapi.utils import requests
+
+
+logger = logging.getLogger(__name__)
+
+
+class LocalCloudTasksClient:
+    """Keep created tasks in memory, after a simulated latency.
+
+    If ``dispatch`` is set, each task is also sent to its URL right
+    away, with the headers that Google Cloud Tasks would add. Like
+    Google Cloud Tasks, a task cannot be created twice with the same
+    name.
+    """
+
+    def __init__(self, latency: float | None = None, dispatch: bool | None = None) -> None:
+        self.latency = settings.CLOUD_TASK_LOCAL_CLIENT_LATENCY if latency is None else latency
+        self.dispatch = settings.CLOUD_TASK_LOCAL_CLIENT_DISPATCH if dispatch is None else dispatch
+        self.tasks: dict[str, list[tasks_v2.Task]] = collections.defaultdict(list)
+        self._names: set[str] = set()
+        self._lock = threading.Lock()
+
+    def queue_path(self, project: str, location: str, queue: str) -> str:
+        return f"projects/{project}/locations/{location}/queues/{queue}"
+
+    def task_path(self, project: str, location: str, queue: str, task: str) -> str:
+        return f"{self.queue_path(project, location, queue)}/tasks/{task}"
+
+    def create_task(self, request: tasks_v2.CreateTaskRequest, **kwargs: typing.Any) -> tasks_v2.Task:
+        if self.latency:
+            time.sleep(self.latency)
+
+        task = tasks_v2.Task(request.task)
+        if not task.name:
+            task.name = f"{request.parent}/tasks/{uuid.uuid4().hex}"
+        with self._lock:
+            if task.name in self._names:
+                raise AlreadyExists(f"Task {task.name} already exists")
+            self._names.add(task.name)
+            self.tasks[request.parent].append(task)
+
+        if self.dispatch:
+            self._dispatch(task)
+        return task
+
+    def list_tasks(self, request: tasks_v2.ListTasksRequest, **kwargs: typing.Any) -> tasks_v2.ListTasksResponse:
+        with self._lock:
+            return tasks_v2.ListTasksResponse(tasks=list(self.tasks[request.parent]))
+
+    def _dispatch(self, task: tasks_v2.Task) -> None:
+        _, queue, _, task_id = task.name.rsplit("/", 3)
+        try:
+            requests.post(
+                task.http_request.url,
+                headers=dict(task.http_request.headers)
+                | {"HTTP_X_CLOUDTASKS_QUEUENAME": queue, "HTTP_X_CLOUDTASKS_TASKNAME": task_id},
+                data=task.http_request.body,
+            )
+        except Exception:  # pylint: disable=broad-except
+            logger.exception("Could not dispatch local cloud task", extra={"queue": queue, "task": task_id})
@@ -0,0 +1,8 @@
+from pcapi.routes.serialization import BaseModel
+
+
+class UpdateUserAttributesRequest(BaseModel):
+    user_id: int
+    time_id: str  # see comment in update_external_user_attributes_task
+    skip_batch: bool = False
+    skip_sendinblue: bool = False
@@ -92,3 +92,80 @@ OPERATIONS = {
     "intersects": intersects,
     "not intersects": lambda a, b: not intersects(a, b),
 }
+
+
+def _compile_in(b: typing.Any) -> typing.Callable[[typing.Any], bool]:
+    sanitized_b = sanitize_list(b)
+    try:
+        sanitized_b_set: frozenset | None = frozenset(sanitized_b)
+    except TypeError:  # unhashable items
+        sanitized_b_set = None
+
+    def is_in(a: typing.Any) -> bool:
+        sanitized_a = sanitize_str(a)
+        if sanitized_b_set is not None:
+            try:
+                return sanitized_a in sanitized_b_set
+            except TypeError:  # unhashable value
+                pass
+        return sanitized_a in sanitized_b
+
+    return is_in
+
+
+def _compile_contains(b: list) -> typing.Callable[[typing.Any], bool]:
+    sanitized_b = sanitize_list(b)
+
+    def contains_(a: typing.Any) -> bool:
+        if not a:
+            return False
+        sanitized_a = sanitize_str(a)
+        return any(element in sanitized_a for element in sanitized_b)
+
+    return contains_
+
+
+def _compile_contains_exact(b: list) -> typing.Callable[[typing.Any], bool]:
+    sanitized_b = sanitize_list(b)
+
+    def contains_exact_(a: typing.Any) -> bool:
+        if not a:
+            return False
+        split_a = sanitize_list(a.split())
+        return any(element in split_a for element in sanitized_b)
+
+    return contains_exact_
+
+
+def _compile_intersects(b: list) -> typing.Callable[[typing.Any], bool]:
+    sanitized_b = set(sanitize_list(b)) if b else set()
+
+    def intersects_(a: typing.Any) -> bool:
+        if not a or not sanitized_b:
+            return False
+        return bool(sanitized_b.intersection(sanitize_list(a)))
+
+    return intersects_
+
+
+def compile_operation(operator: str, b: typing.Any) -> typing.Callable[[typing.Any], bool]:
+    """Return a predicate ``f`` so that ``f(a)`` is ``OPERATIONS[operator](a, b)``.
+
+    The comparated value ``b`` is sanitized once, when possible, instead
+    of on each call.
+    """
+    operation = OPERATIONS[operator]
+    try:
+        if operator in ("in", "not in") and "__contains__" in dir(b):
+            is_in = _compile_in(b)
+            return is_in if operator == "in" else lambda a: not is_in(a)
+        if operator == "contains" and isinstance(b, list):
+            return _compile_contains(b)
+        if operator == "contains-exact" and isinstance(b, list):
+            return _compile_contains_exact(b)
+        if operator in ("intersects", "not intersects"):
+            intersects_ = _compile_intersects(b)
+            return intersects_ if operator == "intersects" else lambda a: not intersects_(a)
+    except TypeError:
+        pass  # `b` cannot be sanitized ahead of time, use the generic operation
+    return lambda a: operation(a, b)
@@ -1,10 +1,12 @@
 from dataclasses import dataclass
 from datetime import datetime
 import json
+import os
 import pathlib
 import shutil
 import tempfile
 import threading
+import time
 import urllib.parse
 
 import weasyprint
@@ -23,13 +25,23 @@ class PdfMetadata:
 
 
 class CachingUrlFetcher:
-    """A URL fetcher for weasyprint that caches files."""
+    """A URL fetcher for weasyprint that caches files.
 
-    def __init__(self) -> None:
-        self.create_cache()
+    If `cache_dir` is given, files are cached in this directory, which
+    may be shared by fetchers of other processes. It is then up to the
+    caller to delete it.
+    """
+
+    def __init__(self, cache_dir: pathlib.Path | None = None) -> None:
+        self.owns_cache = cache_dir is None
+        if cache_dir is None:
+            self.create_cache()
+        else:
+            self.tmp_dir = cache_dir
 
     def __del__(self) -> None:
-        self.delete_cache()
+        if self.owns_cache:
+            self.delete_cache()
 
     def create_cache(self) -> None:
         self.tmp_dir_parent = pathlib.Path(tempfile.mkdtemp())
@@ -65,13 +77,19 @@ class CachingUrlFetcher:
             # File objects cannot be serialized, we serialize their
             # content instead.
             result["string"] = result.pop("file_obj").read()  # type: ignore[attr-defined]
-        with content_path.open("bx") as fp:
-            fp.write(result["string"])  # despite the name, it's bytes
+        # Write metadata first and move files in place atomically:
+        # another process that shares the cache must never see a
+        # partially written file.
         metadata = {key: value for key, value in result.items() if key != "string"}
-        with metadata_path.open("tx", encoding="utf-8") as fp:
-            fp.write(json.dumps(metadata))
+        self._write_atomically(metadata_path, json.dumps(metadata).encode("utf-8"))
+        self._write_atomically(content_path, result["string"])  # despite the name, it's bytes
         return result
 
+    def _write_atomically(self, path: pathlib.Path, content: bytes) -> None:
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp_path.write_bytes(content)
+        os.replace(tmp_path, path)
+
 
 def _get_url_fetcher() -> CachingUrlFetcher:
     if not hasattr(url_fetcher_container, "fetcher"):
@@ -79,6 +97,15 @@ def _get_url_fetcher() -> CachingUrlFetcher:
     return url_fetcher_container.fetcher
 
 
+def use_shared_url_fetcher_cache(cache_dir: str) -> None:
+    """Make the URL fetcher of the current thread use a cache directory
+    shared with other processes.
+
+    This is meant to be used as the initializer of a process pool.
+    """
+    url_fetcher_container.fetcher = CachingUrlFetcher(cache_dir=pathlib.Path(cache_dir))
+
+
 def generate_pdf_from_html(html_content: str, metadata: PdfMetadata | None = None) -> bytes:
     fetcher = _get_url_fetcher()
     document = weasyprint.HTML(string=html_content, url_fetcher=fetcher.fetch_url).render()
@@ -90,3 +117,14 @@ def generate_pdf_from_html(html_content: str, metadata: PdfMetadata | None = Non
     document.metadata.title = metadata.title
     document.metadata.description = metadata.description
     return document.write_pdf()
+
+
+def generate_timed_pdf_from_html(html_content: str, metadata: PdfMetadata | None = None) -> tuple[bytes, float]:
+    """Generate a PDF and return it along with the time spent generating it.
+
+    This is useful when the PDF is generated in another process, where
+    the caller cannot measure it.
+    """
+    start = time.perf_counter()
+    pdf = generate_pdf_from_html(html_content, metadata)
+    return pdf, time.perf_counter() - start
@@ -0,0 +1,14 @@
+from pcapi.core.offers import api as offers_api
+from pcapi.core.offers import models as offers_models
+from pcapi.repository import transaction
+from pcapi.workers import worker
+from pcapi.workers.decorators import job
+
+
+@job(worker.default_queue)
+def update_cinema_stocks_job(offer_id: int) -> None:
+    offer = offers_models.Offer.query.get(offer_id)
+    if not offer or not offer.isActive:
+        return
+    with transaction():
+        offers_api.update_stock_quantity_to_match_cinema_venue_provider_remaining_places(offer, rate_limited=True)
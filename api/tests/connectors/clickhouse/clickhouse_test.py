@@ -1,6 +1,9 @@
 from decimal import Decimal
 from unittest import mock
 
+import redis
+
+import pcapi.connectors.clickhouse as clickhouse_connector
 from pcapi.connectors.clickhouse import queries as clickhouse_queries
 from pcapi.core.testing import override_settings
 
@@ -22,3 +25,72 @@ class GetYearlyAggregatedOffererRevenueTest:
         assert result.income_by_year["2024"].expected_revenue.total == Decimal("26.24")
         assert result.income_by_year["2024"].expected_revenue.individual == Decimal("13.12")
         assert result.income_by_year["2024"].expected_revenue.collective == Decimal("13.12")
+
+
+class GetBackendTest:
+    def test_backend_is_shared(self):
+        clickhouse_connector.reset_backends()
+
+        assert clickhouse_connector.get_backend() is clickhouse_connector.get_backend()
+        assert (
+            clickhouse_queries.TotalAggregatedRevenueQuery().backend
+            is clickhouse_queries.YearlyAggregatedRevenueQuery().backend
+        )
+
+
+class QueryCacheTest:
+    @override_settings(CLICKHOUSE_QUERY_CACHE_TTL=60)
+    def test_result_is_cached_by_query_and_venue_ids(self):
+        with mock.patch("pcapi.connectors.clickhouse.testing_backend.TestingBackend.run_query") as mock_run_query:
+            mock_run_query.return_value = fixtures.YEARLY_AGGREGATED_VENUE_REVENUE
+            result = clickhouse_queries.YearlyAggregatedRevenueQuery().execute((1, 2))
+            cached_result = clickhouse_queries.YearlyAggregatedRevenueQuery().execute((2, 1))
+            clickhouse_queries.YearlyAggregatedRevenueQuery().execute((1, 3))
+            clickhouse_queries.YearlyAggregatedIndividualRevenueQuery().execute((1, 2))
+
+        assert mock_run_query.call_count == 3
+        assert cached_result == result
+        assert cached_result.income_by_year["2024"].revenue.total == Decimal("24.24")
+        assert cached_result.income_by_year["2024"].expected_revenue.collective == Decimal("13.12")
+
+    def test_no_cache(self):
+        with mock.patch("pcapi.connectors.clickhouse.testing_backend.TestingBackend.run_query") as mock_run_query:
+            mock_run_query.return_value = fixtures.YEARLY_AGGREGATED_VENUE_REVENUE
+            clickhouse_queries.YearlyAggregatedRevenueQuery().execute((1, 2))
+            clickhouse_queries.YearlyAggregatedRevenueQuery().execute((1, 2))
+
+        assert mock_run_query.call_count == 2
+
+    @override_settings(CLICKHOUSE_QUERY_CACHE_TTL=60)
+    @mock.patch("flask.current_app.redis_client.set", side_effect=redis.exceptions.ConnectionError)
+    @mock.patch("flask.current_app.redis_client.get", side_effect=redis.exceptions.ConnectionError)
+    def test_query_is_run_when_redis_is_unavailable(self, mock_redis_get, mock_redis_set, caplog):
+        with mock.patch("pcapi.connectors.clickhouse.testing_backend.TestingBackend.run_query") as mock_run_query:
+            mock_run_query.return_value = fixtures.YEARLY_AGGREGATED_VENUE_REVENUE
+            result = clickhouse_queries.YearlyAggregatedRevenueQuery().execute((1, 2))
+
+        assert mock_run_query.call_count == 1
+        assert mock_redis_get.call_count == 1
+        assert mock_redis_set.call_count == 1
+        assert result.income_by_year["2024"].revenue.total == Decimal("24.24")
+        assert "Could not get cached result of Clickhouse query" in caplog.messages
+        assert "Could not cache result of Clickhouse query" in caplog.messages
+
+
+class ExecuteConcurrentlyTest:
+    def test_results_are_in_order(self):
+        with mock.patch("pcapi.connectors.clickhouse.testing_backend.TestingBackend.run_query") as mock_run_query:
+            mock_run_query.side_effect = lambda query, params: (
+                [clickhouse_queries.TotalAggregatedRevenueModel(expectedRevenue=params[0])]
+                if "total_expected_revenue" in query and "GROUP BY" not in query
+                else fixtures.YEARLY_AGGREGATED_VENUE_REVENUE
+            )
+            total, yearly = clickhouse_queries.execute_concurrently(
+                [
+                    (clickhouse_queries.TotalAggregatedRevenueQuery(), (12,)),
+                    (clickhouse_queries.YearlyAggregatedRevenueQuery(), (12,)),
+                ]
+            )
+
+        assert total.expected_revenue == Decimal("12")
+        assert yearly.income_by_year["2024"].revenue.total == Decimal("24.24")
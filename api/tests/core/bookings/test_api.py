@@ -1050,6 +1050,122 @@ class BookOfferTest:
             assert not models.Booking.query.count()
             assert stock.quantity == 11  # dnBookedQuantity + 1
 
+        @pytest.mark.parametrize("outside_stock_lock", [False, True])
+        def test_external_event_booking(self, requests_mock, outside_stock_lock):
+            external_booking_url = "https://api.example.com/"
+            beneficiary = users_factories.BeneficiaryGrant18Factory()
+            provider = providers_factories.ProviderFactory(
+                bookingExternalUrl=external_booking_url,
+                cancelExternalUrl=external_booking_url,
+            )
+            stock = offers_factories.EventStockFactory(
+                offer__lastProvider=provider,
+                offer__withdrawalType=offers_models.WithdrawalTypeEnum.IN_APP,
+                idAtProviders="",
+                quantity=25,
+                dnBookedQuantity=10,
+            )
+            requests_mock.post(
+                external_booking_url,
+                json={"tickets": [{"barcode": "12123932898127", "seat": "A12"}], "remainingQuantity": 50},
+                status_code=201,
+            )
+
+            with override_features(WIP_BOOK_EXTERNAL_TICKETS_OUTSIDE_STOCK_LOCK=outside_stock_lock):
+                booking = api.book_offer(beneficiary, stock.id, quantity=1)
+
+            assert booking.id
+            assert [external_booking.barcode for external_booking in booking.externalBookings] == ["12123932898127"]
+            assert stock.dnBookedQuantity == 11
+            assert stock.quantity == 61  # dnBookedQuantity + remainingQuantity
+
+        @override_features(WIP_BOOK_EXTERNAL_TICKETS_OUTSIDE_STOCK_LOCK=True)
+        def test_concurrent_reservations_are_not_counted_twice(self, requests_mock):
+            external_booking_url = "https://api.example.com/"
+            beneficiary = users_factories.BeneficiaryGrant18Factory()
+            provider = providers_factories.ProviderFactory(
+                bookingExternalUrl=external_booking_url,
+                cancelExternalUrl=external_booking_url,
+            )
+            stock = offers_factories.EventStockFactory(
+                offer__lastProvider=provider,
+                offer__withdrawalType=offers_models.WithdrawalTypeEnum.IN_APP,
+                idAtProviders="",
+                quantity=25,
+                dnBookedQuantity=12,
+            )
+            # Another booking, whose ticket is being booked.
+            db.session.add(models.StockQuantityReservation(stockId=stock.id, quantity=2))
+            db.session.commit()
+            requests_mock.post(
+                external_booking_url,
+                json={"tickets": [{"barcode": "12123932898127", "seat": "A12"}], "remainingQuantity": 50},
+                status_code=201,
+            )
+
+            api.book_offer(beneficiary, stock.id, quantity=1)
+
+            assert stock.dnBookedQuantity == 13
+            assert stock.quantity == 61  # dnBookedQuantity - other reservation + remainingQuantity
+            assert models.StockQuantityReservation.query.count() == 1
+
+        @override_features(WIP_BOOK_EXTERNAL_TICKETS_OUTSIDE_STOCK_LOCK=True)
+        def test_sold_out_failure_outside_stock_lock(self, requests_mock):
+            external_booking_url = "https://api.example.com/"
+            beneficiary = users_factories.BeneficiaryGrant18Factory()
+            provider = providers_factories.ProviderFactory(
+                bookingExternalUrl=external_booking_url,
+                cancelExternalUrl=external_booking_url,
+            )
+            stock = offers_factories.EventStockFactory(
+                offer__lastProvider=provider,
+                offer__withdrawalType=offers_models.WithdrawalTypeEnum.IN_APP,
+                idAtProviders="",
+                quantity=25,
+                dnBookedQuantity=10,
+            )
+            requests_mock.post(
+                external_booking_url,
+                json={"error": "sold_out", "remainingQuantity": 0},
+                status_code=409,
+            )
+
+            with pytest.raises(external_bookings_exceptions.ExternalBookingSoldOutError):
+                api.book_offer(beneficiary, stock.id, quantity=1)
+
+            assert not models.Booking.query.count()
+            assert stock.dnBookedQuantity == 10  # reserved quantity has been released
+            assert stock.quantity == 10
+
+        @patch("pcapi.core.bookings.api.external_bookings_api.book_cinema_ticket")
+        @override_features(ENABLE_CDS_IMPLEMENTATION=True, WIP_BOOK_EXTERNAL_TICKETS_OUTSIDE_STOCK_LOCK=True)
+        def test_release_reserved_quantity_if_user_booked_meanwhile(self, mocked_book_cinema_ticket):
+            beneficiary = users_factories.BeneficiaryGrant18Factory()
+            cds_provider = get_provider_by_local_class("CDSStocks")
+            venue_provider = providers_factories.VenueProviderFactory(provider=cds_provider)
+            cinema_provider_pivot = providers_factories.CinemaProviderPivotFactory(venue=venue_provider.venue)
+            offer = offers_factories.EventOfferFactory(
+                venue=venue_provider.venue,
+                subcategoryId=subcategories.SEANCE_CINE.id,
+                lastProviderId=cinema_provider_pivot.provider.id,
+            )
+            stock = offers_factories.EventStockFactory(offer=offer, idAtProviders="1111%4444#111", dnBookedQuantity=3)
+
+            def book_meanwhile(**kwargs):
+                # Another booking of the same offer by the same user,
+                # while the stock and the user are not locked.
+                bookings_factories.BookingFactory(user=beneficiary, stock__offer=offer)
+                return [Ticket(barcode="testbarcode", seat_number="A_1")]
+
+            mocked_book_cinema_ticket.side_effect = book_meanwhile
+
+            with pytest.raises(exceptions.OfferIsAlreadyBooked):
+                api.book_offer(beneficiary=beneficiary, stock_id=stock.id, quantity=1)
+
+            assert models.Booking.query.filter_by(stockId=stock.id).count() == 0
+            assert stock.dnBookedQuantity == 3
+            assert models.StockQuantityReservation.query.count() == 0
+
         @override_features(DISABLE_CDS_EXTERNAL_BOOKINGS=True)
         def test_should_raise_error_when_cds_external_bookings_are_disabled(self):
             beneficiary = users_factories.BeneficiaryGrant18Factory()
@@ -1872,7 +1988,7 @@ class AutoMarkAsUsedAfterEventTest:
         educational_factories.CollectiveBookingFactory(collectiveStock__beginningDatetime=event_date)
         educational_factories.CollectiveBookingFactory(collectiveStock__beginningDatetime=event_date)
 
-        queries = 1  # select feature flag
+        queries = 2  # select feature flags
         queries += 1  # select individual bookings
         # fmt: off
         queries += 2 * (
@@ -1986,6 +2102,86 @@ class AutoMarkAsUsedAfterEventTest:
         with pytest.raises(ValueError):
             api.auto_mark_as_used_after_event()
 
+    @override_features(WIP_CHUNKED_AUTO_MARK_AS_USED=True)
+    @mock.patch("pcapi.core.bookings.constants.AUTO_USE_AFTER_EVENT_CHUNK_SIZE", 1)
+    def test_chunked_individual_bookings(self):
+        event_date = datetime.utcnow() - timedelta(days=3)
+        with_pricing_point = bookings_factories.BookingFactory(
+            stock__beginningDatetime=event_date, stock__offer__venue__pricing_point="self"
+        )
+        without_pricing_point = bookings_factories.BookingFactory(stock__beginningDatetime=event_date)
+        not_yet = bookings_factories.BookingFactory(stock__beginningDatetime=datetime.utcnow() - timedelta(days=1))
+        cancelled = bookings_factories.CancelledBookingFactory(stock__beginningDatetime=event_date)
+
+        api.auto_mark_as_used_after_event()
+
+        db.session.expire_all()
+        assert with_pricing_point.status is BookingStatus.USED
+        assert with_pricing_point.validationAuthorType == models.BookingValidationAuthorType.AUTO
+        assert without_pricing_point.status is BookingStatus.USED
+        assert with_pricing_point.dateUsed == without_pricing_point.dateUsed != None
+        assert not_yet.status is BookingStatus.CONFIRMED
+        assert cancelled.status is BookingStatus.CANCELLED
+
+        ready_event = finance_models.FinanceEvent.query.filter_by(booking=with_pricing_point).one()
+        assert ready_event.motive == finance_models.FinanceEventMotive.BOOKING_USED
+        assert ready_event.status == finance_models.FinanceEventStatus.READY
+        assert ready_event.valueDate == with_pricing_point.dateUsed
+        assert ready_event.venueId == with_pricing_point.venueId
+        assert ready_event.pricingPointId == with_pricing_point.venueId
+        assert ready_event.pricingOrderingDate == finance_api.get_pricing_ordering_date(with_pricing_point)
+        pending_event = finance_models.FinanceEvent.query.filter_by(booking=without_pricing_point).one()
+        assert pending_event.status == finance_models.FinanceEventStatus.PENDING
+        assert pending_event.pricingPointId is None
+        assert pending_event.pricingOrderingDate is None
+        assert finance_models.FinanceEvent.query.count() == 2
+
+    @override_features(WIP_CHUNKED_AUTO_MARK_AS_USED=True)
+    @mock.patch("pcapi.core.bookings.constants.AUTO_USE_AFTER_EVENT_CHUNK_SIZE", 1)
+    def test_chunked_collective_bookings(self, caplog):
+        event_date = datetime.utcnow() - timedelta(days=3)
+        booking = educational_factories.CollectiveBookingFactory(
+            collectiveStock__endDatetime=event_date, collectiveStock__collectiveOffer__venue__pricing_point="self"
+        )
+        other_booking = educational_factories.CollectiveBookingFactory(collectiveStock__endDatetime=event_date)
+
+        with caplog.at_level(logging.INFO):
+            api.auto_mark_as_used_after_event()
+
+        db.session.expire_all()
+        assert booking.status is CollectiveBookingStatus.USED
+        assert other_booking.status is CollectiveBookingStatus.USED
+        event = finance_models.FinanceEvent.query.filter_by(collectiveBooking=booking).one()
+        assert event.status == finance_models.FinanceEventStatus.READY
+        assert event.pricingPointId == booking.venueId
+        assert event.pricingOrderingDate == finance_api.get_pricing_ordering_date(booking)
+        other_event = finance_models.FinanceEvent.query.filter_by(collectiveBooking=other_booking).one()
+        assert other_event.status == finance_models.FinanceEventStatus.PENDING
+        data_logs = [record for record in caplog.records if record.message == "BookingUsed"]
+        assert {record.extra["bookingId"] for record in data_logs} == {booking.id, other_booking.id}
+        summary = [record for record in caplog.records if record.message.startswith("Automatically marked")]
+        assert summary[0].extra["collectiveBookingsUpdatedCount"] == 2
+
+    @override_features(WIP_CHUNKED_AUTO_MARK_AS_USED=True)
+    def test_chunked_num_queries(self):
+        event_date = datetime.utcnow() - timedelta(days=3)
+        bookings_factories.BookingFactory.create_batch(3, stock__beginningDatetime=event_date)
+        educational_factories.CollectiveBookingFactory.create_batch(3, collectiveStock__endDatetime=event_date)
+
+        queries = 2  # select feature flags
+        # fmt: off
+        queries += 2 * (
+            1  # select ids of the chunk
+            + 1  # update the chunk
+            + 1  # fetch pricing points
+            + 1  # insert finance events
+            + 1  # select ids of the next (empty) chunk
+        )
+        # fmt: on
+
+        with assert_num_queries(queries):
+            api.auto_mark_as_used_after_event()
+
 
 @pytest.mark.usefixtures("db_session")
 class GetInvidualBookingsFromStockTest:
@@ -2104,6 +2300,27 @@ class ArchiveOldBookingsTest:
         assert old_booking.displayAsEnded
 
 
+@pytest.mark.usefixtures("db_session")
+class ReleaseStaleStockQuantityReservationsTest:
+    def test_release_stale_reservations(self):
+        stock = offers_factories.EventStockFactory(dnBookedQuantity=5)
+        db.session.add_all(
+            [
+                models.StockQuantityReservation(
+                    stockId=stock.id, quantity=2, dateCreated=datetime.utcnow() - timedelta(hours=1)
+                ),
+                models.StockQuantityReservation(stockId=stock.id, quantity=1),
+            ]
+        )
+        db.session.commit()
+
+        api.release_stale_stock_quantity_reservations()
+
+        assert stock.dnBookedQuantity == 3
+        [reservation] = models.StockQuantityReservation.query.all()
+        assert reservation.quantity == 1
+
+
 @pytest.mark.usefixtures("db_session")
 class PopBarcodesFromQueueAndCancelWastedExternalBookingTest:
     def test_should_not_pop_and_not_try_to_cancel_external_booking_if_minimum_age_not_reached(self, app):
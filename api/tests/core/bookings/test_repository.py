@@ -5431,6 +5431,61 @@ class GetExcelReportTest:
         assert sheet.cell(row=2, column=18).value == "Non"
 
 
+class StreamExportTest:
+    def _create_bookings(self):
+        pro = users_factories.ProFactory()
+        offerer = offerers_factories.OffererFactory()
+        offerers_factories.UserOffererFactory(user=pro, offerer=offerer)
+        event_date = datetime.utcnow() + timedelta(days=5)
+        offer = offers_factories.EventOfferFactory(venue__managingOfferer=offerer)
+        overseas_offer = offers_factories.EventOfferFactory(
+            venue__managingOfferer=offerer, venue__postalCode="97300", venue__departementCode="973"
+        )
+        for stock_offer in (offer, overseas_offer):
+            stock = offers_factories.EventStockFactory(offer=stock_offer, beginningDatetime=event_date)
+            bookings_factories.BookingFactory(stock=stock)
+            bookings_factories.UsedBookingFactory(stock=stock, quantity=2)
+        return pro, offer
+
+    def _get_excel_values(self, content: bytes) -> list[tuple]:
+        return list(openpyxl.load_workbook(BytesIO(content)).active.values)
+
+    def test_stream_export_csv(self):
+        pro, _ = self._create_bookings()
+
+        chunks = booking_repository.stream_export(user=pro, status_filter=BookingStatusFilter.BOOKED)
+
+        expected = booking_repository.get_export(user=pro, status_filter=BookingStatusFilter.BOOKED)
+        assert b"".join(chunks) == expected.encode("utf-8-sig")
+
+    def test_stream_export_excel(self):
+        pro, _ = self._create_bookings()
+
+        chunks = booking_repository.stream_export(
+            user=pro, status_filter=BookingStatusFilter.BOOKED, export_type=BookingExportType.EXCEL
+        )
+
+        expected = booking_repository.get_export(
+            user=pro, status_filter=BookingStatusFilter.BOOKED, export_type=BookingExportType.EXCEL
+        )
+        assert self._get_excel_values(b"".join(chunks)) == self._get_excel_values(expected)
+
+    @pytest.mark.parametrize("export_type", [BookingExportType.CSV, BookingExportType.EXCEL])
+    def test_stream_bookings_by_offer_id(self, export_type):
+        _, offer = self._create_bookings()
+        event_date = offer.stocks[0].beginningDatetime.date()
+
+        streamed = b"".join(
+            booking_repository.stream_bookings_by_offer_id(offer.id, event_date, export_type, validated_only=True)
+        )
+
+        expected = booking_repository.export_validated_bookings_by_offer_id(offer.id, event_date, export_type)
+        if export_type == BookingExportType.CSV:
+            assert streamed == expected.encode("utf-8-sig")
+        else:
+            assert self._get_excel_values(streamed) == self._get_excel_values(expected)
+
+
 class FindSoonToBeExpiredBookingsTest:
     def test_should_return_only_soon_to_be_expired_individual_bookings(self, app: fixture):
 
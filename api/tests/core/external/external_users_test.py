@@ -1,5 +1,6 @@
 from datetime import datetime
 from decimal import Decimal
+from unittest import mock
 
 from dateutil.relativedelta import relativedelta
 import pytest
@@ -14,6 +15,7 @@ from pcapi.core.external.attributes.api import get_bookings_categories_and_subca
 from pcapi.core.external.attributes.api import get_most_favorite_subcategories
 from pcapi.core.external.attributes.api import get_user_attributes
 from pcapi.core.external.attributes.api import get_user_bookings
+from pcapi.core.external.attributes.api import get_users_attributes
 from pcapi.core.external.attributes.api import update_external_user
 from pcapi.core.external.attributes.models import BookingsAttributes
 from pcapi.core.external.attributes.models import UserAttributes
@@ -97,6 +99,53 @@ def test_email_should_not_be_blacklisted_in_sendinblue_by_default():
     assert sendinblue_testing.sendinblue_requests[0].get("emailBlacklisted") is False
 
 
+@override_features(WIP_DEFERRED_EXTERNAL_USER_ATTRIBUTES=True)
+def test_update_external_user_deferred():
+    user = BeneficiaryGrant18Factory(email="jeanne@example.com")
+    BookingFactory(user=user)
+
+    update_external_user(user)
+
+    assert len(batch_testing.requests) == 2
+    assert {request["user_id"] for request in batch_testing.requests} == {user.id}
+    assert len(sendinblue_testing.sendinblue_requests) == 1
+    assert sendinblue_testing.sendinblue_requests[0].get("email") == "jeanne@example.com"
+
+
+@override_features(WIP_DEFERRED_EXTERNAL_USER_ATTRIBUTES=True)
+@mock.patch("pcapi.tasks.external_user_tasks.update_external_user_attributes_task.delay")
+def test_update_external_user_deferred_is_coalesced(delay_mock):
+    user = BeneficiaryGrant18Factory()
+
+    with time_machine.travel("2024-03-01 10:00:00", tick=False):
+        update_external_user(user)
+    with time_machine.travel("2024-03-01 10:00:59", tick=False):
+        update_external_user(user)
+    with time_machine.travel("2024-03-01 10:01:00", tick=False):
+        update_external_user(user)
+
+    payloads = [call.kwargs["payload"] for call in delay_mock.call_args_list]
+    assert len(payloads) == 3
+    assert {payload.user_id for payload in payloads} == {user.id}
+    # Same payload, so same task, within the debounce window
+    assert payloads[0] == payloads[1]
+    assert payloads[1] != payloads[2]
+    assert len(batch_testing.requests) == 0
+    assert len(sendinblue_testing.sendinblue_requests) == 0
+
+
+@override_features(WIP_DEFERRED_EXTERNAL_USER_ATTRIBUTES=True)
+def test_update_external_user_with_cultural_survey_answers_is_not_deferred():
+    user = BeneficiaryGrant18Factory()
+
+    with mock.patch("pcapi.tasks.external_user_tasks.update_external_user_attributes_task.delay") as delay_mock:
+        update_external_user(user, cultural_survey_answers={"SORTIES": ["FESTIVAL"]})
+
+    delay_mock.assert_not_called()
+    assert len(batch_testing.requests) == 2
+    assert len(sendinblue_testing.sendinblue_requests) == 1
+
+
 @override_features(WIP_ENABLE_BREVO_PRO_SUBACCOUNT=False)
 def test_update_external_pro_user():
     user = ProFactory()
@@ -483,6 +532,21 @@ def test_get_user_attributes_not_beneficiary():
     )
 
 
+def test_get_users_attributes():
+    beneficiary = BeneficiaryGrant18Factory()
+    BookingFactory(user=beneficiary)
+    CancelledBookingFactory(user=beneficiary)
+    FavoriteFactory(user=beneficiary)
+    underage = UnderageBeneficiaryFactory()
+    BookingFactory(user=underage)
+    not_beneficiary = UserFactory()
+    pro = ProFactory()
+    users = [beneficiary, underage, not_beneficiary, pro]
+
+    expected = {user.id: get_user_attributes(user) for user in users}
+    assert get_users_attributes(users) == expected
+
+
 def test_get_bookings_categories_and_subcategories():
     user = BeneficiaryGrant18Factory()
     offer = OfferFactory(product=ProductFactory(id=list(TRACKED_PRODUCT_IDS.keys())[0]))
@@ -13,6 +13,7 @@ import pytest
 import pytz
 import time_machine
 
+from pcapi.core import object_storage
 from pcapi.core.bookings import api as bookings_api
 from pcapi.core.bookings import factories as bookings_factories
 from pcapi.core.bookings import models as bookings_models
@@ -41,6 +42,7 @@ from pcapi.core.testing import override_settings
 from pcapi.core.users import api as users_api
 from pcapi.core.users import factories as users_factories
 from pcapi.core.users import models as users_models
+from pcapi.domain import reimbursement
 from pcapi.models import db
 from pcapi.notifications.push import testing as push_testing
 from pcapi.routes.backoffice.finance import validation
@@ -1057,7 +1059,7 @@ class PriceEventsTest:
         assert event1.status == models.FinanceEventStatus.PRICED
         assert event2.status == models.FinanceEventStatus.PRICED
 
-    @mock.patch("pcapi.core.finance.api.price_event", lambda booking: None)
+    @mock.patch("pcapi.core.finance.api.price_event", lambda event, rule_finder: None)
     def test_num_queries(self):
         factories.UsedBookingFinanceEventFactory(
             booking__dateUsed=self.few_minutes_ago,
@@ -1071,9 +1073,168 @@ class PriceEventsTest:
         n_queries = 0
         n_queries += 1  # count of events to price
         n_queries += 1  # select events
+        n_queries += 1  # select custom reimbursement rules (once)
         with assert_num_queries(n_queries):
             api.price_events(min_date=self.few_minutes_ago)
 
+    def test_by_pricing_point(self):
+        venue = offerers_factories.VenueFactory(pricing_point="self")
+        event1 = factories.UsedBookingFinanceEventFactory(
+            booking__dateUsed=self.few_minutes_ago - datetime.timedelta(seconds=2),
+            booking__stock__price=19_999,
+            booking__stock__offer__venue=venue,
+        )
+        event2 = factories.UsedBookingFinanceEventFactory(
+            booking__dateUsed=self.few_minutes_ago - datetime.timedelta(seconds=1),
+            booking__stock__price=100,
+            booking__stock__offer__venue=venue,
+        )
+        other_event = factories.UsedBookingFinanceEventFactory(
+            booking__dateUsed=self.few_minutes_ago,
+            booking__stock__offer__venue__pricing_point="self",
+        )
+
+        api.price_events(min_date=self.few_minutes_ago - datetime.timedelta(minutes=1), by_pricing_point=True)
+
+        pricing1 = models.Pricing.query.filter_by(event=event1).one()
+        assert pricing1.revenue == 19_999 * 100
+        assert pricing1.amount == -(19_999 * 100)
+        pricing2 = models.Pricing.query.filter_by(event=event2).one()
+        assert pricing2.revenue == pricing1.revenue + 100 * 100
+        assert pricing2.amount == -(95 * 100)
+        assert pricing2.standardRule == "Remboursement à 95% entre 20 000 € et 40 000 € par lieu (>= 2021-09-01)"
+        assert len(pricing2.lines) == 2
+        assert len(other_event.pricings) == 1
+        statuses = {event.status for event in models.FinanceEvent.query.all()}
+        assert statuses == {models.FinanceEventStatus.PRICED}
+
+    def test_by_pricing_point_with_small_batches(self):
+        venue = offerers_factories.VenueFactory(pricing_point="self")
+        events = [
+            factories.UsedBookingFinanceEventFactory(
+                booking__dateUsed=self.few_minutes_ago - datetime.timedelta(seconds=i),
+                booking__stock__price=10_000,
+                booking__stock__offer__venue=venue,
+            )
+            for i in range(3, 0, -1)
+        ]
+
+        api.price_events(
+            min_date=self.few_minutes_ago - datetime.timedelta(minutes=1),
+            batch_size=2,
+            by_pricing_point=True,
+        )
+
+        revenues = [models.Pricing.query.filter_by(event=event).one().revenue for event in events]
+        assert revenues == [10_000 * 100, 20_000 * 100, 30_000 * 100]
+
+    def test_by_pricing_point_reprices_events_priced_too_early(self):
+        venue = offerers_factories.VenueFactory(pricing_point="self")
+        late_event = factories.UsedBookingFinanceEventFactory(
+            booking__dateUsed=self.few_minutes_ago,
+            booking__stock__price=100,
+            booking__stock__offer__venue=venue,
+        )
+        api.price_event(late_event)
+        early_event = factories.UsedBookingFinanceEventFactory(
+            booking__dateUsed=self.few_minutes_ago - datetime.timedelta(seconds=1),
+            booking__stock__price=19_999,
+            booking__stock__offer__venue=venue,
+        )
+
+        api.price_events(min_date=self.few_minutes_ago - datetime.timedelta(minutes=1), by_pricing_point=True)
+
+        early_pricing = models.Pricing.query.filter_by(event=early_event).one()
+        late_pricing = models.Pricing.query.filter_by(event=late_event).one()
+        assert early_pricing.revenue == 19_999 * 100
+        assert late_pricing.revenue == (19_999 + 100) * 100
+        assert late_pricing.amount == -(95 * 100)
+
+    @mock.patch("pcapi.core.finance.api._price_events_of_pricing_point", side_effect=ValueError())
+    def test_by_pricing_point_falls_back_to_one_by_one(self, _mocked_price_events_of_pricing_point):
+        event = factories.UsedBookingFinanceEventFactory(
+            booking__dateUsed=self.few_minutes_ago,
+            booking__stock__offer__venue__pricing_point="self",
+        )
+
+        api.price_events(min_date=self.few_minutes_ago, by_pricing_point=True)
+
+        assert len(event.pricings) == 1
+        assert event.status == models.FinanceEventStatus.PRICED
+
+
+class PricingPointRevenueTest:
+    few_minutes_ago = datetime.datetime.utcnow() - datetime.timedelta(minutes=5)
+
+    def _get_stored_revenue(self, pricing_point):
+        return (
+            db.session.query(models.PricingPointYearlyRevenue.revenue)
+            .filter_by(pricingPointId=pricing_point.id)
+            .scalar()
+        )
+
+    def test_updated_when_pricing_and_cancelling(self):
+        venue = offerers_factories.VenueFactory(pricing_point="self")
+        event1 = factories.UsedBookingFinanceEventFactory(
+            booking__dateUsed=self.few_minutes_ago - datetime.timedelta(seconds=1),
+            booking__stock__price=10,
+            booking__stock__offer__venue=venue,
+        )
+        event2 = factories.UsedBookingFinanceEventFactory(
+            booking__dateUsed=self.few_minutes_ago,
+            booking__stock__price=20,
+            booking__stock__offer__venue=venue,
+        )
+
+        api.price_event(event1)
+        assert self._get_stored_revenue(venue) == 10 * 100
+        api.price_event(event2)
+        assert self._get_stored_revenue(venue) == 30 * 100
+
+        api.cancel_latest_event(event2.booking)
+        assert self._get_stored_revenue(venue) == 10 * 100
+
+    def test_updated_when_deleting_dependent_pricings(self):
+        venue = offerers_factories.VenueFactory(pricing_point="self")
+        late_event = factories.UsedBookingFinanceEventFactory(
+            booking__dateUsed=self.few_minutes_ago,
+            booking__stock__price=20,
+            booking__stock__offer__venue=venue,
+        )
+        api.price_event(late_event)
+        early_event = factories.UsedBookingFinanceEventFactory(
+            booking__dateUsed=self.few_minutes_ago - datetime.timedelta(seconds=1),
+            booking__stock__price=10,
+            booking__stock__offer__venue=venue,
+        )
+
+        api.price_event(early_event)
+
+        # The pricing of `late_event` has been deleted.
+        assert self._get_stored_revenue(venue) == 10 * 100
+        assert late_event.status == models.FinanceEventStatus.READY
+
+    def test_check_and_fix_drift(self):
+        venue = offerers_factories.VenueFactory(pricing_point="self")
+        event = factories.UsedBookingFinanceEventFactory(
+            booking__dateUsed=self.few_minutes_ago,
+            booking__stock__price=10,
+            booking__stock__offer__venue=venue,
+        )
+        api.price_event(event)
+        year = api._get_revenue_year(event.valueDate)
+        assert api.check_pricing_point_revenues(year) == []
+
+        models.PricingPointYearlyRevenue.query.update({"revenue": 1})
+        drifts = api.check_pricing_point_revenues(year)
+        assert drifts == [
+            {"pricing_point": venue.id, "year": year, "stored_revenue": 1, "computed_revenue": 10 * 100},
+        ]
+        assert self._get_stored_revenue(venue) == 1
+
+        api.check_pricing_point_revenues(year, fix=True)
+        assert self._get_stored_revenue(venue) == 10 * 100
+
 
 class AddEventTest:
     def test_used(self):
@@ -1602,7 +1763,8 @@ def test_get_next_cashflow_batch_label():
 
 
 class GenerateCashflowsTest:
-    def test_basics(self):
+    @pytest.mark.parametrize("by_chunks", [False, True])
+    def test_basics(self, by_chunks):
         now = datetime.datetime.utcnow()
         offerer1 = offerers_factories.OffererFactory(name="Association de coiffeurs1", siren="853318459")
         offerer2 = offerers_factories.OffererFactory(name="Association de coiffeurs2", siren="853318458")
@@ -1658,7 +1820,7 @@ class GenerateCashflowsTest:
             booking__stock__offer__venue=venue1,
         )
 
-        batch = api.generate_cashflows(cutoff)
+        batch = api.generate_cashflows(cutoff, by_chunks=by_chunks)
 
         queried_batch = models.CashflowBatch.query.one()
         assert queried_batch.id == batch.id
@@ -1692,6 +1854,7 @@ class GenerateCashflowsTest:
         assert not pricing_after_cutoff.cashflows
         assert not pricing_after_cutoff.logs
 
+    @pytest.mark.parametrize("by_chunks", [False, True])
     @pytest.mark.parametrize(
         "booking_pricing,incident_booking_amount",
         [
@@ -1700,7 +1863,7 @@ class GenerateCashflowsTest:
             (-1000, 20),
         ],
     )
-    def test_basics_with_incident(self, booking_pricing, incident_booking_amount):
+    def test_basics_with_incident(self, booking_pricing, incident_booking_amount, by_chunks):
         venue = offerers_factories.VenueFactory(pricing_point="self")
         venue_bank_account_link = offerers_factories.VenueBankAccountLinkFactory(venue=venue)
         bank_account = venue_bank_account_link.bankAccount
@@ -1742,7 +1905,7 @@ class GenerateCashflowsTest:
 
         # Generating Cashflow
         cutoff = datetime.datetime.utcnow()
-        batch = api.generate_cashflows(cutoff)
+        batch = api.generate_cashflows(cutoff, by_chunks=by_chunks)
 
         queried_batch = models.CashflowBatch.query.one()
 
@@ -1773,7 +1936,8 @@ class GenerateCashflowsTest:
         assert queried_batch.id == batch.id
         assert queried_batch.cutoff == cutoff
 
-    def test_no_cashflow_if_no_accepted_bank_account(self):
+    @pytest.mark.parametrize("by_chunks", [False, True])
+    def test_no_cashflow_if_no_accepted_bank_account(self, by_chunks):
         offerer = offerers_factories.OffererFactory(name="Nom de la structure")
         bank_account_ok = factories.BankAccountFactory(offerer=offerer)
         venue_ok = offerers_factories.VenueFactory(bank_account=bank_account_ok, managingOfferer=offerer)
@@ -1802,12 +1966,13 @@ class GenerateCashflowsTest:
         )
 
         cutoff = datetime.datetime.utcnow()
-        api.generate_cashflows(cutoff)
+        api.generate_cashflows(cutoff, by_chunks=by_chunks)
 
         cashflow = models.Cashflow.query.one()
         assert cashflow.bankAccount == venue_ok.current_bank_account_link.bankAccount
 
-    def test_cashflow_for_zero_total(self):
+    @pytest.mark.parametrize("by_chunks", [False, True])
+    def test_cashflow_for_zero_total(self, by_chunks):
         venue = offerers_factories.VenueFactory()
         venue_bank_account_link = offerers_factories.VenueBankAccountLinkFactory(venue=venue)
         bank_account = venue_bank_account_link.bankAccount
@@ -1827,7 +1992,7 @@ class GenerateCashflowsTest:
             amount=0,
         )
         cutoff = datetime.datetime.utcnow()
-        api.generate_cashflows(cutoff)
+        api.generate_cashflows(cutoff, by_chunks=by_chunks)
         cashflows = models.Cashflow.query.all()
         assert len(cashflows) == 1
         cashflow = cashflows[0]
@@ -1835,7 +2000,8 @@ class GenerateCashflowsTest:
         assert cashflow.status == models.CashflowStatus.PENDING
         assert cashflow.amount == 0
 
-    def test_check_pricing_integrity(self):
+    @pytest.mark.parametrize("by_chunks", [False, True])
+    def test_check_pricing_integrity(self, by_chunks):
         # Price an individual and a collective booking.
         venue1 = offerers_factories.VenueFactory(pricing_point="self")
         offerers_factories.VenueBankAccountLinkFactory(venue=venue1)
@@ -1859,10 +2025,59 @@ class GenerateCashflowsTest:
         finance_event2.collectiveBooking.collectiveStock.price -= 1
         db.session.flush()
 
-        api.generate_cashflows(cutoff=datetime.datetime.utcnow())
+        api.generate_cashflows(cutoff=datetime.datetime.utcnow(), by_chunks=by_chunks)
 
         assert models.Cashflow.query.count() == 0  # not 2!
 
+    def test_simulate_cashflows(self):
+        venue1 = offerers_factories.VenueFactory(pricing_point="self")
+        bank_account1 = offerers_factories.VenueBankAccountLinkFactory(venue=venue1).bankAccount
+        venue2 = offerers_factories.VenueFactory(pricing_point="self")
+        bank_account2 = offerers_factories.VenueBankAccountLinkFactory(venue=venue2).bankAccount
+        pricings = [
+            factories.PricingFactory(
+                status=models.PricingStatus.VALIDATED, booking__stock__offer__venue=venue1, amount=-1000
+            ),
+            factories.PricingFactory(
+                status=models.PricingStatus.VALIDATED, booking__stock__offer__venue=venue1, amount=-500
+            ),
+            factories.PricingFactory(
+                status=models.PricingStatus.VALIDATED, booking__stock__offer__venue=venue2, amount=-3000
+            ),
+        ]
+
+        totals = api.simulate_cashflows(datetime.datetime.utcnow())
+
+        assert totals == {bank_account1.id: -1500, bank_account2.id: -3000}
+        assert models.CashflowBatch.query.count() == 0
+        assert models.Cashflow.query.count() == 0
+        assert {pricing.status for pricing in pricings} == {models.PricingStatus.VALIDATED}
+        assert models.PricingLog.query.count() == 0
+
+    def test_by_chunks_with_several_chunks(self):
+        pricings = []
+        for _ in range(3):
+            venue = offerers_factories.VenueFactory(pricing_point="self")
+            offerers_factories.VenueBankAccountLinkFactory(venue=venue)
+            pricings.append(
+                factories.PricingFactory(
+                    status=models.PricingStatus.VALIDATED, booking__stock__offer__venue=venue, amount=-1000
+                )
+            )
+        batch = models.CashflowBatch(cutoff=datetime.datetime.utcnow(), label="1")
+        db.session.add(batch)
+        db.session.commit()
+
+        totals = api._generate_cashflows_by_chunks(batch, chunk_size=2)
+
+        assert len(totals) == 3
+        assert models.Cashflow.query.count() == 3
+        for pricing in pricings:
+            assert pricing.status == models.PricingStatus.PROCESSED
+            assert len(pricing.cashflows) == 1
+            assert pricing.cashflows[0].amount == -1000
+            assert [log.reason for log in pricing.logs] == [models.PricingLogReason.GENERATE_CASHFLOW]
+
     def test_assert_num_queries(self):
         offerer = offerers_factories.OffererFactory(name="Nom de la structure")
         bank_account1, bank_account2 = factories.BankAccountFactory.create_batch(2, offerer=offerer)
@@ -1936,6 +2151,26 @@ def test_generate_payment_files(mocked_gdrive_create_file, clean_temp_files):
     }
 
 
+@pytest.mark.parametrize("compress", [False, True])
+def test_write_csv(clean_temp_files, caplog, compress):
+    rows = ((i, f"row {i}") for i in range(3))
+
+    with caplog.at_level(logging.INFO):
+        path = api._write_csv("test", ("id", "label"), rows, lambda row: (row[0] * 10, row[1]), compress=compress)
+
+    if compress:
+        with zipfile.ZipFile(path) as zfile:
+            [csv_name] = zfile.namelist()
+            content = zfile.read(csv_name).decode("utf-8")
+    else:
+        content = path.read_text(encoding="utf-8")
+    assert content == '"id","label"\r\n0,"row 0"\r\n10,"row 1"\r\n20,"row 2"\r\n'
+    record = [record for record in caplog.records if record.message == "Wrote finance CSV file"][0]
+    assert record.extra["rows"] == 3
+    assert record.extra["csv_bytes"] == len(content.encode("utf-8"))
+    assert record.extra["file_bytes"] == path.stat().st_size
+
+
 def test_generate_bank_accounts_file(clean_temp_files):
     now = datetime.datetime.utcnow()
     offerer = offerers_factories.OffererFactory(name="Nom de la structure")
@@ -3106,6 +3341,52 @@ class GenerateInvoicesTest:
         assert invoiced_bookings == {booking1, booking2}
         assert {invoice.status for invoice in invoices} == {models.InvoiceStatus.PENDING}
 
+    def _make_batch_with_two_bank_accounts(self):
+        for _ in range(2):
+            stock = offers_factories.ThingStockFactory(offer__venue__pricing_point="self")
+            finance_event = factories.UsedBookingFinanceEventFactory(booking__stock=stock)
+            bank_account = factories.BankAccountFactory()
+            offerers_factories.VenueBankAccountLinkFactory(venue=finance_event.booking.venue, bankAccount=bank_account)
+            api.price_event(finance_event)
+        return api.generate_cashflows_and_payment_files(datetime.datetime.utcnow())
+
+    @pytest.mark.features(WIP_GENERATE_INVOICES_WITH_WORKER_POOLS=True)
+    @override_settings(FINANCE_INVOICE_PDF_WORKERS=2, FINANCE_INVOICE_UPLOAD_WORKERS=2)
+    @mock.patch("pcapi.core.finance.api._generate_invoice_html", return_value="<p>Trust me, I am an invoice.</p>")
+    @pytest.mark.usefixtures("clean_temp_files", "clear_tests_invoices_bucket")
+    def test_with_worker_pools(self, _mocked, app):
+        batch = self._make_batch_with_two_bank_accounts()
+
+        api.generate_invoices_and_debit_notes(batch)
+
+        invoices = models.Invoice.query.all()
+        assert len(invoices) == 2
+        for invoice in invoices:
+            [invoice_pdf] = object_storage.get_public_object("invoices", invoice.storage_object_id)
+            assert invoice_pdf.startswith(b"%PDF")
+        assert not app.redis_client.hgetall(conf.REDIS_INVOICES_WITHOUT_PDF.format(batch_id=batch.id))
+
+    @pytest.mark.features(WIP_GENERATE_INVOICES_WITH_WORKER_POOLS=True)
+    @override_settings(FINANCE_INVOICE_PDF_WORKERS=1, FINANCE_INVOICE_UPLOAD_WORKERS=1)
+    @mock.patch("pcapi.core.finance.api._generate_invoice_html", return_value="<p>Trust me, I am an invoice.</p>")
+    @pytest.mark.usefixtures("clean_temp_files", "clear_tests_invoices_bucket")
+    def test_with_worker_pools_resumes_invoices_without_pdf(self, _mocked, app):
+        batch = self._make_batch_with_two_bank_accounts()
+        with mock.patch("pcapi.core.finance.api._store_timed_invoice_pdf", side_effect=RuntimeError):
+            with pytest.raises(RuntimeError):
+                api.generate_invoices_and_debit_notes(batch)
+        redis_key = conf.REDIS_INVOICES_WITHOUT_PDF.format(batch_id=batch.id)
+        assert app.redis_client.hgetall(redis_key)
+
+        api.generate_invoices_and_debit_notes(batch)
+
+        invoices = models.Invoice.query.all()
+        assert len(invoices) == 2
+        for invoice in invoices:
+            [invoice_pdf] = object_storage.get_public_object("invoices", invoice.storage_object_id)
+            assert invoice_pdf.startswith(b"%PDF")
+        assert not app.redis_client.hgetall(redis_key)
+
     @mock.patch("pcapi.core.finance.api._generate_invoice_html")
     @mock.patch("pcapi.core.finance.api._store_invoice_pdf")
     def test_invoice_cashflows_with_0_amount(self, _generate_invoice_html, _store_invoice_pdf):
@@ -3959,6 +4240,16 @@ class CreateOfferReimbursementRuleTest:
             datetime.datetime.today() + datetime.timedelta(days=2)
         ).strftime("%d/%m/%Y")
 
+    def test_reset_shared_rule_finder(self):
+        offer = offers_factories.OfferFactory()
+        finder = reimbursement.get_custom_rule_finder()
+        start = pytz.utc.localize(datetime.datetime.today() + datetime.timedelta(days=1))
+        rule = api.create_offer_reimbursement_rule(offer.id, amount=12.34, start_date=start)
+
+        new_finder = reimbursement.get_custom_rule_finder()
+        assert new_finder is not finder
+        assert [indexed_rule.rule_id for indexed_rule in new_finder.rules_by_offer[offer.id]] == [rule.id]
+
     def test_validation(self):
         # Validation is thoroughly verified in `test_validation.py`.
         # This is just an integration test.
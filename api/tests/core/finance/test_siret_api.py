@@ -1,6 +1,7 @@
 import pytest
 
 import pcapi.core.bookings.factories as bookings_factories
+from pcapi.core.finance import api as finance_api
 from pcapi.core.finance import factories
 from pcapi.core.finance import models
 from pcapi.core.finance import siret_api
@@ -90,6 +91,32 @@ class DeleteSiretTest:
         assert actions[1].venueId == dependent_venue.id
         assert actions[1].extraData["modified_info"]["pricingPointSiret"] == {"old_info": old_siret, "new_info": None}
 
+    @pytest.mark.usefixtures("clean_database")
+    def test_reset_stored_revenue_of_deleted_pricings(self):
+        venue = offerers_factories.VenueFactory(pricing_point="self")
+        finance_event = factories.FinanceEventFactory(venue=venue)
+        pricing = factories.PricingFactory(
+            booking=finance_event.booking,
+            pricingPoint=venue,
+            status=models.PricingStatus.VALIDATED,
+            event=finance_event,
+        )
+        year = finance_api._get_revenue_year(pricing.valueDate)
+        db.session.add_all(
+            [
+                models.PricingPointYearlyRevenue(pricingPointId=venue.id, year=year, revenue=1000),
+                models.PricingPointYearlyRevenue(pricingPointId=venue.id, year=year - 1, revenue=2000),
+            ]
+        )
+        db.session.commit()
+
+        siret_api.remove_siret(venue, comment="no SIRET because reasons", apply_changes=True)
+
+        stored_revenues = models.PricingPointYearlyRevenue.query.with_entities(
+            models.PricingPointYearlyRevenue.year, models.PricingPointYearlyRevenue.revenue
+        ).all()
+        assert stored_revenues == [(year - 1, 2000)]
+
     @pytest.mark.usefixtures("clean_database")
     def test_dry_run(self):
         venue = offerers_factories.VenueFactory(pricing_point="self")
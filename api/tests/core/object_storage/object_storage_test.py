@@ -4,11 +4,13 @@ from unittest.mock import patch
 from google.cloud.exceptions import NotFound
 import pytest
 
+from pcapi.core import object_storage
 from pcapi.core.object_storage import BACKENDS_MAPPING
 from pcapi.core.object_storage import _check_backend_setting
 from pcapi.core.object_storage import _check_backends_module_paths
 from pcapi.core.object_storage import delete_public_object
 from pcapi.core.object_storage import store_public_object
+from pcapi.core.object_storage.backends.gcp import GCPBackend
 import pcapi.core.offerers.factories as offerers_factories
 import pcapi.core.offers.factories as offers_factories
 from pcapi.core.testing import override_settings
@@ -36,6 +38,62 @@ class StorePublicObjectTest:
         mock_gcp_store_public_object.assert_called_once_with("folder", "object_id", b"mouette", "image/jpeg")
 
 
+class StorePublicObjectsTest:
+    @override_settings(OBJECT_STORAGE_PROVIDER="local", OBJECT_STORAGE_UPLOAD_WORKERS=2)
+    def test_local_backend(self, clear_tests_assets_bucket):
+        stats_before = object_storage.get_upload_stats()
+        objects = [
+            object_storage.PublicObject("folder", f"object_{i}", f"blob {i}".encode(), "text/plain") for i in range(5)
+        ]
+
+        object_storage.store_public_objects(objects, bucket="bucket")
+
+        for i in range(5):
+            assert object_storage.get_public_object("folder", f"object_{i}", bucket="bucket") == [f"blob {i}".encode()]
+        stats = object_storage.get_upload_stats()
+        assert stats["uploads"] == stats_before["uploads"] + 5
+        assert stats["bytes"] == stats_before["bytes"] + 30
+
+    @override_settings(OBJECT_STORAGE_PROVIDER="local")
+    @patch(
+        "pcapi.core.object_storage.backends.local.LocalBackend.store_public_object",
+        side_effect=[None, OSError("disk full"), None],
+    )
+    def test_raise_error_once_all_uploads_are_done(self, mock_local_store_public_object):
+        stats_before = object_storage.get_upload_stats()
+        objects = [object_storage.PublicObject("folder", f"object_{i}", b"blob", "text/plain") for i in range(3)]
+
+        with pytest.raises(OSError):
+            object_storage.store_public_objects(objects)
+
+        assert mock_local_store_public_object.call_count == 3
+        stats = object_storage.get_upload_stats()
+        assert stats["uploads"] == stats_before["uploads"] + 2
+        assert stats["errors"] == stats_before["errors"] + 1
+
+
+class GetBackendTest:
+    def test_reuse_backend_instances(self):
+        object_storage.reset_backends()
+        backend_path = BACKENDS_MAPPING[object_storage.LOCAL_FILE_STORAGE]
+
+        backend = object_storage._get_backend(backend_path, "bucket")
+
+        assert object_storage._get_backend(backend_path, "bucket") is backend
+        assert object_storage._get_backend(backend_path, "other_bucket") is not backend
+
+    @patch("pcapi.core.object_storage.backends.gcp.Client")
+    @patch("pcapi.core.object_storage.backends.gcp.Credentials")
+    def test_reuse_gcp_client(self, mocked_credentials, mocked_client):
+        backend = GCPBackend(bucket_name="bucket")
+
+        client = backend.get_gcp_storage_client()
+
+        assert backend.get_gcp_storage_client() is client
+        mocked_credentials.from_service_account_info.assert_called_once()
+        mocked_client.assert_called_once()
+
+
 class CheckBackendSettingTest:
     @override_settings(OBJECT_STORAGE_PROVIDER="")
     def test_empty_setting(self):
@@ -12,6 +12,7 @@ from unittest import mock
 from unittest.mock import patch
 
 import pytest
+import redis
 import time_machine
 
 from pcapi import settings
@@ -25,6 +26,7 @@ import pcapi.core.criteria.models as criteria_models
 import pcapi.core.educational.factories as educational_factories
 import pcapi.core.educational.models as educational_models
 from pcapi.core.external_bookings.boost import constants as boost_constants
+import pcapi.core.finance.api as finance_api
 import pcapi.core.finance.factories as finance_factories
 import pcapi.core.finance.models as finance_models
 import pcapi.core.mails.testing as mails_testing
@@ -36,6 +38,7 @@ from pcapi.core.offers import factories
 from pcapi.core.offers import models
 from pcapi.core.offers import repository as offers_repository
 from pcapi.core.offers import schemas as offers_schemas
+from pcapi.core.offers import validation_rules
 from pcapi.core.offers.exceptions import NotUpdateProductOrOffers
 from pcapi.core.offers.exceptions import ProductNotFound
 from pcapi.core.providers.allocine import get_allocine_products_provider
@@ -2865,6 +2868,85 @@ class ResolveOfferValidationRuleTest:
         assert models.ValidationRuleOfferLink.query.count() == 0
 
 
+@pytest.mark.usefixtures("db_session")
+class SetOffersStatusBasedOnFraudCriteriaTest:
+    def test_batch(self, offer_matching_one_validation_rule):
+        offer_to_approve = factories.OfferFactory(name="Un livre")
+        whitelisted_offer = factories.OfferFactory(name="REJECTED")
+        offerers_factories.WhitelistedVenueConfidenceRuleFactory(venue=whitelisted_offer.venue)
+        collective_offer = educational_factories.CollectiveOfferFactory(name="REJECTED")
+        offers = [offer_matching_one_validation_rule, offer_to_approve, whitelisted_offer, collective_offer]
+
+        statuses = api.set_offers_status_based_on_fraud_criteria(offers)
+
+        assert statuses == [
+            models.OfferValidationStatus.PENDING,
+            models.OfferValidationStatus.APPROVED,
+            models.OfferValidationStatus.APPROVED,
+            models.OfferValidationStatus.APPROVED,
+        ]
+        rule = models.OfferValidationRule.query.one()
+        assert offer_matching_one_validation_rule.flaggingValidationRules == [rule]
+        assert offer_to_approve.flaggingValidationRules == []
+        assert whitelisted_offer.flaggingValidationRules == []
+
+    def test_rules_are_loaded_once_per_batch(self, offer_matching_one_validation_rule):
+        offers = [offer_matching_one_validation_rule] + factories.OfferFactory.create_batch(
+            3, venue=offer_matching_one_validation_rule.venue, name="REJECTED"
+        )
+
+        with patch.object(validation_rules, "_load_rules", wraps=validation_rules._load_rules) as load_rules:
+            statuses = api.set_offers_status_based_on_fraud_criteria(offers)
+
+        load_rules.assert_called_once()
+
+        assert statuses == [models.OfferValidationStatus.PENDING] * 4
+        assert models.ValidationRuleOfferLink.query.count() == 4
+
+
+@pytest.mark.usefixtures("db_session")
+class OfferValidationRulesCacheTest:
+    @pytest.fixture(autouse=True)
+    def clear_cache(self):
+        validation_rules.invalidate_rules_cache()
+        yield
+        validation_rules.invalidate_rules_cache()
+
+    @override_settings(OFFER_VALIDATION_RULES_CACHE_TTL=60)
+    def test_rules_are_cached_until_version_is_bumped(self, offer_matching_one_validation_rule):
+        offer = factories.OfferFactory(name="Un livre")
+        rules = validation_rules.get_active_rules()
+        assert len(rules) == 1
+
+        factories.OfferValidationSubRuleFactory(
+            model=models.OfferValidationModel.OFFER,
+            attribute=models.OfferValidationAttribute.NAME,
+            operator=models.OfferValidationRuleOperator.CONTAINS,
+            comparated={"comparated": ["livre"]},
+        )
+        with assert_num_queries(0):
+            assert validation_rules.get_active_rules() is rules
+        assert api.set_offer_status_based_on_fraud_criteria(offer) == models.OfferValidationStatus.APPROVED
+
+        validation_rules.bump_rules_version()
+
+        assert len(validation_rules.get_active_rules()) == 2
+        assert api.set_offer_status_based_on_fraud_criteria(offer) == models.OfferValidationStatus.PENDING
+
+    def test_compiled_rule_ignores_unapplicable_model(self):
+        collective_offer = educational_factories.CollectiveOfferFactory(name="REJECTED")
+        sub_rule = factories.OfferValidationSubRuleFactory(
+            model=models.OfferValidationModel.OFFER,
+            attribute=models.OfferValidationAttribute.NAME,
+            operator=models.OfferValidationRuleOperator.CONTAINS,
+            comparated={"comparated": ["REJECTED"]},
+        )
+        rule = validation_rules.compile_rule(sub_rule.validationRule)
+
+        assert validation_rules.rule_flags_offer(rule, factories.OfferFactory(name="REJECTED"))
+        assert not validation_rules.rule_flags_offer(rule, collective_offer)
+
+
 @pytest.mark.usefixtures("db_session")
 class UnindexExpiredOffersTest:
     @time_machine.travel("2020-01-05 10:00:00")
@@ -3712,6 +3794,80 @@ class UpdateStockQuantityToMatchCinemaVenueProviderRemainingPlacesTest:
         assert offer.isActive
 
 
+@pytest.mark.usefixtures("db_session")
+class RequestCinemaStocksRefreshTest:
+    def _create_cds_offer(self):
+        cds_provider = providers_repository.get_provider_by_local_class("CDSStocks")
+        venue_provider = providers_factories.VenueProviderFactory(provider=cds_provider)
+        providers_factories.CinemaProviderPivotFactory(
+            venue=venue_provider.venue,
+            provider=venue_provider.provider,
+            idAtProvider=venue_provider.venueIdAtOfferProvider,
+        )
+        offer_id_at_provider = f"456%{venue_provider.venue.siret}%CDS"
+        offer = factories.EventOfferFactory(
+            venue=venue_provider.venue, idAtProvider=offer_id_at_provider, lastProviderId=cds_provider.id
+        )
+        stock = factories.EventStockFactory(offer=offer, quantity=10, idAtProviders=f"{offer_id_at_provider}#888")
+        return offer, stock
+
+    @override_features(ENABLE_CDS_IMPLEMENTATION=True)
+    @patch("pcapi.core.offers.api.external_bookings_api.get_shows_stock", return_value={"888": 0})
+    def test_concurrent_requests_are_coalesced(self, mocked_get_shows_stock, app):
+        offer, stock = self._create_cds_offer()
+
+        api.request_cinema_stocks_refresh(offer)
+        api.request_cinema_stocks_refresh(offer)
+
+        mocked_get_shows_stock.assert_called_once()
+        assert stock.remainingQuantity == 0
+        assert app.redis_client.zscore(api.REDIS_CINEMA_OFFER_VIEWS_NAME, offer.id) == 2
+
+    @patch("pcapi.core.offers.api.external_bookings_api.get_shows_stock")
+    def test_manual_offers_are_ignored(self, mocked_get_shows_stock, app):
+        offer = factories.EventOfferFactory()
+
+        api.request_cinema_stocks_refresh(offer)
+
+        mocked_get_shows_stock.assert_not_called()
+        assert app.redis_client.zcard(api.REDIS_CINEMA_OFFER_VIEWS_NAME) == 0
+
+    @override_features(ENABLE_CDS_IMPLEMENTATION=True)
+    @patch("pcapi.core.offers.api.external_bookings_api.get_shows_stock")
+    def test_redis_errors_are_logged(self, mocked_get_shows_stock, app, caplog):
+        offer, _ = self._create_cds_offer()
+
+        with patch.object(app.redis_client, "zincrby", side_effect=redis.exceptions.ConnectionError):
+            api.request_cinema_stocks_refresh(offer)
+
+        mocked_get_shows_stock.assert_not_called()
+        assert caplog.records[-1].message == "Could not request refresh of cinema stocks"
+
+    @override_settings(CINEMA_STOCKS_REFRESH_RATE_LIMIT=1)
+    @override_features(ENABLE_CDS_IMPLEMENTATION=True)
+    @patch("pcapi.core.offers.api.external_bookings_api.get_shows_stock", return_value={"888": 5})
+    def test_provider_is_rate_limited(self, mocked_get_shows_stock, app):
+        offer, _ = self._create_cds_offer()
+        other_offer, _ = self._create_cds_offer()
+
+        api.request_cinema_stocks_refresh(offer)
+        api.request_cinema_stocks_refresh(other_offer)
+
+        mocked_get_shows_stock.assert_called_once()
+
+    @override_features(ENABLE_CDS_IMPLEMENTATION=True)
+    @patch("pcapi.core.offers.api.external_bookings_api.get_shows_stock", return_value={"888": 0})
+    def test_refresh_hot_offers(self, mocked_get_shows_stock, app):
+        offer, stock = self._create_cds_offer()
+        app.redis_client.zincrby(api.REDIS_CINEMA_OFFER_VIEWS_NAME, 3, offer.id)
+
+        api.refresh_hot_cinema_offers_stocks()
+
+        mocked_get_shows_stock.assert_called_once()
+        assert stock.remainingQuantity == 0
+        assert app.redis_client.zcard(api.REDIS_CINEMA_OFFER_VIEWS_NAME) == 0
+
+
 @pytest.mark.usefixtures("db_session")
 class ApproveProductAndRejectedOffersTest:
     @mock.patch("pcapi.core.search.async_index_offer_ids")
@@ -4066,6 +4222,36 @@ class UpdateUsedStockPriceTest:
         assert later_event.status == finance_models.FinanceEventStatus.READY
         assert finance_models.Pricing.query.filter_by(id=later_pricing_id).count() == 0
 
+    def test_update_used_stock_price_should_reset_stored_revenue(self):
+        booking = bookings_factories.UsedBookingFactory(
+            stock__offer__subcategoryId=subcategories.CONFERENCE.id,
+            stock__offer__venue__pricing_point="self",
+            stock__price=decimal.Decimal("20"),
+            amount=decimal.Decimal("20"),
+        )
+        venue = booking.venue
+        event = finance_factories.UsedBookingFinanceEventFactory(booking=booking)
+        finance_api.price_event(event)
+        other_venue = offerers_factories.VenueFactory(pricing_point="self")
+        other_event = finance_factories.UsedBookingFinanceEventFactory(
+            booking__stock__offer__venue=other_venue,
+            booking__stock__price=decimal.Decimal("10"),
+        )
+        finance_api.price_event(other_event)
+
+        api.update_used_stock_price(booking.stock, 15)
+
+        # The stored revenue is computed again, with the new amount, when
+        # the event is priced again.
+        assert finance_models.PricingPointYearlyRevenue.query.filter_by(pricingPointId=venue.id).count() == 0
+        finance_api.price_event(event)
+        revenue = finance_models.PricingPointYearlyRevenue.query.filter_by(pricingPointId=venue.id).one().revenue
+        assert revenue == 15 * 100
+        other_revenue = (
+            finance_models.PricingPointYearlyRevenue.query.filter_by(pricingPointId=other_venue.id).one().revenue
+        )
+        assert other_revenue == 10 * 100
+
     def test_update_used_stock_price_should_update_confirmed_events(self):
         stock_to_edit = factories.StockFactory(
             offer__subcategoryId=subcategories.CONFERENCE.id,
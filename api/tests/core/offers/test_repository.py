@@ -43,8 +43,9 @@ class GetCappedOffersForFiltersTest:
 
         # 1 to get user
         # 1 to get user_offerer
+        # 1 to check feature flag
         # 1 to get offers
-        with assert_num_queries(3):
+        with assert_num_queries(4):
             offers = repository.get_capped_offers_for_filters(
                 user_id=user_offerer.user.id, user_is_admin=user_offerer.user.has_admin_role, offers_limit=50
             )
@@ -90,6 +91,72 @@ class GetCappedOffersForFiltersTest:
         # Then
         assert offers[0].id > offers[1].id
 
+    @pytest.mark.usefixtures("db_session")
+    @override_features(WIP_OFFERS_LIST_STOCKS_SUMMARY=True)
+    def test_paginate_with_keyset_cursor(self):
+        user_offerer = offerers_factories.UserOffererFactory()
+        offers = factories.OfferFactory.create_batch(3, venue__managingOfferer=user_offerer.offerer)
+        offer_ids = sorted((offer.id for offer in offers), reverse=True)
+
+        first_page = repository.get_capped_offers_for_filters(
+            user_id=user_offerer.user.id, user_is_admin=False, offers_limit=2
+        )
+        second_page = repository.get_capped_offers_for_filters(
+            user_id=user_offerer.user.id, user_is_admin=False, offers_limit=2, after_id=first_page[-1].id
+        )
+
+        assert [offer.id for offer in first_page] == offer_ids[:2]
+        assert [offer.id for offer in second_page] == offer_ids[2:]
+
+    @pytest.mark.usefixtures("db_session")
+    @override_features(WIP_OFFERS_LIST_STOCKS_SUMMARY=True)
+    def test_stocks_summary(self):
+        user_offerer = offerers_factories.UserOffererFactory()
+        now = datetime.datetime.utcnow()
+        event = factories.EventOfferFactory(venue__managingOfferer=user_offerer.offerer)
+        factories.EventStockFactory(offer=event, beginningDatetime=now + datetime.timedelta(days=1), quantity=10)
+        factories.EventStockFactory(
+            offer=event, beginningDatetime=now + datetime.timedelta(days=3), quantity=5, dnBookedQuantity=2
+        )
+        factories.EventStockFactory(offer=event, beginningDatetime=now + datetime.timedelta(days=5), isSoftDeleted=True)
+        sold_out_thing = factories.ThingOfferFactory(venue__managingOfferer=user_offerer.offerer)
+        factories.ThingStockFactory(offer=sold_out_thing, quantity=1, dnBookedQuantity=1)
+        unlimited_thing = factories.ThingOfferFactory(venue__managingOfferer=user_offerer.offerer)
+        factories.ThingStockFactory(offer=unlimited_thing, quantity=None)
+        expired_thing = factories.ThingOfferFactory(venue__managingOfferer=user_offerer.offerer)
+        factories.ThingStockFactory(offer=expired_thing, bookingLimitDatetime=now - datetime.timedelta(days=1))
+        offer_without_stock = factories.ThingOfferFactory(venue__managingOfferer=user_offerer.offerer)
+
+        offers = repository.get_capped_offers_for_filters(
+            user_id=user_offerer.user.id, user_is_admin=False, offers_limit=10
+        )
+        offers_by_id = {offer.id: offer for offer in offers}
+
+        # Stocks are not loaded, offer status comes from the summary
+        with assert_num_queries(0):
+            offer = offers_by_id[event.id]
+            assert offer.stocksCount == 2
+            assert offer.stocksFirstBeginningDatetime == now + datetime.timedelta(days=1)
+            assert offer.stocksLastBeginningDatetime == now + datetime.timedelta(days=3)
+            assert offer.stocksRemainingQuantity == 13
+            assert offer.status == offer_mixin.OfferStatus.ACTIVE
+
+            offer = offers_by_id[sold_out_thing.id]
+            assert offer.stocksRemainingQuantity == 0
+            assert offer.status == offer_mixin.OfferStatus.SOLD_OUT
+
+            offer = offers_by_id[unlimited_thing.id]
+            assert offer.stocksRemainingQuantity is None
+            assert offer.status == offer_mixin.OfferStatus.ACTIVE
+
+            offer = offers_by_id[expired_thing.id]
+            assert offer.status == offer_mixin.OfferStatus.EXPIRED
+
+            offer = offers_by_id[offer_without_stock.id]
+            assert offer.stocksCount == 0
+            assert offer.stocksFirstBeginningDatetime is None
+            assert offer.status == offer_mixin.OfferStatus.SOLD_OUT
+
     @pytest.mark.usefixtures("db_session")
     def should_include_draft_offers_when_requesting_all_offers(self, app):
         # given
@@ -2561,3 +2628,54 @@ class GetOfferPriceCategoriesFiltersTest:
 
         # Then
         assert len(price_categories.all()) == 0
+
+
+@pytest.mark.usefixtures("db_session")
+class UpsertOffersByIdAtProviderTest:
+    def test_insert_new_offers_and_return_existing_ones(self):
+        venue = offerers_factories.VenueFactory()
+        provider = providers_factories.ProviderFactory()
+        existing_offer = factories.ThingOfferFactory(venue=venue, idAtProvider="existing")
+        offers = [
+            models.Offer(
+                name=f"Offer {id_at_provider}",
+                subcategoryId=subcategories.LIVRE_PAPIER.id,
+                venueId=venue.id,
+                idAtProvider=id_at_provider,
+                lastProviderId=provider.id,
+            )
+            for id_at_provider in ("existing", "new")
+        ]
+        offers[1].isActive = False
+
+        with assert_num_queries(1):
+            offer_ids = repository.upsert_offers_by_id_at_provider(offers)
+
+        assert offer_ids.keys() == {"existing", "new"}
+        assert offer_ids["existing"] == existing_offer.id
+        db.session.expire_all()
+        assert existing_offer.lastProviderId == provider.id
+        new_offer = models.Offer.query.get(offer_ids["new"])
+        assert new_offer.venueId == venue.id
+        assert new_offer.isActive is False
+        assert new_offer.validation == offer_mixin.OfferValidationStatus.APPROVED
+
+
+@pytest.mark.usefixtures("db_session")
+class InsertStocksTest:
+    def test_insert_stocks_and_ignore_existing_ones(self):
+        offer = factories.ThingOfferFactory()
+        factories.ThingStockFactory(offer=offer, idAtProviders="existing")
+        stocks = [
+            models.Stock(offerId=offer.id, price=10, quantity=5, idAtProviders=id_at_providers)
+            for id_at_providers in ("existing", "new", None)
+        ]
+
+        with assert_num_queries(1):
+            inserted = repository.insert_stocks(stocks)
+
+        assert len(inserted) == 2
+        assert {offer_id for _, offer_id in inserted} == {offer.id}
+        db.session.expire_all()
+        assert models.Stock.query.filter_by(offerId=offer.id).count() == 3
+        assert models.Stock.query.filter_by(idAtProviders="new").one().quantity == 5
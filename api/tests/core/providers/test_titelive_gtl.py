@@ -1,6 +1,8 @@
 import pytest
 
 from pcapi.connectors.serialization.titelive_serializers import _format_gtl_code
+from pcapi.core.providers import titelive_gtl
+from pcapi.core.providers import titelive_utils
 from pcapi.core.providers.titelive_gtl import get_gtl
 
 
@@ -65,3 +67,21 @@ def test_get_gtl_not_found():
 )
 def test_format_gtl_code(input_, output):
     assert _format_gtl_code(input_) == output
+
+
+def test_gtls_are_loaded_lazily_from_data_file(tmp_path):
+    gtls = {
+        "01000000": get_gtl("01000000"),
+        "01030102": get_gtl("01030102"),
+    }
+    file_path = tmp_path / "titelive_gtl.tsv"
+    titelive_utils.write_gtls(gtls, file_path)
+
+    lazy_gtls = titelive_gtl._Gtls(file_path)
+    assert lazy_gtls._rows is None
+
+    assert dict(lazy_gtls) == gtls
+    assert "01030102" in lazy_gtls
+    assert lazy_gtls.get("03040202") is None
+    # level labels that are shared by several GTLs are stored once
+    assert lazy_gtls.rows["01000000"][1] is lazy_gtls.rows["01030102"][1]
@@ -1,5 +1,6 @@
 import datetime
 import itertools
+import logging
 from unittest import mock
 
 import pytest
@@ -322,6 +323,72 @@ class IndexOffersInQueueTest:
         assert app.redis_client.smembers(queue) <= set(str(id_) for id_ in items)
 
 
+@override_settings(REDIS_OFFER_IDS_CHUNK_SIZE=2, ALGOLIA_INDEXATION_SENDERS=2, ALGOLIA_INDEXATION_QUEUE_SIZE=1)
+class IndexOffersInQueuePipelinedTest:
+    def _get_processing_queues(self, app, queue):
+        return list(app.redis_client.scan_iter(f"{queue}:processing:*"))
+
+    def test_index_and_unindex_offers(self, app):
+        queue = algolia.REDIS_OFFER_IDS_NAME
+        bookable_offers = [make_bookable_offer() for _ in range(4)]
+        unbookable_offer = make_unbookable_offer()
+        search_testing.search_store["offers"][unbookable_offer.id] = "dummy"
+        app.redis_client.hset(algolia.REDIS_HASHMAP_INDEXED_OFFERS_NAME, unbookable_offer.id, "")
+        app.redis_client.sadd(queue, *(offer.id for offer in bookable_offers), unbookable_offer.id)
+
+        search.index_offers_in_queue(max_batches_to_process=None, pipelined=True)
+
+        assert set(search_testing.search_store["offers"]) == {offer.id for offer in bookable_offers}
+        assert app.redis_client.scard(queue) == 0
+        assert self._get_processing_queues(app, queue) == []
+        assert not app.redis_client.hexists(algolia.REDIS_HASHMAP_INDEXED_OFFERS_NAME, unbookable_offer.id)
+
+    def test_stop_when_limit_is_reached(self, app, caplog):
+        queue = algolia.REDIS_OFFER_IDS_NAME
+        offer_ids = [make_bookable_offer().id for _ in range(5)]
+        app.redis_client.sadd(queue, *offer_ids)
+
+        with caplog.at_level(logging.INFO):
+            search.index_offers_in_queue(max_batches_to_process=2, pipelined=True)
+
+        assert len(search_testing.search_store["offers"]) == 4
+        assert app.redis_client.scard(queue) == 1
+        assert self._get_processing_queues(app, queue) == []
+        record = caplog.records[-1]
+        assert record.message == "Reindexed offers from queue through pipeline"
+        assert record.extra["batches"] == 2
+        assert record.extra["stages"]["load"]["count"] == 4
+        assert record.extra["stages"]["serialize"]["count"] == 4
+        assert record.extra["stages"]["send"]["count"] == 4
+
+    @mock.patch("pcapi.core.search.backends.testing.FakeClient.save_objects", fail)
+    @override_settings(CATCH_INDEXATION_EXCEPTIONS=True)
+    def test_handle_indexation_error(self, app):
+        queue = algolia.REDIS_OFFER_IDS_NAME
+        offer_ids = [make_bookable_offer().id for _ in range(3)]
+        app.redis_client.sadd(queue, *offer_ids)
+
+        search.index_offers_in_queue(max_batches_to_process=None, pipelined=True)
+
+        assert search_testing.search_store["offers"] == {}
+        error_queue = algolia.REDIS_OFFER_IDS_IN_ERROR_NAME
+        assert app.redis_client.smembers(error_queue) == {str(offer_id) for offer_id in offer_ids}
+        assert self._get_processing_queues(app, queue) == []
+
+    @mock.patch("pcapi.core.search.backends.testing.FakeClient.save_objects", fail)
+    @override_settings(CATCH_INDEXATION_EXCEPTIONS=False)
+    def test_keep_processing_queue_on_unhandled_error(self, app):
+        queue = algolia.REDIS_OFFER_IDS_NAME
+        offer_id = make_bookable_offer().id
+        app.redis_client.sadd(queue, offer_id)
+
+        with pytest.raises(ValueError):
+            search.index_offers_in_queue(max_batches_to_process=None, pipelined=True)
+
+        [processing_queue] = self._get_processing_queues(app, queue)
+        assert app.redis_client.smembers(processing_queue) == {str(offer_id)}
+
+
 @override_features(ENABLE_VENUE_STRICT_SEARCH=True)
 def test_unindex_offer_ids(app):
     offer1 = make_bookable_offer()
@@ -150,6 +150,73 @@ def test_index_offers(app):
     assert backend.check_offer_is_indexed(offer)
 
 
+@pytest.mark.usefixtures("db_session")
+def test_index_offers_skip_unchanged(app):
+    backend = get_backend()
+    offer = offers_factories.StockFactory().offer
+    with requests_mock.Mocker() as mock:
+        posted = mock.post("https://dummy-app-id.algolia.net/1/indexes/offers/batch", json={})
+
+        backend.index_offers([offer], {offer.id: 0}, skip_unchanged=True)
+        assert posted.call_count == 1
+        assert posted.last_request.json()["requests"][0]["action"] == "updateObject"
+
+        # Unchanged: nothing is sent, even if `indexedAt` changed.
+        backend.index_offers([offer], {offer.id: 0}, skip_unchanged=True)
+        assert posted.call_count == 1
+
+        offer.name = "New name"
+        backend.index_offers([offer], {offer.id: 0}, skip_unchanged=True)
+        assert posted.call_count == 2
+        [request] = posted.last_request.json()["requests"]
+        assert request["action"] == "partialUpdateObjectNoCreate"
+        assert set(request["body"]) == {"objectID", "offer"}
+        assert request["body"]["offer"]["name"] == "New name"
+
+        # `indexedAt` is sent along with changed attributes.
+        offer.venue.publicName = "New venue name"
+        backend.index_offers([offer], {offer.id: 0}, skip_unchanged=True)
+        assert posted.call_count == 3
+        [request] = posted.last_request.json()["requests"]
+        assert request["action"] == "partialUpdateObjectNoCreate"
+        assert set(request["body"]) == {"objectID", "offer", "venue"}
+        assert request["body"]["offer"]["indexedAt"]
+
+        # Without `skip_unchanged`, the whole object is sent.
+        backend.index_offers([offer], {offer.id: 0})
+        assert posted.call_count == 4
+        assert posted.last_request.json()["requests"][0]["action"] == "updateObject"
+
+
+@pytest.mark.usefixtures("db_session")
+def test_index_offers_skip_unchanged_saves_offer_without_stored_hash(app):
+    backend = get_backend()
+    offer = offers_factories.StockFactory().offer
+    with requests_mock.Mocker() as mock:
+        posted = mock.post("https://dummy-app-id.algolia.net/1/indexes/offers/batch", json={})
+        backend.index_offers([offer], {offer.id: 0}, skip_unchanged=True)
+
+        app.redis_client.hdel(algolia.REDIS_HASHMAP_INDEXED_OFFERS_HASHES_NAME, str(offer.id))
+        offer.name = "New name"
+        backend.index_offers([offer], {offer.id: 0}, skip_unchanged=True)
+
+        assert posted.call_count == 2
+        [request] = posted.last_request.json()["requests"]
+        assert request["action"] == "updateObject"
+        assert request["body"]["offer"]["name"] == "New name"
+        assert request["body"]["venue"]
+    assert app.redis_client.hexists(algolia.REDIS_HASHMAP_INDEXED_OFFERS_HASHES_NAME, str(offer.id))
+
+
+def test_unindex_offer_ids_forgets_hashes(app):
+    backend = get_backend()
+    app.redis_client.hset(algolia.REDIS_HASHMAP_INDEXED_OFFERS_HASHES_NAME, "1", "dummy")
+    with requests_mock.Mocker() as mock:
+        mock.post("https://dummy-app-id.algolia.net/1/indexes/offers/batch", json={})
+        backend.unindex_offer_ids([1])
+    assert not app.redis_client.hexists(algolia.REDIS_HASHMAP_INDEXED_OFFERS_HASHES_NAME, "1")
+
+
 def test_unindex_offer_ids(app):
     backend = get_backend()
     app.redis_client.hset("indexed_offers", "1", "")
@@ -316,6 +383,17 @@ class IndexationLimitTest:
         backend.enqueue_offer_ids([1, 2, 3])
         assert backend.redis_client.smembers(algolia.REDIS_OFFER_IDS_NAME) == {"1", "2", "3"}
 
+    @override_settings(ALGOLIA_OFFERS_INDEX_MAX_SIZE=4, ALGOLIA_OFFERS_INDEX_SIZE_CACHE_TTL=60)
+    def should_count_enqueued_offers_while_size_is_cached(self):
+        backend = get_backend()
+        with mock.patch.object(algolia, "_offers_index_size_cache", algolia._OffersIndexSizeCache()):
+            backend.enqueue_offer_ids([1, 2, 3])
+            backend.enqueue_offer_ids([4])  # 3 offers are counted as enqueued, below the limit
+            backend.redis_client.delete(algolia.REDIS_OFFER_IDS_NAME)  # not seen, size is cached
+            backend.enqueue_offer_ids([5])
+
+        assert backend.redis_client.smembers(algolia.REDIS_OFFER_IDS_NAME) == set()
+
 
 class ProcessingQueueTest:
     class CustomError(Exception):  # an error that only our tests can raise
@@ -334,6 +412,20 @@ class ProcessingQueueTest:
         # processing queue has been deleted, too.
         assert redis.keys() == []
 
+    def test_pop_large_batch(self):
+        backend = get_backend()
+        redis = backend.redis_client
+        queue = algolia.REDIS_OFFER_IDS_NAME
+        redis.sadd(queue, *range(2500))
+
+        with backend.pop_offer_ids_from_queue(2200) as ids:
+            assert len(ids) == 2200
+            [processing_queue] = redis.keys(f"{queue}:processing:*")
+            assert redis.smembers(processing_queue) == {str(id_) for id_ in ids}
+            assert redis.scard(queue) == 300
+
+        assert redis.keys(f"{queue}:processing:*") == []
+
     @time_machine.travel(datetime.datetime.utcnow(), tick=False)
     def test_processing_queue_is_kept_upon_error(self):
         backend = get_backend()
@@ -462,6 +462,33 @@ class CustomRuleFinderTest:
         assert finder.get_rule(another_booking) is None  # no rule for this offer
 
 
+    def test_consecutive_rules(self):
+        yesterday = datetime.utcnow() - timedelta(days=1)
+        last_month = datetime.utcnow() - timedelta(days=30)
+        far_in_the_past = datetime.utcnow() - timedelta(days=800)
+        booking = bookings_factories.UsedBookingFactory(stock__offer__venue__pricing_point="self")
+        offerer = booking.offerer
+        last_month_booking = bookings_factories.UsedBookingFactory(
+            offerer=offerer,
+            stock__offer__venue=booking.venue,
+            dateUsed=last_month + timedelta(days=1),
+        )
+        ancient_booking = bookings_factories.UsedBookingFactory(
+            offerer=offerer,
+            stock__offer__venue=booking.venue,
+            dateUsed=far_in_the_past,
+        )
+        current_rule = finance_factories.CustomReimbursementRuleFactory(offerer=offerer, timespan=(yesterday, None))
+        previous_rule = finance_factories.CustomReimbursementRuleFactory(
+            offerer=offerer, timespan=(last_month, yesterday)
+        )
+
+        finder = reimbursement.CustomRuleFinder()
+        assert finder.get_rule(booking) == current_rule
+        assert finder.get_rule(last_month_booking) == previous_rule
+        assert finder.get_rule(ancient_booking) is None  # before any rule
+
+
 def assert_total_reimbursement(booking_reimbursement, rule, booking):
     assert booking_reimbursement.booking == booking
     assert isinstance(booking_reimbursement.rule, rule)
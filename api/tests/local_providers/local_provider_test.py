@@ -3,11 +3,14 @@ from unittest.mock import patch
 
 import pytest
 
+from pcapi import settings
+from pcapi.connectors.thumb_storage import ThumbPipeline
 from pcapi.core.categories import subcategories_v2 as subcategories
 import pcapi.core.offers.factories as offers_factories
 import pcapi.core.offers.models as offers_models
 import pcapi.core.providers.factories as providers_factories
 import pcapi.core.providers.models as providers_models
+from pcapi.core.testing import assert_num_queries
 from pcapi.local_providers.local_provider import _upload_thumb
 from pcapi.local_providers.providable_info import ProvidableInfo
 from pcapi.models.api_errors import ApiErrors
@@ -172,6 +175,55 @@ class UpdateObjectsTest:
         assert new_product.subcategoryId == subcategories.LIVRE_PAPIER.id
 
 
+@pytest.mark.usefixtures("db_session")
+class GetExistingObjectsTest:
+    def test_fetches_objects_with_one_query_by_model_type(self):
+        providers_factories.AllocineProviderFactory(localClass="TestLocalProvider")
+        offer = offers_factories.EventOfferFactory(idAtProvider="movie-1")
+        stock_1 = offers_factories.EventStockFactory(offer=offer, idAtProviders="movie-1#1")
+        stock_2 = offers_factories.EventStockFactory(offer=offer, idAtProviders="movie-1#2")
+        offers_factories.EventStockFactory(offer=offer, idAtProviders="movie-1#3")
+        local_provider = provider_test_utils.TestLocalProvider()
+        providable_infos = [
+            ProvidableInfo(type=offers_models.Offer, id_at_providers="movie-1"),
+            ProvidableInfo(type=offers_models.Stock, id_at_providers="movie-1#1"),
+            ProvidableInfo(type=offers_models.Stock, id_at_providers="movie-1#2"),
+            ProvidableInfo(type=offers_models.Stock, id_at_providers="movie-1#4"),
+        ]
+
+        with assert_num_queries(2):
+            existing_objects = local_provider.get_existing_objects(providable_infos)
+
+        assert existing_objects == {
+            "movie-1|Offer": offer,
+            "movie-1#1|Stock": stock_1,
+            "movie-1#2|Stock": stock_2,
+        }
+
+    @patch("tests.local_providers.provider_test_utils.TestLocalProvider.__next__")
+    def test_update_objects_does_not_query_objects_one_by_one(self, next_function):
+        provider = providers_factories.AllocineProviderFactory(localClass="TestLocalProvider")
+        products = [
+            offers_factories.ThingProductFactory(
+                dateModifiedAtLastProvider=datetime(2020, 1, 1),
+                lastProvider=provider,
+                idAtProviders=str(i),
+            )
+            for i in range(3)
+        ]
+        next_function.side_effect = [
+            [ProvidableInfo(id_at_providers=product.idAtProviders, date_modified_at_provider=datetime(2018, 1, 1))]
+            for product in products
+        ] + [[ProvidableInfo(id_at_providers=product.idAtProviders) for product in products]]
+        local_provider = provider_test_utils.TestLocalProvider()
+
+        with patch.object(local_provider, "get_existing_object") as get_existing_object:
+            local_provider.updateObjects()
+
+        get_existing_object.assert_not_called()
+        assert {product.name for product in offers_models.Product.query} == {"New Product"}
+
+
 @pytest.mark.usefixtures("db_session")
 class CreateObjectTest:
     def test_returns_object_with_expected_attributes(self):
@@ -277,6 +329,39 @@ class HandleThumbTest:
         assert local_provider.createdThumbs == 1
         assert product.thumbCount == 1
 
+    def test_handle_thumb_through_pipeline(self):
+        provider = providers_factories.AllocineProviderFactory(localClass="TestLocalProviderWithThumb")
+        providable_info = ProvidableInfo()
+        product = offers_factories.ThingProductFactory(
+            idAtProviders=providable_info.id_at_providers,
+            lastProvider=provider,
+        )
+        local_provider = provider_test_utils.TestLocalProviderWithThumb()
+
+        with ThumbPipeline("test") as local_provider.thumb_pipeline:
+            local_provider._handle_thumb(product)
+            assert product.thumbCount == 1
+            local_provider._handle_thumb_results(local_provider.thumb_pipeline.join())
+
+        assert local_provider.checkedThumbs == 1
+        assert local_provider.createdThumbs == 1
+        assert local_provider.erroredThumbs == 0
+        assert (settings.LOCAL_STORAGE_DIR / "thumbs" / product.get_thumb_storage_id()).exists()
+
+    @patch("pcapi.local_providers.local_provider.store_thumb", side_effect=Exception)
+    def test_handle_thumb_through_pipeline_counts_errors(self, mocked_store_thumb):
+        provider = providers_factories.AllocineProviderFactory(localClass="TestLocalProviderWithThumb")
+        product = offers_factories.ThingProductFactory(lastProvider=provider)
+        local_provider = provider_test_utils.TestLocalProviderWithThumb()
+
+        with ThumbPipeline("test") as local_provider.thumb_pipeline:
+            local_provider._handle_thumb(product)
+            local_provider._handle_thumb_results(local_provider.thumb_pipeline.join())
+
+        assert local_provider.createdThumbs == 0
+        assert local_provider.erroredThumbs == 1
+        assert product.thumbCount == 0
+
 
 @pytest.mark.usefixtures("db_session")
 class UploadThumbTest:
@@ -1,17 +1,23 @@
 import enum
+import time
 from unittest.mock import patch
 
 import flask
 import pytest
 
 from pcapi.core.testing import assert_num_queries
+from pcapi.core.testing import override_features
+from pcapi.core.testing import override_settings
 from pcapi.models import db
 from pcapi.models.feature import FEATURES_DISABLED_BY_DEFAULT
 from pcapi.models.feature import Feature
+from pcapi.models.feature import REDIS_FEATURES_VERSION_KEY
 from pcapi.models.feature import FeatureToggle
+from pcapi.models.feature import bump_features_version
 from pcapi.models.feature import check_feature_flags_completeness
 from pcapi.models.feature import clean_feature_flags
 from pcapi.models.feature import install_feature_flags
+from pcapi.models.feature import invalidate_features_cache
 from pcapi.repository import repository
 
 
@@ -76,6 +82,66 @@ class FeatureToggleTest:
             FeatureToggle.ALGOLIA_BOOKINGS_NUMBER_COMPUTATION.is_active()
 
 
+@pytest.mark.usefixtures("db_session")
+@override_settings(FEATURES_CACHE_TTL=60)
+class FeatureToggleProcessCacheTest:
+    @pytest.fixture(autouse=True)
+    def outside_request_context(self):
+        invalidate_features_cache()
+        context = flask._request_ctx_stack.pop()
+        yield
+        flask._request_ctx_stack.push(context)
+        invalidate_features_cache()
+
+    def test_cache_is_used_outside_request_context(self):
+        with assert_num_queries(1):
+            FeatureToggle.SYNCHRONIZE_ALLOCINE.is_active()
+            FeatureToggle.SYNCHRONIZE_ALLOCINE.is_active()
+            FeatureToggle.DISABLE_CGR_EXTERNAL_BOOKINGS.is_active()
+
+    def test_cache_is_renewed_when_version_is_unchanged(self):
+        FeatureToggle.SYNCHRONIZE_ALLOCINE.is_active()
+
+        with patch("time.monotonic", return_value=time.monotonic() + 120):
+            with assert_num_queries(0):
+                FeatureToggle.SYNCHRONIZE_ALLOCINE.is_active()
+
+    def test_cache_is_reloaded_when_version_is_bumped(self):
+        assert FeatureToggle.SYNCHRONIZE_ALLOCINE.is_active()
+
+        Feature.query.filter_by(name=FeatureToggle.SYNCHRONIZE_ALLOCINE.name).update({"isActive": False})
+        db.session.commit()
+        # Another process bumped the version: this one notices it after the TTL.
+        flask.current_app.redis_client.incr(REDIS_FEATURES_VERSION_KEY)
+        assert FeatureToggle.SYNCHRONIZE_ALLOCINE.is_active()
+
+        with patch("time.monotonic", return_value=time.monotonic() + 120):
+            with assert_num_queries(1):
+                assert not FeatureToggle.SYNCHRONIZE_ALLOCINE.is_active()
+
+    def test_cache_is_reloaded_after_max_age(self):
+        FeatureToggle.SYNCHRONIZE_ALLOCINE.is_active()
+
+        with patch("time.monotonic", return_value=time.monotonic() + 3600):
+            with assert_num_queries(1):
+                FeatureToggle.SYNCHRONIZE_ALLOCINE.is_active()
+
+    def test_bump_features_version_invalidates_local_cache(self):
+        FeatureToggle.SYNCHRONIZE_ALLOCINE.is_active()
+
+        bump_features_version()
+
+        with assert_num_queries(1):
+            FeatureToggle.SYNCHRONIZE_ALLOCINE.is_active()
+
+    def test_override_features_invalidates_cache(self):
+        assert FeatureToggle.SYNCHRONIZE_ALLOCINE.is_active()
+
+        with override_features(SYNCHRONIZE_ALLOCINE=False):
+            assert not FeatureToggle.SYNCHRONIZE_ALLOCINE.is_active()
+        assert FeatureToggle.SYNCHRONIZE_ALLOCINE.is_active()
+
+
 @pytest.mark.usefixtures("db_session")
 class FeatureTest:
     def test_features_installation(self):
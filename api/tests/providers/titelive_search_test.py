@@ -2,6 +2,7 @@ import copy
 import datetime
 import pathlib
 import re
+from unittest.mock import patch
 
 import pytest
 import time_machine
@@ -332,6 +333,72 @@ class TiteliveSearchTest:
             == 0
         )
 
+    @pytest.mark.features(WIP_PROVIDER_THUMBS_PIPELINE=True)
+    def test_sync_thumbnails_through_pipeline(self, requests_mock):
+        _configure_login_and_images(requests_mock)
+        requests_mock.get(f"{settings.TITELIVE_EPAGINE_API_URL}/search?page=1", json=fixtures.MUSIC_SEARCH_FIXTURE)
+        requests_mock.get(
+            f"{settings.TITELIVE_EPAGINE_API_URL}/search?page=2", json=fixtures.EMPTY_MUSIC_SEARCH_FIXTURE
+        )
+
+        TiteliveMusicSearch().synchronize_products(datetime.date(2022, 12, 1))
+
+        assert offers_models.Product.query.count() == 3
+        mediations = offers_models.ProductMediation.query.all()
+        assert len(mediations) == 6
+        assert all(mediation.url.endswith(mediation.uuid) for mediation in mediations)
+
+    @pytest.mark.features(WIP_PROVIDER_THUMBS_PIPELINE=True)
+    def test_sync_thumbnails_through_pipeline_keeps_unchanged_images(self, requests_mock):
+        _configure_login_and_images(requests_mock)
+        requests_mock.get(f"{settings.TITELIVE_EPAGINE_API_URL}/search?page=1", json=fixtures.MUSIC_SEARCH_FIXTURE)
+        requests_mock.get(
+            f"{settings.TITELIVE_EPAGINE_API_URL}/search?page=2", json=fixtures.EMPTY_MUSIC_SEARCH_FIXTURE
+        )
+        TiteliveMusicSearch().synchronize_products(datetime.date(2022, 12, 1))
+        old_mediations = {mediation.id: mediation.uuid for mediation in offers_models.ProductMediation.query}
+        assert len(old_mediations) == 6
+
+        with patch("pcapi.connectors.thumb_storage.store_thumb") as store_thumb:
+            TiteliveMusicSearch().synchronize_products(datetime.date(2022, 12, 1))
+
+        store_thumb.assert_not_called()
+        new_mediations = {mediation.id: mediation.uuid for mediation in offers_models.ProductMediation.query}
+        assert new_mediations == old_mediations
+
+    @pytest.mark.features(WIP_PROVIDER_THUMBS_PIPELINE=True)
+    def test_sync_thumbnails_through_pipeline_replaces_changed_images(self, requests_mock):
+        _configure_login_and_images(requests_mock)
+        requests_mock.get(f"{settings.TITELIVE_EPAGINE_API_URL}/search?page=1", json=fixtures.MUSIC_SEARCH_FIXTURE)
+        requests_mock.get(
+            f"{settings.TITELIVE_EPAGINE_API_URL}/search?page=2", json=fixtures.EMPTY_MUSIC_SEARCH_FIXTURE
+        )
+        TiteliveMusicSearch().synchronize_products(datetime.date(2022, 12, 1))
+        old_uuids = {mediation.uuid for mediation in offers_models.ProductMediation.query}
+
+        image_path = pathlib.Path(tests.__path__[0]) / "files" / "mouette_square.jpg"
+        requests_mock.get("https://images.epagine.fr/323/3700187679324.jpg", content=image_path.read_bytes())
+        TiteliveMusicSearch().synchronize_products(datetime.date(2022, 12, 1))
+
+        new_uuids = {mediation.uuid for mediation in offers_models.ProductMediation.query}
+        assert len(new_uuids) == 6
+        assert len(new_uuids - old_uuids) == 1
+
+    @pytest.mark.features(WIP_PROVIDER_THUMBS_PIPELINE=True)
+    def test_sync_thumbnails_through_pipeline_network_failure_is_silent(self, requests_mock):
+        _configure_login_and_images(requests_mock)
+        requests_mock.get(f"{settings.TITELIVE_EPAGINE_API_URL}/search?page=1", json=fixtures.MUSIC_SEARCH_FIXTURE)
+        requests_mock.get(
+            f"{settings.TITELIVE_EPAGINE_API_URL}/search?page=2", json=fixtures.EMPTY_MUSIC_SEARCH_FIXTURE
+        )
+        requests_mock.get("https://images.epagine.fr/323/3700187679324.jpg", exc=requests.exceptions.RequestException)
+
+        TiteliveMusicSearch().synchronize_products(datetime.date(2022, 12, 1))
+
+        no_thumbnail_product = offers_models.Product.query.filter_by(idAtProviders="3700187679324").one()
+        assert offers_models.ProductMediation.query.count() == 4
+        assert not offers_models.ProductMediation.query.filter_by(productId=no_thumbnail_product.id).all()
+
     def test_sync_skips_unallowed_format(self, requests_mock):
         _configure_login_and_images(requests_mock)
         not_fully_allowed_response = copy.deepcopy(fixtures.MUSIC_SEARCH_FIXTURE)
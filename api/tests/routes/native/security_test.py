@@ -1,6 +1,16 @@
+from unittest import mock
+
 import pytest
 
+from pcapi.core.offerers import api as offerers_api
+from pcapi.core.offerers import factories as offerers_factories
+from pcapi.core.testing import override_settings
+from pcapi.core.users import api as users_api
+from pcapi.core.users import constants as users_constants
+from pcapi.core.users import identity_cache
+from pcapi.core.users import repository as users_repository
 import pcapi.core.users.factories as users_factories
+from pcapi.models import db
 from pcapi.routes.native.security import authenticated_and_active_user_required
 from pcapi.routes.native.security import authenticated_maybe_inactive_user_required
 
@@ -22,6 +32,12 @@ def authenticated_maybe_inactive_user_required_route(*args, **kwargs) -> None:
     return "", 204
 
 
+@test_blueprint.route("/authenticated_user_first_name", methods=["GET"])
+@authenticated_and_active_user_required
+def authenticated_user_first_name_route(user) -> dict:
+    return {"id": user.id, "firstName": user.firstName}
+
+
 @pytest.mark.parametrize(
     "path",
     [
@@ -65,3 +81,63 @@ def test_inactive_user_when_may_be_inactive(client):
     client.with_token(user.email)
     response = client.get(path)
     assert response.status_code == 204
+
+
+@override_settings(NATIVE_AUTHENTICATED_USER_CACHE_TTL=60)
+class AuthenticatedUserCacheTest:
+    path = "/test-blueprint/authenticated_and_active_user_required"
+
+    def test_user_is_looked_up_once(self, client):
+        user = users_factories.UserFactory(email="Jeanne@example.com")
+        client.with_token("jeanne@example.com")
+
+        with mock.patch(
+            "pcapi.routes.native.security.find_user_by_email", wraps=users_repository.find_user_by_email
+        ) as find_user_by_email:
+            assert client.get(self.path).status_code == 204
+            assert client.get(self.path).status_code == 204
+
+        find_user_by_email.assert_called_once()
+        cached_user = identity_cache.get_cached_user("jeanne@example.com")
+        assert cached_user.id == user.id
+        assert cached_user.is_active
+
+    def test_lazy_user_loads_other_attributes(self, client):
+        user = users_factories.UserFactory(firstName="Jeanne")
+        client.with_token(user.email)
+        assert client.get(self.path).status_code == 204
+        user_id = user.id
+        db.session.expunge_all()
+
+        response = client.get("/test-blueprint/authenticated_user_first_name")
+
+        assert response.status_code == 200
+        assert response.json == {"id": user_id, "firstName": "Jeanne"}
+
+    def test_suspended_user_is_forbidden(self, client):
+        user = users_factories.UserFactory()
+        client.with_token(user.email)
+        assert client.get(self.path).status_code == 204
+
+        users_api.suspend_account(user, reason=users_constants.SuspensionReason.FRAUD_SUSPICION, actor=None)
+
+        assert identity_cache.get_cached_user(user.email) is None
+        assert client.get(self.path).status_code == 403
+
+    def test_former_email_is_forbidden_after_email_change(self, client):
+        user = users_factories.UserFactory(email="former@example.com")
+        client.with_token("former@example.com")
+        assert client.get(self.path).status_code == 204
+
+        users_api.change_email(user, "new@example.com")
+
+        assert client.get(self.path).status_code == 403
+
+    def test_cached_roles_are_invalidated_on_role_change(self, client):
+        user_offerer = offerers_factories.NotValidatedUserOffererFactory()
+        client.with_token(user_offerer.user.email)
+        assert client.get(self.path).status_code == 204
+
+        offerers_api.validate_offerer_attachment(user_offerer, users_factories.AdminFactory())
+
+        assert identity_cache.get_cached_user(user_offerer.user.email) is None
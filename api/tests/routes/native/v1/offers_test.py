@@ -3,6 +3,7 @@ from datetime import timedelta
 from unittest import mock
 from unittest.mock import patch
 
+from flask import current_app as app
 import pytest
 import time_machine
 
@@ -1200,6 +1201,39 @@ class OffersV2Test:
         assert stock.remainingQuantity == 0
         assert response.json["stocks"][0]["isSoldOut"]
 
+    @override_features(ENABLE_CDS_IMPLEMENTATION=True, WIP_ASYNC_CINEMA_STOCKS_REFRESH=True)
+    @patch("pcapi.core.offers.api.external_bookings_api.get_shows_stock")
+    def test_get_cds_sync_offer_requests_stock_refresh_once(self, mocked_get_shows_stock, client):
+        mocked_get_shows_stock.return_value = {5008: 0}
+        cds_provider = get_provider_by_local_class("CDSStocks")
+        venue_provider = providers_factories.VenueProviderFactory(provider=cds_provider)
+        cinema_provider_pivot = providers_factories.CinemaProviderPivotFactory(
+            venue=venue_provider.venue,
+            provider=venue_provider.provider,
+            idAtProvider=venue_provider.venueIdAtOfferProvider,
+        )
+        providers_factories.CDSCinemaDetailsFactory(cinemaProviderPivot=cinema_provider_pivot)
+        offer_id_at_provider = f"54%{venue_provider.venue.siret}"
+        offer = offers_factories.OfferFactory(
+            subcategoryId=subcategories.SEANCE_CINE.id,
+            idAtProvider=offer_id_at_provider,
+            lastProviderId=venue_provider.providerId,
+            venue=venue_provider.venue,
+        )
+        stock = offers_factories.EventStockFactory(offer=offer, idAtProviders=f"{offer_id_at_provider}#5008")
+
+        # Jobs are run synchronously in tests: the first view refreshes the stock.
+        response = client.get(f"/native/v2/offer/{offer.id}")
+        assert response.status_code == 200
+        assert stock.remainingQuantity == 0
+
+        response = client.get(f"/native/v2/offer/{offer.id}")
+        assert response.status_code == 200
+        assert response.json["stocks"][0]["isSoldOut"]
+
+        mocked_get_shows_stock.assert_called_once()
+        assert app.redis_client.zscore("pcapi:cinema_stocks:views", offer.id) == 2
+
     @time_machine.travel("2023-01-01")
     @override_features(ENABLE_BOOST_API_INTEGRATION=True)
     @patch("pcapi.connectors.boost.requests.get")
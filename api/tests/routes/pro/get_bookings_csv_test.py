@@ -1,5 +1,8 @@
+import codecs
+
 import pytest
 
+import pcapi.core.bookings.factories as bookings_factories
 import pcapi.core.offerers.factories as offerers_factories
 from pcapi.core.offers import factories as offers_factories
 from pcapi.core.testing import assert_num_queries
@@ -22,3 +25,22 @@ class Returns401Test:
             assert response.status_code == 403
 
         assert response.json == {"global": "You are not allowed to access this offer"}
+
+
+class Returns200Test:
+    @pytest.mark.features(WIP_STREAM_BOOKING_EXPORTS=True)
+    def test_stream_csv_export(self, client):
+        user_offerer = offerers_factories.UserOffererFactory()
+        stock = offers_factories.EventStockFactory(offer__venue__managingOfferer=user_offerer.offerer)
+        booking = bookings_factories.UsedBookingFactory(stock=stock)
+        event_date = stock.beginningDatetime.date().isoformat()
+
+        client = client.with_session_auth(user_offerer.user.email)
+        response = client.get(f"/bookings/offer/{stock.offerId}/csv?event_date={event_date}&status=all")
+
+        assert response.status_code == 200
+        assert response.headers["Content-Type"] == "text/csv; charset=utf-8;"
+        assert response.data.startswith(codecs.BOM_UTF8)
+        header, row = response.data.decode("utf-8-sig").splitlines()
+        assert header.startswith('"')
+        assert booking.user.email in row
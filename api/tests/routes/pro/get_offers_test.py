@@ -19,6 +19,7 @@ pytestmark = pytest.mark.usefixtures("db_session")
 class Returns200Test:
     number_of_queries = testing.AUTHENTICATION_QUERIES
     number_of_queries += 1  # search offers
+    number_of_queries += 1  # check WIP_OFFERS_LIST_STOCKS_SUMMARY
 
     def should_filter_by_venue_when_user_is_not_admin_and_request_specific_venue_with_rights_on_it(self, client):
         pro = users_factories.ProFactory()
@@ -47,8 +48,8 @@ class Returns200Test:
 
         venue_id = venue.id
         authenticated_client = client.with_session_auth(email=pro.email)
-        # -1 due to mocking
-        with testing.assert_num_queries(self.number_of_queries - 1):
+        # -2 due to mocking (search offers and check feature flag)
+        with testing.assert_num_queries(self.number_of_queries - 2):
             response = authenticated_client.get(f"/offers?venueId={venue_id}")
             assert response.status_code == 200
         mocked_get_capped_offers.assert_called_once_with(
@@ -64,6 +65,7 @@ class Returns200Test:
             status=None,
             creation_mode=None,
             offerer_address_id=None,
+            after_id=None,
         )
 
     @patch("pcapi.routes.pro.offers.offers_repository.get_capped_offers_for_filters")
@@ -73,8 +75,8 @@ class Returns200Test:
         offerers_factories.UserOffererFactory(user=pro, offerer=offerer)
 
         authenticated_client = client.with_session_auth(email=pro.email)
-        # -1 due to mocking
-        with testing.assert_num_queries(self.number_of_queries - 1):
+        # -2 due to mocking (search offers and check feature flag)
+        with testing.assert_num_queries(self.number_of_queries - 2):
             response = authenticated_client.get("/offers?status=ACTIVE")
             assert response.status_code == 200
 
@@ -91,6 +93,7 @@ class Returns200Test:
             status=OfferStatus.ACTIVE,
             creation_mode=None,
             offerer_address_id=None,
+            after_id=None,
         )
 
     @patch("pcapi.routes.pro.offers.offers_repository.get_capped_offers_for_filters")
@@ -102,8 +105,8 @@ class Returns200Test:
 
         offerer_id = offerer.id
         authenticated_client = client.with_session_auth(email=pro.email)
-        # -1 due to mocking
-        with testing.assert_num_queries(self.number_of_queries - 1):
+        # -2 due to mocking (search offers and check feature flag)
+        with testing.assert_num_queries(self.number_of_queries - 2):
             response = authenticated_client.get(f"/offers?offererId={offerer_id}")
             assert response.status_code == 200
 
@@ -120,6 +123,7 @@ class Returns200Test:
             status=None,
             creation_mode=None,
             offerer_address_id=None,
+            after_id=None,
         )
 
     @patch("pcapi.routes.pro.offers.offers_repository.get_capped_offers_for_filters")
@@ -129,8 +133,8 @@ class Returns200Test:
         offerers_factories.UserOffererFactory(user=pro, offerer=offerer)
 
         authenticated_client = client.with_session_auth(email=pro.email)
-        # -1 due to mocking
-        with testing.assert_num_queries(self.number_of_queries - 1):
+        # -2 due to mocking (search offers and check feature flag)
+        with testing.assert_num_queries(self.number_of_queries - 2):
             response = authenticated_client.get("/offers?creationMode=imported")
             assert response.status_code == 200
 
@@ -147,6 +151,7 @@ class Returns200Test:
             status=None,
             creation_mode="imported",
             offerer_address_id=None,
+            after_id=None,
         )
 
     @patch("pcapi.routes.pro.offers.offers_repository.get_capped_offers_for_filters")
@@ -156,8 +161,8 @@ class Returns200Test:
         offerers_factories.UserOffererFactory(user=pro, offerer=offerer)
 
         authenticated_client = client.with_session_auth(email=pro.email)
-        # -1 due to mocking
-        with testing.assert_num_queries(self.number_of_queries - 1):
+        # -2 due to mocking (search offers and check feature flag)
+        with testing.assert_num_queries(self.number_of_queries - 2):
             response = authenticated_client.get("/offers?periodBeginningDate=2020-10-11")
             assert response.status_code == 200
 
@@ -174,6 +179,7 @@ class Returns200Test:
             status=None,
             creation_mode=None,
             offerer_address_id=None,
+            after_id=None,
         )
 
     @override_features(WIP_USE_OFFERER_ADDRESS_AS_DATA_SOURCE=True)
@@ -233,8 +239,8 @@ class Returns200Test:
         offerers_factories.UserOffererFactory(user=pro, offerer=offerer)
 
         authenticated_client = client.with_session_auth(email=pro.email)
-        # -1 due to mocking
-        with testing.assert_num_queries(self.number_of_queries - 1):
+        # -2 due to mocking (search offers and check feature flag)
+        with testing.assert_num_queries(self.number_of_queries - 2):
             response = authenticated_client.get("/offers?periodEndingDate=2020-10-11")
             assert response.status_code == 200
 
@@ -251,6 +257,7 @@ class Returns200Test:
             status=None,
             creation_mode=None,
             offerer_address_id=None,
+            after_id=None,
         )
 
     @patch("pcapi.routes.pro.offers.offers_repository.get_capped_offers_for_filters")
@@ -260,8 +267,8 @@ class Returns200Test:
         offerers_factories.UserOffererFactory(user=pro, offerer=offerer)
 
         authenticated_client = client.with_session_auth(email=pro.email)
-        # -1 due to mocking
-        with testing.assert_num_queries(self.number_of_queries - 1):
+        # -2 due to mocking (search offers and check feature flag)
+        with testing.assert_num_queries(self.number_of_queries - 2):
             response = authenticated_client.get("/offers?categoryId=LIVRE")
             assert response.status_code == 200
 
@@ -278,6 +285,7 @@ class Returns200Test:
             status=None,
             creation_mode=None,
             offerer_address_id=None,
+            after_id=None,
         )
 
     def should_return_event_correctly_serialized(self, client):
@@ -320,6 +328,7 @@ class Returns200Test:
                         "bookingQuantity": 0,
                     }
                 ],
+                "stocksSummary": None,
                 "thumbUrl": None,
                 "productIsbn": None,
                 "subcategoryId": "SEANCE_CINE",
@@ -393,6 +402,7 @@ class Returns200Test:
                         "bookingQuantity": 0,
                     }
                 ],
+                "stocksSummary": None,
                 "thumbUrl": None,
                 "productIsbn": None,
                 "subcategoryId": "SEANCE_CINE",
@@ -440,6 +450,7 @@ class Returns200Test:
                 "isEducational": False,
                 "name": event_offer.name,
                 "stocks": [],
+                "stocksSummary": None,
                 "thumbUrl": None,
                 "productIsbn": None,
                 "subcategoryId": "SEANCE_CINE",
@@ -526,6 +537,7 @@ class Returns200Test:
                 "status": "SOLD_OUT",
                 "stocks": [],
                 "subcategoryId": "CONCERT",
+                "stocksSummary": None,
                 "thumbUrl": None,
                 "venue": {
                     "id": venue.id,
@@ -565,6 +577,7 @@ class Returns200Test:
                 "status": "SOLD_OUT",
                 "stocks": [],
                 "subcategoryId": "CONCERT",
+                "stocksSummary": None,
                 "thumbUrl": None,
                 "venue": {
                     "id": venue.id,
@@ -625,6 +638,7 @@ class Returns200Test:
                 "isEducational": False,
                 "name": "The Weeknd",
                 "stocks": [],
+                "stocksSummary": None,
                 "thumbUrl": None,
                 "productIsbn": None,
                 "subcategoryId": "CONCERT",
@@ -691,6 +705,7 @@ class Returns200Test:
                 "isEducational": False,
                 "name": "The Weeknd",
                 "stocks": [],
+                "stocksSummary": None,
                 "thumbUrl": None,
                 "productIsbn": None,
                 "subcategoryId": "CONCERT",
@@ -735,10 +750,42 @@ class Returns200Test:
 
         assert response.json == []
 
+    @override_features(WIP_OFFERS_LIST_STOCKS_SUMMARY=True)
+    def should_return_stocks_summary_when_feature_is_active(self, client):
+        pro = users_factories.ProFactory()
+        offerer = offerers_factories.OffererFactory()
+        offerers_factories.UserOffererFactory(user=pro, offerer=offerer)
+        venue = offerers_factories.VenueFactory(managingOfferer=offerer)
+        event_offer = offers_factories.EventOfferFactory(venue=venue)
+        offers_factories.EventStockFactory(
+            offer=event_offer, beginningDatetime=datetime.datetime(2022, 9, 21, 13, 19), quantity=10
+        )
+        offers_factories.EventStockFactory(
+            offer=event_offer, beginningDatetime=datetime.datetime(2022, 9, 22, 13, 19), quantity=None
+        )
+
+        authenticated_client = client.with_session_auth(email=pro.email)
+        with testing.assert_num_queries(self.number_of_queries):
+            response = authenticated_client.get("/offers")
+            assert response.status_code == 200
+
+        assert len(response.json) == 1
+        assert response.json[0]["stocks"] == []
+        assert response.json[0]["stocksSummary"] == {
+            "count": 2,
+            "firstBeginningDatetime": "2022-09-21T13:19:00Z",
+            "lastBeginningDatetime": "2022-09-22T13:19:00Z",
+            "remainingQuantity": "unlimited",
+            "isSoldOut": True,
+            "hasBookingLimitDatetimesPassed": True,
+        }
+        assert response.json[0]["status"] == "EXPIRED"
+
 
 class Returns404Test:
     number_of_queries = testing.AUTHENTICATION_QUERIES
     number_of_queries += 1  # search offers
+    number_of_queries += 1  # check WIP_OFFERS_LIST_STOCKS_SUMMARY
 
     def should_return_no_offers_when_user_offerer_is_not_validated(self, client, db_session):
         # TODO : maybe move this test to another class due to status code
@@ -817,3 +817,133 @@ class PostProductByEanTest(PublicAPIVenueEndpointHelper):
         updated_stock = offers_models.Stock.query.get(stock.id)
         assert updated_stock.price == 0
         assert updated_stock.quantity == 3
+
+
+@pytest.mark.usefixtures("db_session")
+@pytest.mark.features(WIP_BULK_UPSERT_EAN_OFFERS=True)
+class BulkPostProductByEanTest:
+    @mock.patch("pcapi.core.search.async_index_offer_ids")
+    def test_create_update_and_reject_offers(self, async_index_offer_ids, client, caplog):
+        venue, api_key = utils.create_offerer_provider_linked_to_venue()
+        product_provider = providers_factories.ProviderFactory()
+        products = [
+            offers_factories.ProductFactory(
+                subcategoryId=subcategories.SUPPORT_PHYSIQUE_MUSIQUE_CD.id,
+                extraData={"ean": ean},
+                lastProviderId=product_provider.id,
+                idAtProviders=ean,
+            )
+            for ean in ("1234567890123", "1234567890124", "1234567890125")
+        ]
+        stock_to_update = offers_factories.ThingStockFactory(
+            offer__product=products[0],
+            offer__venue=venue,
+            offer__extraData=products[0].extraData,
+            quantity=10,
+            price=100,
+        )
+        bookings_factories.BookingFactory(stock=stock_to_update, quantity=2)
+        rejected_stock = offers_factories.ThingStockFactory(
+            offer__product=products[1],
+            offer__venue=venue,
+            offer__extraData=products[1].extraData,
+            offer__validation=offers_models.OfferValidationStatus.REJECTED,
+            quantity=10,
+            price=100,
+        )
+        unknown_ean = "1234567897123"
+
+        with caplog.at_level(logging.INFO):
+            response = client.with_explicit_token(offerers_factories.DEFAULT_CLEAR_API_KEY).post(
+                "/public/offers/v1/products/ean",
+                json={
+                    "location": {"type": "physical", "venueId": venue.id},
+                    "products": [
+                        {"ean": ean, "stock": {"price": 1234, "quantity": 3}}
+                        for ean in ("1234567890123", "1234567890124", "1234567890125", unknown_ean)
+                    ],
+                },
+            )
+
+        assert response.status_code == 204
+        updated_stock = offers_models.Stock.query.get(stock_to_update.id)
+        assert updated_stock.price == decimal.Decimal("12.34")
+        assert updated_stock.quantity == 5  # 3 remaining + 2 booked
+        assert updated_stock.offer.lastProviderId == api_key.provider.id
+        not_updated_stock = offers_models.Stock.query.get(rejected_stock.id)
+        assert not_updated_stock.price == decimal.Decimal("100.00")
+        assert not_updated_stock.quantity == 10
+        assert not_updated_stock.offer.lastProviderId != api_key.provider.id
+        created_offer = offers_models.Offer.query.filter_by(productId=products[2].id).one()
+        assert created_offer.idAtProvider == "1234567890125"
+        assert created_offer.lastValidationPrice == decimal.Decimal("12.34")
+        assert created_offer.validation == offers_models.OfferValidationStatus.APPROVED
+        [created_stock] = created_offer.stocks
+        assert created_stock.price == decimal.Decimal("12.34")
+        assert created_stock.quantity == 3
+
+        async_index_offer_ids.assert_called_once()
+        assert set(async_index_offer_ids.call_args.args[0]) == {
+            stock_to_update.offerId,
+            created_offer.id,
+        }
+        log = next(record for record in caplog.records if record.message == "Created or updated offers by ean")
+        assert log.extra["errors"] == {
+            "1234567890124": "RejectedOrPendingOfferNotEditable",
+            unknown_ean: "ProductNotFound",
+        }
+        assert log.extra["created_offers"] == 1
+        assert log.extra["created_stocks"] == 1
+        assert log.extra["updated_offers"] == 1
+        assert log.extra["rejected_eans"] == 2
+
+    def test_do_not_update_offer_imported_by_another_provider(self, client, caplog):
+        venue, _ = utils.create_offerer_provider_linked_to_venue()
+        product = offers_factories.ProductFactory(
+            subcategoryId=subcategories.SUPPORT_PHYSIQUE_MUSIQUE_CD.id,
+            extraData={"ean": "1234567890123"},
+            lastProviderId=providers_factories.ProviderFactory().id,
+            idAtProviders="1234567890123",
+        )
+        other_provider = providers_factories.PublicApiProviderFactory()
+        stock = offers_factories.ThingStockFactory(
+            offer__product=product,
+            offer__venue=venue,
+            offer__extraData=product.extraData,
+            offer__lastProvider=other_provider,
+            quantity=10,
+            price=100,
+        )
+
+        with caplog.at_level(logging.INFO):
+            response = client.with_explicit_token(offerers_factories.DEFAULT_CLEAR_API_KEY).post(
+                "/public/offers/v1/products/ean",
+                json={
+                    "location": {"type": "physical", "venueId": venue.id},
+                    "products": [{"ean": "1234567890123", "stock": {"price": 1234, "quantity": 3}}],
+                },
+            )
+
+        assert response.status_code == 204
+        not_updated_stock = offers_models.Stock.query.get(stock.id)
+        assert not_updated_stock.price == decimal.Decimal("100.00")
+        assert not_updated_stock.offer.lastProviderId == other_provider.id
+        log = next(record for record in caplog.records if record.message == "Created or updated offers by ean")
+        assert log.extra["errors"] == {"1234567890123": "ApiErrors"}
+
+    def test_create_offer_with_free_stock(self, client):
+        venue, _ = utils.create_offerer_provider_linked_to_venue()
+        ean, product = PostProductByEanTest._get_base_product()
+
+        response = client.with_explicit_token(offerers_factories.DEFAULT_CLEAR_API_KEY).post(
+            "/public/offers/v1/products/ean",
+            json={
+                "location": {"type": "physical", "venueId": venue.id},
+                "products": [{"ean": ean, "stock": {"price": 0, "quantity": 3}}],
+            },
+        )
+
+        assert response.status_code == 204
+        created_offer = offers_models.Offer.query.filter_by(productId=product.id).one()
+        [created_stock] = created_offer.stocks
+        assert created_stock.price == 0
@@ -0,0 +1,124 @@
+import threading
+from unittest import mock
+
+from google.api_core.exceptions import AlreadyExists
+from google.cloud import tasks_v2
+import pytest
+
+from pcapi.core.testing import override_settings
+from pcapi.tasks import cloud_task
+from pcapi.tasks.local_client import LocalCloudTasksClient
+
+
+@pytest.fixture(name="local_client")
+def local_client_fixture():
+    client = LocalCloudTasksClient(latency=0, dispatch=False)
+    with mock.patch("pcapi.tasks.cloud_task.get_client", return_value=client):
+        yield client
+    cloud_task.shutdown_enqueuer()
+
+
+def _created_payloads(client):
+    return sorted(task.http_request.body for tasks in client.tasks.values() for task in tasks)
+
+
+@override_settings(CLOUD_TASK_CALL_INTERNAL_API_ENDPOINT=False)
+class EnqueueInternalTaskTest:
+    def test_synchronous(self, local_client):
+        task_id = cloud_task.enqueue_internal_task("test-queue", "/test", {"number": 1})
+
+        assert task_id
+        assert _created_payloads(local_client) == [b'{"number": 1}']
+
+    @override_settings(CLOUD_TASK_ENQUEUE_WORKERS=4)
+    def test_buffered(self, local_client):
+        for number in range(10):
+            assert cloud_task.enqueue_internal_task("test-queue", "/test", {"number": number}) is None
+
+        assert cloud_task.flush_tasks()
+        assert _created_payloads(local_client) == sorted(f'{{"number": {number}}}'.encode() for number in range(10))
+
+    @override_settings(CLOUD_TASK_ENQUEUE_WORKERS=2)
+    def test_buffered_deduplication(self, local_client):
+        created = threading.Event()
+        create_task = local_client.create_task
+
+        def slow_create_task(*args, **kwargs):
+            created.wait(timeout=5)
+            return create_task(*args, **kwargs)
+
+        with mock.patch.object(local_client, "create_task", slow_create_task):
+            cloud_task.enqueue_internal_task("test-queue", "/test", {"number": 1}, deduplicate=True)
+            cloud_task.enqueue_internal_task("test-queue", "/test", {"number": 1}, deduplicate=True)
+            created.set()
+            assert cloud_task.flush_tasks()
+
+        assert _created_payloads(local_client) == [b'{"number": 1}']
+
+    @override_settings(CLOUD_TASK_ENQUEUE_WORKERS=1, CLOUD_TASK_ENQUEUE_BUFFER_SIZE=1)
+    def test_buffer_is_full(self, local_client):
+        created = threading.Event()
+        create_task = local_client.create_task
+        callers = []
+
+        def slow_create_task(*args, **kwargs):
+            callers.append(threading.current_thread())
+            if threading.current_thread() is not threading.main_thread():
+                created.wait(timeout=5)
+            return create_task(*args, **kwargs)
+
+        with mock.patch.object(local_client, "create_task", slow_create_task):
+            cloud_task.enqueue_internal_task("test-queue", "/test", {"number": 1})
+            # The first task is still being created: the second one is
+            # created synchronously.
+            cloud_task.enqueue_internal_task("test-queue", "/test", {"number": 2})
+            assert threading.main_thread() in callers
+            created.set()
+            assert cloud_task.flush_tasks()
+
+        assert _created_payloads(local_client) == [b'{"number": 1}', b'{"number": 2}']
+
+
+class LocalCloudTasksClientTest:
+    def test_create_and_list_tasks(self):
+        client = LocalCloudTasksClient(latency=0, dispatch=False)
+        parent = client.queue_path("project", "region", "queue")
+        http_request = tasks_v2.HttpRequest(url="https://example.com/cloud-tasks/test", body=b"{}")
+        request = tasks_v2.CreateTaskRequest(parent=parent, task=tasks_v2.Task(http_request=http_request))
+
+        task = client.create_task(request=request)
+
+        assert task.name.startswith("projects/project/locations/region/queues/queue/tasks/")
+        assert client.list_tasks(request=tasks_v2.ListTasksRequest(parent=parent)).tasks == [task]
+
+    def test_task_name_is_unique(self):
+        client = LocalCloudTasksClient(latency=0, dispatch=False)
+        parent = client.queue_path("project", "region", "queue")
+        task = tasks_v2.Task(name=client.task_path("project", "region", "queue", "abc"))
+        client.create_task(request=tasks_v2.CreateTaskRequest(parent=parent, task=task))
+
+        with pytest.raises(AlreadyExists):
+            client.create_task(request=tasks_v2.CreateTaskRequest(parent=parent, task=task))
+
+    @mock.patch("pcapi.tasks.local_client.requests.post")
+    def test_dispatch(self, requests_post):
+        client = LocalCloudTasksClient(latency=0, dispatch=True)
+        parent = client.queue_path("project", "region", "queue")
+        task = tasks_v2.Task(
+            name=client.task_path("project", "region", "queue", "abc"),
+            http_request=tasks_v2.HttpRequest(
+                url="https://example.com/cloud-tasks/test", body=b"{}", headers={"AUTHORIZATION": "Bearer token"}
+            ),
+        )
+
+        client.create_task(request=tasks_v2.CreateTaskRequest(parent=parent, task=task))
+
+        requests_post.assert_called_once_with(
+            "https://example.com/cloud-tasks/test",
+            headers={
+                "AUTHORIZATION": "Bearer token",
+                "HTTP_X_CLOUDTASKS_QUEUENAME": "queue",
+                "HTTP_X_CLOUDTASKS_TASKNAME": "abc",
+            },
+            data=b"{}",
+        )
@@ -1,6 +1,7 @@
 import pytest
 
 from pcapi.utils.custom_logic import OPERATIONS
+from pcapi.utils.custom_logic import compile_operation
 
 
 def test_soft_equal_return_true():
@@ -234,3 +235,22 @@ def test_not_in_with_none_as_argument_return_false():
     b = ["le", "dérèglement", "climatique", None]
     result = OPERATIONS["not in"](a, b)
     assert not result
+
+
+@pytest.mark.parametrize("operator", list(OPERATIONS))
+@pytest.mark.parametrize(
+    "a",
+    [None, "", "Le dérèglement climatique", "lot", 2, 2.5, ["climatique", "bon"], []],
+)
+@pytest.mark.parametrize(
+    "b",
+    [["le", "dérèglement", "climatique", None], ["bon", "lot"], [], [2, 3], 2],
+)
+def test_compiled_operation_is_equivalent_to_operation(operator, a, b):
+    try:
+        expected = OPERATIONS[operator](a, b)
+    except (AttributeError, TypeError, ValueError) as exc:
+        with pytest.raises(type(exc)):
+            compile_operation(operator, b)(a)
+    else:
+        assert compile_operation(operator, b)(a) == expected
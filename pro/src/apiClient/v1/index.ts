@@ -163,6 +163,7 @@ export type { ListOffersOfferResponseModel } from './models/ListOffersOfferRespo
 export type { ListOffersQueryModel } from './models/ListOffersQueryModel';
 export type { ListOffersResponseModel } from './models/ListOffersResponseModel';
 export type { ListOffersStockResponseModel } from './models/ListOffersStockResponseModel';
+export type { ListOffersStocksSummaryResponseModel } from './models/ListOffersStocksSummaryResponseModel';
 export type { ListOffersVenueResponseModel } from './models/ListOffersVenueResponseModel';
 export type { ListProviderResponse } from './models/ListProviderResponse';
 export type { ListVenueProviderQuery } from './models/ListVenueProviderQuery';
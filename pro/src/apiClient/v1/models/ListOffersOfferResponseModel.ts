@@ -4,6 +4,7 @@
 /* eslint-disable */
 import type { AddressResponseIsLinkedToVenueModel } from './AddressResponseIsLinkedToVenueModel';
 import type { ListOffersStockResponseModel } from './ListOffersStockResponseModel';
+import type { ListOffersStocksSummaryResponseModel } from './ListOffersStocksSummaryResponseModel';
 import type { ListOffersVenueResponseModel } from './ListOffersVenueResponseModel';
 import type { OfferStatus } from './OfferStatus';
 import type { SubcategoryIdEnum } from './SubcategoryIdEnum';
@@ -21,6 +22,7 @@ export type ListOffersOfferResponseModel = {
   productIsbn?: string | null;
   status: OfferStatus;
   stocks: Array<ListOffersStockResponseModel>;
+  stocksSummary?: ListOffersStocksSummaryResponseModel | null;
   subcategoryId: SubcategoryIdEnum;
   thumbUrl?: string | null;
   venue: ListOffersVenueResponseModel;
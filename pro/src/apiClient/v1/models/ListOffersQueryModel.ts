@@ -6,6 +6,7 @@ import type { CollectiveOfferDisplayedStatus } from './CollectiveOfferDisplayedS
 import type { CollectiveOfferType } from './CollectiveOfferType';
 import type { OfferStatus } from './OfferStatus';
 export type ListOffersQueryModel = {
+  afterId?: number | null;
   categoryId?: string | null;
   collectiveOfferType?: CollectiveOfferType | null;
   creationMode?: string | null;
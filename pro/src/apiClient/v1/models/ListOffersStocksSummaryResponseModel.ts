@@ -0,0 +1,13 @@
+/* generated using openapi-typescript-codegen -- do not edit */
+/* istanbul ignore file */
+/* tslint:disable */
+/* eslint-disable */
+export type ListOffersStocksSummaryResponseModel = {
+  count: number;
+  firstBeginningDatetime?: string | null;
+  hasBookingLimitDatetimesPassed: boolean;
+  isSoldOut: boolean;
+  lastBeginningDatetime?: string | null;
+  remainingQuantity: (number | string);
+};
+
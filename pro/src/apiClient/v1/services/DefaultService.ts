@@ -1603,6 +1603,7 @@ export class DefaultService {
    * @param periodEndingDate
    * @param collectiveOfferType
    * @param offererAddressId
+   * @param afterId
    * @returns ListOffersResponseModel OK
    * @throws ApiError
    */
@@ -1617,6 +1618,7 @@ export class DefaultService {
     periodEndingDate?: string | null,
     collectiveOfferType?: CollectiveOfferType | null,
     offererAddressId?: number | null,
+    afterId?: number | null,
   ): CancelablePromise<ListOffersResponseModel> {
     return this.httpRequest.request({
       method: 'GET',
@@ -1632,6 +1634,7 @@ export class DefaultService {
         'periodEndingDate': periodEndingDate,
         'collectiveOfferType': collectiveOfferType,
         'offererAddressId': offererAddressId,
+        'afterId': afterId,
       },
       errors: {
         403: `Forbidden`,